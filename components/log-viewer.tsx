@@ -110,7 +110,13 @@ export function LogViewer({ runId, isFullPage = false, onExpand, showHeader = tr
                 if (streamAbortRef.current?.signal.aborted) break
 
                 if (event.type === 'initial') {
+                    // The stream starts from a bounded tail; earlier bytes load on scroll-up.
                     setLogs(event.content || '')
+                    currentOffsetRef.current = event.offset ?? 0
+                    setLogInfo({
+                        totalSize: event.total_size ?? 0,
+                        hasMoreBefore: (event.offset ?? 0) > 0
+                    })
                 } else if (event.type === 'delta') {
                     setLogs(prev => prev + (event.content || ''))
                     // Auto-scroll to bottom on new content
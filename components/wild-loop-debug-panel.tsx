@@ -1017,7 +1017,7 @@ export function WildLoopDebugPanel({
                                     <div className="border-t border-border/30 pt-2">
                                         <div className="text-[10px] text-muted-foreground mb-1 font-medium">System Health</div>
                                         <div className="flex flex-wrap gap-2 text-[10px]">
-                                            <span className="text-blue-400">▶ {v2Status.system_health.running}/{v2Status.system_health.max_concurrent}</span>
+                                            <span className="text-blue-400">▶ {v2Status.system_health.running}/{v2Status.system_health.max_concurrent || '∞'}</span>
                                             <span className="text-muted-foreground">⏳ {v2Status.system_health.queued}</span>
                                             <span className="text-green-400">✓ {v2Status.system_health.completed}</span>
                                             <span className="text-red-400">✗ {v2Status.system_health.failed}</span>
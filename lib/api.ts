@@ -468,6 +468,11 @@ export interface Run {
     chat_session_id?: string | null
     sweep_params?: Record<string, unknown> | null
     gpuwrap_config?: GpuwrapConfig | null
+    disk_usage?: RunDiskUsage
+    storage_gc?: { at: number; policies: string[]; freed_bytes: number }
+    depends_on?: string[] | null
+    dependency_condition?: RunDependencyCondition | null
+    queue_blocked_reason?: string | null
     // Optional fields for metrics/charts (from mock or W&B)
     progress?: number
     config?: Record<string, unknown>
@@ -478,6 +483,15 @@ export interface Run {
     color?: string
 }
 
+export type RunDependencyCondition = 'on_success' | 'on_any'
+
+export interface RunDiskUsage {
+    bytes: number
+    files: number
+    breakdown: { logs: number; wandb: number; artifacts: number; metrics: number; other: number }
+    measured_at: number
+}
+
 export interface GpuwrapConfig {
     enabled?: boolean
     retries?: number | null  // null = unlimited, 0 = no retry
@@ -508,6 +522,8 @@ export interface CreateRunRequest {
     chat_session_id?: string
     auto_start?: boolean
     gpuwrap_config?: GpuwrapConfig
+    depends_on?: string[]
+    dependency_condition?: RunDependencyCondition
 }
 
 export interface RunRerunRequest {
@@ -517,10 +533,41 @@ export interface RunRerunRequest {
     gpuwrap_config?: GpuwrapConfig
 }
 
+export type RunBulkAction = 'create' | 'start' | 'stop' | 'archive' | 'unarchive' | 'rerun'
+
+export interface RunBulkRequest {
+    action: RunBulkAction
+    run_ids?: string[]
+    filter?: { sweep_id?: string; statuses?: RunStatus[]; include_archived?: boolean }
+    runs?: CreateRunRequest[]
+    rerun?: RunRerunRequest
+}
+
+export interface RunBulkResult {
+    id: string | null
+    index: number
+    ok: boolean
+    new_id?: string
+    status?: RunStatus
+    status_code?: number
+    error?: string
+    blocked_reason?: string
+}
+
+export interface RunBulkResponse {
+    action: RunBulkAction
+    succeeded: number
+    failed: number
+    launched: string[]
+    results: RunBulkResult[]
+}
+
 export interface RunUpdateRequest {
     name?: string
     command?: string
     workdir?: string
+    depends_on?: string[]
+    dependency_condition?: RunDependencyCondition
 }
 
 export interface WildModeState {
@@ -541,7 +588,15 @@ export interface LogResponse {
 export interface Artifact {
     name: string
     path: string
-    type: 'checkpoint' | 'metrics' | 'wandb' | 'other'
+    type: 'checkpoint' | 'image' | 'table' | 'text' | 'metrics' | 'wandb' | 'other'
+    /** Download endpoint (supports Range) for files under the run directory */
+    url?: string
+    size?: number
+    mtime_ns?: number
+    /** Filled in once requested with `?hashes=true` */
+    sha256?: string | null
+    /** Set with `?hashes=true` when the file did not fit in this request's hashing budget */
+    hash_pending?: boolean
 }
 
 export type RepoDiffFileStatus = 'modified' | 'added' | 'deleted'
@@ -711,6 +766,21 @@ export async function unarchiveRun(runId: string): Promise<void> {
     }
 }
 
+/**
+ * Apply one action to many runs in a single request (per-run results)
+ */
+export async function bulkRunAction(request: RunBulkRequest): Promise<RunBulkResponse> {
+    const response = await trackedFetch(`${API_URL()}/runs/bulk`, {
+        method: 'POST',
+        headers: getHeaders(),
+        body: JSON.stringify(request)
+    })
+    if (!response.ok) {
+        throw new Error(`Failed to apply bulk ${request.action}: ${response.statusText}`)
+    }
+    return response.json()
+}
+
 /**
  * List all alerts
  */
@@ -864,7 +934,7 @@ export interface WildV2Status {
         completed: number
         failed: number
         total: number
-        max_concurrent: number
+        max_concurrent: number  // 0 = no limit
     }
 }
 
@@ -1273,6 +1343,8 @@ export async function getRunLogs(
 export async function* streamRunLogs(runId: string): AsyncGenerator<{
     type: 'initial' | 'delta' | 'done' | 'error'
     content?: string
+    offset?: number
+    total_size?: number
     status?: string
     error?: string
 }> {
@@ -1343,6 +1415,8 @@ export async function getSidecarLogs(
 export async function* streamSidecarLogs(runId: string): AsyncGenerator<{
     type: 'initial' | 'delta' | 'done' | 'error'
     content?: string
+    offset?: number
+    total_size?: number
     status?: string
     error?: string
 }> {
@@ -1478,6 +1552,7 @@ export interface Sweep {
     is_wild?: boolean
     chat_session_id?: string | null
     ui_config?: Record<string, unknown> | null
+    disk_usage?: { bytes: number; runs: number }
     creation_context?: {
         name?: string | null
         goal?: string | null
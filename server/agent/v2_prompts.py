@@ -283,10 +283,13 @@ def _api_catalog(ctx: PromptContext) -> str:
 - `POST {s}/runs/{{id}}/stop` — Stop a running job
 - `GET  {s}/runs` — List all runs
 - `GET  {s}/runs/{{id}}` — Get run details & status
+- `GET  {s}/logs/search?q=<text>&sweep_id=<id>` — Grep many runs' logs at once (`regex=true`, `run_ids=a,b`; NDJSON, one match per line)
+- `GET  {s}/runs/{{id}}/logs/raw` — Whole run.log as a file (honors `Range: bytes=...`; `?log=sidecar` for the sidecar log)
 
 ### Alerts & Events
 - `GET  {s}/wild/v2/events/{sid}` — Pending events for this session
 - `POST {s}/wild/v2/events/{sid}/resolve` — Mark events handled (body: `{{"event_ids": ["<id>"]}}`)
+- `POST {s}/alerts/groups/{{group_id}}/respond` — Answer every run of an `alert_group` event at once (body: `{{"choice": "<choice>"}}`)
 - `GET  {s}/wild/v2/system-health` — System utilization (running/queued/completed/failed counts)
 
 ### Cluster & Capacity
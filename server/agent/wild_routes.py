@@ -11,6 +11,8 @@ from typing import Optional
 from fastapi import APIRouter, Query
 from pydantic import BaseModel
 
+from runs.alert_groups import group_alerts
+
 logger = logging.getLogger("research-agent-server")
 router = APIRouter()
 
@@ -21,15 +23,17 @@ _wild_v2_engine = None
 _active_alerts = None
 _runs = None
 _WildV2Engine = None
+_launch_queue = None
 
 
-def init(wild_v2_engine, active_alerts_dict, runs_dict, WildV2Engine_cls):
+def init(wild_v2_engine, active_alerts_dict, runs_dict, WildV2Engine_cls, launch_queue=None):
     """Wire in shared state and engine from server.py."""
-    global _wild_v2_engine, _active_alerts, _runs, _WildV2Engine
+    global _wild_v2_engine, _active_alerts, _runs, _WildV2Engine, _launch_queue
     _wild_v2_engine = wild_v2_engine
     _active_alerts = active_alerts_dict
     _runs = runs_dict
     _WildV2Engine = WildV2Engine_cls
+    _launch_queue = launch_queue
 
 
 # ---------------------------------------------------------------------------
@@ -109,9 +113,21 @@ async def wild_v2_status(chat_session_id: Optional[str] = Query(None)):
 async def wild_v2_events(session_id: str):
     """Get pending events for a V2 session (agent calls this)."""
     events = []
-    # Collect pending alerts
+    # Collect pending alerts; a sweep incident is one event for all its runs
+    pending = [a for a in _active_alerts.values() if a.get("status") == "pending"]
+    for group in group_alerts(pending).values():
+        events.append({
+            "id": group["id"],
+            "type": "alert_group",
+            "title": f"Alert on {len(group['run_ids'])} runs of sweep {group.get('sweep_id')}",
+            "detail": group["message"],
+            "run_id": group["run_ids"][0],
+            "run_ids": group["run_ids"],
+            "alert_ids": group["alert_ids"],
+            "created_at": group.get("created_at") or time.time(),
+        })
     for alert_id, alert in _active_alerts.items():
-        if alert.get("status") == "pending":
+        if alert.get("status") == "pending" and not alert.get("group_id"):
             events.append({
                 "id": alert_id,
                 "type": "alert",
@@ -139,8 +155,8 @@ async def wild_v2_resolve_events(session_id: str, req: WildV2ResolveRequest):
     """Mark events as resolved (agent calls this after handling)."""
     resolved = 0
     ids_to_resolve = set(req.event_ids)
-    for alert_id in list(_active_alerts.keys()):
-        if alert_id in ids_to_resolve:
+    for alert_id, alert in list(_active_alerts.items()):
+        if alert_id in ids_to_resolve or alert.get("group_id") in ids_to_resolve:
             _active_alerts[alert_id]["status"] = "resolved"
             resolved += 1
     return {"resolved": resolved}
@@ -149,7 +165,12 @@ async def wild_v2_resolve_events(session_id: str, req: WildV2ResolveRequest):
 @router.get("/wild/v2/system-health")
 async def wild_v2_system_health():
     """Get system utilization (agent calls this to check resources)."""
-    return _WildV2Engine.get_system_health_from_runs(_runs)
+    health = _WildV2Engine.get_system_health_from_runs(_runs)
+    if _launch_queue is not None:
+        summary = _launch_queue.summary()
+        health["max_concurrent"] = summary["max_concurrent"]
+        health["launch_queue"] = summary
+    return health
 
 
 @router.get("/wild/v2/plan/{session_id}")
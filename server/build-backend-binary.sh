@@ -51,6 +51,7 @@ log "Building one-file backend binary"
   --add-data "${SERVER_DIR}/opencode.json:." \
   --add-data "${SERVER_DIR}/gpuwrap_detect.py:." \
   --hidden-import job_sidecar \
+  --hidden-import tools.log_filter \
   --hidden-import core \
   --hidden-import core.config \
   --hidden-import core.models \
@@ -85,6 +85,80 @@ def set_server_callback_url(url: str) -> None:
     SERVER_CALLBACK_URL = url
 FRONTEND_STATIC_DIR = os.environ.get("RESEARCH_AGENT_FRONTEND_DIR", "").strip()
 
+# Launch queue — how many runs may be launching/running at once on this machine
+# (0, the default, means no limit; cluster executors such as Slurm never count),
+# and whether higher-priority work may preempt lower-priority runs when it is full.
+MAX_CONCURRENT_RUNS = int(os.environ.get("RESEARCH_AGENT_MAX_CONCURRENT_RUNS", "0"))
+RUN_PREEMPTION_ENABLED = os.environ.get("RESEARCH_AGENT_RUN_PREEMPTION", "").strip().lower() in {"1", "true", "yes"}
+
+# Default run executor backend ("tmux" or "subprocess"); runs may override it.
+RUN_EXECUTOR = os.environ.get("RESEARCH_AGENT_EXECUTOR", "tmux").strip().lower() or "tmux"
+
+# Who watches tmux runs: "sidecar" (one job_sidecar.py process per run) or
+# "server" (the in-server RunMonitor; the window runs the command directly).
+RUN_MONITOR_MODE = os.environ.get("RESEARCH_AGENT_RUN_MONITOR", "sidecar").strip().lower() or "sidecar"
+RUN_MONITOR_INTERVAL = float(os.environ.get("RESEARCH_AGENT_RUN_MONITOR_INTERVAL", "2"))
+
+# Slurm executor defaults.  SLURM_BIN_DIR points at sbatch/squeue/sacct/scancel
+# when they are not on PATH (or at stand-ins in tests).
+SLURM_BIN_DIR = os.environ.get("RESEARCH_AGENT_SLURM_BIN_DIR", "").strip()
+SLURM_PARTITION = os.environ.get("RESEARCH_AGENT_SLURM_PARTITION", "").strip()
+SLURM_ACCOUNT = os.environ.get("RESEARCH_AGENT_SLURM_ACCOUNT", "").strip()
+SLURM_TIME_LIMIT = os.environ.get("RESEARCH_AGENT_SLURM_TIME_LIMIT", "").strip()
+SLURM_POLL_SECONDS = float(os.environ.get("RESEARCH_AGENT_SLURM_POLL_SECONDS", "15"))
+
+# Server-side anomaly detection on ingested metrics (runs/anomaly.py).  When
+# on, sidecars and the run monitor skip their own fixed-threshold loss rules.
+ANOMALY_DETECTION_ENABLED = os.environ.get("RESEARCH_AGENT_ANOMALY_DETECTION", "1").strip().lower() in {"1", "true", "yes"}
+
+# Shared LLM alert judge (runs/alert_judge.py): one batched, budgeted judge
+# for all runs instead of an opencode subprocess per sidecar.
+ALERT_JUDGE_ENABLED = os.environ.get("RESEARCH_AGENT_ALERT_JUDGE", "1").strip().lower() in {"1", "true", "yes"}
+ALERT_JUDGE_BATCH_SIZE = int(os.environ.get("RESEARCH_AGENT_ALERT_JUDGE_BATCH_SIZE", "20"))
+ALERT_JUDGE_CALLS_PER_MINUTE = float(os.environ.get("RESEARCH_AGENT_ALERT_JUDGE_CALLS_PER_MINUTE", "6"))
+ALERT_JUDGE_TOKENS_PER_HOUR = float(os.environ.get("RESEARCH_AGENT_ALERT_JUDGE_TOKENS_PER_HOUR", "200000"))
+
+# Same-signature alerts from one sweep within this window become one group
+# with one notification (runs/alert_groups.py).  0 disables grouping.
+ALERT_GROUP_WINDOW_SECONDS = float(os.environ.get("RESEARCH_AGENT_ALERT_GROUP_WINDOW_SECONDS", "60"))
+
+# Slack delivery (integrations/notification_dispatcher.py): queue bound and the
+# minimum spacing between messages to one channel.
+SLACK_QUEUE_SIZE = int(os.environ.get("RESEARCH_AGENT_SLACK_QUEUE_SIZE", "500"))
+SLACK_MIN_INTERVAL_SECONDS = float(os.environ.get("RESEARCH_AGENT_SLACK_MIN_INTERVAL_SECONDS", "1.0"))
+
+# Job output passes through tools/log_filter.py on its way into run.log
+# (carriage-return redraws collapsed, ANSI stripped, repeated lines summarized).
+# LOG_KEEP_RAW also keeps the untouched stream in run.raw.log.gz.
+LOG_CAPTURE_FILTER = os.environ.get("RESEARCH_AGENT_LOG_FILTER", "1").strip().lower() in {"1", "true", "yes"}
+LOG_KEEP_RAW = os.environ.get("RESEARCH_AGENT_LOG_KEEP_RAW", "0").strip().lower() in {"1", "true", "yes"}
+
+# Logs of runs that ended this long ago are compressed into seekable
+# run.log.zf / sidecar.log.zf files (runs/log_store.py); smaller logs are left alone.
+LOG_COMPRESSION_ENABLED = os.environ.get("RESEARCH_AGENT_LOG_COMPRESSION", "1").strip().lower() in {"1", "true", "yes"}
+LOG_COMPRESS_AFTER_SECONDS = float(os.environ.get("RESEARCH_AGENT_LOG_COMPRESS_AFTER_SECONDS", "900"))
+LOG_COMPRESS_MIN_BYTES = int(os.environ.get("RESEARCH_AGENT_LOG_COMPRESS_MIN_BYTES", str(1024 * 1024)))
+
+# Most bytes one GET /runs/{id}/artifacts?hashes=true request hashes (smallest
+# files first); the rest are flagged hash_pending and picked up by later requests.
+ARTIFACT_HASH_MAX_BYTES = int(os.environ.get("RESEARCH_AGENT_ARTIFACT_HASH_MAX_BYTES", str(1024 * 1024 * 1024)))
+
+# Opt-in content-addressed artifact store (runs/blob_store.py): ended runs'
+# artifacts of at least this size are hardlinked into DATA_DIR/blobs by sha256.
+ARTIFACT_DEDUP_ENABLED = os.environ.get("RESEARCH_AGENT_ARTIFACT_DEDUP", "0").strip().lower() in {"1", "true", "yes"}
+ARTIFACT_DEDUP_MIN_BYTES = int(os.environ.get("RESEARCH_AGENT_ARTIFACT_DEDUP_MIN_BYTES", str(1024 * 1024)))
+
+# Run directory disk accounting and GC (runs/storage.py).  Accounting is on by
+# default; GC only runs with STORAGE_GC=1 and deletes what the enabled policies
+# select from runs that ended at least STORAGE_GC_MIN_AGE_SECONDS ago.
+STORAGE_ACCOUNTING_ENABLED = os.environ.get("RESEARCH_AGENT_STORAGE_ACCOUNTING", "1").strip().lower() in {"1", "true", "yes"}
+STORAGE_GC_ENABLED = os.environ.get("RESEARCH_AGENT_STORAGE_GC", "0").strip().lower() in {"1", "true", "yes"}
+STORAGE_KEEP_LAST_PER_SWEEP = int(os.environ.get("RESEARCH_AGENT_STORAGE_KEEP_LAST_PER_SWEEP", "0"))
+STORAGE_PRUNE_WANDB = os.environ.get("RESEARCH_AGENT_STORAGE_PRUNE_WANDB", "0").strip().lower() in {"1", "true", "yes"}
+STORAGE_PRUNE_ARCHIVED_FAILED = os.environ.get("RESEARCH_AGENT_STORAGE_PRUNE_ARCHIVED_FAILED", "0").strip().lower() in {"1", "true", "yes"}
+STORAGE_GC_MIN_AGE_SECONDS = float(os.environ.get("RESEARCH_AGENT_STORAGE_GC_MIN_AGE_SECONDS", "3600"))
+STORAGE_GC_FILES_PER_SECOND = float(os.environ.get("RESEARCH_AGENT_STORAGE_GC_FILES_PER_SECOND", "200"))
+
 
 def init_paths(workdir: str):
     """Initialize all paths based on workdir."""
@@ -120,6 +194,9 @@ AUTH_PROTECTED_PREFIXES = (
     "/plans",
     "/integrations",
     "/journey",
+    "/logs",
+    "/artifacts",
+    "/storage",
 )
 
 
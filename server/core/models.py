@@ -66,6 +66,24 @@ class GpuwrapConfig(BaseModel):
     enabled: Optional[bool] = None
     retries: Optional[int] = Field(default=None, ge=-1)
     retry_delay_seconds: Optional[float] = Field(default=None, gt=0, le=600)
+    gpu_count: Optional[int] = Field(default=None, ge=1)
+    min_free_memory_mb: Optional[int] = Field(default=None, ge=0)  # unset = exclusive devices
+
+
+class SlurmOptions(BaseModel):
+    partition: Optional[str] = None
+    account: Optional[str] = None
+    qos: Optional[str] = None
+    time_limit: Optional[str] = None  # e.g. "04:00:00"
+    cpus_per_task: Optional[int] = Field(default=None, ge=1)
+    mem: Optional[str] = None  # e.g. "64G"
+    extra_args: Optional[list[str]] = None  # raw sbatch flags, e.g. ["--constraint=a100"]
+
+
+class AnomalyDetectorConfig(BaseModel):
+    type: str  # ewma_zscore, plateau, divergence, nonfinite, grad_explosion
+    metric: Optional[str] = None  # metric key; each type has a default
+    params: dict = Field(default_factory=dict)  # thresholds etc., see runs/anomaly.py
 
 
 class RunCreate(BaseModel):
@@ -78,6 +96,12 @@ class RunCreate(BaseModel):
     chat_session_id: Optional[str] = None  # Originating chat session for traceability
     auto_start: bool = False  # If True, skip ready and go straight to queued
     gpuwrap_config: Optional[GpuwrapConfig] = None
+    priority_class: Optional[str] = None  # interactive, agent, sweep, background (inferred if unset)
+    executor: Optional[str] = None  # tmux, subprocess or slurm (server default if unset)
+    slurm: Optional[SlurmOptions] = None  # sbatch settings for the slurm executor
+    anomaly_detectors: Optional[List[AnomalyDetectorConfig]] = None  # overrides the sweep/default set
+    depends_on: Optional[List[str]] = None  # upstream run ids; the run launches once they are terminal
+    dependency_condition: Optional[str] = None  # on_success (default) or on_any
 
 
 class RunStatusUpdate(BaseModel):
@@ -86,12 +110,32 @@ class RunStatusUpdate(BaseModel):
     error: Optional[str] = None
     tmux_pane: Optional[str] = None
     wandb_dir: Optional[str] = None
+    sidecar_wakeups: Optional[int] = None  # monitor-loop checks so far
+
+
+class RunEvent(BaseModel):
+    seq: int = Field(ge=1)  # per-run sequence number assigned by the sidecar
+    type: str  # status, metrics
+    data: dict = Field(default_factory=dict)
+
+
+class RunEventBatch(BaseModel):
+    events: list[RunEvent]
 
 
 class RunUpdate(BaseModel):
     name: Optional[str] = None
     command: Optional[str] = None
     workdir: Optional[str] = None
+    priority_class: Optional[str] = None
+    anomaly_detectors: Optional[List[AnomalyDetectorConfig]] = None
+    depends_on: Optional[List[str]] = None  # only while the run is ready or queued; [] clears
+    dependency_condition: Optional[str] = None
+
+
+class LaunchQueueConfigUpdate(BaseModel):
+    max_concurrent: Optional[int] = Field(default=None, ge=0)  # 0 = no limit
+    preemption_enabled: Optional[bool] = None
 
 
 # =============================================================================
@@ -109,6 +153,11 @@ class SweepCreate(BaseModel):
     status: Optional[str] = None  # draft, pending, running
     ui_config: Optional[dict] = None
     chat_session_id: Optional[str] = None  # Originating chat session for traceability
+    priority_class: Optional[str] = None  # defaults to "sweep"
+    share_weight: Optional[float] = Field(default=None, gt=0)  # fair-share weight vs. other sweeps/sessions
+    executor: Optional[str] = None  # backend for every run; "slurm" submits one job array
+    slurm: Optional[SlurmOptions] = None
+    anomaly_detectors: Optional[List[AnomalyDetectorConfig]] = None  # default for member runs
 
 
 class SweepUpdate(BaseModel):
@@ -120,6 +169,9 @@ class SweepUpdate(BaseModel):
     goal: Optional[str] = None
     status: Optional[str] = None  # draft, pending, running, completed, failed, canceled
     ui_config: Optional[dict] = None
+    priority_class: Optional[str] = None
+    share_weight: Optional[float] = Field(default=None, gt=0)
+    anomaly_detectors: Optional[List[AnomalyDetectorConfig]] = None
 
 
 # =============================================================================
@@ -138,6 +190,9 @@ class AlertRecord(BaseModel):
     responded_at: Optional[float] = None
     session_id: Optional[str] = None
     auto_session: bool = False
+    source: Optional[str] = None  # "anomaly" for server-side detector alerts
+    group_id: Optional[str] = None  # set when aggregated with same-sweep alerts
+    sweep_id: Optional[str] = None
 
 
 class CreateAlertRequest(BaseModel):
@@ -157,6 +212,20 @@ class RunRerunRequest(BaseModel):
     gpuwrap_config: Optional[GpuwrapConfig] = None
 
 
+class RunBulkFilter(BaseModel):
+    sweep_id: Optional[str] = None
+    statuses: Optional[List[str]] = None
+    include_archived: bool = False
+
+
+class RunBulkRequest(BaseModel):
+    action: str  # create, start, stop, archive, unarchive, rerun
+    run_ids: Optional[List[str]] = None  # targets, or use filter (not for create)
+    filter: Optional[RunBulkFilter] = None
+    runs: Optional[List[RunCreate]] = None  # create only
+    rerun: Optional[RunRerunRequest] = None  # options applied to every rerun
+
+
 class WildModeRequest(BaseModel):
     enabled: bool
 
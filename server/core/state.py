@@ -6,14 +6,16 @@ state helpers. Extracted from server.py.
 """
 
 import asyncio
+import contextlib
 import glob
 import json
 import logging
 import math
 import os
+import threading
 import time
 import uuid
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, Optional
 
 from core import config
 
@@ -213,17 +215,62 @@ def load_chat_state():
             logger.error(f"Error loading chat state: {e}")
 
 
+# Saves requested inside deferred_saves() blocks, written once on exit.
+_deferred_lock = threading.Lock()
+_deferred_depth = 0
+_deferred_saves: Dict[str, Callable[[], None]] = {}
+
+
+def _defer_save(save_fn: Callable[[], None]) -> bool:
+    """True (and the save is remembered) while a deferred_saves() block is open."""
+    with _deferred_lock:
+        if not _deferred_depth:
+            return False
+        _deferred_saves[save_fn.__name__] = save_fn
+        return True
+
+
+@contextlib.contextmanager
+def deferred_saves():
+    """Coalesce save_*_state() calls into one write per file when the outermost block exits.
+
+    Used by bulk operations so that touching N runs does not rewrite
+    jobs.json and the journey file N times.
+    """
+    global _deferred_depth
+    with _deferred_lock:
+        _deferred_depth += 1
+    try:
+        yield
+    finally:
+        with _deferred_lock:
+            _deferred_depth -= 1
+            pending = list(_deferred_saves.values()) if not _deferred_depth else []
+            if pending:
+                _deferred_saves.clear()
+        for save_fn in pending:
+            save_fn()
+
+
 def save_runs_state():
     """Persist runs and sweeps to disk."""
+    if _defer_save(save_runs_state):
+        return
+    # Write a sibling temp file and rename it over the old one, so a crash or a
+    # concurrent reader never sees a half-written file.
+    tmp_path = f"{config.JOBS_DATA_FILE}.tmp"
     try:
-        with open(config.JOBS_DATA_FILE, "w") as f:
+        with open(tmp_path, "w") as f:
             json.dump({"runs": runs, "sweeps": sweeps}, f, indent=2, default=str)
+        os.replace(tmp_path, config.JOBS_DATA_FILE)
     except Exception as e:
         logger.error(f"Error saving runs state: {e}")
 
 
 def save_alerts_state():
     """Persist active alerts to disk."""
+    if _defer_save(save_alerts_state):
+        return
     try:
         with open(config.ALERTS_DATA_FILE, "w") as f:
             json.dump({"alerts": list(active_alerts.values())}, f, indent=2, default=str)
@@ -233,17 +280,18 @@ def save_alerts_state():
 
 def load_alerts_state():
     """Load active alerts from disk."""
-    global active_alerts
     if os.path.exists(config.ALERTS_DATA_FILE):
         try:
             with open(config.ALERTS_DATA_FILE, "r") as f:
                 data = json.load(f)
                 loaded = data.get("alerts", [])
-                active_alerts = {
+                # In place: routes hold a reference to this dict.
+                active_alerts.clear()
+                active_alerts.update({
                     alert["id"]: alert
                     for alert in loaded
                     if isinstance(alert, dict) and alert.get("id")
-                }
+                })
         except Exception as e:
             logger.error(f"Error loading alerts state: {e}")
 
@@ -276,6 +324,8 @@ def load_plans_state():
 
 def save_journey_state():
     """Persist journey events/recommendations/decisions to disk."""
+    if _defer_save(save_journey_state):
+        return
     try:
         with open(config.JOURNEY_STATE_FILE, "w") as f:
             json.dump(
@@ -31,15 +31,17 @@ _cluster_state = None
 _save_settings_state = None
 _current_run_summary = None
 _infer_cluster_fn = None
+_gpu_scheduler = None
 
 
-def init(cluster_state_dict, save_settings_fn, current_run_summary_fn, infer_cluster_fn):
+def init(cluster_state_dict, save_settings_fn, current_run_summary_fn, infer_cluster_fn, gpu_scheduler=None):
     """Wire in the shared cluster state dict, save function, run summary and cluster detection callbacks."""
-    global _cluster_state, _save_settings_state, _current_run_summary, _infer_cluster_fn
+    global _cluster_state, _save_settings_state, _current_run_summary, _infer_cluster_fn, _gpu_scheduler
     _cluster_state = cluster_state_dict
     _save_settings_state = save_settings_fn
     _current_run_summary = current_run_summary_fn
     _infer_cluster_fn = infer_cluster_fn
+    _gpu_scheduler = gpu_scheduler
 
 
 # ---------------------------------------------------------------------------
@@ -125,3 +127,11 @@ async def update_cluster_state_endpoint(req: ClusterUpdateRequest):
     _cluster_state.update(new_state)
     _save_settings_state()
     return {"cluster": _cluster_state, "run_summary": _current_run_summary()}
+
+
+@router.get("/cluster/gpus")
+async def get_cluster_gpus():
+    """Live GPU devices merged with the scheduler's reservation ledger."""
+    if _gpu_scheduler is None:
+        return {"devices": [], "assignments": {}}
+    return _gpu_scheduler.snapshot()
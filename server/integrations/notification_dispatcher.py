@@ -0,0 +1,223 @@
+"""
+Research Agent Server — Asynchronous Slack Notification Dispatcher
+
+``SlackNotifier`` used to call the blocking ``slack_sdk`` WebClient from the
+run status and alert handlers, so a slow Slack API stalled every sidecar
+POST.  With a dispatcher attached, the notifier only builds the message and
+enqueues it; one worker task on the event loop delivers it:
+
+- The queue is bounded (``max_queue``); messages beyond it are dropped and
+  counted rather than blocking the caller.
+- Delivery uses an ``httpx.AsyncClient`` against ``chat.postMessage``.
+- Each channel gets at most one message per ``min_interval`` seconds.  A
+  429 blocks that channel for its ``Retry-After``, and the message is kept
+  at the head of the channel's queue; other channels keep flowing.
+- Transient failures (network errors, 5xx, Slack's retryable error codes)
+  are retried with exponential backoff up to ``max_attempts``; permanent
+  ones (bad channel, revoked token) are dropped and logged.
+
+``summary()`` exposes the counters.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Optional
+
+logger = logging.getLogger("research-agent-server")
+
+SLACK_POST_MESSAGE_URL = "https://slack.com/api/chat.postMessage"
+RETRYABLE_SLACK_ERRORS = {"ratelimited", "service_unavailable", "request_timeout", "internal_error", "fatal_error"}
+
+# (http status, Retry-After seconds or None, response body)
+PostResult = tuple[int, Optional[float], dict]
+
+
+class NotificationDispatcher:
+    """Bounded queue plus one async worker delivering Slack messages."""
+
+    def __init__(
+        self,
+        notifier: Any,
+        max_queue: int = 500,
+        max_attempts: int = 5,
+        base_backoff: float = 1.0,
+        max_backoff: float = 60.0,
+        min_interval: float = 1.0,
+        post: Optional[Callable[[dict], Awaitable[PostResult]]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._notifier = notifier
+        self.max_queue = max_queue
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.min_interval = min_interval
+        self._post = post or self._post_to_slack
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._pending: dict[str, deque] = {}
+        self._size = 0
+        self._next_allowed: dict[str, float] = {}
+        self._wake: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._http: Any = None
+        self.stats = {"enqueued": 0, "sent": 0, "retried": 0, "rate_limited": 0, "failed": 0, "dropped": 0}
+        self.last_error: Optional[str] = None
+
+    # -- producer side -----------------------------------------------------
+
+    def ensure_running(self) -> bool:
+        """Start the worker on the running loop if needed; True if a worker is alive."""
+        if self._task is not None and not self._task.done():
+            return True
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+        self._loop = loop
+        self._wake = asyncio.Event()
+        self._task = loop.create_task(self._run())
+        return True
+
+    def enqueue(self, payload: dict) -> bool:
+        """Queue a ``chat.postMessage`` payload; False if the queue is full. Thread-safe."""
+        channel = payload.get("channel") or ""
+        with self._lock:
+            if self._size >= self.max_queue:
+                self.stats["dropped"] += 1
+                logger.warning("Slack queue full (%d); dropping notification", self._size)
+                return False
+            self._pending.setdefault(channel, deque()).append(
+                {"payload": payload, "attempts": 0, "not_before": 0.0, "enqueued_at": self._clock()}
+            )
+            self._size += 1
+            self.stats["enqueued"] += 1
+        self._notify_worker()
+        return True
+
+    def _notify_worker(self) -> None:
+        if self._loop is None or self._wake is None:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._wake.set()
+        else:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    # -- worker side -------------------------------------------------------
+
+    def _next_ready(self) -> tuple[Optional[str], Optional[float]]:
+        """Channel whose head message may go now, else seconds until one may."""
+        now = self._clock()
+        wait: Optional[float] = None
+        with self._lock:
+            for channel, items in self._pending.items():
+                if not items:
+                    continue
+                ready_at = max(self._next_allowed.get(channel, 0.0), items[0]["not_before"])
+                if ready_at <= now:
+                    return channel, None
+                wait = ready_at - now if wait is None else min(wait, ready_at - now)
+        return None, wait
+
+    async def _run(self) -> None:
+        while True:
+            channel, wait = self._next_ready()
+            if channel is None:
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self.deliver_one(channel)
+
+    async def deliver_one(self, channel: str) -> None:
+        """Try the head message of ``channel`` once and requeue or drop it."""
+        with self._lock:
+            item = self._pending[channel].popleft()
+            self._size -= 1
+
+        if not self._notifier.is_enabled:
+            self.stats["dropped"] += 1
+            return
+
+        status, retry_after, body, error = 0, None, {}, None
+        try:
+            status, retry_after, body = await self._post(item["payload"])
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+
+        now = self._clock()
+        if error is None and status == 200 and body.get("ok"):
+            self.stats["sent"] += 1
+            self._next_allowed[channel] = now + self.min_interval
+            return
+
+        if status == 429:
+            delay = retry_after if retry_after is not None else self.min_interval
+            self.stats["rate_limited"] += 1
+            self._next_allowed[channel] = now + delay
+            logger.info("Slack rate limited channel %s for %.1fs", channel, delay)
+            self._requeue(channel, item)
+            return
+
+        error = error or body.get("error") or f"HTTP {status}"
+        self.last_error = error
+        transient = status == 0 or status >= 500 or body.get("error") in RETRYABLE_SLACK_ERRORS
+        item["attempts"] += 1
+        if not transient or item["attempts"] >= self.max_attempts:
+            self.stats["failed"] += 1
+            logger.error("Slack notification failed after %d attempt(s): %s", item["attempts"], error)
+            return
+        self.stats["retried"] += 1
+        item["not_before"] = now + min(self.max_backoff, self.base_backoff * 2 ** (item["attempts"] - 1))
+        self._requeue(channel, item)
+
+    def _requeue(self, channel: str, item: dict) -> None:
+        with self._lock:
+            self._pending.setdefault(channel, deque()).appendleft(item)
+            self._size += 1
+
+    async def _post_to_slack(self, payload: dict) -> PostResult:
+        import httpx
+
+        if self._http is None:
+            self._http = httpx.AsyncClient(timeout=10.0)
+        resp = await self._http.post(
+            SLACK_POST_MESSAGE_URL,
+            json=payload,
+            headers={"Authorization": f"Bearer {self._notifier.bot_token}"},
+        )
+        retry_after = resp.headers.get("Retry-After")
+        try:
+            body = resp.json() if resp.status_code == 200 else {}
+        except ValueError:
+            body = {}
+        return resp.status_code, float(retry_after) if retry_after else None, body
+
+    # -- introspection -----------------------------------------------------
+
+    def summary(self) -> dict:
+        now = self._clock()
+        with self._lock:
+            heads = [items[0]["enqueued_at"] for items in self._pending.values() if items]
+            depth = self._size
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "queue_depth": depth,
+            "max_queue": self.max_queue,
+            "oldest_queued_seconds": round(now - min(heads), 3) if heads else 0.0,
+            "blocked_channels": {
+                channel: round(until - now, 3) for channel, until in self._next_allowed.items() if until > now
+            },
+            "last_error": self.last_error,
+            **self.stats,
+        }
@@ -8,7 +8,7 @@ Sends alerts for run completions, failures, and experiment alerts.
 
 import logging
 import time
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 logger = logging.getLogger("research-agent-server")
 
@@ -40,6 +40,8 @@ class SlackNotifier:
         self.notify_on_complete: bool = True
         self.notify_on_failed: bool = True
         self.notify_on_alert: bool = True
+        # Optional NotificationDispatcher; when attached, sends are queued.
+        self._dispatcher: Optional[Any] = None
 
     # ------------------------------------------------------------------
     # Configuration
@@ -117,6 +119,14 @@ class SlackNotifier:
     def is_enabled(self) -> bool:
         return self._enabled and self._client is not None
 
+    @property
+    def bot_token(self) -> Optional[str]:
+        return self._bot_token
+
+    def attach_dispatcher(self, dispatcher: Any) -> None:
+        """Queue notifications on ``dispatcher`` instead of posting inline."""
+        self._dispatcher = dispatcher
+
     def get_status(self) -> Dict[str, Any]:
         """Return current status (safe to expose to frontend)."""
         if not self._enabled:
@@ -180,11 +190,26 @@ class SlackNotifier:
     ) -> bool:
         """Post a Block Kit notification to Slack.
 
-        Returns True on success, False on failure (logged, never raises).
+        With a running dispatcher the message is only queued, and True means
+        it was accepted.  Otherwise it is posted inline.  Returns False on
+        failure (logged, never raises).
         """
         if not self.is_enabled:
             return False
+        payload = self._build_message(title, message, severity, fields, channel_override)
+        if self._dispatcher is not None and self._dispatcher.ensure_running():
+            return self._dispatcher.enqueue(payload)
+        return self._post_message(payload)
 
+    def _build_message(
+        self,
+        title: str,
+        message: str,
+        severity: str,
+        fields: Optional[Dict[str, str]],
+        channel_override: Optional[str],
+    ) -> Dict[str, Any]:
+        """``chat.postMessage`` arguments for a Block Kit notification."""
         color_map = {
             "info": "#2196F3",
             "success": "#4CAF50",
@@ -219,14 +244,17 @@ class SlackNotifier:
             ],
         })
 
-        target_channel = channel_override or self._channel
+        return {
+            "channel": channel_override or self._channel,
+            "text": f"{title}: {message}",  # Fallback for plain-text clients
+            "blocks": blocks,
+            "attachments": [{"color": color, "blocks": []}],  # Color bar
+        }
+
+    def _post_message(self, payload: Dict[str, Any]) -> bool:
+        """Blocking ``chat.postMessage`` through the WebClient."""
         try:
-            self._client.chat_postMessage(  # type: ignore[union-attr]
-                channel=target_channel,
-                text=f"{title}: {message}",  # Fallback for plain-text clients
-                blocks=blocks,
-                attachments=[{"color": color, "blocks": []}],  # Color bar
-            )
+            self._client.chat_postMessage(**payload)  # type: ignore[union-attr]
             return True
         except SlackApiError as e:
             logger.error("Slack send failed: %s", e.response.get("error", str(e)))
@@ -312,16 +340,49 @@ class SlackNotifier:
             fields=fields,
         )
 
+    def send_alert_digest(
+        self,
+        group: Dict[str, Any],
+        runs: List[Dict[str, Any]],
+        sweep: Optional[Dict[str, Any]] = None,
+    ) -> bool:
+        """Notify once for a group of same-signature alerts across a sweep."""
+        if not self.notify_on_alert:
+            return False
+        severity = group.get("severity", "warning")
+        message_text = group.get("message", "No details")
+        names = [run.get("name", run.get("id", "unknown")) for run in runs]
+        shown = ", ".join(names[:10]) + (f" (+{len(names) - 10} more)" if len(names) > 10 else "")
+
+        fields: Dict[str, str] = {
+            "Severity": severity.upper(),
+            "Runs affected": str(len(names)),
+        }
+        if sweep:
+            fields["Sweep"] = sweep.get("name", sweep.get("id", "unknown"))
+        if group.get("choices"):
+            fields["Choices"] = ", ".join(group["choices"])
+
+        emoji = {"critical": "🚨", "warning": "⚠️", "info": "ℹ️"}.get(severity, "⚠️")
+        return self.send_notification(
+            title=f"{emoji} {len(names)} runs alerting: {message_text[:80]}",
+            message=f"{message_text}\n\n*Runs:* {shown}\nRespond once for the whole group (`{group.get('id')}`).",
+            severity=severity,
+            fields=fields,
+        )
+
     def send_test(self) -> Dict[str, Any]:
         """Send a test notification. Returns result dict."""
         if not self.is_enabled:
             return {"ok": False, "error": "Slack is not configured"}
-        ok = self.send_notification(
+        # Posted inline (not queued) so the caller learns whether it worked.
+        ok = self._post_message(self._build_message(
             title="🧪 Test Notification",
             message="This is a test message from Research Agent. If you see this, Slack integration is working!",
             severity="info",
             fields={"Status": "Connected", "Source": "Settings → Test"},
-        )
+            channel_override=None,
+        ))
         return {"ok": ok, "error": None if ok else "Failed to send message"}
 
 
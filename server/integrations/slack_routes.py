@@ -17,13 +17,15 @@ router = APIRouter()
 # ---------------------------------------------------------------------------
 _slack_notifier = None
 _save_settings_state = None
+_dispatcher = None
 
 
-def init(slack_notifier, save_settings_state):
-    """Wire in the shared SlackNotifier and settings save function."""
-    global _slack_notifier, _save_settings_state
+def init(slack_notifier, save_settings_state, dispatcher=None):
+    """Wire in the shared SlackNotifier, settings save function and dispatcher."""
+    global _slack_notifier, _save_settings_state, _dispatcher
     _slack_notifier = slack_notifier
     _save_settings_state = save_settings_state
+    _dispatcher = dispatcher
 
 
 # ---------------------------------------------------------------------------
@@ -67,6 +69,14 @@ async def get_slack_status():
     return _slack_notifier.get_status()
 
 
+@router.get("/integrations/slack/dispatcher")
+async def get_slack_dispatcher_stats():
+    """Queue depth and delivery counters of the notification dispatcher."""
+    if _dispatcher is None:
+        return {"running": False}
+    return _dispatcher.summary()
+
+
 @router.post("/integrations/slack/test")
 async def test_slack():
     """Send a test notification to Slack."""
@@ -0,0 +1,199 @@
+"""
+Research Agent Server — Sweep Alert Aggregation
+
+A bad hyperparameter usually breaks every run of a sweep the same way, and
+each of those runs raises its own alert.  ``AlertAggregator`` folds alerts
+from runs of one sweep that share a signature (source and the message with
+numbers and run names masked) into one group:
+
+- The first alert opens a group; alerts with the same key that arrive within
+  ``window_seconds`` of it join the group instead of notifying on their own.
+- When the window closes, ``on_digest`` is called once for the group (one
+  Slack message for the whole incident).
+- Every member stays a normal alert record with a ``group_id``, so sidecars
+  keep polling their own alert ids; answering the group answers them all.
+- Open groups live in memory.  After a restart ``restore`` re-opens groups
+  whose pending members never went out in a digest (members without
+  ``digest_sent_at``), so their notification is not lost.
+
+Alerts from runs outside a sweep are never grouped.
+"""
+
+import asyncio
+import hashlib
+import logging
+import re
+import time
+import uuid
+from typing import Any, Callable, Iterable, Optional
+
+logger = logging.getLogger("research-agent-server")
+
+_NUMBER_RE = re.compile(r"[-+]?(?:\d+\.?\d*|\.\d+)(?:e[-+]?\d+)?", re.IGNORECASE)
+_SEVERITY_RANK = {"info": 0, "warning": 1, "critical": 2}
+
+
+def alert_signature(alert: dict, run: Optional[dict] = None) -> str:
+    """Hash of what the alert says, ignoring which run, which numbers and severity."""
+    text = (alert.get("message") or "").lower()
+    for name in (run or {}).get("id"), (run or {}).get("name"), alert.get("run_id"):
+        if name:
+            text = text.replace(str(name).lower(), "<run>")
+    text = _NUMBER_RE.sub("#", text)
+    text = " ".join(text.split())
+    blob = f"{alert.get('source') or ''}|{text}"
+    return hashlib.sha1(blob.encode("utf-8")).hexdigest()[:16]
+
+
+def group_alerts(alerts: Iterable[dict]) -> dict[str, dict]:
+    """Summaries of alert groups, keyed by group id, built from the alert records."""
+    groups: dict[str, dict] = {}
+    for alert in sorted(alerts, key=lambda a: a.get("timestamp", 0)):
+        group_id = alert.get("group_id")
+        if not group_id:
+            continue
+        group = groups.get(group_id)
+        if group is None:
+            group = groups[group_id] = {
+                "id": group_id,
+                "sweep_id": alert.get("sweep_id"),
+                "message": alert.get("message", ""),
+                "severity": alert.get("severity", "warning"),
+                "choices": list(alert.get("choices") or []),
+                "source": alert.get("source"),
+                "created_at": alert.get("timestamp"),
+                "status": "resolved",
+                "alert_ids": [],
+                "run_ids": [],
+                "pending_alert_ids": [],
+            }
+        group["alert_ids"].append(alert["id"])
+        if alert.get("run_id") not in group["run_ids"]:
+            group["run_ids"].append(alert.get("run_id"))
+        if alert.get("status") == "pending":
+            group["status"] = "pending"
+            group["pending_alert_ids"].append(alert["id"])
+        if _SEVERITY_RANK.get(alert.get("severity"), 1) > _SEVERITY_RANK.get(group["severity"], 1):
+            group["severity"] = alert.get("severity")
+        member_choices = alert.get("choices") or []
+        group["choices"] = [c for c in group["choices"] if c in member_choices]
+    return groups
+
+
+class AlertAggregator:
+    """Assigns sweep alerts to time-windowed groups and emits one digest per group."""
+
+    def __init__(
+        self,
+        runs: dict,
+        window_seconds: float = 60.0,
+        on_digest: Optional[Callable[[dict], Any]] = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self._runs = runs
+        self.window_seconds = window_seconds
+        self._on_digest = on_digest
+        self._clock = clock
+        # (sweep_id, signature) -> open group; closed groups live only in the alert records.
+        self._open: dict[tuple[str, str], dict] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def assign(self, alert: dict) -> Optional[str]:
+        """Set ``alert["group_id"]`` when the alert belongs to a sweep; returns it."""
+        if self.window_seconds <= 0:
+            return None
+        run = self._runs.get(alert.get("run_id")) or {}
+        sweep_id = run.get("sweep_id")
+        if not sweep_id:
+            return None
+        now = self._clock()
+        key = (sweep_id, alert_signature(alert, run))
+        group = self._open.get(key)
+        if group is None or now - group["created_at"] > self.window_seconds:
+            if group is not None:
+                self._emit(key)
+            group = {
+                "id": f"grp-{uuid.uuid4().hex[:12]}",
+                "sweep_id": sweep_id,
+                "signature": key[1],
+                "created_at": now,
+                "alert_ids": [],
+            }
+            self._open[key] = group
+            self.ensure_running()
+        group["alert_ids"].append(alert["id"])
+        alert["group_id"] = group["id"]
+        alert["sweep_id"] = sweep_id
+        return group["id"]
+
+    def restore(self, alerts: Iterable[dict]) -> int:
+        """Re-open groups with pending, un-notified members; returns how many.
+
+        A group keeps its original ``created_at``, so one whose window has
+        already passed is digested on the next background flush.
+        """
+        if self.window_seconds <= 0:
+            return 0
+        restored: dict[str, dict] = {}
+        for alert in sorted(alerts, key=lambda a: a.get("timestamp", 0)):
+            group_id = alert.get("group_id")
+            if not group_id or alert.get("status") != "pending" or alert.get("digest_sent_at"):
+                continue
+            group = restored.get(group_id)
+            if group is None:
+                run = self._runs.get(alert.get("run_id")) or {}
+                group = restored[group_id] = {
+                    "id": group_id,
+                    "sweep_id": alert.get("sweep_id") or run.get("sweep_id"),
+                    "signature": alert_signature(alert, run),
+                    "created_at": alert.get("timestamp") or self._clock(),
+                    "alert_ids": [],
+                }
+            group["alert_ids"].append(alert["id"])
+        for group in restored.values():
+            key = (group["sweep_id"], group["signature"])
+            if key in self._open:
+                # An older group with the same key: its window is over.
+                self._emit(key)
+            self._open[key] = group
+        if restored:
+            self.ensure_running()
+        return len(restored)
+
+    def close(self, group_id: str) -> None:
+        """Stop accepting members (the group was answered); no digest is sent."""
+        for key, group in list(self._open.items()):
+            if group["id"] == group_id:
+                del self._open[key]
+
+    def flush_due(self) -> list[dict]:
+        """Emit digests for groups whose window has elapsed."""
+        now = self._clock()
+        due = [key for key, group in self._open.items() if now - group["created_at"] >= self.window_seconds]
+        return [self._emit(key) for key in due]
+
+    def _emit(self, key: tuple[str, str]) -> dict:
+        group = self._open.pop(key)
+        if self._on_digest is not None:
+            try:
+                self._on_digest(group)
+            except Exception as e:
+                logger.warning("Alert digest for %s failed: %s", group["id"], e)
+        return group
+
+    # -- background flush --------------------------------------------------
+
+    def ensure_running(self) -> None:
+        if self._task is not None and not self._task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._task = loop.create_task(self._loop())
+
+    async def _loop(self) -> None:
+        while self._open:
+            deadline = min(group["created_at"] for group in self._open.values()) + self.window_seconds
+            await asyncio.sleep(max(0.05, deadline - self._clock()))
+            self.flush_due()
@@ -0,0 +1,299 @@
+"""
+Research Agent Server — Shared LLM Alert Judge
+
+The job sidecar used to run ``alert_judge`` per run: one ``opencode run``
+subprocess every ``AGENT_JUDGE_INTERVAL`` seconds for every run whose
+metrics changed.  ``AlertJudgeService`` replaces that with one judge for
+the whole server, fed by the same ingestion path as the anomaly detectors
+(``append_run_metrics``):
+
+- ``observe`` keeps the last few metric rows per run and marks the run due
+  at most once per ``run_interval``.
+- Every ``batch_window`` seconds, up to ``batch_size`` due runs are judged
+  in a single model request that returns one verdict per run.
+- Verdicts are cached by a hash of the run's (rounded, step-free) context,
+  so runs in the same state do not cost another call.
+- A calls-per-minute and a tokens-per-hour bucket bound total spend; runs
+  that do not fit stay due and go out in a later batch.
+
+The model call runs in a worker thread; batch assembly and alert creation
+happen on the event loop.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+from runs.rate_limit import TokenBucket
+from tools.job_sidecar import (
+    AGENT_JUDGE_INTERVAL,
+    AGENT_JUDGE_MAX_BYTES,
+    AGENT_JUDGE_MAX_LINES,
+    normalize_alert_judge_decision,
+    run_opencode_prompt,
+    seen_recent_signature,
+)
+
+logger = logging.getLogger("research-agent-server")
+
+# Metric keys that change every row without saying anything about health.
+VOLATILE_KEYS = {"step", "_step", "_timestamp", "_runtime", "timestamp", "epoch"}
+CACHE_SIZE = 2048
+CHARS_PER_TOKEN = 4
+OUTPUT_TOKENS_PER_RUN = 80
+
+BATCH_PROMPT = (
+    "[SYSTEM] You are an ML training alert judge. For each run below, decide "
+    "if its latest metrics warrant interrupting a human. Return ONLY a JSON "
+    "object mapping each run id to {\"action\": \"alert\"|\"ignore\", "
+    "\"message\": string, \"severity\": \"info\"|\"warning\"|\"critical\", "
+    "\"choices\": [strings]}. If action is ignore, keep message empty.\n"
+    "Runs:\n"
+)
+
+
+def _round(value: Any) -> Any:
+    if isinstance(value, float):
+        return float(f"{value:.4g}")
+    return value
+
+
+def context_key(rows: list[dict]) -> str:
+    """Stable hash of the health-relevant part of a run's recent metrics."""
+    canonical = [
+        {k: _round(v) for k, v in sorted(row.items()) if k not in VOLATILE_KEYS}
+        for row in rows
+    ]
+    blob = json.dumps(canonical, sort_keys=True, ensure_ascii=True, default=str)
+    return hashlib.sha1(blob.encode("utf-8")).hexdigest()
+
+
+def parse_batch_verdicts(output: Optional[str], run_ids: list[str]) -> dict[str, dict]:
+    """Per-run decisions from a batch reply; runs it skipped count as ignore."""
+    verdicts = {run_id: {"action": "ignore"} for run_id in run_ids}
+    if not output:
+        return verdicts
+    start, end = output.find("{"), output.rfind("}")
+    if start < 0 or end <= start:
+        return verdicts
+    try:
+        data = json.loads(output[start:end + 1])
+    except json.JSONDecodeError:
+        return verdicts
+    if not isinstance(data, dict):
+        return verdicts
+    for run_id in run_ids:
+        decision = normalize_alert_judge_decision(data.get(run_id))
+        if decision is not None:
+            verdicts[run_id] = decision
+    return verdicts
+
+
+class AlertJudgeService:
+    """One batched, cached, budgeted LLM judge for every run on the server."""
+
+    def __init__(
+        self,
+        runs: dict,
+        on_decision: Callable[[str, dict], Any],
+        run_model: Optional[Callable[[str], Optional[str]]] = None,
+        enabled: bool = True,
+        batch_size: int = 20,
+        batch_window: float = 5.0,
+        run_interval: float = AGENT_JUDGE_INTERVAL,
+        max_calls_per_minute: float = 6,
+        tokens_per_hour: float = 200_000,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._runs = runs
+        self._on_decision = on_decision
+        self._run_model = run_model or (lambda prompt: run_opencode_prompt(prompt, timeout=90))
+        self.enabled = enabled
+        self.batch_size = max(1, batch_size)
+        self.batch_window = batch_window
+        self.run_interval = run_interval
+        self._clock = clock
+        self._calls = TokenBucket(max_calls_per_minute, 60.0, clock)
+        self._tokens = TokenBucket(tokens_per_hour, 3600.0, clock)
+        self._lock = threading.Lock()
+        self._recent: dict[str, list[dict]] = {}
+        self._due: "OrderedDict[str, None]" = OrderedDict()
+        self._last_judged: dict[str, float] = {}
+        self._cache: "OrderedDict[str, dict]" = OrderedDict()
+        self._alert_state: dict[str, dict] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"model_calls": 0, "runs_judged": 0, "cache_hits": 0, "tokens_spent": 0, "deferred": 0}
+
+    # -- ingestion ---------------------------------------------------------
+
+    def observe(self, run_id: str, rows: list) -> None:
+        """Record freshly ingested rows; the run becomes due for judging."""
+        if not self.enabled:
+            return
+        rows = [row for row in rows if isinstance(row, dict)]
+        if not rows:
+            return
+        with self._lock:
+            recent = (self._recent.get(run_id, []) + rows)[-AGENT_JUDGE_MAX_LINES:]
+            while len(recent) > 1 and len(json.dumps(recent, default=str)) > AGENT_JUDGE_MAX_BYTES:
+                recent.pop(0)
+            self._recent[run_id] = recent
+            self._due[run_id] = None
+        self.ensure_running()
+
+    def forget(self, run_id: str) -> None:
+        with self._lock:
+            self._recent.pop(run_id, None)
+            self._due.pop(run_id, None)
+            self._last_judged.pop(run_id, None)
+            self._alert_state.pop(run_id, None)
+
+    # -- batching ----------------------------------------------------------
+
+    def _take_batch(self) -> tuple[dict[str, dict], list[tuple[str, str, list]]]:
+        """Split due runs into cached verdicts and contexts needing the model."""
+        now = self._clock()
+        cached: dict[str, dict] = {}
+        misses: list[tuple[str, str, list]] = []
+        with self._lock:
+            for run_id in list(self._due):
+                if len(misses) >= self.batch_size:
+                    break
+                if now - self._last_judged.get(run_id, -float("inf")) < self.run_interval:
+                    continue
+                del self._due[run_id]
+                rows = self._recent.get(run_id) or []
+                if not rows:
+                    continue
+                self._last_judged[run_id] = now
+                key = context_key(rows)
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    cached[run_id] = self._cache[key]
+                    self.stats["cache_hits"] += 1
+                else:
+                    misses.append((run_id, key, rows))
+        return cached, misses
+
+    def _fit_budget(self, misses: list[tuple[str, str, list]]) -> tuple[str, list, int]:
+        """Largest prefix of ``misses`` the budgets allow; the rest go back to due."""
+        kept = list(misses)
+        while kept:
+            prompt = self._build_prompt(kept)
+            cost = len(prompt) // CHARS_PER_TOKEN + OUTPUT_TOKENS_PER_RUN * len(kept)
+            if self._tokens.available() >= cost:
+                break
+            kept.pop()
+        if kept and not self._calls.take(1):
+            kept = []
+        if not kept:
+            prompt, cost = "", 0
+        else:
+            self._tokens.take(cost)
+        deferred = misses[len(kept):]
+        if deferred:
+            self.stats["deferred"] += len(deferred)
+            with self._lock:
+                for run_id, _, _ in deferred:
+                    self._last_judged.pop(run_id, None)
+                    self._due[run_id] = None
+        return prompt, kept, cost
+
+    @staticmethod
+    def _build_prompt(misses: list[tuple[str, str, list]]) -> str:
+        contexts = {run_id: {"recent_metrics": rows} for run_id, _, rows in misses}
+        return BATCH_PROMPT + json.dumps(contexts, ensure_ascii=True, default=str)
+
+    def _apply(self, verdicts: dict[str, dict]) -> int:
+        raised = 0
+        for run_id, decision in verdicts.items():
+            self.stats["runs_judged"] += 1
+            if decision.get("action") != "alert":
+                continue
+            run = self._runs.get(run_id)
+            if not run or run.get("status") not in ("launching", "running"):
+                continue
+            message = (decision.get("message") or "Metric anomaly detected.").strip()
+            if len(message) > 600:
+                message = f"{message[:597]}..."
+            signature = hashlib.sha1(message.encode("utf-8")).hexdigest()
+            if seen_recent_signature(self._alert_state.setdefault(run_id, {}), "alert_judge", signature):
+                continue
+            self._on_decision(run_id, {**decision, "message": message, "source": "alert_judge"})
+            raised += 1
+        return raised
+
+    def _store(self, misses: list[tuple[str, str, list]], verdicts: dict[str, dict]) -> None:
+        with self._lock:
+            for run_id, key, _ in misses:
+                self._cache[key] = verdicts[run_id]
+                self._cache.move_to_end(key)
+            while len(self._cache) > CACHE_SIZE:
+                self._cache.popitem(last=False)
+
+    def _prepare(self) -> tuple[dict, list, str, int]:
+        cached, misses = self._take_batch()
+        prompt, kept, cost = self._fit_budget(misses)
+        return cached, kept, prompt, cost
+
+    def _finish(self, cached: dict, kept: list, cost: int, output: Optional[str]) -> int:
+        verdicts = dict(cached)
+        if kept:
+            self.stats["model_calls"] += 1
+            self.stats["tokens_spent"] += cost
+            batch = parse_batch_verdicts(output, [run_id for run_id, _, _ in kept])
+            self._store(kept, batch)
+            verdicts.update(batch)
+        return self._apply(verdicts)
+
+    def judge_due(self) -> int:
+        """Judge one batch synchronously; returns alerts raised."""
+        cached, kept, prompt, cost = self._prepare()
+        output = self._run_model(prompt) if kept else None
+        return self._finish(cached, kept, cost, output)
+
+    async def judge_due_async(self) -> int:
+        """``judge_due`` with the model call moved off the event loop."""
+        cached, kept, prompt, cost = self._prepare()
+        output = None
+        if kept:
+            output = await asyncio.get_running_loop().run_in_executor(None, self._run_model, prompt)
+        return self._finish(cached, kept, cost, output)
+
+    # -- background loop ---------------------------------------------------
+
+    def ensure_running(self) -> None:
+        if not self.enabled or (self._task is not None and not self._task.done()):
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._task = loop.create_task(self._loop())
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.batch_window)
+            if not self._due:
+                continue
+            try:
+                await self.judge_due_async()
+            except Exception as e:
+                logger.warning("Alert judge batch failed: %s", e)
+
+    def summary(self) -> dict:
+        with self._lock:
+            due = len(self._due)
+        return {
+            "enabled": self.enabled,
+            "due_runs": due,
+            "cached_verdicts": len(self._cache),
+            "calls_available": round(self._calls.available(), 2),
+            "tokens_available": int(self._tokens.available()),
+            **self.stats,
+        }
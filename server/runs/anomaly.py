@@ -0,0 +1,482 @@
+"""
+Research Agent Server — Metric Anomaly Detection
+
+Runs on the server against every batch of metric rows a run ingests,
+whether they came from a job sidecar (``/runs/{id}/events``,
+``/runs/{id}/metrics``) or the in-server run monitor, so detection no
+longer depends on where a run executes.
+
+Each run gets its own set of detectors, built from the run's
+``anomaly_detectors`` config, else its sweep's, else ``DEFAULT_DETECTORS``:
+
+- ``ewma_zscore`` — EWMA mean/variance of a metric; flags a row whose
+  z-score against the running estimate exceeds ``threshold``.
+- ``plateau`` — no relative improvement of ``min_delta`` in ``patience`` rows.
+- ``divergence`` — validation loss rising for ``patience`` evaluations while
+  the training loss keeps falling.
+- ``nonfinite`` — NaN/Inf in any loss or gradient-norm column; re-armed
+  for a column once its value is finite again.
+- ``grad_explosion`` — gradient norm above ``factor`` times its EWMA.
+
+Every detector keeps O(1) state (a few floats and counters) and processes a
+batch with NumPy, so the cost per ingested row is small enough to run on
+every run.  Detectors re-arm after ``cooldown`` rows, so one incident
+raises one alert.
+"""
+
+import logging
+import math
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Iterable, Optional
+
+import numpy as np
+
+logger = logging.getLogger("research-agent-server")
+
+LOSS_KEYS = ("loss", "train/loss", "train_loss")
+VAL_LOSS_KEYS = ("val_loss", "val/loss", "eval/loss", "eval_loss", "validation/loss")
+GRAD_NORM_KEYS = ("grad_norm", "train/grad_norm", "gradient_norm", "global_grad_norm")
+
+DEFAULT_DETECTORS: list[dict] = [
+    {"type": "nonfinite"},
+    {"type": "ewma_zscore", "metric": "loss"},
+    {"type": "grad_explosion"},
+    {"type": "divergence"},
+    {"type": "plateau"},
+]
+
+# Rows per chunk when evaluating an exponential recurrence in closed form;
+# keeps decay**-n well inside float64 range for any sensible alpha.
+_SCAN_CHUNK = 64
+
+
+@dataclass
+class Anomaly:
+    detector: str
+    metric: str
+    step: Any
+    value: float
+    message: str
+    severity: str = "warning"
+
+    def signature(self) -> str:
+        return f"{self.detector}:{self.metric}"
+
+
+def _to_float(value: Any) -> Optional[float]:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return None
+
+
+def _column(rows: list[dict], keys: Iterable[str]) -> np.ndarray:
+    """Values of the first present key in ``keys`` per row; NaN where absent.
+
+    Absent and NaN-valued cells are indistinguishable here — detectors that
+    care about NaN values (``nonfinite``) read the rows themselves.
+    """
+    keys = tuple(keys)
+    out = np.full(len(rows), np.nan)
+    for i, row in enumerate(rows):
+        for key in keys:
+            if key in row:
+                value = _to_float(row[key])
+                if value is not None:
+                    out[i] = value
+                break
+    return out
+
+
+def _steps(rows: list[dict]) -> list[Any]:
+    return [row.get("step", row.get("_step")) for row in rows]
+
+
+def decay_scan(inputs: np.ndarray, prev: float, decay: float) -> np.ndarray:
+    """Evaluate ``y[k] = decay * y[k-1] + inputs[k]`` (``y[-1] = prev``) vectorised.
+
+    Uses the closed form ``y[k] = decay**(k+1) * (prev + sum_j inputs[j] / decay**(j+1))``
+    chunk by chunk.
+    """
+    out = np.empty(len(inputs))
+    if decay <= 0.0:
+        out[:] = inputs
+        return out
+    for start in range(0, len(inputs), _SCAN_CHUNK):
+        chunk = inputs[start:start + _SCAN_CHUNK]
+        powers = decay ** np.arange(1, len(chunk) + 1)
+        out[start:start + len(chunk)] = powers * (prev + np.cumsum(chunk / powers))
+        prev = out[start + len(chunk) - 1]
+    return out
+
+
+class Detector(ABC):
+    """Base class: ``update`` consumes a batch and returns any anomalies."""
+
+    kind = ""
+    default_params: dict = {}
+
+    def __init__(self, metric: Optional[str] = None, params: Optional[dict] = None) -> None:
+        unknown = set(params or {}) - set(self.default_params)
+        if unknown:
+            raise ValueError(f"Unknown {self.kind} parameter(s): {', '.join(sorted(unknown))}")
+        self.params = {**self.default_params, **(params or {})}
+        self.metric = metric
+        self.rows_seen = 0
+        self.last_alert_row: Optional[int] = None
+
+    def _keys(self, default: tuple[str, ...]) -> tuple[str, ...]:
+        return (self.metric,) if self.metric else default
+
+    def _armed(self, row_index: int) -> bool:
+        cooldown = self.params.get("cooldown", 0)
+        return self.last_alert_row is None or row_index - self.last_alert_row >= cooldown
+
+    @abstractmethod
+    def update(self, rows: list[dict], steps: list[Any]) -> list[Anomaly]:
+        """Consume ``rows`` (with their ``steps``) and return new anomalies."""
+
+
+class EwmaZScoreDetector(Detector):
+    kind = "ewma_zscore"
+    default_params = {"alpha": 0.05, "threshold": 6.0, "warmup": 20, "two_sided": False, "cooldown": 200}
+
+    def __init__(self, metric=None, params=None) -> None:
+        super().__init__(metric, params)
+        self.n = 0
+        self.mean = 0.0
+        self.var = 0.0
+
+    def update(self, rows, steps):
+        values = _column(rows, self._keys(LOSS_KEYS))
+        positions = np.flatnonzero(np.isfinite(values))
+        base_row = self.rows_seen
+        self.rows_seen += len(rows)
+        if positions.size == 0:
+            return []
+        x = values[positions]
+        if self.n == 0:
+            self.mean, self.var, self.n = float(x[0]), 0.0, 1
+            x, positions = x[1:], positions[1:]
+            if x.size == 0:
+                return []
+
+        alpha = float(self.params["alpha"])
+        means = decay_scan(alpha * x, self.mean, 1.0 - alpha)
+        prev_means = np.concatenate(([self.mean], means[:-1]))
+        diff = x - prev_means
+        variances = decay_scan((1.0 - alpha) * alpha * diff * diff, self.var, 1.0 - alpha)
+        prev_std = np.sqrt(np.concatenate(([self.var], variances[:-1])))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            z = np.where(prev_std > 0, diff / prev_std, 0.0)
+        score = np.abs(z) if self.params["two_sided"] else z
+        eligible = (self.n + np.arange(x.size)) >= int(self.params["warmup"])
+        hits = np.flatnonzero(eligible & (score > float(self.params["threshold"])))
+
+        self.n += x.size
+        self.mean, self.var = float(means[-1]), float(variances[-1])
+
+        for hit in hits:
+            row_index = base_row + int(positions[hit])
+            if not self._armed(row_index):
+                continue
+            self.last_alert_row = row_index
+            metric = self.metric or "loss"
+            return [Anomaly(
+                self.kind, metric, steps[positions[hit]], float(x[hit]),
+                f"{metric} jumped to {x[hit]:.4g} (z={z[hit]:.1f} vs EWMA {prev_means[hit]:.4g}).",
+            )]
+        return []
+
+
+class GradExplosionDetector(Detector):
+    kind = "grad_explosion"
+    default_params = {"alpha": 0.05, "factor": 10.0, "warmup": 20, "cooldown": 200}
+
+    def __init__(self, metric=None, params=None) -> None:
+        super().__init__(metric, params)
+        self.n = 0
+        self.mean = 0.0
+
+    def update(self, rows, steps):
+        values = _column(rows, self._keys(GRAD_NORM_KEYS))
+        positions = np.flatnonzero(np.isfinite(values))
+        base_row = self.rows_seen
+        self.rows_seen += len(rows)
+        if positions.size == 0:
+            return []
+        x = values[positions]
+        if self.n == 0:
+            self.mean, self.n = float(x[0]), 1
+            x, positions = x[1:], positions[1:]
+            if x.size == 0:
+                return []
+
+        alpha = float(self.params["alpha"])
+        means = decay_scan(alpha * x, self.mean, 1.0 - alpha)
+        prev_means = np.concatenate(([self.mean], means[:-1]))
+        eligible = (self.n + np.arange(x.size)) >= int(self.params["warmup"])
+        hits = np.flatnonzero(eligible & (prev_means > 0) & (x > float(self.params["factor"]) * prev_means))
+
+        self.n += x.size
+        self.mean = float(means[-1])
+
+        for hit in hits:
+            row_index = base_row + int(positions[hit])
+            if not self._armed(row_index):
+                continue
+            self.last_alert_row = row_index
+            metric = self.metric or "grad_norm"
+            return [Anomaly(
+                self.kind, metric, steps[positions[hit]], float(x[hit]),
+                f"Gradient norm exploded: {metric}={x[hit]:.4g}, "
+                f"{x[hit] / prev_means[hit]:.0f}x its running average {prev_means[hit]:.4g}.",
+            )]
+        return []
+
+
+class PlateauDetector(Detector):
+    kind = "plateau"
+    default_params = {"patience": 1000, "min_delta": 0.01}
+
+    def __init__(self, metric=None, params=None) -> None:
+        super().__init__(metric, params)
+        self.best = math.inf
+        self.since_best = 0
+        self.alerted = False
+
+    def update(self, rows, steps):
+        values = _column(rows, self._keys(LOSS_KEYS))
+        self.rows_seen += len(rows)
+        positions = np.flatnonzero(np.isfinite(values))
+        if positions.size == 0:
+            return []
+        x = values[positions]
+        running_best = np.minimum.accumulate(np.concatenate(([self.best], x)))
+        prev_best = running_best[:-1]
+        with np.errstate(invalid="ignore"):
+            improved = x < prev_best - float(self.params["min_delta"]) * np.abs(prev_best)
+        improved |= ~np.isfinite(prev_best)
+
+        index = np.arange(x.size)
+        last_improved = np.maximum.accumulate(np.where(improved, index, -1))
+        since = np.where(last_improved >= 0, index - last_improved, self.since_best + index + 1)
+
+        # ``since`` counts up by one per row, so each stall crosses ``patience`` exactly once.
+        # A crossing before any improvement in this batch belongs to the previous stall.
+        hits = [
+            int(hit) for hit in np.flatnonzero(since == int(self.params["patience"]))
+            if last_improved[hit] >= 0 or not self.alerted
+        ]
+        if improved.any():
+            self.alerted = False
+        if hits and last_improved[hits[-1]] == last_improved[-1]:
+            self.alerted = True
+        self.best = float(running_best[-1])
+        self.since_best = int(since[-1])
+        if not hits:
+            return []
+        hit = hits[0]
+        metric = self.metric or "loss"
+        return [Anomaly(
+            self.kind, metric, steps[positions[hit]], float(x[hit]),
+            f"{metric} has not improved by {float(self.params['min_delta']):.0%} "
+            f"in {int(since[hit])} logged steps (best {running_best[hit + 1]:.4g}).",
+            severity="info",
+        )]
+
+
+class DivergenceDetector(Detector):
+    kind = "divergence"
+    default_params = {"val_metric": None, "alpha": 0.1, "patience": 3, "min_delta": 0.05}
+
+    def __init__(self, metric=None, params=None) -> None:
+        super().__init__(metric, params)
+        self.train_n = 0
+        self.train_mean = 0.0
+        self.best_val: Optional[float] = None
+        self.train_at_best = 0.0
+        self.worse_evals = 0
+        self.alerted = False
+
+    def update(self, rows, steps):
+        self.rows_seen += len(rows)
+        train = _column(rows, self._keys(LOSS_KEYS))
+        val_metric = self.params["val_metric"]
+        val = _column(rows, (val_metric,) if val_metric else VAL_LOSS_KEYS)
+
+        train_pos = np.flatnonzero(np.isfinite(train))
+        train_means = np.empty(0)
+        if train_pos.size:
+            x = train[train_pos]
+            if self.train_n == 0:
+                # Seed with the first value so the EWMA does not start at zero.
+                self.train_mean = float(x[0])
+            alpha = float(self.params["alpha"])
+            train_means = decay_scan(alpha * x, self.train_mean, 1.0 - alpha)
+            self.train_n += x.size
+
+        findings = []
+        val_pos = np.flatnonzero(np.isfinite(val))
+        # The train EWMA as of each validation row (last train row at or before it).
+        lookup = np.searchsorted(train_pos, val_pos, side="right") - 1
+        min_delta = float(self.params["min_delta"])
+        for pos, idx in zip(val_pos, lookup):
+            v = float(val[pos])
+            t = float(train_means[idx]) if idx >= 0 else self.train_mean
+            if self.best_val is None or v < self.best_val:
+                self.best_val, self.train_at_best = v, t
+                self.worse_evals, self.alerted = 0, False
+            elif v > self.best_val + min_delta * abs(self.best_val) and t < self.train_at_best:
+                self.worse_evals += 1
+                if self.worse_evals >= int(self.params["patience"]) and not self.alerted:
+                    self.alerted = True
+                    findings.append(Anomaly(
+                        self.kind, val_metric or "val_loss", steps[pos], v,
+                        f"Validation loss is diverging from training loss: val={v:.4g} "
+                        f"(best {self.best_val:.4g}) while train loss fell to {t:.4g}.",
+                    ))
+            else:
+                self.worse_evals = 0
+
+        if train_means.size:
+            self.train_mean = float(train_means[-1])
+        return findings
+
+
+class NonFiniteDetector(Detector):
+    kind = "nonfinite"
+    default_params = {}
+
+    def __init__(self, metric=None, params=None) -> None:
+        super().__init__(metric, params)
+        self.alerted: set[str] = set()
+
+    def _watched(self, key: str) -> bool:
+        if self.metric:
+            return key == self.metric
+        lowered = key.lower()
+        return "loss" in lowered or "grad_norm" in lowered
+
+    def update(self, rows, steps):
+        self.rows_seen += len(rows)
+        keys = {key for row in rows for key in row if self._watched(key)}
+        findings = []
+        for key in sorted(keys):
+            values = np.array(
+                [_to_float(row[key]) if key in row else 0.0 for row in rows], dtype=float
+            )
+            # Non-numeric cells came back as None -> NaN; treat them as absent.
+            numeric = np.array([key in row and _to_float(row[key]) is not None for row in rows])
+            checked = np.flatnonzero(numeric)
+            if checked.size == 0:
+                continue
+            finite = np.isfinite(values[checked])
+            # An incident starts at a NaN/Inf whose previous value was finite.
+            was_finite = np.concatenate(([key not in self.alerted], finite[:-1]))
+            for pos in checked[~finite & was_finite]:
+                findings.append(Anomaly(
+                    self.kind, key, steps[pos], float(values[pos]),
+                    f"{key} became NaN/Inf. This run is unstable.",
+                    severity="critical",
+                ))
+            if finite[-1]:
+                self.alerted.discard(key)
+            else:
+                self.alerted.add(key)
+        return findings
+
+
+DETECTOR_TYPES: dict[str, type[Detector]] = {
+    cls.kind: cls
+    for cls in (EwmaZScoreDetector, GradExplosionDetector, PlateauDetector, DivergenceDetector, NonFiniteDetector)
+}
+
+
+def build_detectors(specs: list[dict]) -> list[Detector]:
+    """Instantiate detectors from config dicts; raises ValueError on bad specs."""
+    detectors = []
+    for spec in specs:
+        kind = str(spec.get("type") or "").strip().lower()
+        cls = DETECTOR_TYPES.get(kind)
+        if cls is None:
+            raise ValueError(f"Unknown anomaly detector type: {kind or '<missing>'}")
+        detectors.append(cls(metric=spec.get("metric") or None, params=spec.get("params") or {}))
+    return detectors
+
+
+def validate_detector_specs(specs: list[dict]) -> list[dict]:
+    """Return normalised copies of ``specs`` after checking they build."""
+    normalised = [
+        {"type": str(s.get("type") or "").strip().lower(), "metric": s.get("metric") or None,
+         "params": dict(s.get("params") or {})}
+        for s in specs
+    ]
+    build_detectors(normalised)
+    return normalised
+
+
+class AnomalyEngine:
+    """Per-run detector state plus config resolution (run > sweep > default)."""
+
+    def __init__(
+        self,
+        sweeps: dict,
+        default_specs: Optional[list[dict]] = None,
+        enabled: bool = True,
+    ) -> None:
+        self._sweeps = sweeps
+        self.default_specs = default_specs if default_specs is not None else DEFAULT_DETECTORS
+        self.enabled = enabled
+        # run_id -> (specs the detectors were built from, detectors)
+        self._runs: dict[str, tuple[list[dict], list[Detector]]] = {}
+
+    def specs_for(self, run: dict) -> list[dict]:
+        if run.get("anomaly_detectors") is not None:
+            return run["anomaly_detectors"]
+        sweep = self._sweeps.get(run.get("sweep_id") or "")
+        if sweep and sweep.get("anomaly_detectors") is not None:
+            return sweep["anomaly_detectors"]
+        return self.default_specs
+
+    def _detectors(self, run_id: str, run: dict) -> list[Detector]:
+        specs = self.specs_for(run)
+        cached = self._runs.get(run_id)
+        if cached is not None and cached[0] == specs:
+            return cached[1]
+        try:
+            detectors = build_detectors(specs)
+        except ValueError as e:
+            logger.warning(f"Invalid anomaly detectors for run {run_id}: {e}")
+            detectors = []
+        self._runs[run_id] = (list(specs), detectors)
+        return detectors
+
+    def process(self, run_id: str, run: dict, rows: list) -> list[Anomaly]:
+        """Feed one ingested batch through the run's detectors."""
+        if not self.enabled:
+            return []
+        rows = [row for row in rows if isinstance(row, dict)]
+        if not rows:
+            return []
+        steps = _steps(rows)
+        findings: list[Anomaly] = []
+        for detector in self._detectors(run_id, run):
+            try:
+                findings.extend(detector.update(rows, steps))
+            except Exception as e:
+                logger.warning(f"Anomaly detector {detector.kind} failed for run {run_id}: {e}")
+        return findings
+
+    def forget(self, run_id: str) -> None:
+        self._runs.pop(run_id, None)
+
+    def summary(self) -> dict:
+        return {"enabled": self.enabled, "tracked_runs": len(self._runs), "default_detectors": self.default_specs}
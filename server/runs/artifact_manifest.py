@@ -0,0 +1,219 @@
+"""
+Research Agent Server — Artifact Manifests
+
+``/runs/{id}/artifacts`` used to ``listdir`` the run's ``artifacts/`` folder
+on every call and label everything "other".  ``ArtifactManifest`` keeps
+``<run_dir>/artifact_manifest.json`` instead: one entry per file under
+``artifacts/`` (walked recursively, following the symlinks runs use to
+publish checkpoints) with its size, mtime, detected type and, once
+computed, its sha256.
+
+``refresh()`` re-stats the tree and keeps the entry of every file whose size
+and mtime did not change, including its hash, so only new or modified files
+cost anything.  Hashes are computed lazily by ``compute_hashes`` (on request,
+within a byte budget) because checkpoints can be many GB.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+logger = logging.getLogger("research-agent-server")
+
+MANIFEST_NAME = "artifact_manifest.json"
+ARTIFACTS_DIR = "artifacts"
+MAX_ENTRIES = 10000
+REFRESH_INTERVAL_SECONDS = 5.0
+HASH_CHUNK_BYTES = 4 * 1024 * 1024
+
+_TYPE_EXTENSIONS = {
+    "checkpoint": {".pt", ".pth", ".ckpt", ".safetensors", ".bin", ".h5", ".keras", ".onnx", ".pkl", ".npz", ".msgpack"},
+    "image": {".png", ".jpg", ".jpeg", ".gif", ".svg", ".webp", ".bmp", ".tif", ".tiff"},
+    "table": {".csv", ".tsv", ".parquet", ".feather", ".arrow", ".jsonl", ".xlsx"},
+    "text": {".txt", ".log", ".md", ".json", ".yaml", ".yml", ".toml", ".cfg", ".ini", ".py", ".sh"},
+}
+
+
+def detect_type(rel_path: str) -> str:
+    """Artifact type from the path: checkpoint, image, table, text, wandb or other."""
+    parts = rel_path.lower().split("/")
+    if "wandb" in parts[:-1] or parts[-1].endswith(".wandb"):
+        return "wandb"
+    ext = os.path.splitext(parts[-1])[1]
+    for kind, extensions in _TYPE_EXTENSIONS.items():
+        if ext in extensions:
+            return kind
+    if any(part.startswith("checkpoint") for part in parts[:-1]):
+        return "checkpoint"
+    return "other"
+
+
+def _walk(root: str) -> dict[str, tuple[str, os.stat_result]]:
+    """``rel_path -> (real_path, stat)`` for every file under ``root``."""
+    found: dict[str, tuple[str, os.stat_result]] = {}
+    seen_dirs: set[str] = set()
+    stack = [("", root)]
+    while stack and len(found) < MAX_ENTRIES:
+        rel_dir, directory = stack.pop()
+        real_dir = os.path.realpath(directory)
+        if real_dir in seen_dirs:
+            continue  # symlink cycle
+        seen_dirs.add(real_dir)
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            continue
+        for entry in entries:
+            rel = f"{rel_dir}{entry.name}"
+            try:
+                if entry.is_dir():
+                    stack.append((rel + "/", entry.path))
+                elif entry.is_file():
+                    found[rel] = (os.path.realpath(entry.path), entry.stat())
+            except OSError:
+                continue  # dangling link or vanished file
+    return found
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK_BYTES):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ArtifactManifest:
+    """Cached listing of one run's ``artifacts/`` tree."""
+
+    def __init__(self, run_dir: str) -> None:
+        self.run_dir = run_dir
+        self.path = os.path.join(run_dir, MANIFEST_NAME)
+        self.entries: dict[str, dict] = {}
+        self.refreshed_at = 0.0
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _load(self) -> None:
+        self._loaded = True
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            if data.get("version") == 1 and isinstance(data.get("entries"), dict):
+                self.entries = data["entries"]
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def _save(self) -> None:
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"version": 1, "updated_at": time.time(), "entries": self.entries}, f)
+        os.replace(tmp_path, self.path)
+
+    def refresh(self, max_age: float = REFRESH_INTERVAL_SECONDS) -> bool:
+        """Re-stat the tree unless refreshed within ``max_age`` seconds; True if anything changed."""
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            now = time.time()
+            if now - self.refreshed_at < max_age:
+                return False
+            self.refreshed_at = now
+            found = _walk(os.path.join(self.run_dir, ARTIFACTS_DIR))
+            entries: dict[str, dict] = {}
+            changed = len(found) != len(self.entries)
+            for rel, (real_path, st) in found.items():
+                old = self.entries.get(rel)
+                if old and old["size"] == st.st_size and old["mtime_ns"] == st.st_mtime_ns and old["path"] == real_path:
+                    entries[rel] = old
+                    continue
+                changed = True
+                entries[rel] = {
+                    "path": real_path,
+                    "size": st.st_size,
+                    "mtime_ns": st.st_mtime_ns,
+                    "type": detect_type(rel),
+                    "sha256": None,
+                }
+            self.entries = entries
+            if changed:
+                try:
+                    self._save()
+                except OSError as e:
+                    logger.warning("Could not write %s: %s", self.path, e)
+            return changed
+
+    def compute_hashes(self, max_bytes: Optional[int] = None) -> int:
+        """Hash entries that have none yet, up to ``max_bytes`` of content; returns how many."""
+        with self._lock:
+            pending = [(rel, dict(entry)) for rel, entry in self.entries.items() if not entry.get("sha256")]
+        hashed, budget = {}, max_bytes
+        for rel, entry in sorted(pending, key=lambda item: item[1]["size"]):
+            if budget is not None and entry["size"] > budget:
+                break
+            try:
+                digest = _sha256(entry["path"])
+                st = os.stat(entry["path"])
+            except OSError:
+                continue
+            if (st.st_size, st.st_mtime_ns) != (entry["size"], entry["mtime_ns"]):
+                continue  # modified while hashing; the next refresh picks it up
+            hashed[rel] = (entry["size"], entry["mtime_ns"], digest)
+            if budget is not None:
+                budget -= entry["size"]
+        if not hashed:
+            return 0
+        with self._lock:
+            for rel, (size, mtime_ns, digest) in hashed.items():
+                current = self.entries.get(rel)
+                # Skip files that changed while being hashed.
+                if current and current["size"] == size and current["mtime_ns"] == mtime_ns:
+                    current["sha256"] = digest
+            try:
+                self._save()
+            except OSError as e:
+                logger.warning("Could not write %s: %s", self.path, e)
+        return len(hashed)
+
+    def relinked(self, names: list[str]) -> None:
+        """Re-stat files whose content is unchanged but whose inode was swapped
+        (runs/blob_store.py), keeping their hashes."""
+        with self._lock:
+            for name in names:
+                entry = self.entries.get(name)
+                try:
+                    st = os.stat(entry["path"]) if entry else None
+                except OSError:
+                    continue
+                if st is not None and st.st_size == entry["size"]:
+                    entry["mtime_ns"] = st.st_mtime_ns
+            try:
+                self._save()
+            except OSError as e:
+                logger.warning("Could not write %s: %s", self.path, e)
+
+    def listing(self) -> list[dict]:
+        with self._lock:
+            return [{"name": rel, **entry} for rel, entry in sorted(self.entries.items())]
+
+
+_manifests: "OrderedDict[str, ArtifactManifest]" = OrderedDict()
+_manifests_lock = threading.Lock()
+_MAX_CACHED_MANIFESTS = 256
+
+
+def get_manifest(run_dir: str) -> ArtifactManifest:
+    """Shared ``ArtifactManifest`` for ``run_dir`` (kept for the most recent runs)."""
+    with _manifests_lock:
+        manifest = _manifests.get(run_dir)
+        if manifest is None:
+            manifest = _manifests[run_dir] = ArtifactManifest(run_dir)
+            while len(_manifests) > _MAX_CACHED_MANIFESTS:
+                _manifests.popitem(last=False)
+        _manifests.move_to_end(run_dir)
+        return manifest
@@ -0,0 +1,261 @@
+"""
+Research Agent Server — Content-Addressed Artifact Store
+
+Reruns and sweep members often write byte-identical datasets, tokenizer
+files or base checkpoints into their own ``artifacts/``.  With
+``RESEARCH_AGENT_ARTIFACT_DEDUP=1`` the ``ArtifactDeduper`` visits runs once
+they have ended, hashes their artifacts through the run's artifact manifest
+(runs/artifact_manifest.py) and moves every file of at least ``min_bytes``
+into ``DATA_DIR/blobs/<sha256[:2]>/<sha256>``:
+
+- the first copy of a digest is hardlinked into the store (no data copied);
+- later copies are replaced by a hardlink to the stored blob, freeing their
+  space.
+
+Each blob's hardlink count is its reference count: run directories that are
+deleted drop their links, and ``BlobStore.gc`` removes blobs whose only link
+left is the store's own.  Blobs are made read-only so a stray in-place write
+cannot change every run's copy at once, and ``unshare_artifacts`` gives a
+run private copies again before it is relaunched.
+
+Only regular files physically inside ``artifacts/`` are stored; symlinked
+artifacts stay where they are, and files on another filesystem than
+``DATA_DIR`` are skipped (hardlinks cannot cross devices).
+"""
+
+import asyncio
+import logging
+import os
+import shutil
+import stat
+import time
+from typing import Any, Callable, Optional
+
+from core import config
+from runs.artifact_manifest import ARTIFACTS_DIR, get_manifest
+
+logger = logging.getLogger("research-agent-server")
+
+BLOB_DIR_NAME = "blobs"
+_TERMINAL = ("finished", "failed", "stopped")
+
+
+class BlobStore:
+    """sha256-addressed files under ``root`` (default ``DATA_DIR/blobs``)."""
+
+    def __init__(self, root: Optional[str] = None) -> None:
+        self._root = root
+
+    @property
+    def root(self) -> str:
+        return self._root or os.path.join(config.DATA_DIR, BLOB_DIR_NAME)
+
+    def blob_path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], digest)
+
+    def ingest(self, path: str, digest: str) -> int:
+        """Store ``path`` under ``digest`` or replace it with the stored blob.
+
+        Returns the bytes freed (0 when ``path`` became the blob or was skipped).
+        """
+        st = os.lstat(path)
+        if not stat.S_ISREG(st.st_mode):
+            return 0
+        blob = self.blob_path(digest)
+        try:
+            blob_st = os.stat(blob)
+        except FileNotFoundError:
+            os.makedirs(os.path.dirname(blob), exist_ok=True)
+            os.link(path, blob)
+            os.chmod(blob, 0o444)
+            return 0
+        if blob_st.st_ino == st.st_ino:
+            return 0
+        if blob_st.st_size != st.st_size:
+            logger.warning("Blob %s does not match %s; not deduplicating", blob, path)
+            return 0
+        tmp_path = f"{path}.blob-{os.getpid()}"
+        os.link(blob, tmp_path)
+        os.replace(tmp_path, path)
+        return st.st_size
+
+    def gc(self) -> dict:
+        """Remove blobs no run directory links to any more."""
+        removed, freed = 0, 0
+        for prefix in _listdir(self.root):
+            directory = os.path.join(self.root, prefix)
+            for name in _listdir(directory):
+                blob = os.path.join(directory, name)
+                try:
+                    st = os.stat(blob)
+                    if st.st_nlink <= 1:
+                        os.remove(blob)
+                        removed += 1
+                        freed += st.st_size
+                except OSError:
+                    continue
+        return {"removed": removed, "freed_bytes": freed}
+
+    def summary(self) -> dict:
+        blobs, stored, references, saved = 0, 0, 0, 0
+        for prefix in _listdir(self.root):
+            directory = os.path.join(self.root, prefix)
+            for name in _listdir(directory):
+                try:
+                    st = os.stat(os.path.join(directory, name))
+                except OSError:
+                    continue
+                refs = st.st_nlink - 1
+                blobs += 1
+                stored += st.st_size
+                references += refs
+                saved += st.st_size * max(0, refs - 1)
+        return {"root": self.root, "blobs": blobs, "stored_bytes": stored,
+                "references": references, "saved_bytes": saved}
+
+
+def _listdir(path: str) -> list[str]:
+    try:
+        return os.listdir(path)
+    except OSError:
+        return []
+
+
+def unshare_artifacts(run_dir: str) -> int:
+    """Replace hardlinked artifacts with private, writable copies; returns how many."""
+    artifacts = os.path.join(run_dir, ARTIFACTS_DIR)
+    count = 0
+    for directory, _, files in os.walk(artifacts):
+        for name in files:
+            path = os.path.join(directory, name)
+            try:
+                st = os.lstat(path)
+                if not stat.S_ISREG(st.st_mode) or st.st_nlink <= 1:
+                    continue
+                tmp_path = f"{path}.unshare-{os.getpid()}"
+                shutil.copyfile(path, tmp_path)
+                os.chmod(tmp_path, 0o644)
+                os.replace(tmp_path, path)
+                count += 1
+            except OSError as e:
+                logger.warning("Could not unshare %s: %s", path, e)
+    return count
+
+
+class ArtifactDeduper:
+    """Moves ended runs' artifacts into a ``BlobStore`` and collects unused blobs."""
+
+    def __init__(
+        self,
+        runs: dict,
+        store: BlobStore,
+        enabled: bool = False,
+        min_bytes: int = 1024 * 1024,
+        settle_seconds: float = 60.0,
+        interval_seconds: float = 300.0,
+        save_fn: Optional[Callable[[], Any]] = None,
+    ) -> None:
+        self._runs = runs
+        self.store = store
+        self.enabled = enabled
+        self.min_bytes = min_bytes
+        self.settle_seconds = settle_seconds
+        self.interval_seconds = interval_seconds
+        self._save_fn = save_fn
+        self.stats = {"runs": 0, "files": 0, "freed_bytes": 0, "gc_removed": 0, "errors": 0}
+        self._task: Optional[asyncio.Task] = None
+
+    def dedup_run(self, run_dir: str) -> int:
+        """Store one run's artifacts; returns the bytes freed."""
+        inside = os.path.realpath(os.path.join(run_dir, ARTIFACTS_DIR)) + os.sep
+        manifest = get_manifest(run_dir)
+        manifest.refresh(max_age=0)
+        manifest.compute_hashes()
+        freed, relinked = 0, []
+        for entry in manifest.listing():
+            if entry["size"] < self.min_bytes or not entry.get("sha256") or not entry["path"].startswith(inside):
+                continue
+            try:
+                st = os.stat(entry["path"])
+                if (st.st_size, st.st_mtime_ns) != (entry["size"], entry["mtime_ns"]):
+                    continue  # changed since it was hashed
+                saved = self.store.ingest(entry["path"], entry["sha256"])
+            except OSError as e:  # EXDEV, permissions, vanished files
+                self.stats["errors"] += 1
+                logger.debug("Not storing %s: %s", entry["path"], e)
+                continue
+            self.stats["files"] += 1
+            if saved:
+                freed += saved
+                relinked.append(entry["name"])
+        if relinked:
+            manifest.relinked(relinked)  # they now carry the blob's mtime
+        return freed
+
+    def due(self, now: float) -> list[tuple[str, str]]:
+        """``(run_id, run_dir)`` for runs that ended since they were last visited."""
+        due = []
+        for run_id, run in list(self._runs.items()):
+            ended_at = run.get("ended_at")
+            if (
+                not run.get("run_dir") or run.get("status") not in _TERMINAL or not ended_at
+                or now - ended_at < self.settle_seconds
+                or (run.get("artifacts_deduped_at") or 0) >= ended_at
+            ):
+                continue
+            due.append((run_id, run["run_dir"]))
+        return due
+
+    def dedup_runs(self, due: list[tuple[str, str]]) -> list[str]:
+        """Filesystem half of a pass (safe off the event loop): dedup, then GC.
+
+        Touches no run records; returns the ids visited for ``record``.
+        """
+        visited = []
+        for run_id, run_dir in due:
+            try:
+                self.stats["freed_bytes"] += self.dedup_run(run_dir)
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.warning("Artifact dedup failed for %s: %s", run_dir, e)
+            self.stats["runs"] += 1
+            visited.append(run_id)
+        self.stats["gc_removed"] += self.store.gc()["removed"]
+        return visited
+
+    def record(self, visited: list[str], now: float) -> None:
+        """Mark runs visited and save; runs where the runs dict is owned (the event loop)."""
+        for run_id in visited:
+            run = self._runs.get(run_id)
+            if run is not None:
+                run["artifacts_deduped_at"] = now
+        if visited and self._save_fn:
+            self._save_fn()
+
+    def run_due(self, now: Optional[float] = None) -> int:
+        """Deduplicate every run that ended since it was last visited, then GC."""
+        now = time.time() if now is None else now
+        visited = self.dedup_runs(self.due(now))
+        self.record(visited, now)
+        return len(visited)
+
+    def summary(self) -> dict:
+        return {"enabled": self.enabled, "min_bytes": self.min_bytes, **self.stats, "store": self.store.summary()}
+
+    def ensure_running(self) -> None:
+        if not self.enabled or (self._task is not None and not self._task.done()):
+            return
+        try:
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+        except RuntimeError:
+            pass
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                now = time.time()
+                visited = await asyncio.to_thread(self.dedup_runs, self.due(now))
+                self.record(visited, now)
+            except Exception as e:
+                logger.error("Artifact dedup pass failed: %s", e)
+            await asyncio.sleep(self.interval_seconds)
@@ -0,0 +1,100 @@
+"""
+Research Agent Server — Run Dependencies
+
+A run may list upstream runs in ``depends_on``; it stays in the queue until
+they reach a terminal state and is launched by the next dispatch pass,
+which every terminal status update triggers.  ``dependency_condition``
+decides what counts as done:
+
+- ``on_success`` (default): every upstream run finished.  An upstream run
+  that failed, was stopped or was deleted can never satisfy this, so the
+  dependent run fails (or is stopped) as well, and so on down the graph.
+- ``on_any``: every upstream run is terminal, whatever the outcome — for
+  cleanup or reporting steps.
+
+Fan-out (many runs depending on one) and fan-in (one run depending on
+many) both fall out of the per-run lists.  Edges are checked for cycles
+when they are created, so the graph the dispatcher sees is always a DAG.
+"""
+
+from typing import Any, Iterable, Optional
+
+DEPENDENCY_CONDITIONS = ("on_success", "on_any")
+DEFAULT_DEPENDENCY_CONDITION = "on_success"
+
+TERMINAL_STATUSES = {"finished", "failed", "stopped"}
+# Runs that have not started yet and are cancelled when a dependency can't be met.
+UNSTARTED_STATUSES = {"ready", "queued"}
+
+
+class DependencyError(ValueError):
+    """Invalid ``depends_on`` list: unknown run, self-reference or cycle."""
+
+
+def normalize_dependency_condition(value: Any) -> Optional[str]:
+    """Return a known condition name, or None for anything else."""
+    if not isinstance(value, str):
+        return None
+    value = value.strip().lower().replace("-", "_")
+    return value if value in DEPENDENCY_CONDITIONS else None
+
+
+def find_cycle(runs: dict, run_id: str, depends_on: Iterable[str]) -> Optional[list[str]]:
+    """Return a path ``[run_id, ..., run_id]`` if these edges would close a loop."""
+    stack = [(dep, [run_id, dep]) for dep in depends_on]
+    seen: set[str] = set()
+    while stack:
+        current, path = stack.pop()
+        if current == run_id:
+            return path
+        if current in seen:
+            continue
+        seen.add(current)
+        for upstream in (runs.get(current) or {}).get("depends_on") or ():
+            stack.append((upstream, path + [upstream]))
+    return None
+
+
+def validate_dependencies(runs: dict, run_id: str, depends_on: Iterable[str]) -> list[str]:
+    """Deduplicate ``depends_on`` and check every id exists and no cycle forms."""
+    deps = list(dict.fromkeys(str(dep).strip() for dep in depends_on if str(dep).strip()))
+    for dep in deps:
+        if dep == run_id:
+            raise DependencyError("A run cannot depend on itself")
+        if dep not in runs:
+            raise DependencyError(f"Dependency not found: {dep}")
+    cycle = find_cycle(runs, run_id, deps)
+    if cycle:
+        raise DependencyError(f"Dependency cycle: {' -> '.join(cycle)}")
+    return deps
+
+
+def dependency_state(runs: dict, run: dict) -> tuple[str, Optional[str]]:
+    """Where ``run`` stands with respect to its upstream runs.
+
+    Returns ``("ready", None)`` when it may launch, ``("waiting", reason)``
+    while upstream runs are still going, and ``("failed" | "stopped", reason)``
+    when the condition can no longer be met.
+    """
+    deps = run.get("depends_on") or ()
+    if not deps:
+        return "ready", None
+    condition = run.get("dependency_condition") or DEFAULT_DEPENDENCY_CONDITION
+    pending: list[str] = []
+    for dep in deps:
+        upstream = runs.get(dep)
+        if upstream is None:
+            return "failed", f"Dependency {dep} no longer exists"
+        status = upstream.get("status")
+        if status not in TERMINAL_STATUSES:
+            pending.append(dep)
+        elif condition == "on_success" and status != "finished":
+            return ("stopped" if status == "stopped" else "failed"), f"Dependency {dep} {status}"
+    if pending:
+        return "waiting", f"Waiting for {len(pending)} dependenc{'y' if len(pending) == 1 else 'ies'}: {', '.join(pending)}"
+    return "ready", None
+
+
+def dependents_of(runs: dict, run_id: str) -> list[str]:
+    """Runs that list ``run_id`` in their ``depends_on``."""
+    return [other_id for other_id, other in runs.items() if run_id in (other.get("depends_on") or ())]
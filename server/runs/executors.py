@@ -0,0 +1,411 @@
+"""
+Research Agent Server — Run Executors
+
+An executor is what actually starts and stops a run's command.  The launch
+queue decides *when* a run starts; the executor decides *how*.
+
+- ``tmux``: the original path — a tmux window running ``job_sidecar.py``,
+  which splits a pane for the job.  Slow to launch but lets you attach.
+- ``subprocess``: spawns the command directly from the server's event loop
+  in its own process group, pipes stdout/stderr into ``run.log`` (through
+  tools/log_filter.py unless ``RESEARCH_AGENT_LOG_FILTER=0``) and reads the
+  exit code from the process itself.  A wrapper shell also writes it to
+  ``job.exit``, so a run that outlives a server restart is still resolved.
+
+Runs without a sidecar are marked ``monitor="server"`` so the in-server
+RunMonitor (runs/monitor.py) tails their metrics and evaluates alerts.
+
+The default comes from ``RESEARCH_AGENT_EXECUTOR``; a run may pick its own
+with the ``executor`` field.
+"""
+
+import asyncio
+import contextlib
+import logging
+import os
+import shutil
+import signal
+import time
+import subprocess
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Optional
+
+from core import config
+from tools.log_filter import RAW_LOG_NAME, filter_argv
+from runs.helpers import (
+    RUN_STATUS_ACTIVE,
+    kill_run_in_tmux,
+    launch_run_in_tmux,
+    prepare_run_dir,
+    release_run_gpus,
+    reserve_run_gpus,
+)
+from runs.tmux_pool import tmux_pool
+
+logger = logging.getLogger("research-agent-server")
+
+LOG_FILTER_DRAIN_SECONDS = 5.0
+EXIT_CODE_FILE = "job.exit"
+
+# ``$0 -c "$1"`` runs the command in a child shell so that ``exit`` inside it
+# still reaches the line that records the exit code.
+_EXIT_CODE_WRAPPER = '"$0" -c "$1"; code=$?; echo "$code" > "$2"; exit "$code"'
+
+
+class RunExecutor(ABC):
+    """Interface every executor backend implements."""
+
+    name = ""
+    # Runs on this machine, so it takes one of the launch queue's slots.
+    local = True
+
+    @abstractmethod
+    def launch(self, run_id: str, run_data: dict) -> Optional[str]:
+        """Start the run; set ``status``/``run_dir``/``launched_at`` on run_data.
+
+        May raise GpuPlacementError to keep the run queued.
+        """
+
+    @abstractmethod
+    def stop(self, run_id: str, run_data: dict) -> None:
+        """Kill the run's process without recording a terminal status."""
+
+    def prepare(self, run_id: str, run_data: dict) -> None:
+        """Raise if ``launch`` could not start the run for a reason other than GPUs.
+
+        The launch queue calls this before stopping another run to make room.
+        """
+        workdir = run_data.get("workdir") or config.WORKDIR
+        if not os.path.isdir(workdir):
+            raise FileNotFoundError(f"Workdir does not exist: {workdir}")
+        prepare_run_dir(run_id, run_data)
+
+    def batch(self) -> contextlib.AbstractContextManager:
+        """Context in which launches/stops may be deferred and submitted together."""
+        return contextlib.nullcontext()
+
+
+class TmuxExecutor(RunExecutor):
+    """``monitor_mode`` "sidecar" starts job_sidecar.py in the window; "server"
+    runs the command directly and leaves watching it to the RunMonitor."""
+
+    name = "tmux"
+
+    def __init__(self, monitor_mode: Optional[str] = None) -> None:
+        self.monitor_mode = monitor_mode or config.RUN_MONITOR_MODE
+
+    def launch(self, run_id: str, run_data: dict) -> Optional[str]:
+        use_sidecar = self.monitor_mode != "server"
+        window = launch_run_in_tmux(run_id, run_data, sidecar=use_sidecar)
+        run_data["monitor"] = "sidecar" if use_sidecar else "server"
+        return window
+
+    def stop(self, run_id: str, run_data: dict) -> None:
+        kill_run_in_tmux(run_id, run_data)
+
+    def batch(self) -> contextlib.AbstractContextManager:
+        return tmux_pool.batch()
+
+
+class SubprocessExecutor(RunExecutor):
+    """Run commands as direct children of the server process.
+
+    ``report_status(run_id, status, **fields)`` feeds lifecycle changes
+    through the same code path as the sidecar's ``POST /runs/{id}/status``.
+    """
+
+    name = "subprocess"
+
+    def __init__(
+        self,
+        report_status: Optional[Callable[..., Any]] = None,
+        stop_grace_seconds: float = 10.0,
+        shell: Optional[str] = None,
+    ) -> None:
+        self._report_status = report_status
+        self.stop_grace_seconds = stop_grace_seconds
+        self.shell = shell or shutil.which("bash") or "/bin/sh"
+        self._procs: dict[str, asyncio.subprocess.Process] = {}
+        self._tasks: dict[str, asyncio.Task] = {}
+
+    def _report(self, run_id: str, status: str, **fields: Any) -> None:
+        if self._report_status is None:
+            return
+        try:
+            self._report_status(run_id, status, **fields)
+        except Exception as e:
+            logger.error("Failed to record %s status for run %s: %s", status, run_id, e)
+
+    def _build_env(self, run_id: str, run_dir: str, run_data: dict) -> dict[str, str]:
+        env = dict(os.environ)
+        wandb_data_dir = os.path.join(run_dir, "wandb_data")
+        os.makedirs(wandb_data_dir, exist_ok=True)
+        env["WANDB_DIR"] = wandb_data_dir
+        env["WANDB_RUN_ID"] = run_id
+        env["PYTHONUNBUFFERED"] = "1"
+        reservation = run_data.get("gpu_reservation")
+        if reservation and reservation.get("cuda_visible_devices"):
+            env["CUDA_VISIBLE_DEVICES"] = reservation["cuda_visible_devices"]
+        return env
+
+    def launch(self, run_id: str, run_data: dict) -> Optional[str]:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            raise RuntimeError("The subprocess executor must be used from the server event loop")
+
+        reserve_run_gpus(run_id, run_data)
+        try:
+            run_dir, _, _ = prepare_run_dir(run_id, run_data)
+            for name in ("job.done", EXIT_CODE_FILE):
+                if os.path.exists(os.path.join(run_dir, name)):
+                    os.remove(os.path.join(run_dir, name))
+            env = self._build_env(run_id, run_dir, run_data)
+        except Exception:
+            release_run_gpus(run_id, run_data)
+            raise
+
+        logger.info(f"Launching run {run_id} as a subprocess")
+        run_data["status"] = "launching"
+        run_data["monitor"] = "server"
+        run_data["tmux_window"] = None
+        run_data["run_dir"] = run_dir
+        run_data["launched_at"] = time.time()
+        self._tasks[run_id] = loop.create_task(self._supervise(run_id, run_data, env))
+        return None
+
+    async def _supervise(self, run_id: str, run_data: dict, env: dict[str, str]) -> None:
+        run_dir = run_data["run_dir"]
+        workdir = run_data.get("workdir") or config.WORKDIR
+        log_file = os.path.join(run_dir, "run.log")
+        completion_file = os.path.join(run_dir, "job.done")
+
+        try:
+            proc, log_filter = await self._spawn(run_data["command"], workdir, env, run_dir, log_file)
+        except Exception as e:
+            logger.error("Failed to spawn run %s: %s", run_id, e)
+            release_run_gpus(run_id, run_data)
+            self._report(run_id, "failed", error=f"Failed to start process: {e}")
+            return
+
+        self._procs[run_id] = proc
+        run_data["pid"] = proc.pid
+        if self._tasks.get(run_id) is not asyncio.current_task() or run_data.get("status") not in RUN_STATUS_ACTIVE:
+            # Stopped while the process was still being spawned.
+            self._signal_group(proc.pid, signal.SIGKILL)
+            await proc.wait()
+            await self._drain_log_filter(run_id, log_filter)
+            return
+        self._report(run_id, "running")
+
+        returncode = await proc.wait()
+        if self._procs.get(run_id) is proc:
+            self._procs.pop(run_id, None)
+        await self._drain_log_filter(run_id, log_filter)
+        # Killed by a signal: report it the way a shell would ($? = 128 + N).
+        exit_code = 128 - returncode if returncode < 0 else returncode
+
+        if self._tasks.get(run_id) is not asyncio.current_task():
+            return  # superseded by a relaunch after preemption
+        self._tasks.pop(run_id, None)
+        if run_data.get("status") not in RUN_STATUS_ACTIVE:
+            return  # stopped or preempted by the server; status already recorded
+
+        with open(completion_file, "w") as f:
+            f.write(str(exit_code))
+        if exit_code == 0:
+            self._report(run_id, "finished", exit_code=0)
+        else:
+            self._report(run_id, "failed", exit_code=exit_code)
+
+    def _argv(self, command: str, run_dir: str) -> list[str]:
+        return [self.shell, "-c", _EXIT_CODE_WRAPPER, self.shell, command, os.path.join(run_dir, EXIT_CODE_FILE)]
+
+    async def _spawn(
+        self, command: str, workdir: str, env: dict[str, str], run_dir: str, log_file: str
+    ) -> tuple[asyncio.subprocess.Process, Optional[subprocess.Popen]]:
+        """Start ``command`` with its output captured into ``log_file``.
+
+        Returns the job process and the log filter process (None when
+        capture is unfiltered).
+        """
+        if not config.LOG_CAPTURE_FILTER:
+            with open(log_file, "ab") as log_fh:
+                proc = await asyncio.create_subprocess_exec(
+                    *self._argv(command, run_dir),
+                    cwd=workdir,
+                    env=env,
+                    stdin=asyncio.subprocess.DEVNULL,
+                    stdout=log_fh,
+                    stderr=asyncio.subprocess.STDOUT,
+                    start_new_session=True,
+                )
+            return proc, None
+
+        # The filter runs in its own session so stopping the job's process
+        # group leaves it alive to drain the pipe; it exits on EOF once every
+        # writer is gone.  Both ends are closed here so EOF can happen.
+        raw_log = os.path.join(run_dir, RAW_LOG_NAME) if config.LOG_KEEP_RAW else None
+        read_fd, write_fd = os.pipe()
+        try:
+            log_filter = subprocess.Popen(
+                filter_argv(log_file, raw_log),
+                stdin=read_fd,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                start_new_session=True,
+            )
+            proc = await asyncio.create_subprocess_exec(
+                *self._argv(command, run_dir),
+                cwd=workdir,
+                env=env,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=write_fd,
+                stderr=asyncio.subprocess.STDOUT,
+                start_new_session=True,
+            )
+            return proc, log_filter
+        finally:
+            os.close(read_fd)
+            os.close(write_fd)
+
+    async def _drain_log_filter(self, run_id: str, log_filter: Optional[subprocess.Popen]) -> None:
+        """Wait for the log filter to flush run.log (bounded: a background
+        child of the job may still hold the pipe open)."""
+        if log_filter is None:
+            return
+        try:
+            await asyncio.to_thread(log_filter.wait, LOG_FILTER_DRAIN_SECONDS)
+        except subprocess.TimeoutExpired:
+            logger.warning("Log filter for run %s still running after the job exited", run_id)
+
+    def _signal_group(self, pid: int, sig: int) -> None:
+        try:
+            os.killpg(pid, sig)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+    def stop(self, run_id: str, run_data: dict) -> None:
+        proc = self._procs.pop(run_id, None)
+        pid = proc.pid if proc is not None else run_data.get("pid")
+        if pid and (proc is None or proc.returncode is None):
+            # start_new_session makes the child a group leader, so pgid == pid.
+            self._signal_group(pid, signal.SIGTERM)
+            logger.info(f"Sent SIGTERM to run {run_id} (pgid {pid})")
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                loop = None
+            if loop is not None:
+                loop.call_later(self.stop_grace_seconds, self._signal_group, pid, signal.SIGKILL)
+        release_run_gpus(run_id, run_data)
+        run_dir = run_data.get("run_dir")
+        if run_dir:
+            for name in ("job.done", EXIT_CODE_FILE):
+                if os.path.exists(os.path.join(run_dir, name)):
+                    os.remove(os.path.join(run_dir, name))
+
+    @staticmethod
+    def _pid_alive(pid: Optional[int]) -> bool:
+        if not pid:
+            return False
+        try:
+            os.kill(int(pid), 0)
+        except PermissionError:
+            return True  # exists, owned by someone else
+        except (ProcessLookupError, TypeError, ValueError, OverflowError):
+            return False
+        return True
+
+    def recover_orphans(self, runs: dict) -> int:
+        """Resolve active subprocess runs this server process is not supervising.
+
+        After a restart nothing awaits those processes, so the exit code the
+        wrapper left in ``job.exit`` is reported instead; a run with neither
+        that file nor a live process died unobserved and is marked failed.
+        Returns the number of runs resolved.
+        """
+        resolved = 0
+        for run_id, run_data in list(runs.items()):
+            if run_data.get("executor") != self.name or run_data.get("status") not in RUN_STATUS_ACTIVE:
+                continue
+            if run_id in self._tasks:
+                continue
+            run_dir = run_data.get("run_dir")
+            if run_dir and os.path.exists(os.path.join(run_dir, "job.done")):
+                continue  # terminal-state reconciliation picks this one up
+            exit_code: Optional[int] = None
+            exit_file = os.path.join(run_dir, EXIT_CODE_FILE) if run_dir else None
+            if exit_file and os.path.exists(exit_file):
+                try:
+                    with open(exit_file) as f:
+                        exit_code = int(f.read().strip())
+                except (OSError, ValueError):
+                    exit_code = None
+            elif self._pid_alive(run_data.get("pid")):
+                continue
+            release_run_gpus(run_id, run_data)
+            resolved += 1
+            if exit_code is None:
+                logger.warning("Subprocess run %s (pid %s) exited while unsupervised", run_id, run_data.get("pid"))
+                self._report(run_id, "failed", error="Process exited while the server was not supervising it")
+                continue
+            if run_dir:
+                with open(os.path.join(run_dir, "job.done"), "w") as f:
+                    f.write(str(exit_code))
+            self._report(run_id, "finished" if exit_code == 0 else "failed", exit_code=exit_code)
+        return resolved
+
+
+class ExecutorRegistry:
+    """Name -> executor lookup plus per-run routing."""
+
+    def __init__(self, default_name: Optional[str] = None) -> None:
+        self.default_name = default_name or config.RUN_EXECUTOR
+        self._executors: dict[str, RunExecutor] = {}
+
+    def register(self, executor: RunExecutor) -> RunExecutor:
+        self._executors[executor.name] = executor
+        return executor
+
+    def get(self, name: str) -> Optional[RunExecutor]:
+        return self._executors.get(name)
+
+    def names(self) -> list[str]:
+        return sorted(self._executors)
+
+    def resolve(self, run_data: dict) -> RunExecutor:
+        name = run_data.get("executor")
+        if not name:
+            # Runs launched before executors existed all went through tmux.
+            name = "tmux" if run_data.get("tmux_window") else self.default_name
+        executor = self._executors.get(name)
+        if executor is None:
+            raise ValueError(f"Unknown executor '{name}' (available: {', '.join(self.names())})")
+        return executor
+
+    def launch(self, run_id: str, run_data: dict) -> Optional[str]:
+        executor = self.resolve(run_data)
+        run_data["executor"] = executor.name
+        return executor.launch(run_id, run_data)
+
+    def stop(self, run_id: str, run_data: dict) -> None:
+        self.resolve(run_data).stop(run_id, run_data)
+
+    def prepare(self, run_id: str, run_data: dict) -> None:
+        self.resolve(run_data).prepare(run_id, run_data)
+
+    def takes_slot(self, run_data: dict) -> bool:
+        """Whether the run counts against the launch queue's ``max_concurrent``."""
+        try:
+            return self.resolve(run_data).local
+        except ValueError:
+            return True  # launching it fails anyway
+
+    @contextlib.contextmanager
+    def batch(self):
+        """Batch every executor's launches and stops (e.g. one tmux call per dispatch)."""
+        with contextlib.ExitStack() as stack:
+            for executor in self._executors.values():
+                stack.enter_context(executor.batch())
+            yield
@@ -0,0 +1,258 @@
+"""
+Research Agent Server — GPU Scheduler
+
+Server-side GPU placement with a per-device reservation ledger.
+
+Sidecars used to run ``gpuwrap_detect.py`` independently and grab every
+"free" GPU, so two runs launched at the same moment could race onto the
+same device.  The scheduler owns placement instead: each launch asks for
+``gpu_count`` devices (optionally with ``min_free_memory_mb`` each), the
+scheduler bin-packs the request against live NVML data plus the ledger,
+and hands the resulting ``CUDA_VISIBLE_DEVICES`` to the sidecar.
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Optional
+
+from tools.gpuwrap_detect import _collect_from_nvidia_smi, _collect_from_nvml
+
+logger = logging.getLogger("research-agent-server")
+
+
+class GpuPlacementError(Exception):
+    """Raised when a GPU request cannot be satisfied right now."""
+
+
+class NvmlDeviceProvider:
+    """Live device data from NVML, falling back to nvidia-smi parsing."""
+
+    def list_devices(self) -> list[dict[str, Any]]:
+        gpus, _ = _collect_from_nvml()
+        if not gpus:
+            gpus, _ = _collect_from_nvidia_smi()
+        return gpus
+
+
+class GpuScheduler:
+    """Bin-packing GPU placement backed by a reservation ledger.
+
+    A request without ``min_free_memory_mb`` is *exclusive*: it only lands on
+    devices with no running processes and no other reservations.  A request
+    with ``min_free_memory_mb`` is *shared*: it may co-locate with other shared
+    reservations as long as each chosen device keeps enough free memory.
+    Shared requests are packed best-fit (tightest device first) so large
+    devices stay available for large jobs.
+
+    Reserved memory is treated as a floor on device usage, so a freshly
+    launched run that has not allocated anything yet still blocks its share.
+    """
+
+    def __init__(self, provider: Optional[Any] = None) -> None:
+        self._provider = provider or NvmlDeviceProvider()
+        self._lock = threading.Lock()
+        # device index -> {run_id: {"memory_mb": int, "exclusive": bool}}
+        self._ledger: dict[int, dict[str, dict[str, Any]]] = {}
+        self._assignments: dict[str, dict[str, Any]] = {}
+
+    def set_provider(self, provider: Any) -> None:
+        with self._lock:
+            self._provider = provider
+
+    # ------------------------------------------------------------------
+    # Placement
+    # ------------------------------------------------------------------
+
+    def reserve(
+        self,
+        run_id: str,
+        gpu_count: int = 1,
+        min_free_memory_mb: Optional[int] = None,
+    ) -> Optional[dict[str, Any]]:
+        """Atomically pick and reserve devices for a run.
+
+        Returns the reservation dict, or None when the host exposes no GPUs
+        (the caller then launches without pinning).  Raises
+        GpuPlacementError when GPUs exist but the request does not fit.
+        """
+        gpu_count = max(1, int(gpu_count or 1))
+        exclusive = not min_free_memory_mb
+        with self._lock:
+            existing = self._assignments.get(run_id)
+            if existing:
+                return dict(existing)
+
+            devices = self._provider.list_devices()
+            if not devices:
+                return None
+
+            candidates = self._candidates(devices, exclusive, min_free_memory_mb)
+            if len(candidates) < gpu_count:
+                raise GpuPlacementError(
+                    f"Need {gpu_count} GPU(s)"
+                    + (f" with {min_free_memory_mb} MB free" if not exclusive else " with no running processes")
+                    + f"; {len(candidates)} of {len(devices)} available"
+                )
+
+            if exclusive:
+                candidates.sort(key=lambda item: item[1])
+            else:
+                candidates.sort(key=lambda item: (item[0], item[1]))
+            chosen = sorted(index for _, index, _ in candidates[:gpu_count])
+            totals = {index: total for _, index, total in candidates}
+
+            for index in chosen:
+                memory_mb = totals[index] if exclusive else int(min_free_memory_mb)
+                self._ledger.setdefault(index, {})[run_id] = {
+                    "memory_mb": memory_mb,
+                    "exclusive": exclusive,
+                }
+
+            reservation = {
+                "devices": chosen,
+                "cuda_visible_devices": ",".join(str(i) for i in chosen),
+                "memory_mb": None if exclusive else int(min_free_memory_mb),
+                "exclusive": exclusive,
+                "reserved_at": time.time(),
+            }
+            self._assignments[run_id] = reservation
+            logger.info(
+                "GPU scheduler reserved %s for run %s (%s)",
+                reservation["cuda_visible_devices"],
+                run_id,
+                "exclusive" if exclusive else f"{min_free_memory_mb} MB",
+            )
+            return dict(reservation)
+
+    def _candidates(
+        self,
+        devices: list[dict[str, Any]],
+        exclusive: bool,
+        min_free_memory_mb: Optional[int],
+        freed: frozenset = frozenset(),
+    ) -> list[tuple[int, int, int]]:
+        """``(free_mb, index, total_mb)`` for devices that can take the request.
+
+        Reservations held by ``freed`` runs are treated as already released:
+        their exclusive devices count as empty and their shared memory as free.
+        """
+        candidates: list[tuple[int, int, int]] = []
+        for device in devices:
+            try:
+                index = int(device["index"])
+            except (KeyError, TypeError, ValueError):
+                continue
+            all_holders = self._ledger.get(index, {})
+            holders = {run_id: h for run_id, h in all_holders.items() if run_id not in freed}
+            released = [h for run_id, h in all_holders.items() if run_id in freed]
+            total = int(device.get("memory_total_mb") or 0)
+            used = int(device.get("memory_used_mb") or 0)
+            process_count = int(device.get("process_count") or 0)
+            if any(h["exclusive"] for h in released):
+                used, process_count = 0, 0
+            else:
+                used = max(0, used - sum(int(h["memory_mb"]) for h in released))
+            reserved = sum(int(h["memory_mb"]) for h in holders.values())
+            free = max(0, total - max(used, reserved))
+
+            if exclusive:
+                if holders or process_count > 0:
+                    continue
+            else:
+                if any(h["exclusive"] for h in holders.values()):
+                    continue
+                if free < int(min_free_memory_mb):
+                    continue
+            candidates.append((free, index, total))
+        return candidates
+
+    def fits(
+        self,
+        gpu_count: int = 1,
+        min_free_memory_mb: Optional[int] = None,
+        freed_run_ids: tuple = (),
+    ) -> bool:
+        """Whether a request would fit once ``freed_run_ids`` released their GPUs."""
+        gpu_count = max(1, int(gpu_count or 1))
+        devices = self._provider.list_devices()
+        if not devices:
+            return True
+        with self._lock:
+            candidates = self._candidates(devices, not min_free_memory_mb, min_free_memory_mb,
+                                          frozenset(freed_run_ids))
+        return len(candidates) >= gpu_count
+
+    def release(self, run_id: str) -> bool:
+        """Drop all ledger entries held by a run."""
+        with self._lock:
+            reservation = self._assignments.pop(run_id, None)
+            if not reservation:
+                return False
+            for index in reservation.get("devices", []):
+                holders = self._ledger.get(index)
+                if holders is None:
+                    continue
+                holders.pop(run_id, None)
+                if not holders:
+                    self._ledger.pop(index, None)
+            logger.info("GPU scheduler released %s from run %s", reservation.get("cuda_visible_devices"), run_id)
+            return True
+
+    def restore(self, run_id: str, reservation: dict[str, Any]) -> None:
+        """Re-register a reservation persisted on a run record (after restart)."""
+        devices = [int(i) for i in reservation.get("devices") or []]
+        if not devices:
+            return
+        exclusive = bool(reservation.get("exclusive", True))
+        memory_mb = reservation.get("memory_mb")
+        with self._lock:
+            if run_id in self._assignments:
+                return
+            for index in devices:
+                self._ledger.setdefault(index, {})[run_id] = {
+                    # Exclusive holders block the whole device regardless of size.
+                    "memory_mb": int(memory_mb or 0),
+                    "exclusive": exclusive,
+                }
+            self._assignments[run_id] = {**reservation, "devices": devices}
+
+    def rebuild_from_runs(self, runs_dict: dict, active_statuses: set) -> None:
+        """Restore reservations for runs that are still active."""
+        for run_id, run in runs_dict.items():
+            reservation = run.get("gpu_reservation")
+            if isinstance(reservation, dict) and run.get("status") in active_statuses:
+                self.restore(run_id, reservation)
+
+    # ------------------------------------------------------------------
+    # Introspection
+    # ------------------------------------------------------------------
+
+    def assignment_for(self, run_id: str) -> Optional[dict[str, Any]]:
+        with self._lock:
+            reservation = self._assignments.get(run_id)
+            return dict(reservation) if reservation else None
+
+    def snapshot(self) -> dict[str, Any]:
+        """Live device view merged with the reservation ledger."""
+        devices = self._provider.list_devices()
+        with self._lock:
+            rows = []
+            for device in sorted(devices, key=lambda d: int(d.get("index", 0))):
+                index = int(device.get("index", 0))
+                holders = self._ledger.get(index, {})
+                rows.append({
+                    **device,
+                    "reservations": [
+                        {"run_id": run_id, **entry} for run_id, entry in sorted(holders.items())
+                    ],
+                    "reserved_memory_mb": sum(int(h["memory_mb"]) for h in holders.values()),
+                })
+            return {
+                "devices": rows,
+                "assignments": {run_id: dict(r) for run_id, r in self._assignments.items()},
+            }
+
+
+# Module-level singleton
+gpu_scheduler = GpuScheduler()
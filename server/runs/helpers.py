@@ -15,16 +15,23 @@ import sys
 import time
 from typing import Any, Optional
 
-import libtmux
 from fastapi import HTTPException
 
 from core import config
 from core.config import (
     get_server_callback_url,
     USER_AUTH_TOKEN,
-    TMUX_SESSION_NAME,
 )
 from core.models import GpuwrapConfig
+from runs.anomaly import validate_detector_specs
+from runs.dependencies import (
+    DEFAULT_DEPENDENCY_CONDITION,
+    DependencyError,
+    normalize_dependency_condition,
+    validate_dependencies,
+)
+from runs.gpu_scheduler import gpu_scheduler
+from runs.launch_queue import normalize_priority_class
 from core.state import (
     runs,
     sweeps,
@@ -33,6 +40,10 @@ from core.state import (
     _cluster_type_label,
     _cluster_type_description,
 )
+from runs.blob_store import unshare_artifacts
+from runs.log_store import COMPACTED_LOGS, restore_log
+from runs.tmux_pool import tmux_pool
+from tools.log_filter import RAW_LOG_NAME, filter_command
 
 logger = logging.getLogger("research-agent-server")
 
@@ -105,6 +116,8 @@ def _reconcile_run_terminal_state(run_id: str, run: dict) -> bool:
 
         completion_status = _terminal_status_from_exit_code(completion_exit_code)
         current_status = run.get("status")
+        if current_status not in RUN_STATUS_TERMINAL:
+            release_run_gpus(run_id, run)
         if completion_status and current_status not in RUN_STATUS_TERMINAL:
             run["status"] = completion_status
             changed = True
@@ -358,7 +371,7 @@ def recompute_all_sweep_states() -> None:
         recompute_sweep_state(sweep_id)
 
 
-def _sync_run_membership_with_sweep(run_id: str, sweep_id: Optional[str]) -> None:
+def _sync_run_membership_with_sweep(run_id: str, sweep_id: Optional[str], recompute: bool = True) -> None:
     if not sweep_id:
         return
     if sweep_id not in sweeps:
@@ -366,7 +379,8 @@ def _sync_run_membership_with_sweep(run_id: str, sweep_id: Optional[str]) -> Non
     run_ids = sweeps[sweep_id].setdefault("run_ids", [])
     if run_id not in run_ids:
         run_ids.append(run_id)
-    recompute_sweep_state(sweep_id)
+    if recompute:
+        recompute_sweep_state(sweep_id)
 
 
 # =============================================================================
@@ -560,18 +574,14 @@ def _current_run_summary() -> dict:
 # =============================================================================
 
 def get_tmux_server():
-    """Get or create tmux server connection."""
-    try:
-        return libtmux.Server()
-    except Exception as e:
-        logger.error(f"Failed to connect to tmux server: {e}")
-        return None
+    """The shared tmux server connection (runs/tmux_pool.py)."""
+    return tmux_pool.server()
 
 
 def get_or_create_session(session_name: Optional[str] = None):
-    """Get or create the research-agent tmux session."""
-    if session_name is None:
-        session_name = TMUX_SESSION_NAME
+    """Get or create the research-agent tmux session (cached by the pool)."""
+    if session_name is None or session_name == tmux_pool.session_name:
+        return tmux_pool.session()
     server = get_tmux_server()
     if not server:
         return None
@@ -587,6 +597,58 @@ def get_or_create_session(session_name: Optional[str] = None):
         return None
 
 
+def _validated_priority_class(value: Optional[str]) -> Optional[str]:
+    if value is None or not value.strip():
+        return None
+    normalized = normalize_priority_class(value)
+    if normalized is None:
+        raise HTTPException(
+            status_code=400,
+            detail="priority_class must be one of: interactive, agent, sweep, background",
+        )
+    return normalized
+
+
+def _validated_anomaly_detectors(specs) -> Optional[list]:
+    if specs is None:
+        return None
+    try:
+        return validate_detector_specs([spec.model_dump() for spec in specs])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _validated_dependency_condition(value: Optional[str]) -> str:
+    if value is None or not value.strip():
+        return DEFAULT_DEPENDENCY_CONDITION
+    normalized = normalize_dependency_condition(value)
+    if normalized is None:
+        raise HTTPException(status_code=400, detail="dependency_condition must be one of: on_success, on_any")
+    return normalized
+
+
+def _validated_dependencies(runs_dict: dict, run_id: str, depends_on: Optional[list]) -> Optional[list]:
+    if not depends_on:
+        return None
+    try:
+        return validate_dependencies(runs_dict, run_id, depends_on)
+    except DependencyError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _validated_executor(value: Optional[str], run_executors: Any = None) -> Optional[str]:
+    """Normalize an executor name, checked against ``run_executors`` when given."""
+    if value is None or not value.strip():
+        return None
+    name = value.strip().lower()
+    if run_executors is not None and run_executors.get(name) is None:
+        raise HTTPException(
+            status_code=400,
+            detail=f"executor must be one of: {', '.join(run_executors.names())}",
+        )
+    return name
+
+
 def _normalize_gpuwrap_config(config: Any) -> Optional[dict]:
     """Validate and normalize per-run gpuwrap settings."""
     if config is None:
@@ -602,27 +664,61 @@ def _normalize_gpuwrap_config(config: Any) -> Optional[dict]:
     return data or None
 
 
-def launch_run_in_tmux(run_id: str, run_data: dict) -> Optional[str]:
-    """Launch a run in a new tmux window with sidecar."""
-    session = get_or_create_session()
-    if not session:
-        raise Exception("Tmux session not available. Start tmux first.")
+def reserve_run_gpus(run_id: str, run_data: dict) -> Optional[dict]:
+    """Reserve GPUs for a gpuwrap-enabled run through the server-side scheduler.
 
-    # Create window name
-    run_name = run_data.get("name", run_id)[:20].replace(" ", "-")
-    tmux_window_name = f"ra-{run_id[:8]}"
+    Returns the reservation (also stored on ``run_data["gpu_reservation"]``),
+    or None when gpuwrap is off or the host exposes no GPUs.  Raises
+    GpuPlacementError when the request does not fit right now.
+    """
+    gpuwrap_config = _normalize_gpuwrap_config(run_data.get("gpuwrap_config")) or {}
+    if not gpuwrap_config.get("enabled"):
+        return None
+    reservation = gpu_scheduler.reserve(
+        run_id,
+        gpu_count=gpuwrap_config.get("gpu_count") or 1,
+        min_free_memory_mb=gpuwrap_config.get("min_free_memory_mb"),
+    )
+    run_data["gpu_reservation"] = reservation
+    return reservation
+
+
+def run_gpus_fit(run_id: str, run_data: dict, freed_run_ids: tuple = ()) -> bool:
+    """Whether ``run_data``'s GPU request would fit once ``freed_run_ids`` stop."""
+    gpuwrap_config = _normalize_gpuwrap_config(run_data.get("gpuwrap_config")) or {}
+    if not gpuwrap_config.get("enabled"):
+        return True
+    return gpu_scheduler.fits(
+        gpu_count=gpuwrap_config.get("gpu_count") or 1,
+        min_free_memory_mb=gpuwrap_config.get("min_free_memory_mb"),
+        freed_run_ids=tuple(freed_run_ids),
+    )
 
-    logger.info(f"Launching run {run_id} in window {tmux_window_name}")
 
-    # Create window
-    window = session.new_window(window_name=tmux_window_name, attach=False)
-    pane = window.active_pane
+def release_run_gpus(run_id: str, run_data: Optional[dict] = None) -> None:
+    """Return a run's GPUs to the scheduler once it stops occupying them."""
+    gpu_scheduler.release(run_id)
+    if run_data is not None and run_data.get("gpu_reservation"):
+        run_data["gpu_reservation"] = None
+
 
-    # Setup run directory
+def prepare_run_dir(run_id: str, run_data: dict) -> tuple[str, str, Optional[str]]:
+    """Create the run directory and write command.txt / gpuwrap_config.json.
+
+    Returns ``(run_dir, command_file, gpuwrap_config_file)``; the last is
+    None when the run has no gpuwrap settings.
+    """
     run_dir = os.path.join(config.DATA_DIR, "runs", run_id)
     os.makedirs(run_dir, exist_ok=True)
+    # A rerun appends to the previous output, which may have been compressed.
+    for name in COMPACTED_LOGS:
+        restore_log(os.path.join(run_dir, name))
+    # Artifacts shared with the blob store must not be rewritten in place.
+    if run_data.pop("artifacts_deduped_at", None):
+        unshare_artifacts(run_dir)
+    # Outputs pruned by storage GC (runs/storage.py) are not coming back.
+    run_data.pop("storage_gc", None)
 
-    # Write command to file
     command_file = os.path.join(run_dir, "command.txt")
     with open(command_file, "w") as f:
         f.write(run_data["command"])
@@ -637,6 +733,108 @@ def launch_run_in_tmux(run_id: str, run_data: dict) -> Optional[str]:
         run_data["gpuwrap_config"] = None
         gpuwrap_config_file = None
 
+    return run_dir, command_file, gpuwrap_config_file
+
+
+def kill_run_in_tmux(run_id: str, run_data: dict) -> None:
+    """Kill a run's tmux window without recording a terminal status.
+
+    Used when the launch queue preempts a run: the run goes back to
+    ``queued``, so any stale completion marker is removed as well.
+    """
+    tmux_window = run_data.get("tmux_window")
+    if tmux_window:
+        tmux_pool.kill(tmux_window)
+    release_run_gpus(run_id, run_data)
+    run_dir = run_data.get("run_dir")
+    if run_dir:
+        completion_file = os.path.join(run_dir, "job.done")
+        if os.path.exists(completion_file):
+            os.remove(completion_file)
+
+
+def write_direct_job_script(run_id: str, run_data: dict, run_dir: str, command_file: str) -> str:
+    """Write ``job.sh``: run the command, capture it into run.log, record the exit code.
+
+    Used for tmux runs watched by the in-server monitor instead of a sidecar.
+    """
+    run_workdir = run_data.get("workdir") or config.WORKDIR
+    wandb_data_dir = os.path.join(run_dir, "wandb_data")
+    lines = [
+        "#!/bin/bash",
+        f"cd {shlex.quote(run_workdir)} || {{ echo 1 > {shlex.quote(os.path.join(run_dir, 'job.done'))}; exit 1; }}",
+        f"export WANDB_DIR={shlex.quote(wandb_data_dir)}",
+        f"export WANDB_RUN_ID={shlex.quote(run_id)}",
+        "export PYTHONUNBUFFERED=1",
+        'mkdir -p "$WANDB_DIR"',
+    ]
+    reservation = run_data.get("gpu_reservation")
+    if reservation and reservation.get("cuda_visible_devices"):
+        lines.append(f"export CUDA_VISIBLE_DEVICES={shlex.quote(reservation['cuda_visible_devices'])}")
+    log_file = os.path.join(run_dir, "run.log")
+    if config.LOG_CAPTURE_FILTER:
+        raw_log = os.path.join(run_dir, RAW_LOG_NAME) if config.LOG_KEEP_RAW else None
+        capture = filter_command(log_file, raw_log, echo=True)
+    else:
+        capture = f"tee -a {shlex.quote(log_file)}"
+    lines.extend([
+        f"bash {shlex.quote(command_file)} 2>&1 | {capture}",
+        f"echo ${{PIPESTATUS[0]}} > {shlex.quote(os.path.join(run_dir, 'job.done'))}",
+    ])
+    script_path = os.path.join(run_dir, "job.sh")
+    with open(script_path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+    return script_path
+
+
+def _open_run_window(run_id: str, run_data: dict, run_dir: str, tmux_window_name: str, keys: str) -> str:
+    """Type ``keys`` into a new window for the run and mark it launching.
+
+    Inside ``tmux_pool.batch()`` the window is only opened when the batch is
+    flushed; if that fails the run goes back to ``queued`` with the error in
+    ``queue_blocked_reason``, for the launch queue to fail it.
+    """
+    def requeue(error: str) -> None:
+        release_run_gpus(run_id, run_data)
+        run_data["status"] = "queued"
+        run_data["queue_blocked_reason"] = error
+        run_data.pop("tmux_window", None)
+        run_data.pop("launched_at", None)
+
+    try:
+        tmux_pool.launch(tmux_window_name, keys, on_error=requeue)
+    except Exception:
+        release_run_gpus(run_id, run_data)
+        raise
+    run_data["status"] = "launching"
+    run_data["tmux_window"] = tmux_window_name
+    run_data["run_dir"] = run_dir
+    run_data["launched_at"] = time.time()
+    return tmux_window_name
+
+
+def launch_run_in_tmux(run_id: str, run_data: dict, sidecar: bool = True) -> Optional[str]:
+    """Launch a run in a new tmux window, with a sidecar unless ``sidecar=False``."""
+    tmux_window_name = f"ra-{run_id[:8]}"
+
+    # Place GPUs before touching tmux so a failed placement leaves no window behind.
+    gpu_reservation = reserve_run_gpus(run_id, run_data)
+
+    logger.info(f"Launching run {run_id} in window {tmux_window_name}")
+
+    try:
+        run_dir, command_file, gpuwrap_config_file = prepare_run_dir(run_id, run_data)
+    except Exception:
+        release_run_gpus(run_id, run_data)
+        raise
+
+    if not sidecar:
+        completion_file = os.path.join(run_dir, "job.done")
+        if os.path.exists(completion_file):
+            os.remove(completion_file)
+        script_path = write_direct_job_script(run_id, run_data, run_dir, command_file)
+        return _open_run_window(run_id, run_data, run_dir, tmux_window_name, f"bash {shlex.quote(script_path)}")
+
     # Get sidecar path — job_sidecar.py lives in tools/, not runs/
     server_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # server/
     sidecar_path = os.path.join(server_dir, "tools", "job_sidecar.py")
@@ -667,14 +865,16 @@ def launch_run_in_tmux(run_id: str, run_data: dict) -> Optional[str]:
         sidecar_cmd += f" --auth_token {shlex.quote(USER_AUTH_TOKEN)}"
     if gpuwrap_config_file:
         sidecar_cmd += f" --gpuwrap_config_file {shlex.quote(gpuwrap_config_file)}"
+    if gpu_reservation:
+        sidecar_cmd += f" --cuda_visible_devices {shlex.quote(gpu_reservation['cuda_visible_devices'])}"
+    if config.ANOMALY_DETECTION_ENABLED:
+        sidecar_cmd += " --no_rule_alerts"
+    if config.ALERT_JUDGE_ENABLED:
+        sidecar_cmd += " --no_alert_judge"
+    if not config.LOG_CAPTURE_FILTER:
+        sidecar_cmd += " --raw_log_capture"
+    elif config.LOG_KEEP_RAW:
+        sidecar_cmd += " --keep_raw_log"
 
     logger.info(f"Executing sidecar: {sidecar_cmd}")
-    pane.send_keys(sidecar_cmd)
-
-    # Update run data
-    run_data["status"] = "launching"
-    run_data["tmux_window"] = tmux_window_name
-    run_data["run_dir"] = run_dir
-    run_data["launched_at"] = time.time()
-
-    return tmux_window_name
+    return _open_run_window(run_id, run_data, run_dir, tmux_window_name, sidecar_cmd)
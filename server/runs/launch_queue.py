@@ -0,0 +1,701 @@
+"""
+Research Agent Server — Launch Queue
+
+Decides which queued runs get launched, and in what order.
+
+Runs carry a priority class (interactive > agent > sweep > background).
+Classes are strict: a queued interactive run always goes before any agent
+run.  Within a class, capacity is shared fairly between *share groups* —
+one group per sweep, per chat session, or per standalone run — weighted by
+``share_weight``.  The group with the fewest active runs per unit of weight
+launches next, so a 200-run sweep and a single debug run alternate instead
+of the sweep draining first.  Inside a group runs stay FIFO.
+
+When the queue is full and preemption is enabled, a queued run may stop the
+most recently launched active run of a strictly lower class; the victim goes
+back to the queue and relaunches from scratch later.  Preemption happens
+outside executor batches and only after the preemptor was prepared, so a
+preemptor that cannot launch never costs the victim its progress when that
+can be helped (see ``_preempt_for``).
+
+Queued runs with ``depends_on`` are held back until their upstream runs are
+terminal (see runs/dependencies.py); each dispatch first cancels the runs
+whose dependencies can no longer be met.
+"""
+
+import asyncio
+import contextlib
+import heapq
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Any, Callable, Optional
+
+from core import config
+from runs.dependencies import UNSTARTED_STATUSES, dependency_state
+from runs.gpu_scheduler import GpuPlacementError
+
+logger = logging.getLogger("research-agent-server")
+
+PRIORITY_CLASSES = ("interactive", "agent", "sweep", "background")
+PRIORITY_RANK = {name: rank for rank, name in enumerate(PRIORITY_CLASSES)}
+
+ACTIVE_STATUSES = {"launching", "running"}
+TERMINAL_STATUSES = {"finished", "failed", "stopped"}
+
+# Runtime guess used for ETAs until enough runs have finished.
+DEFAULT_RUN_SECONDS = 600.0
+RUNTIME_SAMPLE_SIZE = 50
+ESTIMATE_CACHE_SECONDS = 1.0
+
+
+def normalize_priority_class(value: Any) -> Optional[str]:
+    """Return a known priority class name, or None for anything else."""
+    if not isinstance(value, str):
+        return None
+    value = value.strip().lower()
+    return value if value in PRIORITY_RANK else None
+
+
+def priority_class_for(run: dict, sweeps: Optional[dict] = None) -> str:
+    """Resolve a run's priority class.
+
+    An explicit ``priority_class`` on the run wins, then the owning sweep's
+    class.  Otherwise sweep members are ``sweep``, runs created from a chat
+    session are ``agent``, and everything else was started by a human.
+    """
+    explicit = normalize_priority_class(run.get("priority_class"))
+    if explicit:
+        return explicit
+    sweep_id = run.get("sweep_id")
+    if sweep_id:
+        sweep = (sweeps or {}).get(sweep_id) or {}
+        return normalize_priority_class(sweep.get("priority_class")) or "sweep"
+    if run.get("chat_session_id"):
+        return "agent"
+    return "interactive"
+
+
+def share_group_for(run_id: str, run: dict) -> str:
+    """Fair-share group key: the sweep, else the chat session, else the run itself."""
+    if run.get("sweep_id"):
+        return f"sweep:{run['sweep_id']}"
+    if run.get("chat_session_id"):
+        return f"session:{run['chat_session_id']}"
+    return f"run:{run_id}"
+
+
+def _run_duration(run: dict) -> Optional[float]:
+    started = run.get("started_at") or run.get("launched_at")
+    ended = run.get("ended_at")
+    if not isinstance(started, (int, float)) or not isinstance(ended, (int, float)):
+        return None
+    duration = float(ended) - float(started)
+    return duration if duration > 0 else None
+
+
+class _Entry:
+    __slots__ = ("run_id", "run", "rank", "group", "weight", "sweep_id", "order")
+
+    def __init__(self, run_id: str, run: dict, rank: int, group: str, weight: float):
+        self.run_id = run_id
+        self.run = run
+        self.rank = rank
+        self.group = group
+        self.weight = weight
+        self.sweep_id = run.get("sweep_id")
+        self.order = (float(run.get("queued_at") or run.get("created_at") or 0.0), run_id)
+
+
+class LaunchQueue:
+    """Priority + weighted fair-share dispatcher over the shared runs dict.
+
+    ``launch_fn(run_id, run)`` starts a run; a GpuPlacementError keeps it
+    queued, any other error fails it; ``stop_fn(run_id, run)`` kills an active run for
+    preemption; ``fits_fn(run_id, run, freed_run_ids)`` says whether a run's
+    GPU request would fit once those runs stop, so nothing is preempted for a
+    run that still could not launch; ``prepare_fn(run_id, run)`` raises if a
+    run could not be launched at all (unknown executor, missing workdir) and
+    is called before anything is stopped for it; ``slot_fn(run)`` says
+    whether a run counts against ``max_concurrent`` (runs handed to a
+    cluster scheduler don't; 0 means no limit); ``on_launched`` / ``on_preempted`` /
+    ``on_cancelled`` / ``on_failed`` let the server record journey events and recompute sweep
+    progress.  ``batch_fn()`` returns a
+    context manager wrapped around each dispatch pass so executors can submit
+    its launches together.
+    """
+
+    def __init__(
+        self,
+        runs: dict,
+        sweeps: dict,
+        launch_fn: Callable[[str, dict], Any],
+        stop_fn: Optional[Callable[[str, dict], Any]] = None,
+        save_fn: Optional[Callable[[], Any]] = None,
+        on_launched: Optional[Callable[[str, dict], Any]] = None,
+        on_preempted: Optional[Callable[[str, dict, str], Any]] = None,
+        on_cancelled: Optional[Callable[[str, dict], Any]] = None,
+        on_failed: Optional[Callable[[str, dict], Any]] = None,
+        fits_fn: Optional[Callable[[str, dict, tuple], bool]] = None,
+        prepare_fn: Optional[Callable[[str, dict], Any]] = None,
+        slot_fn: Optional[Callable[[dict], bool]] = None,
+        batch_fn: Optional[Callable[[], Any]] = None,
+        max_concurrent: Optional[int] = None,
+        preemption_enabled: Optional[bool] = None,
+    ) -> None:
+        self._runs = runs
+        self._sweeps = sweeps
+        self._launch_fn = launch_fn
+        self._stop_fn = stop_fn
+        self._save_fn = save_fn
+        self._on_launched = on_launched
+        self._on_preempted = on_preempted
+        self._on_cancelled = on_cancelled
+        self._on_failed = on_failed
+        self._fits_fn = fits_fn
+        self._prepare_fn = prepare_fn
+        self._slot_fn = slot_fn
+        self._batch_fn = batch_fn or contextlib.nullcontext
+        self.max_concurrent = max(0, int(config.MAX_CONCURRENT_RUNS if max_concurrent is None else max_concurrent))
+        self.preemption_enabled = (
+            config.RUN_PREEMPTION_ENABLED if preemption_enabled is None else bool(preemption_enabled)
+        )
+        self._lock = threading.RLock()
+        self._estimate_cache: tuple[float, dict[str, dict]] = (0.0, {})
+        self._background_interval = 0.0
+        self._background_task: Optional[asyncio.Task] = None
+        self._background_tick: Optional[Callable[[], Any]] = None
+
+    # ------------------------------------------------------------------
+    # Configuration
+    # ------------------------------------------------------------------
+
+    def configure(
+        self,
+        max_concurrent: Optional[int] = None,
+        preemption_enabled: Optional[bool] = None,
+    ) -> None:
+        with self._lock:
+            if max_concurrent is not None:
+                self.max_concurrent = max(0, int(max_concurrent))
+            if preemption_enabled is not None:
+                self.preemption_enabled = bool(preemption_enabled)
+            self._estimate_cache = (0.0, {})
+
+    def enable_background_dispatch(self, interval: float, tick: Optional[Callable[[], Any]] = None) -> None:
+        """Re-run dispatch every ``interval`` seconds once an event loop is up.
+
+        ``tick`` runs first on each pass (e.g. terminal-state reconciliation)
+        so runs whose sidecar died still free their slot.
+        """
+        self._background_interval = max(0.0, float(interval))
+        self._background_tick = tick
+
+    def ensure_running(self) -> None:
+        """Start the periodic dispatch task if it is enabled and not running."""
+        if self._background_interval <= 0:
+            return
+        if self._background_task is not None and not self._background_task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._background_task = loop.create_task(self._periodic_dispatch())
+
+    async def _periodic_dispatch(self) -> None:
+        while True:
+            await asyncio.sleep(self._background_interval)
+            try:
+                if self._background_tick:
+                    self._background_tick()
+                self.dispatch()
+            except Exception as e:
+                logger.warning("Background dispatch failed: %s", e)
+
+    # ------------------------------------------------------------------
+    # Board construction
+    # ------------------------------------------------------------------
+
+    def _group_weight(self, run: dict) -> float:
+        sweep_id = run.get("sweep_id")
+        raw = None
+        if sweep_id:
+            raw = ((self._sweeps or {}).get(sweep_id) or {}).get("share_weight")
+        if raw is None:
+            raw = run.get("share_weight")
+        try:
+            weight = float(raw) if raw is not None else 1.0
+        except (TypeError, ValueError):
+            weight = 1.0
+        return weight if weight > 0 else 1.0
+
+    def _entry(self, run_id: str, run: dict) -> _Entry:
+        return _Entry(
+            run_id,
+            run,
+            PRIORITY_RANK[priority_class_for(run, self._sweeps)],
+            share_group_for(run_id, run),
+            self._group_weight(run),
+        )
+
+    def _sweep_cap(self, sweep_id: Optional[str]) -> Optional[int]:
+        if not sweep_id:
+            return None
+        raw = ((self._sweeps or {}).get(sweep_id) or {}).get("parallel")
+        try:
+            cap = int(raw) if raw is not None else None
+        except (TypeError, ValueError):
+            return None
+        return cap if cap and cap > 0 else None
+
+    def _takes_slot(self, run: dict) -> bool:
+        return self._slot_fn is None or self._slot_fn(run)
+
+    def _full(self, active: list[_Entry]) -> bool:
+        return 0 < self.max_concurrent <= len(active)
+
+    def _collect(self, exclude: Optional[set] = None) -> tuple[list[_Entry], list[_Entry]]:
+        """Dispatchable queued runs, and the active runs that hold a slot."""
+        pending: list[_Entry] = []
+        active: list[_Entry] = []
+        for run_id, run in self._runs.items():
+            status = run.get("status")
+            if status in ACTIVE_STATUSES:
+                if run.get("slurm_array_job_id") or not self._takes_slot(run):
+                    continue  # throttled by the cluster's scheduler, not our slots
+                active.append(self._entry(run_id, run))
+            elif status == "queued" and not run.get("is_archived") and run_id not in (exclude or ()):
+                if run.get("depends_on") and dependency_state(self._runs, run)[0] != "ready":
+                    continue
+                pending.append(self._entry(run_id, run))
+        return pending, active
+
+    @staticmethod
+    def _build_lanes(pending: list[_Entry]) -> dict[int, dict[str, deque]]:
+        lanes: dict[int, dict[str, list[_Entry]]] = defaultdict(lambda: defaultdict(list))
+        for entry in pending:
+            lanes[entry.rank][entry.group].append(entry)
+        return {
+            rank: {group: deque(sorted(items, key=lambda e: e.order)) for group, items in groups.items()}
+            for rank, groups in lanes.items()
+        }
+
+    def _pick(
+        self,
+        lanes: dict[int, dict[str, deque]],
+        group_active: Callable[[str], int],
+        sweep_active: Callable[[str], int],
+    ) -> Optional[_Entry]:
+        """Head of the highest class; within it, the least-served group."""
+        for rank in sorted(lanes):
+            best: Optional[tuple] = None
+            for group, queue in lanes[rank].items():
+                if not queue:
+                    continue
+                head = queue[0]
+                cap = self._sweep_cap(head.sweep_id)
+                if cap is not None and sweep_active(head.sweep_id) >= cap:
+                    continue
+                score = (group_active(group) / head.weight, head.order)
+                if best is None or score < best[0]:
+                    best = (score, group)
+            if best is not None:
+                return lanes[rank][best[1]].popleft()
+        return None
+
+    # ------------------------------------------------------------------
+    # Estimates
+    # ------------------------------------------------------------------
+
+    def _runtime_estimates(self) -> tuple[float, dict[str, float]]:
+        finished = []
+        for run in self._runs.values():
+            if run.get("status") not in TERMINAL_STATUSES:
+                continue
+            duration = _run_duration(run)
+            if duration is not None:
+                finished.append((run.get("ended_at") or 0, run.get("sweep_id"), duration))
+        finished.sort(key=lambda item: item[0], reverse=True)
+
+        recent = [duration for _, _, duration in finished[:RUNTIME_SAMPLE_SIZE]]
+        overall = sum(recent) / len(recent) if recent else DEFAULT_RUN_SECONDS
+
+        per_sweep: dict[str, list[float]] = defaultdict(list)
+        for _, sweep_id, duration in finished:
+            if sweep_id and len(per_sweep[sweep_id]) < RUNTIME_SAMPLE_SIZE:
+                per_sweep[sweep_id].append(duration)
+        return overall, {sweep_id: sum(d) / len(d) for sweep_id, d in per_sweep.items()}
+
+    def estimate(self) -> dict[str, dict]:
+        """Queue position and estimated start time for every queued run.
+
+        Simulates the dispatcher forward in time: each slot frees when its
+        run's expected runtime (sweep average, else recent average) elapses.
+        Preemption is not modelled, so ETAs are conservative when it is on.
+        """
+        now = time.time()
+        cached_at, cached = self._estimate_cache
+        if now - cached_at < ESTIMATE_CACHE_SECONDS:
+            return cached
+
+        with self._lock:
+            overall, per_sweep = self._runtime_estimates()
+
+            def expected(entry: _Entry) -> float:
+                return per_sweep.get(entry.sweep_id, overall) if entry.sweep_id else overall
+
+            pending, active = self._collect()
+            group_ends: dict[str, list[float]] = defaultdict(list)
+            sweep_ends: dict[str, list[float]] = defaultdict(list)
+            ends = []
+            for entry in active:
+                started = entry.run.get("started_at") or entry.run.get("launched_at") or now
+                end = max(now, float(started) + expected(entry))
+                ends.append(end)
+                heapq.heappush(group_ends[entry.group], end)
+                if entry.sweep_id:
+                    heapq.heappush(sweep_ends[entry.sweep_id], end)
+            ends.sort()
+            capacity = self.max_concurrent or len(active) + len(pending)
+            overflow = max(0, len(active) - capacity)
+            slots = [now] * max(0, capacity - len(active)) + ends[overflow:]
+            heapq.heapify(slots)
+
+            def running_at(heaps: dict[str, list[float]], key: str, t: float) -> int:
+                heap = heaps.get(key)
+                if not heap:
+                    return 0
+                while heap and heap[0] <= t:
+                    heapq.heappop(heap)
+                return len(heap)
+
+            lanes = self._build_lanes(pending)
+            result: dict[str, dict] = {}
+            remaining = len(pending)
+            position = 0
+            while remaining and slots:
+                t = heapq.heappop(slots)
+                entry = self._pick(
+                    lanes,
+                    lambda group: running_at(group_ends, group, t),
+                    lambda sweep_id: running_at(sweep_ends, sweep_id, t),
+                )
+                if entry is None:
+                    # Everything left is behind a per-sweep cap; wait for the
+                    # earliest capped run to finish.
+                    later = [heap[0] for heap in sweep_ends.values() if heap and heap[0] > t]
+                    if not later:
+                        break
+                    heapq.heappush(slots, min(later))
+                    continue
+                remaining -= 1
+                position += 1
+                if self._takes_slot(entry.run):
+                    end = t + expected(entry)
+                    heapq.heappush(slots, end)
+                else:
+                    # Handed straight to the cluster; its own queue is not modelled.
+                    heapq.heappush(slots, t)
+                    t = now
+                    end = t + expected(entry)
+                heapq.heappush(group_ends[entry.group], end)
+                if entry.sweep_id:
+                    heapq.heappush(sweep_ends[entry.sweep_id], end)
+                result[entry.run_id] = {
+                    "queue_position": position,
+                    "estimated_start_at": t,
+                    "priority_class": PRIORITY_CLASSES[entry.rank],
+                    "share_group": entry.group,
+                }
+
+            self._estimate_cache = (now, result)
+            return result
+
+    def queue_info(self, run_id: str) -> Optional[dict]:
+        return self.estimate().get(run_id)
+
+    # ------------------------------------------------------------------
+    # Dispatch
+    # ------------------------------------------------------------------
+
+    def _victim_for(self, entry: _Entry, active: list[_Entry]) -> Optional[_Entry]:
+        """The lower-class active run whose slot (and GPUs) ``entry`` should take."""
+        if not self.preemption_enabled or self._stop_fn is None:
+            return None
+        victims = [
+            candidate for candidate in active
+            if candidate.rank > entry.rank and candidate.run.get("preemptible", True) is not False
+        ]
+        # Lowest class first; within it, the youngest run loses the least work.
+        victims.sort(key=lambda c: (c.rank, float(c.run.get("launched_at") or 0.0)), reverse=True)
+        return next(
+            (c for c in victims if self._fits_fn is None or self._fits_fn(entry.run_id, entry.run, (c.run_id,))),
+            None,
+        )
+
+    def _stop_victim(self, victim: _Entry) -> bool:
+        try:
+            self._stop_fn(victim.run_id, victim.run)
+        except Exception as e:
+            logger.error("Failed to preempt run %s: %s", victim.run_id, e)
+            return False
+        return True
+
+    def _requeue_victim(self, victim: _Entry, preemptor_id: str) -> None:
+        run = victim.run
+        run["status"] = "queued"
+        run["preempted_at"] = time.time()
+        run["preempt_count"] = int(run.get("preempt_count") or 0) + 1
+        run["tmux_window"] = None
+        run["started_at"] = None
+        run["launched_at"] = None
+        logger.info("Preempted run %s for higher-priority run %s", victim.run_id, preemptor_id)
+        if self._on_preempted:
+            self._on_preempted(victim.run_id, run, preemptor_id)
+
+    def _preempt_for(self, entry: _Entry, active: list[_Entry], preempted: list[str], launched: list[str]) -> bool:
+        """Launch ``entry`` in the slot of a lower-class active run; False if there is none.
+
+        Called outside any executor batch, so launch and stop failures are
+        known immediately.  ``entry`` is prepared before the victim is
+        touched.  If it needs none of the victim's GPUs it is launched first
+        and the victim is only stopped once that worked; otherwise the victim
+        is stopped, and relaunched if ``entry`` still fails to launch.  Launch
+        errors are re-raised for the caller to record.
+        """
+        victim = self._victim_for(entry, active)
+        if victim is None:
+            return False
+        if self._prepare_fn:
+            self._prepare_fn(entry.run_id, entry.run)
+
+        if self._fits_fn is None or self._fits_fn(entry.run_id, entry.run, ()):
+            self._launch_fn(entry.run_id, entry.run)
+            if self._stop_victim(victim):
+                self._requeue_victim(victim, entry.run_id)
+                preempted.append(victim.run_id)
+            return True
+
+        if not self._stop_victim(victim):
+            return False
+        try:
+            self._launch_fn(entry.run_id, entry.run)
+        except Exception:
+            # The victim is already gone; restart it rather than leave its slot empty.
+            try:
+                self._launch_fn(victim.run_id, victim.run)
+                launched.append(victim.run_id)
+                logger.info("Relaunched run %s after run %s failed to launch in its place",
+                            victim.run_id, entry.run_id)
+            except Exception as e:
+                logger.warning("Failed to relaunch preempted run %s: %s", victim.run_id, e)
+                self._requeue_victim(victim, entry.run_id)
+                preempted.append(victim.run_id)
+            raise
+        self._requeue_victim(victim, entry.run_id)
+        preempted.append(victim.run_id)
+        return True
+
+    def _fail(self, run_id: str, run: dict, error: str) -> None:
+        """A launch that failed for anything but GPU placement would fail again: end the run."""
+        logger.warning("Failed to launch queued run %s: %s", run_id, error)
+        run["status"] = "failed"
+        run["error"] = error
+        run["ended_at"] = time.time()
+        run.pop("queue_blocked_reason", None)
+        if self._on_failed:
+            self._on_failed(run_id, run)
+
+    def _resolve_dependencies(self) -> list[str]:
+        """Cancel unstarted runs whose dependencies can no longer be met.
+
+        Repeats until nothing changes, so a failure propagates down whole
+        chains in one pass.  Still-waiting queued runs get a blocked reason.
+        """
+        cancelled: list[str] = []
+        candidates = {
+            run_id: run for run_id, run in self._runs.items()
+            if run.get("depends_on") and run.get("status") in UNSTARTED_STATUSES
+        }
+        changed = True
+        while changed:
+            changed = False
+            for run_id, run in list(candidates.items()):
+                state, reason = dependency_state(self._runs, run)
+                if state in ("failed", "stopped"):
+                    run["status"] = state
+                    run["error"] = reason
+                    run["ended_at"] = time.time()
+                    run.pop("queue_blocked_reason", None)
+                    del candidates[run_id]
+                    cancelled.append(run_id)
+                    changed = True
+                    logger.info("Cancelled run %s: %s", run_id, reason)
+                elif run.get("status") == "queued":
+                    if state == "waiting":
+                        run["queue_blocked_reason"] = reason
+                    elif (run.get("queue_blocked_reason") or "").startswith("Waiting for"):
+                        run.pop("queue_blocked_reason", None)
+        if self._on_cancelled:
+            for run_id in cancelled:
+                self._on_cancelled(run_id, self._runs[run_id])
+        return cancelled
+
+    def _launch_failed(self, entry: _Entry, error: Exception, blocked: dict, failed: dict) -> None:
+        if isinstance(error, GpuPlacementError):
+            blocked[entry.run_id] = str(error)
+            entry.run["queue_blocked_reason"] = str(error)
+        else:
+            failed[entry.run_id] = str(error)
+            self._fail(entry.run_id, entry.run, str(error))
+
+    def _fill(
+        self, skip: set[str], launched: list[str], blocked: dict, failed: dict
+    ) -> Optional[tuple[_Entry, list[_Entry]]]:
+        """Launch queued runs in pick order while slots are free.
+
+        Returns the next pick and the active runs once the queue is full, or
+        None when nothing is left to launch.
+        """
+        while True:
+            pending, active = self._collect(exclude=skip)
+            if not pending:
+                return None
+            group_counts: dict[str, int] = defaultdict(int)
+            sweep_counts: dict[str, int] = defaultdict(int)
+            for entry in active:
+                group_counts[entry.group] += 1
+                if entry.sweep_id:
+                    sweep_counts[entry.sweep_id] += 1
+
+            entry = self._pick(
+                self._build_lanes(pending),
+                lambda group: group_counts[group],
+                lambda sweep_id: sweep_counts[sweep_id],
+            )
+            if entry is None:
+                return None
+            if self._full(active) and self._takes_slot(entry.run):
+                return entry, active
+
+            skip.add(entry.run_id)
+            try:
+                self._launch_fn(entry.run_id, entry.run)
+            except Exception as e:
+                self._launch_failed(entry, e, blocked, failed)
+                continue
+            entry.run.pop("queue_blocked_reason", None)
+            launched.append(entry.run_id)
+
+    def dispatch(self) -> dict[str, Any]:
+        """Launch queued runs while capacity allows.
+
+        Returns ``{"launched": [...], "blocked": {run_id: reason},
+        "failed": {run_id: error}, "preempted": [...], "cancelled": [...]}``.
+        Blocked runs could not get GPUs; they stay queued and are retried on
+        the next dispatch.  Failed runs raised anything else from
+        ``launch_fn`` (or failed when a batched launch was submitted) and are
+        marked ``failed``.  Cancelled runs had a dependency fail or stop.
+        """
+        self.ensure_running()
+        launched: list[str] = []
+        blocked: dict[str, str] = {}
+        failed: dict[str, str] = {}
+        preempted: list[str] = []
+
+        with self._lock:
+            cancelled = self._resolve_dependencies()
+            skip: set[str] = set()
+            while True:
+                with self._batch_fn():
+                    contested = self._fill(skip, launched, blocked, failed)
+
+                # A batched launch that failed on submission put its run back in the queue.
+                for run_id in list(launched):
+                    run = self._runs.get(run_id) or {}
+                    if run.get("status") == "queued" and run.get("queue_blocked_reason"):
+                        launched.remove(run_id)
+                        failed[run_id] = run["queue_blocked_reason"]
+                        self._fail(run_id, run, failed[run_id])
+
+                if contested is None:
+                    break
+                entry, active = contested
+                skip.add(entry.run_id)
+                try:
+                    took_slot = self._preempt_for(entry, active, preempted, launched)
+                except Exception as e:
+                    self._launch_failed(entry, e, blocked, failed)
+                    took_slot = None
+                skip.update(preempted)
+                if took_slot is None:
+                    continue
+                if not took_slot:
+                    break
+                entry.run.pop("queue_blocked_reason", None)
+                launched.append(entry.run_id)
+
+            if self._on_launched:
+                for run_id in launched:
+                    self._on_launched(run_id, self._runs[run_id])
+
+            if launched or preempted or blocked or failed or cancelled:
+                self._estimate_cache = (0.0, {})
+                if self._save_fn:
+                    self._save_fn()
+
+        return {"launched": launched, "blocked": blocked, "failed": failed, "preempted": preempted,
+                "cancelled": cancelled}
+
+    # ------------------------------------------------------------------
+    # Introspection
+    # ------------------------------------------------------------------
+
+    def summary(self) -> dict[str, Any]:
+        """Counts per priority class, for system-health style payloads."""
+        by_class = {name: {"active": 0, "queued": 0} for name in PRIORITY_CLASSES}
+        for run in self._runs.values():
+            status = run.get("status")
+            if status in ACTIVE_STATUSES:
+                by_class[priority_class_for(run, self._sweeps)]["active"] += 1
+            elif status == "queued" and not run.get("is_archived"):
+                by_class[priority_class_for(run, self._sweeps)]["queued"] += 1
+        return {
+            "max_concurrent": self.max_concurrent,
+            "preemption_enabled": self.preemption_enabled,
+            "active": sum(c["active"] for c in by_class.values()),
+            "queued": sum(c["queued"] for c in by_class.values()),
+            "by_class": by_class,
+        }
+
+    def snapshot(self) -> dict[str, Any]:
+        """Summary plus the queued runs in expected launch order."""
+        estimates = self.estimate()
+        queued = []
+        for run_id, info in sorted(estimates.items(), key=lambda item: item[1]["queue_position"]):
+            run = self._runs.get(run_id) or {}
+            queued.append({
+                "id": run_id,
+                "name": run.get("name"),
+                "sweep_id": run.get("sweep_id"),
+                "chat_session_id": run.get("chat_session_id"),
+                "queued_at": run.get("queued_at"),
+                "blocked_reason": run.get("queue_blocked_reason"),
+                **info,
+            })
+        waiting = [
+            {
+                "id": run_id,
+                "name": run.get("name"),
+                "depends_on": run.get("depends_on"),
+                "dependency_condition": run.get("dependency_condition"),
+                "blocked_reason": run.get("queue_blocked_reason"),
+            }
+            for run_id, run in self._runs.items()
+            if run.get("status") == "queued" and not run.get("is_archived") and run_id not in estimates
+            and run.get("depends_on")
+        ]
+        return {**self.summary(), "priority_classes": list(PRIORITY_CLASSES), "queue": queued, "waiting": waiting}
+
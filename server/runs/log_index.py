@@ -0,0 +1,139 @@
+"""
+Research Agent Server — Line Index for Run Logs
+
+``LineIndex`` keeps ``<log>.lidx`` next to ``run.log`` / ``sidecar.log``: a
+16-byte header (magic, inode of the log) followed by one little-endian
+uint64 per newline, holding the byte offset where the next line starts.
+Line ``k`` therefore spans ``[entry[k-1], entry[k])`` (``entry[-1]`` being 0),
+and finding it is one seek into the index plus one into the log.
+
+``refresh()`` scans only the bytes appended since the last call and appends
+their offsets, so the index is built once and then kept current as the log
+grows.  A log that shrank or was replaced (different inode) is re-indexed
+from scratch.  Logs are read through runs/log_store.py, so an index built
+before a finished log was compressed keeps working on the ``.zf`` copy.
+"""
+
+import os
+import struct
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from runs.log_store import iter_chunks, stat_log
+
+INDEX_SUFFIX = ".lidx"
+SCAN_CHUNK_BYTES = 4 * 1024 * 1024
+_MAGIC = b"RALIDX1\0"
+_HEADER = struct.Struct("<8sQ")
+_ENTRY = np.dtype("<u8")
+
+
+class LineIndex:
+    """Newline offsets of one log file, persisted in ``<log>.lidx``."""
+
+    def __init__(self, log_path: str) -> None:
+        self.log_path = log_path
+        self.index_path = log_path + INDEX_SUFFIX
+        self.lines = 0      # complete lines (newlines) indexed
+        self.scanned = 0    # byte offset just past the last indexed newline
+        self.size = 0       # log size at the last refresh
+        self._inode = None
+        self._lock = threading.Lock()
+
+    def _reset(self, inode: int) -> None:
+        with open(self.index_path, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, inode))
+        self._inode, self.lines, self.scanned = inode, 0, 0
+
+    def _load(self, inode: int, size: int) -> None:
+        try:
+            with open(self.index_path, "rb") as f:
+                magic, indexed_inode = _HEADER.unpack(f.read(_HEADER.size))
+                body = os.fstat(f.fileno()).st_size - _HEADER.size
+                if magic != _MAGIC or indexed_inode != inode or body % _ENTRY.itemsize:
+                    raise ValueError("stale index")
+                lines = body // _ENTRY.itemsize
+                scanned = 0
+                if lines:
+                    f.seek(-_ENTRY.itemsize, os.SEEK_END)
+                    scanned = int(np.frombuffer(f.read(_ENTRY.itemsize), dtype=_ENTRY)[0])
+            if scanned > size:
+                raise ValueError("log shrank")
+            self._inode, self.lines, self.scanned = inode, lines, scanned
+        except (OSError, ValueError, struct.error):
+            self._reset(inode)
+
+    def refresh(self) -> None:
+        """Index whatever was appended to the log since the last refresh."""
+        with self._lock:
+            st = stat_log(self.log_path)
+            if st is None:
+                self.lines = self.scanned = self.size = 0
+                self._inode = None
+                return
+            inode, size = st
+            if self._inode is None or not os.path.exists(self.index_path):
+                self._load(inode, size)
+            elif inode != self._inode or size < self.scanned:
+                self._reset(inode)
+
+            with open(self.index_path, "ab") as index:
+                for pos, chunk in iter_chunks(self.log_path, self.scanned, size, SCAN_CHUNK_BYTES):
+                    ends = np.flatnonzero(np.frombuffer(chunk, dtype=np.uint8) == 10).astype(_ENTRY)
+                    if ends.size:
+                        ends += pos + 1
+                        index.write(ends.tobytes())
+                        self.lines += int(ends.size)
+                        self.scanned = int(ends[-1])
+            self.size = size
+
+    def total_lines(self) -> int:
+        """Indexed lines, counting a trailing line that has no newline yet."""
+        return self.lines + (1 if self.size > self.scanned else 0)
+
+    def entries(self) -> np.ndarray:
+        """Indexed line-start offsets, memory-mapped (``self.lines`` long)."""
+        if not self.lines:
+            return np.empty(0, dtype=_ENTRY)
+        return np.memmap(self.index_path, dtype=_ENTRY, mode="r", offset=_HEADER.size, shape=(self.lines,))
+
+    def boundaries(self, start: int, count: int) -> np.ndarray:
+        """Byte offsets delimiting lines ``[start, start + count)``, clamped to the log.
+
+        The result has one more element than the number of lines it covers.
+        """
+        with self._lock:
+            total = self.total_lines()
+            start = max(0, min(start, total))
+            end = max(start, min(start + count, total))
+            lo, hi = max(start - 1, 0), min(end, self.lines)
+            entries = np.empty(0, dtype=_ENTRY)
+            if hi > lo:
+                with open(self.index_path, "rb") as f:
+                    f.seek(_HEADER.size + lo * _ENTRY.itemsize)
+                    entries = np.frombuffer(f.read((hi - lo) * _ENTRY.itemsize), dtype=_ENTRY)
+            parts = [entries]
+            if start == 0:
+                parts.insert(0, np.zeros(1, dtype=_ENTRY))
+            if end > self.lines:
+                parts.append(np.array([self.size], dtype=_ENTRY))
+            return np.concatenate(parts)
+
+
+_indexes: "OrderedDict[str, LineIndex]" = OrderedDict()
+_indexes_lock = threading.Lock()
+_MAX_OPEN_INDEXES = 256
+
+
+def get_line_index(log_path: str) -> LineIndex:
+    """Shared ``LineIndex`` for ``log_path`` (kept for the most recent logs)."""
+    with _indexes_lock:
+        index = _indexes.get(log_path)
+        if index is None:
+            index = _indexes[log_path] = LineIndex(log_path)
+            while len(_indexes) > _MAX_OPEN_INDEXES:
+                _indexes.popitem(last=False)
+        _indexes.move_to_end(log_path)
+        return index
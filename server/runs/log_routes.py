@@ -2,17 +2,29 @@
 Research Agent Server — Log & Artifact Endpoints
 
 Extracted from server.py.  Routes for reading run logs (with
-byte-offset pagination and SSE streaming) and listing run artifacts.
+byte-offset pagination and SSE streaming through shared tailers),
+downloading whole logs and run files (Range / If-None-Match aware) and
+listing run artifacts.
 """
 
 import asyncio
 import json
 import logging
 import os
-from typing import Dict
+from typing import Dict, Optional
+from urllib.parse import quote
 
-from fastapi import APIRouter, HTTPException, Query
-from starlette.responses import StreamingResponse
+import numpy as np
+
+from fastapi import APIRouter, HTTPException, Query, Request
+from starlette.responses import FileResponse, Response, StreamingResponse
+
+from core import config
+from runs.artifact_manifest import ARTIFACTS_DIR, get_manifest
+from runs.log_index import get_line_index
+from runs.log_search import SEARCH_WORKERS, build_matcher, scan_log, search_pool
+from runs.log_store import compressed_path, iter_chunks, log_exists, read_range, stat_log
+from runs.log_tailer import LogTailerHub
 
 logger = logging.getLogger("research-agent-server")
 router = APIRouter()
@@ -22,49 +34,65 @@ router = APIRouter()
 # ---------------------------------------------------------------------------
 _runs: Dict[str, dict] = {}
 
+# One tailer per log file shared by all streaming clients.
+_tailer_hub = LogTailerHub()
+
+
+_artifact_deduper = None
+_storage_manager = None
 
-def init(runs_dict):
-    """Wire in the shared runs dict from server.py."""
-    global _runs
+
+def init(runs_dict, artifact_deduper=None, storage_manager=None):
+    """Wire in the shared runs dict (plus the artifact blob store and disk accounting) from server.py."""
+    global _runs, _artifact_deduper, _storage_manager
     _runs = runs_dict
+    _artifact_deduper = artifact_deduper
+    _storage_manager = storage_manager
 
 
 # ---------------------------------------------------------------------------
 # Helper
 # ---------------------------------------------------------------------------
 
-def _read_log_paginated(run_id: str, log_filename: str, offset: int, limit: int):
-    """Common implementation for paginated log reading."""
+MAX_PAGE_BYTES = 100 * 1024
+MAX_PAGE_LINES = 10000
+
+
+def _log_path(run_id: str, log_filename: str) -> Optional[str]:
+    """Path of an existing log for the run, None if there is none yet; 404 for unknown runs."""
     if run_id not in _runs:
         raise HTTPException(status_code=404, detail="Run not found")
+    run_dir = _runs[run_id].get("run_dir")
+    if not run_dir:
+        return None
+    log_file = os.path.join(run_dir, log_filename)
+    return log_file if log_exists(log_file) else None
 
-    run = _runs[run_id]
-    run_dir = run.get("run_dir")
 
+def _read_log_paginated(run_id: str, log_filename: str, offset: int, limit: int):
+    """Common implementation for paginated log reading."""
+    log_file = _log_path(run_id, log_filename)
     empty = {"content": "", "offset": 0, "total_size": 0, "has_more_before": False, "has_more_after": False}
-    if not run_dir:
+    if not log_file:
         return empty
 
-    log_file = os.path.join(run_dir, log_filename)
-    if not os.path.exists(log_file):
-        return empty
-
-    limit = min(limit, 100 * 1024)
+    limit = min(limit, MAX_PAGE_BYTES)
 
     try:
-        total_size = os.path.getsize(log_file)
+        st = stat_log(log_file)
+        if st is None:
+            return empty
+        total_size = st[1]
 
         if offset < 0:
             actual_offset = max(0, total_size + offset)
         else:
             actual_offset = min(offset, total_size)
 
-        with open(log_file, "r", errors="replace") as f:
-            f.seek(actual_offset)
-            content = f.read(limit)
-
-        bytes_read = len(content.encode('utf-8'))
-        end_offset = actual_offset + bytes_read
+        # Offsets count raw bytes, so decode after reading rather than before.
+        raw = read_range(log_file, actual_offset, limit)
+        content = raw.decode("utf-8", errors="replace")
+        end_offset = actual_offset + len(raw)
 
         return {
             "content": content,
@@ -79,8 +107,56 @@ def _read_log_paginated(run_id: str, log_filename: str, offset: int, limit: int)
                 "has_more_before": False, "has_more_after": False}
 
 
+def _read_log_lines(run_id: str, log_filename: str, line_start: int, line_count: int):
+    """Line-based pagination through the log's ``.lidx`` line index.
+
+    Negative ``line_start`` counts from the end.  The page stops early at
+    whole lines once it would exceed ``MAX_PAGE_BYTES``.
+    """
+    log_file = _log_path(run_id, log_filename)
+    if not log_file:
+        return {"content": "", "offset": 0, "end_offset": 0, "total_size": 0, "line_start": 0,
+                "line_count": 0, "total_lines": 0, "has_more_before": False, "has_more_after": False}
+
+    index = get_line_index(log_file)
+    index.refresh()
+    total_lines = index.total_lines()
+    if line_start < 0:
+        line_start = max(0, total_lines + line_start)
+    bounds = index.boundaries(line_start, min(line_count, MAX_PAGE_LINES))
+    line_start = min(line_start, total_lines)
+    start = int(bounds[0])
+
+    # Whole lines that fit the byte cap; a single oversized line is cut at the cap.
+    lines = int(np.searchsorted(bounds, start + MAX_PAGE_BYTES, side="right")) - 1
+    lines = min(max(lines, 1), len(bounds) - 1)
+    end = min(int(bounds[lines]), start + MAX_PAGE_BYTES) if lines else start
+
+    raw = read_range(log_file, start, end - start)
+
+    return {
+        "content": raw.decode("utf-8", errors="replace"),
+        "offset": start,
+        "end_offset": end,
+        "total_size": index.size,
+        "line_start": line_start,
+        "line_count": lines,
+        "total_lines": total_lines,
+        "has_more_before": line_start > 0,
+        "has_more_after": line_start + lines < total_lines,
+    }
+
+
+def _sse(event: dict) -> str:
+    return f"data: {json.dumps(event)}\n\n"
+
+
 def _stream_log(run_id: str, log_filename: str):
-    """Common implementation for SSE log streaming."""
+    """Common implementation for SSE log streaming.
+
+    All clients of one file share a tailer from ``_tailer_hub``; the initial
+    event carries the last ``TAIL_BYTES`` and the byte offset they start at.
+    """
     if run_id not in _runs:
         raise HTTPException(status_code=404, detail="Run not found")
 
@@ -89,42 +165,35 @@ def _stream_log(run_id: str, log_filename: str):
 
     async def log_generator():
         if not run_dir:
-            yield f"data: {json.dumps({'error': 'No run directory'})}\n\n"
+            yield _sse({'error': 'No run directory'})
             return
 
         log_file = os.path.join(run_dir, log_filename)
-        last_size = 0
-
-        # Send initial content
-        if os.path.exists(log_file):
-            with open(log_file, "r", errors="replace") as f:
-                content = f.read()
-                last_size = len(content.encode('utf-8'))
-                yield f"data: {json.dumps({'type': 'initial', 'content': content})}\n\n"
-
-        # Stream updates
-        while True:
-            await asyncio.sleep(0.5)
-
-            current_run = _runs.get(run_id, {})
-            if current_run.get("status") in ["finished", "failed", "stopped"]:
-                if os.path.exists(log_file):
-                    with open(log_file, "r", errors="replace") as f:
-                        f.seek(last_size)
-                        new_content = f.read()
-                        if new_content:
-                            yield f"data: {json.dumps({'type': 'delta', 'content': new_content})}\n\n"
-                yield f"data: {json.dumps({'type': 'done', 'status': current_run.get('status')})}\n\n"
-                break
-
-            if os.path.exists(log_file):
-                current_size = os.path.getsize(log_file)
-                if current_size > last_size:
-                    with open(log_file, "r", errors="replace") as f:
-                        f.seek(last_size)
-                        new_content = f.read()
-                        last_size = current_size
-                        yield f"data: {json.dumps({'type': 'delta', 'content': new_content})}\n\n"
+        tailer, subscriber, initial = _tailer_hub.subscribe(log_file)
+        try:
+            yield _sse(initial)
+            while True:
+                if subscriber.lagged:
+                    # Too far behind to catch up from the queue; start over from the tail.
+                    _tailer_hub.unsubscribe(tailer, subscriber)
+                    tailer, subscriber, initial = _tailer_hub.subscribe(log_file)
+                    yield _sse(initial)
+
+                current_run = _runs.get(run_id, {})
+                if current_run.get("status") in ["finished", "failed", "stopped"]:
+                    tailer.poll()
+                    while not subscriber.queue.empty():
+                        yield _sse(subscriber.queue.get_nowait())
+                    yield _sse({'type': 'done', 'status': current_run.get('status')})
+                    break
+
+                try:
+                    event = await asyncio.wait_for(subscriber.queue.get(), timeout=_tailer_hub.poll_interval)
+                except asyncio.TimeoutError:
+                    continue
+                yield _sse(event)
+        finally:
+            _tailer_hub.unsubscribe(tailer, subscriber)
 
     return StreamingResponse(log_generator(), media_type="text/event-stream")
 
@@ -133,14 +202,25 @@ def _stream_log(run_id: str, log_filename: str):
 # Log Endpoints
 # ---------------------------------------------------------------------------
 
+async def _read_log_page(run_id, log_filename, offset, limit, line_start, line_count):
+    if line_start is None:
+        return _read_log_paginated(run_id, log_filename, offset, limit)
+    # The first line-based read of a big log builds its index; keep that off the loop.
+    return await asyncio.get_running_loop().run_in_executor(
+        None, _read_log_lines, run_id, log_filename, line_start, line_count
+    )
+
+
 @router.get("/runs/{run_id}/logs")
 async def get_run_logs(
     run_id: str,
     offset: int = Query(-10000, description="Byte offset. Negative = from end."),
-    limit: int = Query(10000, description="Max bytes to return (max 100KB)")
+    limit: int = Query(10000, description="Max bytes to return (max 100KB)"),
+    line_start: Optional[int] = Query(None, description="First line (0-based). Negative = from end. Overrides offset."),
+    line_count: int = Query(200, ge=0, description="Lines to return with line_start (max 10000)"),
 ):
-    """Get run logs with byte-offset pagination."""
-    return _read_log_paginated(run_id, "run.log", offset, limit)
+    """Get run logs with byte-offset or line-based pagination."""
+    return await _read_log_page(run_id, "run.log", offset, limit, line_start, line_count)
 
 
 @router.get("/runs/{run_id}/logs/stream")
@@ -153,10 +233,12 @@ async def stream_run_logs(run_id: str):
 async def get_sidecar_logs(
     run_id: str,
     offset: int = Query(-10000, description="Byte offset. Negative = from end."),
-    limit: int = Query(10000, description="Max bytes to return (max 100KB)")
+    limit: int = Query(10000, description="Max bytes to return (max 100KB)"),
+    line_start: Optional[int] = Query(None, description="First line (0-based). Negative = from end. Overrides offset."),
+    line_count: int = Query(200, ge=0, description="Lines to return with line_start (max 10000)"),
 ):
-    """Get sidecar logs with byte-offset pagination."""
-    return _read_log_paginated(run_id, "sidecar.log", offset, limit)
+    """Get sidecar logs with byte-offset or line-based pagination."""
+    return await _read_log_page(run_id, "sidecar.log", offset, limit, line_start, line_count)
 
 
 @router.get("/runs/{run_id}/sidecar-logs/stream")
@@ -165,13 +247,232 @@ async def stream_sidecar_logs(run_id: str):
     return _stream_log(run_id, "sidecar.log")
 
 
+@router.get("/logs/search")
+async def search_logs(
+    q: str = Query(..., min_length=1, max_length=500, description="Text (or regex) to find"),
+    regex: bool = Query(False, description="Treat q as a regular expression"),
+    ignore_case: bool = Query(False),
+    run_ids: Optional[str] = Query(None, description="Comma-separated run ids (default: all runs)"),
+    sweep_id: Optional[str] = Query(None, description="Only runs of this sweep"),
+    log: str = Query("run", pattern="^(run|sidecar)$", description="run.log or sidecar.log"),
+    limit: int = Query(200, ge=1, le=5000, description="Max matching lines in this page"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+):
+    """Search many runs' logs at once; streams NDJSON matches in run-id order.
+
+    Each line is ``{"type": "match", "run_id", "line", "offset", ...}``; the
+    last is ``{"type": "end", "matches", "runs_scanned", "next_cursor"}``.
+    """
+    try:
+        matcher = build_matcher(q, regex=regex, ignore_case=ignore_case)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    wanted = {r for r in run_ids.split(",") if r} if run_ids else None
+    targets = sorted(
+        rid for rid, run in _runs.items()
+        if run.get("run_dir")
+        and (wanted is None or rid in wanted)
+        and (sweep_id is None or run.get("sweep_id") == sweep_id)
+    )
+    resume_run, resume_offset = None, None
+    if cursor:
+        resume_run, _, raw_offset = cursor.rpartition(":")
+        try:
+            resume_offset = int(raw_offset)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        targets = [rid for rid in targets if rid >= resume_run]
+
+    log_filename = f"{log}.log"
+
+    async def generate():
+        loop = asyncio.get_running_loop()
+        pending: list = []
+        queue = iter(targets)
+        emitted, scanned, next_cursor = 0, 0, None
+        last_offset = None  # offset of the last emitted match; set before any cursor is built
+
+        def submit_next() -> None:
+            rid = next(queue, None)
+            if rid is None:
+                return
+            path = os.path.join(_runs[rid]["run_dir"], log_filename)
+            after = resume_offset if rid == resume_run else None
+            pending.append((rid, loop.run_in_executor(search_pool, _scan_or_empty, path, matcher, limit, after)))
+
+        # Keep the pool busy ahead of the run being streamed, without
+        # scanning every run when the first few already fill the page.
+        for _ in range(SEARCH_WORKERS * 2):
+            submit_next()
+        try:
+            while pending and next_cursor is None:
+                rid, future = pending.pop(0)
+                matches = await future
+                scanned += 1
+                submit_next()
+                for match in matches:
+                    if emitted == limit:
+                        next_cursor = f"{rid}:{last_offset}"
+                        break
+                    emitted += 1
+                    last_offset = match["offset"]
+                    yield json.dumps({"type": "match", "run_id": rid, "log": log_filename, **match}) + "\n"
+                if emitted == limit and next_cursor is None and (pending or len(matches) == limit):
+                    next_cursor = f"{rid}:{last_offset}"
+            yield json.dumps({"type": "end", "matches": emitted, "runs_scanned": scanned,
+                              "next_cursor": next_cursor}) + "\n"
+        finally:
+            for _, future in pending:
+                future.cancel()
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+
+def _scan_or_empty(path, matcher, limit, after):
+    if not log_exists(path):
+        return []
+    try:
+        return scan_log(path, matcher, limit, after)
+    except (OSError, ValueError) as e:
+        logger.debug("Log search skipped %s: %s", path, e)
+        return []
+
+
+# ---------------------------------------------------------------------------
+# File Downloads
+# ---------------------------------------------------------------------------
+
+def _run_dir(run_id: str) -> str:
+    if run_id not in _runs:
+        raise HTTPException(status_code=404, detail="Run not found")
+    run_dir = _runs[run_id].get("run_dir")
+    if not run_dir:
+        raise HTTPException(status_code=404, detail="Run has no run directory")
+    return run_dir
+
+
+def _sandboxed_path(run_dir: str, rel_path: str) -> str:
+    """``rel_path`` resolved inside ``run_dir``; 403 if it escapes.
+
+    Symlinks directly in ``artifacts/`` may point elsewhere: that is how runs
+    publish checkpoints kept in their workdir, and ``/artifacts`` already
+    lists their targets.  Paths below such a link stay inside its target.
+    """
+    root = os.path.realpath(run_dir)
+    candidate = os.path.normpath(os.path.join(root, rel_path))
+    if os.path.isabs(rel_path) or not candidate.startswith(root + os.sep):
+        raise HTTPException(status_code=403, detail="Path outside the run directory")
+    allowed = root
+    parts = os.path.relpath(candidate, root).split(os.sep)
+    if len(parts) >= 2 and parts[0] == ARTIFACTS_DIR and os.path.islink(os.path.join(root, ARTIFACTS_DIR, parts[1])):
+        allowed = os.path.realpath(os.path.join(root, ARTIFACTS_DIR, parts[1]))
+    resolved = os.path.realpath(candidate)
+    if not (resolved == allowed or resolved.startswith(allowed + os.sep)) or resolved == root:
+        raise HTTPException(status_code=403, detail="Path outside the run directory")
+    return resolved
+
+
+def _etag(st: os.stat_result) -> str:
+    return f'"{st.st_ino:x}-{st.st_size:x}-{st.st_mtime_ns:x}"'
+
+
+def _not_modified(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return "*" in tags or etag in tags
+
+
+def _single_range(header: Optional[str], size: int) -> Optional[tuple[int, int]]:
+    """Inclusive ``(start, end)`` of a single ``bytes=`` range; None to send
+    the whole file (no, multiple or malformed ranges).  416 if unsatisfiable."""
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, _, last = header[len("bytes="):].strip().partition("-")
+    try:
+        if first:
+            start, end = int(first), int(last) if last else size - 1
+        else:
+            start, end = max(0, size - int(last)), size - 1
+    except ValueError:
+        return None
+    if start >= size or start > end:
+        raise HTTPException(status_code=416, detail="Range not satisfiable",
+                            headers={"Content-Range": f"bytes */{size}"})
+    return start, min(end, size - 1)
+
+
+def _serve_file(request: Request, path: str, filename: str, media_type: Optional[str] = None) -> Response:
+    """Stream ``path`` with Range / If-Range / If-None-Match support.
+
+    Plain files go through ``FileResponse`` (chunked from the file, never
+    decoded); a log compressed by runs/log_store.py is streamed frame by
+    frame, so ranges only decompress the frames they cover.
+    """
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        st = None
+    if st is not None:
+        if not os.path.isfile(path):
+            raise HTTPException(status_code=404, detail="Not a file")
+        etag = _etag(st)
+        if _not_modified(request, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        return FileResponse(path, stat_result=st, filename=filename, media_type=media_type,
+                            headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+    try:
+        zst = os.stat(compressed_path(path))
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="File not found")
+    size = stat_log(path)[1]
+    etag = _etag(zst)
+    if _not_modified(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Accept-Ranges": "bytes",
+               "Content-Disposition": f'attachment; filename="{filename}"'}
+    if_range = request.headers.get("if-range")
+    byte_range = _single_range(request.headers.get("range"), size) if if_range in (None, etag) else None
+    start, end = byte_range or (0, size - 1)
+    headers["Content-Length"] = str(max(0, end - start + 1))
+    if byte_range:
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    body = (data for _, data in iter_chunks(path, start, end + 1))
+    return StreamingResponse(body, status_code=206 if byte_range else 200,
+                             media_type=media_type or "application/octet-stream", headers=headers)
+
+
+@router.get("/runs/{run_id}/logs/raw")
+async def download_run_log(
+    request: Request,
+    run_id: str,
+    log: str = Query("run", pattern="^(run|sidecar)$", description="run.log or sidecar.log"),
+):
+    """Download a whole log (resumable with Range)."""
+    path = os.path.join(_run_dir(run_id), f"{log}.log")
+    return _serve_file(request, path, f"{run_id}-{log}.log", media_type="text/plain; charset=utf-8")
+
+
+@router.get("/runs/{run_id}/files/{file_path:path}")
+async def download_run_file(request: Request, run_id: str, file_path: str):
+    """Download any file under the run directory (resumable with Range)."""
+    path = _sandboxed_path(_run_dir(run_id), file_path)
+    return _serve_file(request, path, os.path.basename(path))
+
+
 # ---------------------------------------------------------------------------
 # Artifact Endpoints
 # ---------------------------------------------------------------------------
 
 @router.get("/runs/{run_id}/artifacts")
-async def list_artifacts(run_id: str):
-    """List artifacts for a run."""
+async def list_artifacts(
+    run_id: str,
+    hashes: bool = Query(False, description="Compute missing sha256 hashes before listing"),
+):
+    """List artifacts for a run from its cached manifest (see runs/artifact_manifest.py)."""
     if run_id not in _runs:
         raise HTTPException(status_code=404, detail="Run not found")
 
@@ -180,17 +481,16 @@ async def list_artifacts(run_id: str):
     artifacts = []
 
     if run_dir:
-        artifacts_dir = os.path.join(run_dir, "artifacts")
-        if os.path.exists(artifacts_dir):
-            for name in os.listdir(artifacts_dir):
-                path = os.path.join(artifacts_dir, name)
-                # Resolve symlinks to get actual path
-                actual_path = os.path.realpath(path) if os.path.islink(path) else path
-                artifacts.append({
-                    "name": name,
-                    "path": actual_path,
-                    "type": "other"  # TODO: detect type
-                })
+        manifest = get_manifest(run_dir)
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, manifest.refresh)
+        if hashes:
+            await loop.run_in_executor(None, manifest.compute_hashes, config.ARTIFACT_HASH_MAX_BYTES)
+        for entry in manifest.listing():
+            entry["url"] = f"/runs/{run_id}/files/{ARTIFACTS_DIR}/{quote(entry['name'])}"
+            if hashes and not entry.get("sha256"):
+                entry["hash_pending"] = True  # over this request's byte budget
+            artifacts.append(entry)
 
     # Add wandb_dir if present
     if run.get("wandb_dir"):
@@ -201,3 +501,27 @@ async def list_artifacts(run_id: str):
         })
 
     return artifacts
+
+
+@router.get("/artifacts/store")
+async def artifact_store_summary():
+    """Content-addressed artifact store: blobs, references and bytes saved."""
+    if _artifact_deduper is None:
+        return {"enabled": False}
+    return await asyncio.get_running_loop().run_in_executor(None, _artifact_deduper.summary)
+
+
+@router.get("/storage")
+async def storage_summary():
+    """Disk usage of run directories, GC policies and the last GC report."""
+    if _storage_manager is None:
+        return {"enabled": False}
+    return _storage_manager.summary()
+
+
+@router.post("/storage/gc")
+async def storage_gc(dry_run: bool = Query(True, description="Only report what would be deleted")):
+    """Run the configured GC policies now; with ``dry_run`` (default) nothing is deleted."""
+    if _storage_manager is None:
+        raise HTTPException(status_code=503, detail="Storage accounting is not available")
+    return await _storage_manager.collect_async(dry_run)
@@ -0,0 +1,112 @@
+"""
+Research Agent Server — Cross-Run Log Search
+
+``scan_log`` searches one log file through a read-only ``mmap``: literal
+queries use ``mmap.find`` (C substring search), regexes a compiled bytes
+pattern with ``re.MULTILINE`` so ``^``/``$`` anchor on lines.  Match byte
+offsets are turned into line numbers through the log's ``.lidx`` line index
+(runs/log_index.py), which the scan refreshes incrementally first, so only
+bytes appended since the previous search or page read are re-indexed.
+Compressed logs of finished runs (runs/log_store.py) are searched one
+decompressed frame at a time; frames end on line boundaries.
+
+``/logs/search`` (log_routes.py) runs one ``scan_log`` per run on
+``search_pool`` and streams results in run-id order as they finish.
+"""
+
+import mmap
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+import numpy as np
+
+from runs.log_index import get_line_index
+from runs.log_store import iter_chunks
+
+MAX_LINE_CHARS = 500
+SEARCH_WORKERS = min(8, os.cpu_count() or 1)
+
+# Shared by all searches; bounded so a burst of searches cannot starve the
+# default executor used by other endpoints.
+search_pool = ThreadPoolExecutor(max_workers=SEARCH_WORKERS, thread_name_prefix="log-search")
+
+# (buffer, start, end) -> byte offset of the next match, or -1; the buffer
+# is an mmap of a plain log or the bytes of one compressed frame.
+Matcher = Callable[[bytes, int, int], int]
+
+
+def build_matcher(query: str, regex: bool = False, ignore_case: bool = False) -> Matcher:
+    """Matcher for ``query``; raises ValueError for an invalid regex."""
+    if not regex and not ignore_case:
+        needle = query.encode("utf-8")
+        return lambda buf, start, end: buf.find(needle, start, end)
+    source = query.encode("utf-8") if regex else re.escape(query.encode("utf-8"))
+    flags = re.MULTILINE | (re.IGNORECASE if ignore_case else 0)
+    try:
+        pattern = re.compile(source, flags)
+    except re.error as e:
+        raise ValueError(f"Invalid regex: {e}") from e
+
+    def search(buf, start, end):
+        match = pattern.search(buf, start, end)
+        return match.start() if match else -1
+
+    return search
+
+
+def scan_log(path: str, matcher: Matcher, max_matches: int, after_offset: Optional[int] = None) -> list[dict]:
+    """Up to ``max_matches`` matching lines of ``path`` (one result per line).
+
+    ``after_offset`` resumes after the line starting at that byte offset.
+    Each result has the 0-based ``line``, the byte ``offset`` where the line
+    starts, the ``match_offset`` and the line ``text`` (truncated).
+    """
+    index = get_line_index(path)
+    index.refresh()
+    if not index.size or max_matches <= 0:
+        return []
+    entries = index.entries()
+    results: list[dict] = []
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        # Compressed: search frame by frame from the one holding after_offset.
+        for base, frame in iter_chunks(path, after_offset or 0, index.size):
+            pos = 0
+            if after_offset is not None and base <= after_offset:
+                newline = frame.find(b"\n", after_offset - base)
+                pos = len(frame) if newline < 0 else newline + 1
+            _scan(frame, base, pos, len(frame), matcher, entries, max_matches, results)
+            if len(results) >= max_matches:
+                break
+        return results
+    with f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+        size = min(index.size, len(buf))
+        pos = 0
+        if after_offset is not None:
+            newline = buf.find(b"\n", after_offset, size)
+            pos = size if newline < 0 else newline + 1
+        _scan(buf, 0, pos, size, matcher, entries, max_matches, results)
+    return results
+
+
+def _scan(buf, base: int, pos: int, size: int, matcher: Matcher, entries: np.ndarray,
+          max_matches: int, results: list[dict]) -> None:
+    """Append matches in ``buf[pos:size]``; ``buf`` starts at log offset ``base``."""
+    while pos < size and len(results) < max_matches:
+        hit = matcher(buf, pos, size)
+        if hit < 0:
+            break
+        line = int(np.searchsorted(entries, base + hit, side="right"))
+        start = max(int(entries[line - 1]) - base if line else -base, 0)
+        end = buf.find(b"\n", hit, size)
+        end = size if end < 0 else end
+        results.append({
+            "line": line,
+            "offset": base + start,
+            "match_offset": base + hit,
+            "text": buf[start:min(end, start + MAX_LINE_CHARS * 4)].decode("utf-8", errors="replace")[:MAX_LINE_CHARS],
+        })
+        pos = end + 1
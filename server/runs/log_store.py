@@ -0,0 +1,335 @@
+"""
+Research Agent Server — Seekable Compressed Run Logs
+
+Finished runs' ``run.log`` / ``sidecar.log`` are compressed in the background
+(``LogCompactor``) into ``<log>.zf``, a framed zlib file that can be read at
+any byte offset without decompressing the rest:
+
+    header   8s   magic
+    frames        independent zlib streams of ~FRAME_BYTES uncompressed each,
+                  cut after a newline where possible
+    index         per frame: uint64 uncompressed start, uint64 compressed start
+    trailer  <QQQQ8s  index offset, frame count, uncompressed size,
+                      inode of the original log, magic
+
+Readers go through ``stat_log`` / ``read_range`` / ``iter_chunks``, which
+serve the plain log while it exists and the framed copy once it has been
+compressed; a range read decompresses only the frames it overlaps, and the
+last few decompressed frames are cached, so tail reads stay cheap.
+
+The trailer remembers the original log's inode and offsets are unchanged, so
+``<log>.lidx`` line indexes (runs/log_index.py) stay valid after compression.
+"""
+
+import asyncio
+import logging
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Iterator, Optional
+
+import numpy as np
+
+logger = logging.getLogger("research-agent-server")
+
+COMPRESSED_SUFFIX = ".zf"
+FRAME_BYTES = 1024 * 1024
+COMPRESSION_LEVEL = 6
+COMPACTED_LOGS = ("run.log", "sidecar.log")
+_MAGIC = b"RALOGZ1\0"
+_TRAILER = struct.Struct("<QQQQ8s")
+_INDEX_DTYPE = np.dtype([("raw", "<u8"), ("packed", "<u8")])
+_CACHED_FRAMES = 8
+
+
+def compressed_path(path: str) -> str:
+    return path + COMPRESSED_SUFFIX
+
+
+class FramedLog:
+    """Random access to one ``.zf`` file."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._fd = os.open(path, os.O_RDONLY)
+        try:
+            st = os.fstat(self._fd)
+            self.inode = st.st_ino
+            self.mtime = st.st_mtime
+            if st.st_size < len(_MAGIC) + _TRAILER.size:
+                raise ValueError("truncated")
+            index_at, frames, self.size, self.source_inode, magic = _TRAILER.unpack(
+                os.pread(self._fd, _TRAILER.size, st.st_size - _TRAILER.size)
+            )
+            if magic != _MAGIC or os.pread(self._fd, len(_MAGIC), 0) != _MAGIC:
+                raise ValueError("not a framed log")
+            index = np.frombuffer(os.pread(self._fd, frames * _INDEX_DTYPE.itemsize, index_at), dtype=_INDEX_DTYPE)
+            if len(index) != frames:
+                raise ValueError("truncated index")
+        except Exception:
+            os.close(self._fd)
+            raise
+        self.starts = index["raw"].astype(np.int64)
+        # Compressed extent of frame i is [packed[i], packed[i + 1]).
+        self._packed = np.append(index["packed"].astype(np.int64), index_at)
+        self._cache: "OrderedDict[int, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __del__(self) -> None:
+        # Evicted readers may still be in use by another thread; the fd is
+        # closed once the last reference goes away.
+        fd, self._fd = getattr(self, "_fd", None), None
+        if fd is not None:
+            os.close(fd)
+
+    @property
+    def frame_count(self) -> int:
+        return len(self.starts)
+
+    def frame(self, i: int) -> bytes:
+        with self._lock:
+            data = self._cache.get(i)
+            if data is not None:
+                self._cache.move_to_end(i)
+                return data
+        lo, hi = int(self._packed[i]), int(self._packed[i + 1])
+        data = zlib.decompress(os.pread(self._fd, hi - lo, lo))
+        with self._lock:
+            self._cache[i] = data
+            while len(self._cache) > _CACHED_FRAMES:
+                self._cache.popitem(last=False)
+        return data
+
+    def frame_at(self, offset: int) -> int:
+        return max(0, int(np.searchsorted(self.starts, offset, side="right")) - 1)
+
+    def read(self, offset: int, length: int) -> bytes:
+        end = min(self.size, offset + length)
+        if offset >= end:
+            return b""
+        parts = []
+        for i in range(self.frame_at(offset), self.frame_at(end - 1) + 1):
+            start = int(self.starts[i])
+            parts.append(self.frame(i)[max(0, offset - start):end - start])
+        return b"".join(parts)
+
+
+_open_logs: "OrderedDict[str, FramedLog]" = OrderedDict()
+_open_logs_lock = threading.Lock()
+_MAX_OPEN_LOGS = 64
+
+
+def _framed(path: str) -> Optional[FramedLog]:
+    """Shared reader for ``path``'s compressed copy, None when there is none."""
+    zpath = compressed_path(path)
+    try:
+        st = os.stat(zpath)
+    except FileNotFoundError:
+        return None
+    with _open_logs_lock:
+        reader = _open_logs.get(zpath)
+        if reader is not None and reader.inode == st.st_ino and reader.mtime == st.st_mtime:
+            _open_logs.move_to_end(zpath)
+            return reader
+    reader = FramedLog(zpath)
+    with _open_logs_lock:
+        _open_logs[zpath] = reader
+        _open_logs.move_to_end(zpath)
+        while len(_open_logs) > _MAX_OPEN_LOGS:
+            _open_logs.popitem(last=False)
+    return reader
+
+
+def log_exists(path: str) -> bool:
+    return os.path.exists(path) or os.path.exists(compressed_path(path))
+
+
+def stat_log(path: str) -> Optional[tuple[int, int]]:
+    """``(inode, size)`` of the log, plain or compressed; None if neither exists.
+
+    A compressed log reports the inode of the file it was made from.
+    """
+    try:
+        st = os.stat(path)
+        return st.st_ino, st.st_size
+    except FileNotFoundError:
+        pass
+    reader = _framed(path)
+    return (reader.source_inode, reader.size) if reader else None
+
+
+def read_range(path: str, offset: int, length: int) -> bytes:
+    """Up to ``length`` bytes of the log starting at ``offset``."""
+    try:
+        with open(path, "rb") as f:
+            f.seek(offset)
+            return f.read(length)
+    except FileNotFoundError:
+        pass
+    reader = _framed(path)
+    if reader is None:
+        raise FileNotFoundError(path)
+    return reader.read(offset, length)
+
+
+def iter_chunks(path: str, start: int = 0, end: Optional[int] = None,
+                chunk_bytes: int = FRAME_BYTES) -> Iterator[tuple[int, bytes]]:
+    """``(offset, data)`` chunks covering ``[start, end)`` of the log.
+
+    Chunks of a compressed log are its frames, which end on a newline
+    unless a single line was longer than a frame.
+    """
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        f = None
+    if f is not None:
+        with f:
+            end = os.fstat(f.fileno()).st_size if end is None else end
+            f.seek(start)
+            pos = start
+            while pos < end:
+                data = f.read(min(chunk_bytes, end - pos))
+                if not data:
+                    return
+                yield pos, data
+                pos += len(data)
+        return
+    reader = _framed(path)
+    if reader is None:
+        return
+    end = reader.size if end is None else min(end, reader.size)
+    if start >= end:
+        return
+    for i in range(reader.frame_at(start), reader.frame_at(end - 1) + 1):
+        frame_start = int(reader.starts[i])
+        data = reader.frame(i)
+        lo, hi = max(0, start - frame_start), min(len(data), end - frame_start)
+        yield frame_start + lo, data[lo:hi]
+
+
+def compress_log(path: str, frame_bytes: int = FRAME_BYTES) -> Optional[dict]:
+    """Replace ``path`` with ``path.zf``; returns sizes, or None if the log
+    changed while it was being compressed (it is retried later)."""
+    zpath = compressed_path(path)
+    tmp_path = zpath + ".tmp"
+    before = os.stat(path)
+    starts, packed = [], []
+    with open(path, "rb") as src, open(tmp_path, "wb") as dst:
+        dst.write(_MAGIC)
+        pos, carry = 0, b""
+        while True:
+            chunk = src.read(frame_bytes)
+            data = carry + chunk
+            if not data:
+                break
+            eof = len(chunk) < frame_bytes
+            cut = len(data) if eof else data.rfind(b"\n") + 1 or len(data)
+            frame, carry = data[:cut], data[cut:]
+            starts.append(pos)
+            packed.append(dst.tell())
+            dst.write(zlib.compress(frame, COMPRESSION_LEVEL))
+            pos += len(frame)
+        index_at = dst.tell()
+        dst.write(np.array(list(zip(starts, packed)), dtype=_INDEX_DTYPE).tobytes())
+        dst.write(_TRAILER.pack(index_at, len(starts), pos, before.st_ino, _MAGIC))
+        dst.flush()
+        os.fsync(dst.fileno())
+    after = os.stat(path)
+    if (after.st_size, after.st_mtime_ns, after.st_ino) != (before.st_size, before.st_mtime_ns, before.st_ino):
+        os.remove(tmp_path)
+        return None
+    os.replace(tmp_path, zpath)
+    os.remove(path)
+    return {"path": path, "size": pos, "compressed_size": os.path.getsize(zpath)}
+
+
+def restore_log(path: str) -> bool:
+    """Decompress ``path.zf`` back to ``path`` so a relaunched run can append to it."""
+    reader = _framed(path)
+    if reader is None or os.path.exists(path):
+        return False
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as dst:
+        for i in range(reader.frame_count):
+            dst.write(reader.frame(i))
+    os.replace(tmp_path, path)
+    os.remove(compressed_path(path))
+    return True
+
+
+class LogCompactor:
+    """Compresses the logs of runs that ended at least ``min_age_seconds`` ago."""
+
+    def __init__(
+        self,
+        runs: dict,
+        enabled: bool = True,
+        min_age_seconds: float = 900.0,
+        min_bytes: int = 1024 * 1024,
+        interval_seconds: float = 300.0,
+    ) -> None:
+        self._runs = runs
+        self.enabled = enabled
+        self.min_age_seconds = min_age_seconds
+        self.min_bytes = min_bytes
+        self.interval_seconds = interval_seconds
+        self.stats = {"compressed": 0, "bytes_before": 0, "bytes_after": 0, "errors": 0}
+        self._task: Optional[asyncio.Task] = None
+
+    def _candidates(self, now: float) -> list[str]:
+        paths = []
+        for run in list(self._runs.values()):
+            run_dir = run.get("run_dir")
+            if not run_dir or run.get("status") not in ("finished", "failed", "stopped"):
+                continue
+            if now - (run.get("ended_at") or now) < self.min_age_seconds:
+                continue
+            for name in COMPACTED_LOGS:
+                path = os.path.join(run_dir, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                # mtime guards against writers that outlive the run's status.
+                if st.st_size >= self.min_bytes and now - st.st_mtime >= self.min_age_seconds:
+                    paths.append(path)
+        return paths
+
+    def compact_due(self, now: Optional[float] = None) -> int:
+        """Compress every log that is due; returns how many were compressed."""
+        done = 0
+        for path in self._candidates(time.time() if now is None else now):
+            try:
+                result = compress_log(path)
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.warning("Failed to compress %s: %s", path, e)
+                continue
+            if result is None:
+                continue
+            done += 1
+            self.stats["compressed"] += 1
+            self.stats["bytes_before"] += result["size"]
+            self.stats["bytes_after"] += result["compressed_size"]
+            logger.info("Compressed %s: %d -> %d bytes", path, result["size"], result["compressed_size"])
+        return done
+
+    def ensure_running(self) -> None:
+        if not self.enabled or (self._task is not None and not self._task.done()):
+            return
+        try:
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+        except RuntimeError:
+            pass  # no event loop (tests, CLI); compact_due can be called directly
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(self.compact_due)
+            except Exception as e:
+                logger.error("Log compaction pass failed: %s", e)
+            await asyncio.sleep(self.interval_seconds)
@@ -0,0 +1,184 @@
+"""
+Research Agent Server — Shared Log Tailers
+
+Log SSE endpoints used to give every client its own 0.5 s poll loop and an
+initial read of the whole file.  ``LogTailerHub`` keeps one ``LogTailer``
+per log file, however many clients watch it, and one poll task for all of
+them:
+
+- Each tick the hub stats every watched file once; a tailer that grew reads
+  only the new bytes and broadcasts them to its subscribers' queues.
+- A new subscriber's ``initial`` event is the last ``tail_bytes`` of the file
+  (starting at a line boundary) along with the byte ``offset`` it starts at,
+  so clients page further back through ``/logs?offset=``.
+- A subscriber whose queue overflows is marked lagged; its stream re-syncs
+  with a fresh ``initial`` instead of buffering without bound.
+- When the file shrinks (truncated) or its inode changes (rotated, even to
+  a file that is already larger) the tailer starts over from byte 0 and
+  sends every subscriber a fresh ``initial`` for the new file.  Compressing
+  a log in place keeps its inode (see ``stat_log``), so that is not a rotation.
+- Tailers with no subscribers are dropped, and the poll task exits when
+  nothing is watched.
+"""
+
+import asyncio
+import codecs
+import logging
+from typing import Optional
+
+from runs.log_store import read_range, stat_log
+
+logger = logging.getLogger("research-agent-server")
+
+POLL_INTERVAL_SECONDS = 0.5
+TAIL_BYTES = 64 * 1024
+MAX_READ_BYTES = 1024 * 1024  # per tailer per tick; the rest follows next tick
+SUBSCRIBER_QUEUE_SIZE = 256
+
+
+class LogSubscriber:
+    """One client's view of a tailer: a bounded queue of delta events."""
+
+    def __init__(self, maxsize: int = SUBSCRIBER_QUEUE_SIZE) -> None:
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.lagged = False
+
+    def push(self, event: dict) -> bool:
+        try:
+            self.queue.put_nowait(event)
+            return True
+        except asyncio.QueueFull:
+            self.lagged = True
+            return False
+
+
+class LogTailer:
+    """Follows one file from ``offset`` and fans new bytes out to subscribers."""
+
+    def __init__(self, path: str, tail_bytes: int = TAIL_BYTES) -> None:
+        self.path = path
+        self.tail_bytes = tail_bytes
+        self.subscribers: set[LogSubscriber] = set()
+        self.offset: Optional[int] = None  # bytes already broadcast; None until first poll
+        self.inode: Optional[int] = None
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+    def _stat(self) -> tuple[Optional[int], int]:
+        try:
+            st = stat_log(self.path)
+        except (OSError, ValueError):
+            return None, 0
+        return st if st else (None, 0)
+
+    def poll(self) -> int:
+        """Read and broadcast whatever was appended since the last poll; returns bytes read."""
+        inode, size = self._stat()
+        if self.offset is None:  # first poll
+            self.inode, self.offset = inode, size
+            return 0
+        rotated = inode is not None and self.inode is not None and inode != self.inode
+        if inode is not None:
+            self.inode = inode
+        if rotated or size < self.offset:  # resync everyone on the new file
+            self._decoder.reset()
+            event = self._snapshot(size)
+            self.offset = size
+            self._broadcast(event)
+            return size - event["offset"]
+        if size == self.offset:
+            return 0
+        try:
+            data = read_range(self.path, self.offset, min(size - self.offset, MAX_READ_BYTES))
+        except OSError as e:
+            logger.debug("Tail read failed for %s: %s", self.path, e)
+            return 0
+        self.offset += len(data)
+        content = self._decoder.decode(data)
+        if content:
+            self._broadcast({"type": "delta", "content": content, "offset": self.offset})
+        return len(data)
+
+    def _broadcast(self, event: dict) -> None:
+        for subscriber in list(self.subscribers):
+            if not subscriber.push(event):
+                self.subscribers.discard(subscriber)
+
+    def _snapshot(self, end: int) -> dict:
+        """An ``initial`` event: the last ``tail_bytes`` before ``end``, from a line start."""
+        start = max(0, end - self.tail_bytes)
+        data = b""
+        if end:
+            try:
+                data = read_range(self.path, start, end - start)
+            except OSError:
+                data, start = b"", end
+        if start > 0:
+            # Begin on a whole line; the partial one is reachable via /logs pagination.
+            newline = data.find(b"\n")
+            if 0 <= newline < len(data) - 1:
+                data = data[newline + 1:]
+                start += newline + 1
+        return {
+            "type": "initial",
+            "content": data.decode("utf-8", errors="replace"),
+            "offset": start,
+            "total_size": end,
+        }
+
+    def subscribe(self) -> tuple[LogSubscriber, dict]:
+        """Register a subscriber; returns it with its bounded ``initial`` event."""
+        self.poll()  # existing subscribers get everything before the new one's snapshot
+        initial = self._snapshot(self.offset or 0)
+        subscriber = LogSubscriber()
+        self.subscribers.add(subscriber)
+        return subscriber, initial
+
+
+class LogTailerHub:
+    """Registry of tailers keyed by path, driven by one shared poll task."""
+
+    def __init__(self, poll_interval: float = POLL_INTERVAL_SECONDS, tail_bytes: int = TAIL_BYTES) -> None:
+        self.poll_interval = poll_interval
+        self.tail_bytes = tail_bytes
+        self._tailers: dict[str, LogTailer] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.polls = 0
+
+    def subscribe(self, path: str) -> tuple[LogTailer, LogSubscriber, dict]:
+        tailer = self._tailers.get(path)
+        if tailer is None:
+            tailer = self._tailers[path] = LogTailer(path, tail_bytes=self.tail_bytes)
+        subscriber, initial = tailer.subscribe()
+        self._ensure_running()
+        return tailer, subscriber, initial
+
+    def unsubscribe(self, tailer: LogTailer, subscriber: LogSubscriber) -> None:
+        tailer.subscribers.discard(subscriber)
+        if not tailer.subscribers and self._tailers.get(tailer.path) is tailer:
+            del self._tailers[tailer.path]
+
+    def poll_all(self) -> None:
+        self.polls += 1
+        for tailer in list(self._tailers.values()):
+            tailer.poll()
+
+    def _ensure_running(self) -> None:
+        if self._task is not None and not self._task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._task = loop.create_task(self._loop())
+
+    async def _loop(self) -> None:
+        while self._tailers:
+            await asyncio.sleep(self.poll_interval)
+            self.poll_all()
+
+    def summary(self) -> dict:
+        return {
+            "tailers": len(self._tailers),
+            "subscribers": sum(len(t.subscribers) for t in self._tailers.values()),
+            "polls": self.polls,
+        }
@@ -0,0 +1,437 @@
+"""
+Research Agent Server — Run Monitor
+
+One in-server supervisor for every active run that has no job sidecar.
+
+The tmux sidecar (tools/job_sidecar.py) is a separate Python process per
+run that sleeps in a 2 s loop.  ``RunMonitor`` does the same work for all
+runs from the server's event loop: a single timer wheel decides which runs
+are due, and each check handles
+
+- completion detection (``job.done`` / vanished tmux window) for tmux runs
+  launched without a sidecar,
+- incremental metrics tailing (byte offsets, complete lines only),
+- rule-based alerts and the LLM alert judge (in a worker thread),
+- alert responses, without blocking the other runs,
+- status reporting through the same code path as ``POST /runs/{id}/status``.
+
+Runs opt in with ``run["monitor"] == "server"``; the subprocess and Slurm
+executors always set it, tmux does when ``RESEARCH_AGENT_RUN_MONITOR=server``.
+"""
+
+import asyncio
+import json
+import logging
+import math
+import os
+import time
+from typing import Any, Callable, Hashable, Optional
+
+from core import config
+from runs.helpers import RUN_STATUS_ACTIVE
+from runs.tmux_pool import tmux_pool
+from tools.job_sidecar import (
+    _read_wandb_binary_history,
+    _resolve_wandb_metrics_source,
+    alert_judge,
+    find_wandb_dir_in_rundir,
+    rulebased_alerts,
+    should_stop_from_choice,
+)
+
+logger = logging.getLogger("research-agent-server")
+
+ALERT_RESPONSE_TIMEOUT_SECONDS = 600
+MAX_METRICS_READ_BYTES = 4 * 1024 * 1024
+
+
+class TimerWheel:
+    """Hashed timer wheel: O(1) schedule/cancel, one slot scan per tick."""
+
+    def __init__(self, tick_seconds: float, slots: int = 512) -> None:
+        self.tick_seconds = tick_seconds
+        self._slots: list[dict[Hashable, int]] = [{} for _ in range(slots)]
+        self._where: dict[Hashable, int] = {}
+        self._cursor = 0
+
+    def __len__(self) -> int:
+        return len(self._where)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._where
+
+    def schedule(self, key: Hashable, delay: float) -> None:
+        """(Re)schedule ``key`` to come due after ``delay`` seconds (at least one tick)."""
+        self.cancel(key)
+        ticks = max(1, math.ceil(delay / self.tick_seconds - 1e-9))
+        index = (self._cursor + ticks) % len(self._slots)
+        self._slots[index][key] = (ticks - 1) // len(self._slots)
+        self._where[key] = index
+
+    def cancel(self, key: Hashable) -> None:
+        index = self._where.pop(key, None)
+        if index is not None:
+            self._slots[index].pop(key, None)
+
+    def advance(self) -> list[Hashable]:
+        """Move one tick forward and return the keys that came due."""
+        self._cursor = (self._cursor + 1) % len(self._slots)
+        slot = self._slots[self._cursor]
+        due = []
+        for key, rounds in list(slot.items()):
+            if rounds <= 0:
+                due.append(key)
+                del slot[key]
+                del self._where[key]
+            else:
+                slot[key] = rounds - 1
+        return due
+
+
+class _Watch:
+    """Per-run monitor state."""
+
+    def __init__(self, run_id: str) -> None:
+        self.run_id = run_id
+        self.wandb_dir: Optional[str] = None
+        self.metrics_path: Optional[str] = None
+        self.metrics_kind = ""
+        self.metrics_offset = 0
+        self.alert_state: dict = {}
+        self.pending_alert: Optional[tuple[str, float, str]] = None  # (alert_id, created_at, source)
+        self.judge_task: Optional[asyncio.Future] = None
+        self.checks = 0
+
+
+def _list_tmux_windows() -> Optional[set[str]]:
+    return tmux_pool.window_names()
+
+
+class RunMonitor:
+    """Supervise all server-monitored runs from one event loop.
+
+    Callbacks (all synchronous, all in-process):
+
+    - ``report_status(run_id, status, **fields)`` — lifecycle changes
+    - ``append_metrics(run_id, rows)`` — new metrics rows
+    - ``create_alert(run_id, message, choices, severity) -> alert_id``
+    - ``get_alert(alert_id) -> dict | None`` — to pick up responses
+    - ``stop_run(run_id, run)`` — kill a run whose alert said stop
+
+    ``rule_alerts=False`` leaves loss anomalies to the server-side detectors
+    that run on ``append_metrics`` (runs/anomaly.py).
+    """
+
+    def __init__(
+        self,
+        runs: dict,
+        report_status: Callable[..., Any],
+        append_metrics: Optional[Callable[[str, list], Any]] = None,
+        create_alert: Optional[Callable[..., Optional[str]]] = None,
+        get_alert: Optional[Callable[[str], Optional[dict]]] = None,
+        stop_run: Optional[Callable[[str, dict], Any]] = None,
+        list_tmux_windows: Optional[Callable[[], Optional[set[str]]]] = None,
+        check_interval: Optional[float] = None,
+        tick_seconds: float = 0.5,
+        judge_enabled: bool = False,
+        rule_alerts: bool = True,
+    ) -> None:
+        self._runs = runs
+        self._report_status = report_status
+        self._append_metrics = append_metrics
+        self._create_alert = create_alert
+        self._get_alert = get_alert
+        self._stop_run = stop_run
+        self._list_tmux_windows = list_tmux_windows or _list_tmux_windows
+        self.check_interval = config.RUN_MONITOR_INTERVAL if check_interval is None else check_interval
+        self.judge_enabled = judge_enabled
+        self.rule_alerts = rule_alerts
+        self.wheel = TimerWheel(tick_seconds)
+        self._watches: dict[str, _Watch] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._tmux_windows_cache: Optional[set[str]] = None
+        self.ticks = 0
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def ensure_running(self) -> None:
+        """Start the monitor loop once an event loop is available."""
+        if self._task is not None and not self._task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._task = loop.create_task(self._loop())
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.wheel.tick_seconds)
+            try:
+                self.step()
+            except Exception as e:
+                logger.warning("Run monitor tick failed: %s", e)
+
+    def summary(self) -> dict:
+        return {
+            "watched_runs": len(self._watches),
+            "check_interval": self.check_interval,
+            "ticks": self.ticks,
+        }
+
+    # ------------------------------------------------------------------
+    # Scheduling
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def is_monitored(run: dict) -> bool:
+        return run.get("monitor") == "server" and run.get("status") in RUN_STATUS_ACTIVE
+
+    def step(self) -> list[str]:
+        """One timer-wheel tick: pick up new runs, then check the due ones."""
+        self.ticks += 1
+        self._tmux_windows_cache = None
+        for run_id, run in self._runs.items():
+            if run_id not in self._watches and self.is_monitored(run):
+                self._watches[run_id] = _Watch(run_id)
+                self.wheel.schedule(run_id, 0)
+
+        due = self.wheel.advance()
+        for run_id in due:
+            try:
+                next_delay = self.check(run_id)
+            except Exception as e:
+                logger.error("Monitor check failed for run %s: %s", run_id, e)
+                next_delay = self.check_interval
+            if next_delay is None:
+                self._watches.pop(run_id, None)
+            else:
+                self.wheel.schedule(run_id, next_delay)
+        return due
+
+    def _tmux_windows(self) -> Optional[set[str]]:
+        # One tmux query per tick, shared by every tmux run that is due.
+        if self._tmux_windows_cache is None:
+            self._tmux_windows_cache = self._list_tmux_windows()
+        return self._tmux_windows_cache
+
+    # ------------------------------------------------------------------
+    # Per-run check
+    # ------------------------------------------------------------------
+
+    def _report(self, run_id: str, status: str, **fields: Any) -> None:
+        try:
+            self._report_status(run_id, status, **fields)
+        except Exception as e:
+            logger.error("Failed to record %s status for run %s: %s", status, run_id, e)
+
+    def check(self, run_id: str) -> Optional[float]:
+        """Check one run; returns the delay until its next check, or None to drop it."""
+        watch = self._watches.get(run_id)
+        run = self._runs.get(run_id)
+        if watch is None or run is None:
+            return None
+        watch.checks += 1
+
+        if not self.is_monitored(run):
+            # Ended through its executor or a user stop: flush what is left.
+            self._tail_metrics(watch, run)
+            return None
+
+        run_dir = run.get("run_dir")
+        if run.get("executor") == "tmux" and run_dir:
+            if self._check_tmux_completion(watch, run):
+                return None
+
+        if self._check_pending_alert(watch, run):
+            return None
+
+        if not watch.wandb_dir and run_dir:
+            watch.wandb_dir = run.get("wandb_dir") or find_wandb_dir_in_rundir(run_dir, run_id)
+            if watch.wandb_dir:
+                logger.info(f"[monitor] Detected WandB dir for {run_id}: {watch.wandb_dir}")
+                self._report(run_id, run.get("status") or "running", wandb_dir=watch.wandb_dir)
+
+        if self._manual_trigger(watch, run):
+            return self.check_interval
+
+        new_rows = self._tail_metrics(watch, run)
+        if watch.wandb_dir and watch.pending_alert is None:
+            if new_rows and self.rule_alerts:
+                self._raise_alert(watch, rulebased_alerts(run_id, watch.wandb_dir, watch.alert_state))
+            self._poll_judge(watch, run, metrics_changed=bool(new_rows))
+        return self.check_interval
+
+    def _check_tmux_completion(self, watch: _Watch, run: dict) -> bool:
+        run_id = watch.run_id
+        completion_file = os.path.join(run["run_dir"], "job.done")
+        if os.path.exists(completion_file):
+            try:
+                with open(completion_file, "r") as f:
+                    raw = f.read().strip()
+            except OSError:
+                raw = ""
+            self._tail_metrics(watch, run)
+            if raw == "0":
+                self._report(run_id, "finished", exit_code=0)
+            elif raw.lstrip("-").isdigit():
+                self._report(run_id, "failed", exit_code=int(raw))
+            else:
+                self._report(run_id, "failed", error="Run ended but exit code could not be parsed")
+            return True
+
+        windows = self._tmux_windows()
+        if windows is None:
+            return False
+        window = run.get("tmux_window")
+        if window and window not in windows:
+            self._report(run_id, "failed", error="Tmux window disappeared")
+            return True
+        if run.get("status") == "launching" and window in windows:
+            self._report(run_id, "running")
+        return False
+
+    # ------------------------------------------------------------------
+    # Metrics
+    # ------------------------------------------------------------------
+
+    def _tail_metrics(self, watch: _Watch, run: dict) -> int:
+        """Forward new metrics rows; returns how many were forwarded."""
+        if not watch.wandb_dir or self._append_metrics is None:
+            return 0
+        if not watch.metrics_path:
+            watch.metrics_path, watch.metrics_kind = _resolve_wandb_metrics_source(watch.wandb_dir)
+            if not watch.metrics_path:
+                return 0
+
+        rows: list[dict] = []
+        if watch.metrics_kind == "jsonl":
+            try:
+                size = os.path.getsize(watch.metrics_path)
+            except OSError:
+                return 0
+            if size < watch.metrics_offset:
+                watch.metrics_offset = 0  # truncated / rewritten
+            if size == watch.metrics_offset:
+                return 0
+            with open(watch.metrics_path, "rb") as f:
+                f.seek(watch.metrics_offset)
+                chunk = f.read(min(size - watch.metrics_offset, MAX_METRICS_READ_BYTES))
+            end = chunk.rfind(b"\n")
+            if end < 0:
+                return 0  # partial line still being written
+            watch.metrics_offset += end + 1
+            for line in chunk[:end].splitlines():
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(row, dict):
+                    rows.append(row)
+        elif watch.metrics_kind == "wandb_binary":
+            rows, watch.metrics_offset = _read_wandb_binary_history(watch.metrics_path, watch.metrics_offset)
+
+        if not rows:
+            return 0
+        try:
+            self._append_metrics(watch.run_id, rows)
+        except Exception as e:
+            logger.warning("Failed to store metrics for run %s: %s", watch.run_id, e)
+            return 0
+        return len(rows)
+
+    # ------------------------------------------------------------------
+    # Alerts
+    # ------------------------------------------------------------------
+
+    def _raise_alert(self, watch: _Watch, decision: Optional[dict]) -> None:
+        if not decision or decision.get("action") != "alert" or self._create_alert is None:
+            return
+        source = decision.get("source") or "alerts"
+        message = decision.get("message") or "Metric anomaly detected."
+        logger.warning("[monitor] %s produced alert for %s: %s", source, watch.run_id, message)
+        alert_id = self._create_alert(
+            watch.run_id,
+            message,
+            decision.get("choices") or ["Ignore", "Stop Job"],
+            decision.get("severity") or "warning",
+        )
+        if alert_id:
+            watch.pending_alert = (alert_id, time.time(), source)
+
+    def _check_pending_alert(self, watch: _Watch, run: dict) -> bool:
+        """Act on a responded alert; True when the run was stopped."""
+        if watch.pending_alert is None or self._get_alert is None:
+            return False
+        alert_id, created_at, source = watch.pending_alert
+        alert = self._get_alert(alert_id) or {}
+        if alert.get("status") != "resolved":
+            if time.time() - created_at > ALERT_RESPONSE_TIMEOUT_SECONDS:
+                logger.info("Timed out waiting for alert response (%s)", alert_id)
+                watch.pending_alert = None
+            return False
+
+        watch.pending_alert = None
+        response = alert.get("response")
+        logger.info("Alert response (%s) for %s: %s", source, watch.run_id, response)
+        if not should_stop_from_choice(response):
+            return False
+        if self._stop_run is not None:
+            self._stop_run(watch.run_id, run)
+        self._report(watch.run_id, "stopped", error="Stopped via alert response")
+        return True
+
+    def _manual_trigger(self, watch: _Watch, run: dict) -> bool:
+        """Same ``tests/story/trigger_alert`` sentinel the sidecar honours."""
+        if watch.pending_alert is not None:
+            return False
+        workdir = run.get("workdir") or config.WORKDIR
+        trigger_file = os.path.join(workdir, "tests", "story", "trigger_alert")
+        if not os.path.isfile(trigger_file):
+            return False
+        try:
+            os.remove(trigger_file)
+        except OSError:
+            return False
+        self._raise_alert(watch, {
+            "action": "alert",
+            "message": "Manual Trigger Detected",
+            "choices": ["Ignore", "Stop Job"],
+            "severity": "warning",
+            "source": "manual",
+        })
+        return True
+
+    def _poll_judge(self, watch: _Watch, run: dict, metrics_changed: bool) -> None:
+        if not self.judge_enabled:
+            return
+        task = watch.judge_task
+        if task is not None:
+            if not task.done():
+                return
+            watch.judge_task = None
+            try:
+                self._raise_alert(watch, task.result())
+            except Exception as e:
+                logger.warning("alert_judge failed for %s: %s", watch.run_id, e)
+            return
+        if not metrics_changed:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        # The judge shells out to an LLM CLI for up to 30 s; keep it off the loop.
+        watch.judge_task = loop.run_in_executor(
+            None,
+            alert_judge,
+            watch.run_id,
+            watch.wandb_dir,
+            run.get("workdir") or config.WORKDIR,
+            watch.alert_state,
+        )
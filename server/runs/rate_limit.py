@@ -0,0 +1,32 @@
+"""
+Research Agent Server — Rate Limiting
+
+``TokenBucket`` bounds how fast a background job spends a budget: alert
+judge calls and tokens (runs/alert_judge.py) and file removals during
+storage passes (runs/storage.py).
+"""
+
+from typing import Callable
+
+
+class TokenBucket:
+    """Continuous-refill bucket: ``capacity`` units, refilled over ``period`` seconds."""
+
+    def __init__(self, capacity: float, period: float, clock: Callable[[], float]) -> None:
+        self.capacity = float(capacity)
+        self.rate = self.capacity / period
+        self.level = self.capacity
+        self._clock = clock
+        self._updated = clock()
+
+    def available(self) -> float:
+        now = self._clock()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+        return self.level
+
+    def take(self, amount: float) -> bool:
+        if self.available() < amount:
+            return False
+        self.level -= amount
+        return True
@@ -5,6 +5,8 @@ Extracted from server.py. All /runs/* CRUD + lifecycle, /alerts/*,
 /wild-mode, and metrics endpoints live here.
 """
 
+import asyncio
+import contextlib
 import json
 import logging
 import os
@@ -13,14 +15,18 @@ import uuid
 from typing import Optional
 
 from fastapi import APIRouter, HTTPException, Query, Request
+from pydantic import ValidationError
 
 from core import config
 import core.state as state
 from core.models import (
     AlertRecord,
     CreateAlertRequest,
+    LaunchQueueConfigUpdate,
     RespondAlertRequest,
+    RunBulkRequest,
     RunCreate,
+    RunEventBatch,
     RunRerunRequest,
     RunStatusUpdate,
     RunUpdate,
@@ -32,6 +38,16 @@ router = APIRouter()
 
 # Telemetry lifecycle events
 from integrations.telemetry import emit_run_event  # noqa: E402
+from runs.alert_groups import group_alerts  # noqa: E402
+from runs.helpers import (  # noqa: E402
+    _validated_anomaly_detectors,
+    _validated_dependencies,
+    _validated_dependency_condition,
+    _validated_executor,
+    _validated_priority_class,
+    release_run_gpus,
+)
+from tools.job_sidecar import should_stop_from_choice  # noqa: E402
 
 # ---------------------------------------------------------------------------
 # Module-level references.  Wired at init().
@@ -42,7 +58,6 @@ _active_alerts = None
 _save_runs_state = None
 _save_alerts_state = None
 _save_settings_state = None
-_launch_run_in_tmux = None
 _recompute_sweep_state = None
 _reconcile_all_run_terminal_states = None
 _run_response_payload = None
@@ -51,37 +66,54 @@ _record_journey_event = None
 _normalize_gpuwrap_config = None
 _coerce_exit_code = None
 _slack_notifier = None
-_get_or_create_session = None
+_run_executors = None
 _RUN_STATUS_TERMINAL = None
 _load_run_metrics = None
 _find_wandb_dir_from_run_dir = None
 _get_wandb_curve_data = None
 _wandb_metrics_cache = None
+_launch_queue = None
+_anomaly_engine = None
+_alert_judge = None
+_alert_aggregator = None
+
+# Alerts raised by the server itself (not a sidecar), whose "stop" answers
+# the server applies in respond_to_alert.
+_SERVER_ALERT_SOURCES = {"anomaly", "alert_judge"}
+
+# Long-poll waiters for alert responses, keyed by run id (see
+# wait_for_alert_responses).  Local to this module; not part of init().
+_alert_response_waiters: dict[str, set[asyncio.Event]] = {}
 
 
 def init(
     runs_dict, sweeps_dict, active_alerts_dict,
     save_runs_state_fn, save_alerts_state_fn, save_settings_state_fn,
-    launch_run_in_tmux_fn, recompute_sweep_state_fn,
+    recompute_sweep_state_fn,
     reconcile_all_run_terminal_states_fn, run_response_payload_fn,
     sync_run_membership_with_sweep_fn, record_journey_event_fn,
     normalize_gpuwrap_config_fn, coerce_exit_code_fn,
-    slack_notifier, get_or_create_session_fn,
+    slack_notifier, run_executors,
     run_status_terminal_set,
     load_run_metrics_fn, find_wandb_dir_from_run_dir_fn,
     get_wandb_curve_data_fn, wandb_metrics_cache_dict,
+    launch_queue=None,
+    anomaly_engine=None,
+    alert_judge=None,
+    alert_aggregator=None,
 ):
     """Wire in all shared state, helpers and callbacks from server.py."""
     global _runs, _sweeps, _active_alerts
     global _save_runs_state, _save_alerts_state, _save_settings_state
-    global _launch_run_in_tmux, _recompute_sweep_state
+    global _recompute_sweep_state
     global _reconcile_all_run_terminal_states, _run_response_payload
     global _sync_run_membership_with_sweep, _record_journey_event
     global _normalize_gpuwrap_config, _coerce_exit_code
-    global _slack_notifier, _get_or_create_session
+    global _slack_notifier, _run_executors
     global _RUN_STATUS_TERMINAL
     global _load_run_metrics, _find_wandb_dir_from_run_dir
     global _get_wandb_curve_data, _wandb_metrics_cache
+    global _launch_queue, _anomaly_engine, _alert_judge, _alert_aggregator
 
     _runs = runs_dict
     _sweeps = sweeps_dict
@@ -89,7 +121,6 @@ def init(
     _save_runs_state = save_runs_state_fn
     _save_alerts_state = save_alerts_state_fn
     _save_settings_state = save_settings_state_fn
-    _launch_run_in_tmux = launch_run_in_tmux_fn
     _recompute_sweep_state = recompute_sweep_state_fn
     _reconcile_all_run_terminal_states = reconcile_all_run_terminal_states_fn
     _run_response_payload = run_response_payload_fn
@@ -98,12 +129,21 @@ def init(
     _normalize_gpuwrap_config = normalize_gpuwrap_config_fn
     _coerce_exit_code = coerce_exit_code_fn
     _slack_notifier = slack_notifier
-    _get_or_create_session = get_or_create_session_fn
+    _run_executors = run_executors
     _RUN_STATUS_TERMINAL = run_status_terminal_set
     _load_run_metrics = load_run_metrics_fn
     _find_wandb_dir_from_run_dir = find_wandb_dir_from_run_dir_fn
     _get_wandb_curve_data = get_wandb_curve_data_fn
     _wandb_metrics_cache = wandb_metrics_cache_dict
+    _launch_queue = launch_queue
+    _anomaly_engine = anomaly_engine
+    _alert_judge = alert_judge
+    _alert_aggregator = alert_aggregator
+
+
+def _dispatch_queue() -> dict:
+    """Let the launch queue fill any free slots."""
+    return _launch_queue.dispatch()
 
 
 # ---------------------------------------------------------------------------
@@ -117,6 +157,7 @@ async def list_runs(
 ):
     """List all runs."""
     _reconcile_all_run_terminal_states()
+    _launch_queue.ensure_running()
     result = []
     for run_id, run in _runs.items():
         if not archived and run.get("is_archived", False):
@@ -127,9 +168,8 @@ async def list_runs(
     return result[:limit]
 
 
-@router.post("/runs")
-async def create_run(req: RunCreate):
-    """Create a new run. Starts in 'ready' state unless auto_start=True."""
+def _new_run(req: RunCreate, recompute_sweep: bool = True) -> tuple[str, dict]:
+    """Validate and add a run (``ready``, or ``queued`` with auto_start); the caller saves and dispatches."""
     run_id = uuid.uuid4().hex[:12]
 
     if req.sweep_id and req.sweep_id not in _sweeps:
@@ -137,19 +177,31 @@ async def create_run(req: RunCreate):
 
     initial_status = "queued" if req.auto_start else "ready"
     gpuwrap_config = _normalize_gpuwrap_config(req.gpuwrap_config)
+    priority_class = _validated_priority_class(req.priority_class)
+    executor = _validated_executor(req.executor, _run_executors)
+    anomaly_detectors = _validated_anomaly_detectors(req.anomaly_detectors)
+    depends_on = _validated_dependencies(_runs, run_id, req.depends_on)
+    now = time.time()
 
     run_data = {
         "name": req.name,
         "command": req.command,
         "workdir": req.workdir or config.WORKDIR,
         "status": initial_status,
-        "created_at": time.time(),
+        "created_at": now,
+        "queued_at": now if initial_status == "queued" else None,
         "is_archived": False,
         "sweep_id": req.sweep_id,
         "parent_run_id": req.parent_run_id,
         "origin_alert_id": req.origin_alert_id,
         "chat_session_id": req.chat_session_id,
         "gpuwrap_config": gpuwrap_config,
+        "priority_class": priority_class,
+        "executor": executor,
+        "slurm": req.slurm.model_dump(exclude_none=True) if req.slurm else None,
+        "anomaly_detectors": anomaly_detectors,
+        "depends_on": depends_on,
+        "dependency_condition": _validated_dependency_condition(req.dependency_condition) if depends_on else None,
         "tmux_window": None,
         "run_dir": None,
         "exit_code": None,
@@ -158,8 +210,7 @@ async def create_run(req: RunCreate):
     }
 
     _runs[run_id] = run_data
-    _sync_run_membership_with_sweep(run_id, req.sweep_id)
-    _save_runs_state()
+    _sync_run_membership_with_sweep(run_id, req.sweep_id, recompute=recompute_sweep)
     _record_journey_event(
         kind="run_created",
         actor="system",
@@ -180,20 +231,44 @@ async def create_run(req: RunCreate):
     logger.info(f"Created run {run_id}: {req.name} (status: {initial_status})")
     emit_run_event("run_created", run_id, chat_session_id=req.chat_session_id or "", sweep_id=req.sweep_id or "",
                    metadata={"name": req.name, "status": initial_status})
+    return run_id, run_data
+
+
+@router.post("/runs")
+async def create_run(req: RunCreate):
+    """Create a new run. Starts in 'ready' state unless auto_start=True."""
+    run_id, run_data = _new_run(req)
+    _save_runs_state()
+    initial_status = run_data["status"]
 
     if initial_status == "queued":
-        try:
-            _launch_run_in_tmux(run_id, run_data)
-            if run_data.get("sweep_id"):
-                _recompute_sweep_state(run_data["sweep_id"])
-            _save_runs_state()
-        except Exception as e:
-            logger.error(f"Failed to auto-start run {run_id}: {e}")
-            raise HTTPException(status_code=500, detail=str(e))
+        result = _dispatch_queue()
+        if run_id in result["failed"]:
+            logger.error(f"Failed to auto-start run {run_id}: {result['failed'][run_id]}")
+            raise HTTPException(status_code=500, detail=result["failed"][run_id])
 
     return _run_response_payload(run_id, run_data)
 
 
+@router.get("/runs/queue")
+async def get_launch_queue():
+    """Queued runs in expected launch order, with positions and ETAs."""
+    _reconcile_all_run_terminal_states()
+    _launch_queue.ensure_running()
+    return _launch_queue.snapshot()
+
+
+@router.put("/runs/queue/config")
+async def update_launch_queue_config(req: LaunchQueueConfigUpdate):
+    """Change the concurrency limit or toggle preemption at runtime."""
+    _launch_queue.configure(
+        max_concurrent=req.max_concurrent,
+        preemption_enabled=req.preemption_enabled,
+    )
+    result = _dispatch_queue()
+    return {**_launch_queue.summary(), "launched": result["launched"], "preempted": result["preempted"]}
+
+
 @router.get("/runs/{run_id}")
 async def get_run(run_id: str):
     """Get run details."""
@@ -212,6 +287,18 @@ async def update_run(run_id: str, req: RunUpdate):
     run = _runs[run_id]
     current_status = str(run.get("status", "")).strip().lower()
 
+    dependencies_changed = req.depends_on is not None or req.dependency_condition is not None
+    if dependencies_changed:
+        if current_status not in {"ready", "queued"}:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Dependencies can only change before the run starts (status: {current_status})",
+            )
+        depends_on = run.get("depends_on")
+        if req.depends_on is not None:
+            depends_on = _validated_dependencies(_runs, run_id, req.depends_on)
+        condition = _validated_dependency_condition(req.dependency_condition or run.get("dependency_condition"))
+
     if req.command is not None:
         next_command = req.command.strip()
         if not next_command:
@@ -235,20 +322,31 @@ async def update_run(run_id: str, req: RunUpdate):
             raise HTTPException(status_code=400, detail="Run workdir cannot be empty")
         run["workdir"] = next_workdir
 
+    if req.priority_class is not None:
+        run["priority_class"] = _validated_priority_class(req.priority_class)
+
+    if req.anomaly_detectors is not None:
+        run["anomaly_detectors"] = _validated_anomaly_detectors(req.anomaly_detectors)
+
+    if dependencies_changed:
+        run["depends_on"] = depends_on
+        run["dependency_condition"] = condition if depends_on else None
+        if not depends_on and (run.get("queue_blocked_reason") or "").startswith("Waiting for"):
+            run.pop("queue_blocked_reason", None)
+
     _save_runs_state()
+    if (req.priority_class is not None or dependencies_changed) and current_status == "queued":
+        _dispatch_queue()
     return _run_response_payload(run_id, run)
 
 
-@router.post("/runs/{run_id}/queue")
-async def queue_run(run_id: str):
-    """Queue a ready run for execution."""
+def _get_run(run_id: str) -> dict:
     if run_id not in _runs:
         raise HTTPException(status_code=404, detail="Run not found")
+    return _runs[run_id]
 
-    run = _runs[run_id]
-    if run["status"] != "ready":
-        raise HTTPException(status_code=400, detail=f"Run is not ready (status: {run['status']})")
 
+def _mark_queued(run_id: str, run: dict) -> None:
     run["status"] = "queued"
     run["queued_at"] = time.time()
     _record_journey_event(
@@ -258,9 +356,30 @@ async def queue_run(run_id: str):
         run_id=run_id,
         note=run.get("name") or run_id,
     )
+
+
+def _queue_for_start(run_id: str) -> dict:
+    """Queue a ready run for ``start``; queued runs are left as they are."""
+    run = _get_run(run_id)
+    if run["status"] not in ["queued", "ready"]:
+        raise HTTPException(status_code=400, detail=f"Run cannot be started (status: {run['status']})")
+    if run["status"] == "ready":
+        _mark_queued(run_id, run)
+    return run
+
+
+@router.post("/runs/{run_id}/queue")
+async def queue_run(run_id: str):
+    """Queue a ready run for execution."""
+    run = _get_run(run_id)
+    if run["status"] != "ready":
+        raise HTTPException(status_code=400, detail=f"Run is not ready (status: {run['status']})")
+
+    _mark_queued(run_id, run)
     if run.get("sweep_id"):
         _recompute_sweep_state(run["sweep_id"])
     _save_runs_state()
+    _dispatch_queue()
 
     return {"message": "Run queued", "id": run_id, **run}
 
@@ -268,62 +387,35 @@ async def queue_run(run_id: str):
 @router.post("/runs/{run_id}/start")
 async def start_run(run_id: str):
     """Start a queued run."""
-    if run_id not in _runs:
-        raise HTTPException(status_code=404, detail="Run not found")
-
-    run = _runs[run_id]
-    if run["status"] not in ["queued", "ready"]:
-        raise HTTPException(status_code=400, detail=f"Run cannot be started (status: {run['status']})")
-
-    if run["status"] == "ready":
-        run["status"] = "queued"
-        run["queued_at"] = time.time()
-        _record_journey_event(
-            kind="run_queued",
-            actor="system",
-            session_id=run.get("chat_session_id"),
-            run_id=run_id,
-            note=run.get("name") or run_id,
-        )
-
-    try:
-        tmux_window = _launch_run_in_tmux(run_id, run)
-        _record_journey_event(
-            kind="run_launched",
-            actor="system",
-            session_id=run.get("chat_session_id"),
-            run_id=run_id,
-            note=run.get("name") or run_id,
-            metadata={"tmux_window": tmux_window},
-        )
-        if run.get("sweep_id"):
-            _recompute_sweep_state(run["sweep_id"])
-        _save_runs_state()
-        return {"message": "Run started", "tmux_window": tmux_window}
-    except Exception as e:
-        logger.error(f"Failed to start run {run_id}: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
-
+    run = _queue_for_start(run_id)
+
+    result = _dispatch_queue()
+    if run_id in result["launched"]:
+        return {"message": "Run started", "tmux_window": run.get("tmux_window")}
+    if run_id in result["failed"]:
+        logger.error(f"Failed to start run {run_id}: {result['failed'][run_id]}")
+        raise HTTPException(status_code=500, detail=result["failed"][run_id])
+    if run.get("sweep_id"):
+        _recompute_sweep_state(run["sweep_id"])
+    _save_runs_state()
+    return {
+        "message": "Run queued",
+        "blocked_reason": result["blocked"].get(run_id),
+        **(_launch_queue.queue_info(run_id) or {}),
+    }
 
-@router.post("/runs/{run_id}/stop")
-async def stop_run(run_id: str):
-    """Stop a running job."""
-    if run_id not in _runs:
-        raise HTTPException(status_code=404, detail="Run not found")
 
-    run = _runs[run_id]
+def _stop(run_id: str) -> dict:
+    """Kill an active run and mark it stopped; the caller saves and dispatches."""
+    run = _get_run(run_id)
     if run["status"] not in ["launching", "running"]:
         raise HTTPException(status_code=400, detail=f"Run is not active (status: {run['status']})")
 
-    tmux_window = run.get("tmux_window")
-    if tmux_window:
-        session = _get_or_create_session()
-        if session:
-            window = session.windows.get(window_name=tmux_window, default=None)
-            if window:
-                window.kill()
-                logger.info(f"Killed tmux window {tmux_window}")
-
+    try:
+        _run_executors.stop(run_id, run)
+    except Exception as e:
+        logger.error(f"Failed to stop run {run_id}: {e}")
+        release_run_gpus(run_id, run)
     run["status"] = "stopped"
     run["stopped_at"] = time.time()
     _record_journey_event(
@@ -333,22 +425,26 @@ async def stop_run(run_id: str):
         run_id=run_id,
         note=run.get("name") or run_id,
     )
+    emit_run_event("run_stopped", run_id, chat_session_id=run.get("chat_session_id") or "",
+                   sweep_id=run.get("sweep_id") or "")
+    return run
+
+
+@router.post("/runs/{run_id}/stop")
+async def stop_run(run_id: str):
+    """Stop a running job."""
+    run = _stop(run_id)
     if run.get("sweep_id"):
         _recompute_sweep_state(run["sweep_id"])
     _save_runs_state()
-    emit_run_event("run_stopped", run_id, chat_session_id=run.get("chat_session_id") or "",
-                   sweep_id=run.get("sweep_id") or "")
+    _dispatch_queue()
 
     return {"message": "Run stopped"}
 
 
-@router.post("/runs/{run_id}/rerun")
-async def rerun_run(run_id: str, req: Optional[RunRerunRequest] = None):
-    """Create a new run based on an existing run."""
-    if run_id not in _runs:
-        raise HTTPException(status_code=404, detail="Run not found")
-
-    source_run = _runs[run_id]
+def _new_rerun(run_id: str, req: Optional[RunRerunRequest], recompute_sweep: bool = True) -> tuple[str, dict]:
+    """Add a copy of ``run_id`` as a new run; the caller saves and dispatches."""
+    source_run = _get_run(run_id)
     new_command = req.command if req and req.command else source_run.get("command")
     if not new_command:
         raise HTTPException(status_code=400, detail="Command is required for rerun")
@@ -360,18 +456,24 @@ async def rerun_run(run_id: str, req: Optional[RunRerunRequest] = None):
     else:
         gpuwrap_config = _normalize_gpuwrap_config(source_run.get("gpuwrap_config"))
 
+    now = time.time()
     new_run = {
         "name": f"{source_run.get('name', 'Run')} (Rerun)",
         "command": new_command,
         "workdir": source_run.get("workdir") or config.WORKDIR,
         "status": initial_status,
-        "created_at": time.time(),
+        "created_at": now,
+        "queued_at": now if initial_status == "queued" else None,
         "is_archived": False,
         "sweep_id": source_run.get("sweep_id"),
         "parent_run_id": run_id,
         "origin_alert_id": req.origin_alert_id if req else None,
         "chat_session_id": source_run.get("chat_session_id"),
         "gpuwrap_config": gpuwrap_config,
+        "priority_class": source_run.get("priority_class"),
+        "executor": source_run.get("executor"),
+        "slurm": source_run.get("slurm"),
+        "anomaly_detectors": source_run.get("anomaly_detectors"),
         "tmux_window": None,
         "run_dir": None,
         "exit_code": None,
@@ -380,8 +482,7 @@ async def rerun_run(run_id: str, req: Optional[RunRerunRequest] = None):
     }
 
     _runs[new_run_id] = new_run
-    _sync_run_membership_with_sweep(new_run_id, new_run.get("sweep_id"))
-    _save_runs_state()
+    _sync_run_membership_with_sweep(new_run_id, new_run.get("sweep_id"), recompute=recompute_sweep)
     _record_journey_event(
         kind="run_created",
         actor="system",
@@ -398,36 +499,38 @@ async def rerun_run(run_id: str, req: Optional[RunRerunRequest] = None):
             run_id=new_run_id,
             note=f"{new_run.get('name') or new_run_id} queued",
         )
+    return new_run_id, new_run
 
-    if initial_status == "queued":
-        try:
-            _launch_run_in_tmux(new_run_id, new_run)
-            _record_journey_event(
-                kind="run_launched",
-                actor="system",
-                session_id=new_run.get("chat_session_id"),
-                run_id=new_run_id,
-                note=new_run.get("name") or new_run_id,
-                metadata={"rerun_of": run_id},
-            )
-            if new_run.get("sweep_id"):
-                _recompute_sweep_state(new_run["sweep_id"])
-            _save_runs_state()
-        except Exception as e:
-            logger.error(f"Failed to launch rerun {new_run_id}: {e}")
-            raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/runs/{run_id}/rerun")
+async def rerun_run(run_id: str, req: Optional[RunRerunRequest] = None):
+    """Create a new run based on an existing run."""
+    new_run_id, new_run = _new_rerun(run_id, req)
+    _save_runs_state()
+
+    if new_run["status"] == "queued":
+        result = _dispatch_queue()
+        if new_run_id in result["failed"]:
+            logger.error(f"Failed to launch rerun {new_run_id}: {result['failed'][new_run_id]}")
+            raise HTTPException(status_code=500, detail=result["failed"][new_run_id])
 
     return {"id": new_run_id, **new_run}
 
 
+def _set_archived(run_id: str, archived: bool) -> dict:
+    run = _get_run(run_id)
+    run["is_archived"] = archived
+    if archived:
+        run["archived_at"] = time.time()
+    else:
+        run.pop("archived_at", None)
+    return run
+
+
 @router.post("/runs/{run_id}/archive")
 async def archive_run(run_id: str):
     """Archive a run."""
-    if run_id not in _runs:
-        raise HTTPException(status_code=404, detail="Run not found")
-
-    _runs[run_id]["is_archived"] = True
-    _runs[run_id]["archived_at"] = time.time()
+    _set_archived(run_id, True)
     _save_runs_state()
     return {"message": "Run archived", "run": {"id": run_id, **_runs[run_id]}}
 
@@ -435,18 +538,114 @@ async def archive_run(run_id: str):
 @router.post("/runs/{run_id}/unarchive")
 async def unarchive_run(run_id: str):
     """Unarchive a run."""
-    if run_id not in _runs:
-        raise HTTPException(status_code=404, detail="Run not found")
-
-    _runs[run_id]["is_archived"] = False
-    _runs[run_id].pop("archived_at", None)
+    _set_archived(run_id, False)
     _save_runs_state()
     return {"message": "Run unarchived", "run": {"id": run_id, **_runs[run_id]}}
 
 
-@router.post("/runs/{run_id}/status")
-async def update_run_status(run_id: str, update: RunStatusUpdate):
-    """Update run status (called by sidecar)."""
+MAX_BULK_RUNS = 1000
+_BULK_ACTIONS = ("create", "start", "stop", "archive", "unarchive", "rerun")
+
+
+def _bulk_targets(req: RunBulkRequest) -> list[str]:
+    if req.run_ids is not None:
+        return list(dict.fromkeys(req.run_ids))
+    if req.filter is None:
+        raise HTTPException(status_code=400, detail="run_ids or filter is required")
+    match = req.filter
+    statuses = {status.strip().lower() for status in match.statuses} if match.statuses else None
+    return [
+        run_id for run_id, run in _runs.items()
+        if (not match.sweep_id or run.get("sweep_id") == match.sweep_id)
+        and (statuses is None or run.get("status") in statuses)
+        and (match.include_archived or not run.get("is_archived", False))
+    ]
+
+
+def _bulk_apply(action: str, item, rerun: Optional[RunRerunRequest]) -> tuple[dict, dict]:
+    """One bulk item: returns ``(result, run)``; raises HTTPException like the single-run route."""
+    if action == "create":
+        run_id, run = _new_run(item, recompute_sweep=False)
+        return {"id": run_id}, run
+    if action == "rerun":
+        new_run_id, run = _new_rerun(item, rerun, recompute_sweep=False)
+        return {"id": item, "new_id": new_run_id}, run
+    if action == "start":
+        return {"id": item}, _queue_for_start(item)
+    if action == "stop":
+        return {"id": item}, _stop(item)
+    return {"id": item}, _set_archived(item, action == "archive")
+
+
+@router.post("/runs/bulk")
+async def bulk_runs(req: RunBulkRequest):
+    """Create, start, stop, archive, unarchive or rerun many runs at once.
+
+    All items are applied first, then the queue is dispatched once, each
+    touched sweep is recomputed once and state is written once.  Every item
+    gets its own result; one failing item does not stop the others.
+    """
+    action = req.action.strip().lower()
+    if action not in _BULK_ACTIONS:
+        raise HTTPException(status_code=400, detail=f"action must be one of: {', '.join(_BULK_ACTIONS)}")
+    if action == "create":
+        if not req.runs:
+            raise HTTPException(status_code=400, detail="runs is required for create")
+        items = list(req.runs)
+    else:
+        items = _bulk_targets(req)
+    if len(items) > MAX_BULK_RUNS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_RUNS} runs per request")
+
+    results: list[dict] = []
+    touched_sweeps: set[str] = set()
+    dispatch = None
+    with state.deferred_saves():
+        # Stops are sent to tmux together when the batch closes.
+        with _run_executors.batch():
+            for index, item in enumerate(items):
+                try:
+                    result, run = _bulk_apply(action, item, req.rerun)
+                except HTTPException as e:
+                    results.append({
+                        "id": item if isinstance(item, str) else None,
+                        "index": index,
+                        "ok": False,
+                        "status_code": e.status_code,
+                        "error": e.detail,
+                    })
+                    continue
+                results.append({**result, "index": index, "ok": True})
+                if run.get("sweep_id"):
+                    touched_sweeps.add(run["sweep_id"])
+        if action in ("create", "start", "stop", "rerun"):
+            dispatch = _dispatch_queue()
+        for sweep_id in touched_sweeps:
+            _recompute_sweep_state(sweep_id)
+        _save_runs_state()
+
+    for result in results:
+        if not result["ok"]:
+            continue
+        run_id = result.get("new_id") or result["id"]
+        result["status"] = _runs[run_id].get("status")
+        if dispatch and run_id in dispatch["failed"]:
+            result.update(ok=False, status_code=500, error=dispatch["failed"][run_id])
+        elif dispatch and run_id in dispatch["blocked"]:
+            result["blocked_reason"] = dispatch["blocked"][run_id]
+    succeeded = sum(1 for result in results if result["ok"])
+    logger.info(f"Bulk {action}: {succeeded}/{len(results)} runs")
+    return {
+        "action": action,
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "launched": dispatch["launched"] if dispatch else [],
+        "results": results,
+    }
+
+
+def apply_run_status_update(run_id: str, update: RunStatusUpdate) -> None:
+    """Record a lifecycle change reported by a sidecar or an in-process executor."""
     logger.info(f"Status update for {run_id}: {update.status}")
 
     if run_id not in _runs:
@@ -463,6 +662,8 @@ async def update_run_status(run_id: str, update: RunStatusUpdate):
         run["tmux_pane"] = update.tmux_pane
     if update.wandb_dir:
         run["wandb_dir"] = update.wandb_dir
+    if update.sidecar_wakeups is not None:
+        run["sidecar_wakeups"] = update.sidecar_wakeups
 
     effective_exit_code = _coerce_exit_code(run.get("exit_code"))
     if run.get("exit_code") != effective_exit_code:
@@ -479,6 +680,11 @@ async def update_run_status(run_id: str, update: RunStatusUpdate):
         run["started_at"] = time.time()
     elif next_status in _RUN_STATUS_TERMINAL:
         run["ended_at"] = time.time()
+        release_run_gpus(run_id, run)
+        if _anomaly_engine is not None:
+            _anomaly_engine.forget(run_id)
+        if _alert_judge is not None:
+            _alert_judge.forget(run_id)
     _record_journey_event(
         kind=f"run_{next_status}",
         actor="system",
@@ -502,23 +708,80 @@ async def update_run_status(run_id: str, update: RunStatusUpdate):
     emit_run_event(f"run_{next_status}", run_id, chat_session_id=run.get("chat_session_id") or "",
                    sweep_id=run.get("sweep_id") or "",
                    metadata={"exit_code": run.get("exit_code")})
+    if next_status in _RUN_STATUS_TERMINAL:
+        _dispatch_queue()
+
+
+@router.post("/runs/{run_id}/status")
+async def update_run_status(run_id: str, update: RunStatusUpdate):
+    """Update run status (called by sidecar)."""
+    apply_run_status_update(run_id, update)
     return {"message": "Status updated"}
 
 
-# ---------------------------------------------------------------------------
-# Alert Endpoints
-# ---------------------------------------------------------------------------
+@router.post("/runs/{run_id}/events")
+async def post_run_events(run_id: str, batch: RunEventBatch):
+    """Apply a batch of spooled sidecar events, each seq at most once.
 
-@router.post("/runs/{run_id}/alerts")
-async def create_alert(run_id: str, req: CreateAlertRequest):
-    """Create a new alert for a run (called by sidecar)."""
+    The sidecar replays unacknowledged events after a failure, so anything at
+    or below the run's ``report_seq`` is skipped.  Returns the highest seq
+    applied so the sidecar can trim its spool.
+    """
     if run_id not in _runs:
         raise HTTPException(status_code=404, detail="Run not found")
 
-    if not req.choices:
-        raise HTTPException(status_code=400, detail="At least one choice is required")
+    run = _runs[run_id]
+    applied = 0
+    for event in sorted(batch.events, key=lambda e: e.seq):
+        if event.seq <= run.get("report_seq", 0):
+            continue
+        if event.type == "status":
+            try:
+                update = RunStatusUpdate(**event.data)
+            except ValidationError as e:
+                # Acknowledge it anyway; a malformed event must not wedge the spool.
+                logger.warning(f"Dropping malformed status event {event.seq} for run {run_id}: {e}")
+            else:
+                apply_run_status_update(run_id, update)
+        elif event.type == "metrics":
+            wakeups = event.data.get("sidecar_wakeups")
+            if isinstance(wakeups, int):
+                run["sidecar_wakeups"] = wakeups
+            rows = event.data.get("rows")
+            if isinstance(rows, list) and rows:
+                try:
+                    append_run_metrics(run_id, rows)
+                except OSError as e:
+                    logger.error(f"Failed to write metrics for run {run_id}: {e}")
+                    _save_runs_state()
+                    raise HTTPException(status_code=500, detail="Failed to write metrics")
+        else:
+            logger.warning(f"Ignoring unknown event type {event.type!r} for run {run_id}")
+        run["report_seq"] = event.seq
+        applied += 1
+
+    if applied:
+        _save_runs_state()
+    return {"acked_seq": run.get("report_seq", 0), "applied": applied}
 
-    severity = (req.severity or "warning").strip().lower()
+
+# ---------------------------------------------------------------------------
+# Alert Endpoints
+# ---------------------------------------------------------------------------
+
+def record_run_alert(
+    run_id: str,
+    message: str,
+    choices: list[str],
+    severity: Optional[str] = "warning",
+    source: Optional[str] = None,
+) -> str:
+    """Store an alert for a run (and notify Slack); returns the alert id.
+
+    Alerts from sweep runs are grouped by the aggregator and notified once
+    per group by ``send_alert_group_digest`` instead of individually.
+    """
+    severity = (severity or "warning").strip().lower()
     if severity not in ["info", "warning", "critical"]:
         severity = "warning"
 
@@ -528,14 +791,16 @@ async def create_alert(run_id: str, req: CreateAlertRequest):
         run_id=run_id,
         timestamp=time.time(),
         severity=severity,
-        message=req.message,
-        choices=req.choices,
+        message=message,
+        choices=choices,
         status="pending",
+        source=source,
     )
 
     alert_payload = alert.model_dump()
+    group_id = _alert_aggregator.assign(alert_payload) if _alert_aggregator is not None else None
 
-    if _slack_notifier.is_enabled:
+    if group_id is None and _slack_notifier.is_enabled:
         _slack_notifier.send_alert(
             alert=alert_payload,
             run=_runs.get(run_id),
@@ -543,7 +808,46 @@ async def create_alert(run_id: str, req: CreateAlertRequest):
 
     _active_alerts[alert_id] = alert_payload
     _save_alerts_state()
-    logger.info(f"Created alert {alert_id} for run {run_id}: {req.message}")
+    logger.info(f"Created alert {alert_id} for run {run_id}: {message}")
+    return alert_id
+
+
+def send_alert_group_digest(group: dict) -> None:
+    """One Slack message for a closed alert group (called by the aggregator).
+
+    Members are marked ``digest_sent_at`` so a restart does not re-open the
+    group (see ``AlertAggregator.restore``).
+    """
+    members = [_active_alerts[a] for a in group["alert_ids"] if a in _active_alerts]
+    now = time.time()
+    for alert in members:
+        alert["digest_sent_at"] = now
+    _save_alerts_state()
+    if not _slack_notifier.is_enabled:
+        return
+    if not any(a.get("status") == "pending" for a in members):
+        return
+    if len(members) == 1:
+        _slack_notifier.send_alert(alert=members[0], run=_runs.get(members[0].get("run_id")))
+        return
+    summary = group_alerts(members)[group["id"]]
+    _slack_notifier.send_alert_digest(
+        group=summary,
+        runs=[_runs.get(rid) or {"id": rid} for rid in summary["run_ids"]],
+        sweep=_sweeps.get(group.get("sweep_id")),
+    )
+
+
+@router.post("/runs/{run_id}/alerts")
+async def create_alert(run_id: str, req: CreateAlertRequest):
+    """Create a new alert for a run (called by sidecar)."""
+    if run_id not in _runs:
+        raise HTTPException(status_code=404, detail="Run not found")
+
+    if not req.choices:
+        raise HTTPException(status_code=400, detail="At least one choice is required")
+
+    alert_id = record_run_alert(run_id, req.message, req.choices, req.severity)
     return {"alert_id": alert_id}
 
 
@@ -555,6 +859,91 @@ async def list_alerts():
     return alerts
 
 
+@router.get("/alerts/judge")
+async def get_alert_judge_summary():
+    """Shared alert judge counters: calls, cache hits, remaining budget."""
+    if _alert_judge is None:
+        return {"enabled": False}
+    return _alert_judge.summary()
+
+
+@router.get("/alerts/groups")
+async def list_alert_groups(status: Optional[str] = Query(None, description="pending or resolved")):
+    """Sweep alert groups (one per incident), newest first."""
+    groups = list(group_alerts(_active_alerts.values()).values())
+    if status:
+        groups = [g for g in groups if g["status"] == status]
+    groups.sort(key=lambda g: g.get("created_at") or 0, reverse=True)
+    return groups
+
+
+def _apply_alert_response(alert_id: str, choice: str) -> Optional[dict]:
+    """Resolve one alert and hand the choice to whoever acts on it.
+
+    Writes the response file the sidecar polls for and wakes long-polls;
+    for server-raised alerts a stop choice stops the run here.  Returns the
+    run, or None when it no longer exists.  Raises OSError if the response
+    file cannot be written; the alert then stays pending.  The caller saves
+    alert state.
+    """
+    alert = _active_alerts[alert_id]
+    run_id = alert.get("run_id")
+    run = _runs.get(run_id) if run_id else None
+    if run:
+        run_dir = run.get("run_dir") or os.path.join(config.DATA_DIR, "runs", run_id)
+        alerts_dir = os.path.join(run_dir, "alerts")
+        os.makedirs(alerts_dir, exist_ok=True)
+        with open(os.path.join(alerts_dir, f"{alert_id}.response"), "w") as f:
+            f.write(choice)
+
+    alert["status"] = "resolved"
+    alert["response"] = choice
+    alert["responded_at"] = time.time()
+    if not run:
+        return None
+
+    _notify_alert_waiters(run_id)
+    logger.info(f"Recorded alert response for {alert_id}: {choice}")
+
+    # Server-raised alerts have no sidecar waiting on them, so act on them here.
+    if (
+        alert.get("source") in _SERVER_ALERT_SOURCES
+        and should_stop_from_choice(choice)
+        and run.get("status") in ("launching", "running")
+    ):
+        try:
+            _run_executors.stop(run_id, run)
+        except Exception as e:
+            logger.error(f"Failed to stop run {run_id}: {e}")
+        apply_run_status_update(run_id, RunStatusUpdate(status="stopped", error="Stopped via alert response"))
+    return run
+
+
+@router.post("/alerts/groups/{group_id}/respond")
+async def respond_to_alert_group(group_id: str, req: RespondAlertRequest):
+    """Apply one response to every pending alert of a group."""
+    group = group_alerts(a for a in _active_alerts.values() if a.get("group_id") == group_id).get(group_id)
+    if group is None:
+        raise HTTPException(status_code=404, detail="Alert group not found")
+    if req.choice not in group["choices"]:
+        raise HTTPException(status_code=400, detail="Invalid choice")
+    if _alert_aggregator is not None:
+        _alert_aggregator.close(group_id)
+
+    resolved, failed = [], []
+    # "Stop" on a group of N runs kills their windows in one tmux call.
+    with _run_executors.batch() if _run_executors is not None else contextlib.nullcontext():
+        for alert_id in group["pending_alert_ids"]:
+            try:
+                _apply_alert_response(alert_id, req.choice)
+                resolved.append(alert_id)
+            except OSError as e:
+                logger.error(f"Failed writing alert response file for {alert_id}: {e}")
+                failed.append(alert_id)
+    _save_alerts_state()
+    return {"message": "Response recorded", "resolved": resolved, "failed": failed}
+
+
 @router.post("/alerts/{alert_id}/respond")
 async def respond_to_alert(alert_id: str, req: RespondAlertRequest):
     """Resolve an alert and persist the response for sidecar consumption."""
@@ -565,38 +954,111 @@ async def respond_to_alert(alert_id: str, req: RespondAlertRequest):
     if req.choice not in alert.get("choices", []):
         raise HTTPException(status_code=400, detail="Invalid choice")
 
-    alert["status"] = "resolved"
-    alert["response"] = req.choice
-    alert["responded_at"] = time.time()
-
-    run_id = alert.get("run_id")
-    run = _runs.get(run_id) if run_id else None
-
-    if not run:
-        _save_alerts_state()
-        return {"message": "Response recorded, run not found"}
-
-    run_dir = run.get("run_dir") or os.path.join(config.DATA_DIR, "runs", run_id)
-    alerts_dir = os.path.join(run_dir, "alerts")
-    os.makedirs(alerts_dir, exist_ok=True)
-    response_file = os.path.join(alerts_dir, f"{alert_id}.response")
-
     try:
-        with open(response_file, "w") as f:
-            f.write(req.choice)
+        run = _apply_alert_response(alert_id, req.choice)
     except Exception as e:
         logger.error(f"Failed writing alert response file for {alert_id}: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to write response file: {e}")
 
     _save_alerts_state()
-    logger.info(f"Recorded alert response for {alert_id}: {req.choice}")
+    if not run:
+        return {"message": "Response recorded, run not found"}
     return {"message": "Response recorded"}
 
 
+def _notify_alert_waiters(run_id: str) -> None:
+    for event in _alert_response_waiters.get(run_id, ()):
+        event.set()
+
+
+@router.get("/runs/{run_id}/alerts/responses")
+async def wait_for_alert_responses(
+    run_id: str,
+    alert_ids: str = Query("", description="Comma-separated alert ids"),
+    wait: float = Query(0.0, ge=0.0, le=60.0, description="Seconds to hold the request open"),
+):
+    """Long-poll for responses to a run's alerts (called by sidecar).
+
+    Returns as soon as any of ``alert_ids`` is resolved, or when another of
+    the run's alerts gets a response so the caller can re-poll with its
+    current set.  ``unknown`` lists ids the server has no record of.
+    """
+    if run_id not in _runs:
+        raise HTTPException(status_code=404, detail="Run not found")
+    wanted = [a for a in alert_ids.split(",") if a]
+
+    def collect() -> dict:
+        responses = {}
+        for alert_id in wanted:
+            alert = _active_alerts.get(alert_id)
+            if alert and alert.get("run_id") == run_id and alert.get("status") == "resolved":
+                responses[alert_id] = alert.get("response")
+        return responses
+
+    responses = collect()
+    if not responses and wanted and wait > 0:
+        event = asyncio.Event()
+        waiters = _alert_response_waiters.setdefault(run_id, set())
+        waiters.add(event)
+        try:
+            await asyncio.wait_for(event.wait(), timeout=wait)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            waiters.discard(event)
+            if not waiters:
+                _alert_response_waiters.pop(run_id, None)
+        responses = collect()
+
+    unknown = [a for a in wanted if a not in _active_alerts]
+    return {"responses": responses, "unknown": unknown}
+
+
 # ---------------------------------------------------------------------------
 # Metrics Endpoints
 # ---------------------------------------------------------------------------
 
+def append_run_metrics(run_id: str, rows: list) -> int:
+    """Append metrics rows to the run's agent_metrics.jsonl; raises OSError."""
+    run = _runs[run_id]
+    run_dir = run.get("run_dir") or os.path.join(config.DATA_DIR, "runs", run_id)
+    os.makedirs(run_dir, exist_ok=True)
+    metrics_file = os.path.join(run_dir, "agent_metrics.jsonl")
+
+    written = 0
+    with open(metrics_file, "a") as f:
+        for row in rows:
+            if isinstance(row, dict):
+                f.write(json.dumps(row, ensure_ascii=False) + "\n")
+                written += 1
+
+    _wandb_metrics_cache.pop(metrics_file, None)
+
+    if _anomaly_engine is not None and written:
+        for anomaly in _anomaly_engine.process(run_id, run, rows):
+            record_run_alert(run_id, anomaly.message, ["Ignore", "Stop Job"], anomaly.severity, source="anomaly")
+    if _alert_judge is not None and written:
+        _alert_judge.observe(run_id, rows)
+    return written
+
+
+@router.get("/runs/{run_id}/anomaly-detectors")
+async def get_run_anomaly_detectors(run_id: str):
+    """Detectors applied to this run's metrics and where the config came from."""
+    if run_id not in _runs:
+        raise HTTPException(status_code=404, detail="Run not found")
+    run = _runs[run_id]
+    if run.get("anomaly_detectors") is not None:
+        origin = "run"
+    elif (_sweeps.get(run.get("sweep_id") or "") or {}).get("anomaly_detectors") is not None:
+        origin = "sweep"
+    else:
+        origin = "default"
+    enabled = _anomaly_engine is not None and _anomaly_engine.enabled
+    detectors = _anomaly_engine.specs_for(run) if _anomaly_engine is not None else []
+    return {"enabled": enabled, "origin": origin, "detectors": detectors}
+
+
 @router.post("/runs/{run_id}/metrics")
 async def post_run_metrics(run_id: str, request: Request):
     """Accept metrics rows from the sidecar and append to stored metrics file."""
@@ -608,22 +1070,12 @@ async def post_run_metrics(run_id: str, request: Request):
     if not isinstance(rows, list) or len(rows) == 0:
         raise HTTPException(status_code=400, detail="'rows' must be a non-empty array")
 
-    run = _runs[run_id]
-    run_dir = run.get("run_dir") or os.path.join(config.DATA_DIR, "runs", run_id)
-    os.makedirs(run_dir, exist_ok=True)
-    metrics_file = os.path.join(run_dir, "agent_metrics.jsonl")
-
     try:
-        with open(metrics_file, "a") as f:
-            for row in rows:
-                if isinstance(row, dict):
-                    f.write(json.dumps(row, ensure_ascii=False) + "\n")
+        append_run_metrics(run_id, rows)
     except OSError as e:
         logger.error(f"Failed to write metrics for run {run_id}: {e}")
         raise HTTPException(status_code=500, detail="Failed to write metrics")
 
-    _wandb_metrics_cache.pop(metrics_file, None)
-
     logger.debug(f"Received {len(rows)} metric rows for run {run_id}")
     return {"appended": len(rows)}
 
@@ -0,0 +1,627 @@
+"""
+Research Agent Server — Slurm Executor
+
+Submits runs as sbatch jobs instead of tmux panes on the head node.
+
+Each launch renders a batch script into the run directory (command, WANDB
+env, GPU request from gpuwrap settings, per-run sbatch options) and submits
+it with ``sbatch --parsable``.  Job output goes to ``run.log`` and the
+script writes ``job.done`` itself, so the usual terminal-state
+reconciliation keeps working on a shared filesystem.
+
+On the server's event loop ``sbatch`` and ``scancel`` run in a worker
+thread: ``launch`` returns with the run ``launching`` and the job id is
+filled in once the submission lands (or the run fails with sbatch's error),
+so a slow controller never stalls the launch queue or other requests.
+
+Sweeps are submitted as a single job array (``submit_array``) rather than
+one sbatch per grid point.
+
+Status tracking is batched: every poll interval one ``squeue --json`` call
+covers all active Slurm runs, and jobs that have already left the queue are
+resolved with a single ``sacct --json`` call.  Array tasks are read from one
+``sacct`` call over their parent arrays.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import shlex
+import subprocess
+import time
+from datetime import datetime
+from typing import Any, Callable, Optional
+
+from core import config
+from runs.executors import RunExecutor
+from runs.helpers import RUN_STATUS_ACTIVE, _normalize_gpuwrap_config, prepare_run_dir
+
+logger = logging.getLogger("research-agent-server")
+
+# Slurm job state -> run status.  Anything not listed is treated as failed.
+SLURM_STATE_TO_RUN_STATUS = {
+    "PENDING": "launching",
+    "CONFIGURING": "launching",
+    "REQUEUED": "launching",
+    "REQUEUE_HOLD": "launching",
+    "REQUEUE_FED": "launching",
+    "RESV_DEL_HOLD": "launching",
+    "RUNNING": "running",
+    "COMPLETING": "running",
+    "SUSPENDED": "running",
+    "STAGE_OUT": "running",
+    "SIGNALING": "running",
+    "RESIZING": "running",
+    "COMPLETED": "finished",
+    "CANCELLED": "stopped",
+    "FAILED": "failed",
+    "TIMEOUT": "failed",
+    "NODE_FAIL": "failed",
+    "OUT_OF_MEMORY": "failed",
+    "BOOT_FAIL": "failed",
+    "DEADLINE": "failed",
+    "PREEMPTED": "failed",
+    "SPECIAL_EXIT": "failed",
+    "REVOKED": "failed",
+}
+
+SLURM_FAILURE_REASONS = {
+    "TIMEOUT": "Slurm job hit its time limit",
+    "NODE_FAIL": "Slurm node failure",
+    "OUT_OF_MEMORY": "Slurm job ran out of memory",
+    "BOOT_FAIL": "Slurm node failed to boot",
+    "DEADLINE": "Slurm job missed its deadline",
+    "PREEMPTED": "Slurm job was preempted",
+}
+
+# Polls a job may be absent from both squeue and sacct before we give up.
+MISSING_JOB_POLLS = 3
+
+
+def _number(value: Any) -> Optional[int]:
+    """Unwrap Slurm's ``{"set": true, "number": N}`` integers."""
+    if isinstance(value, dict):
+        if value.get("set") is False or value.get("infinite"):
+            return None
+        value = value.get("number")
+    if isinstance(value, bool) or value is None:
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def slurm_job_key(job: dict) -> str:
+    """``<job_id>`` for plain jobs, ``<array_job_id>_<task_id>`` for array tasks."""
+    array_info = job.get("array") if isinstance(job.get("array"), dict) else {}
+    array_job_id = _number(job.get("array_job_id", array_info.get("job_id")))
+    array_task_id = _number(job.get("array_task_id", array_info.get("task_id")))
+    if array_job_id and array_task_id is not None:
+        return f"{array_job_id}_{array_task_id}"
+    return str(_number(job.get("job_id")) or job.get("job_id"))
+
+
+def slurm_job_state(job: dict) -> str:
+    """State name from squeue (``job_state``) or sacct (``state.current``)."""
+    state = job.get("job_state")
+    if state is None and isinstance(job.get("state"), dict):
+        state = job["state"].get("current")
+    if isinstance(state, list):
+        state = state[0] if state else None
+    return str(state or "UNKNOWN").upper()
+
+
+def slurm_exit_code(job: dict) -> Optional[int]:
+    exit_info = job.get("exit_code")
+    if isinstance(exit_info, dict):
+        code = _number(exit_info.get("return_code"))
+        signal_info = exit_info.get("signal")
+        signal_id = _number(signal_info.get("id")) if isinstance(signal_info, dict) else None
+        if signal_id:
+            return 128 + signal_id
+        return code
+    return _number(exit_info)
+
+
+def _check_directive(value: str) -> str:
+    if "\n" in value or "\r" in value:
+        raise ValueError(f"Invalid sbatch option value: {value!r}")
+    return value
+
+
+class SlurmExecutor(RunExecutor):
+    """Submit runs with sbatch and track them with batched squeue/sacct polls."""
+
+    name = "slurm"
+    local = False  # the cluster's scheduler decides how many run at once
+
+    def __init__(
+        self,
+        runs: dict,
+        report_status: Optional[Callable[..., Any]] = None,
+        bin_dir: Optional[str] = None,
+        poll_interval: Optional[float] = None,
+        defaults: Optional[dict] = None,
+    ) -> None:
+        self._runs = runs
+        self._report_status = report_status
+        self.bin_dir = config.SLURM_BIN_DIR if bin_dir is None else bin_dir
+        self.poll_interval = config.SLURM_POLL_SECONDS if poll_interval is None else poll_interval
+        self.defaults = defaults if defaults is not None else {
+            "partition": config.SLURM_PARTITION or None,
+            "account": config.SLURM_ACCOUNT or None,
+            "time_limit": config.SLURM_TIME_LIMIT or None,
+        }
+        self._missing: dict[str, int] = {}
+        self._poll_task: Optional[asyncio.Task] = None
+        self._submits: dict[str, asyncio.Task] = {}
+        self._cancels: set[asyncio.Task] = set()
+
+    # ------------------------------------------------------------------
+    # CLI plumbing
+    # ------------------------------------------------------------------
+
+    def _bin(self, name: str) -> str:
+        return os.path.join(self.bin_dir, name) if self.bin_dir else name
+
+    def _run_cli(self, args: list[str], timeout: float = 30.0) -> str:
+        result = subprocess.run(args, capture_output=True, text=True, timeout=timeout)
+        if result.returncode != 0:
+            raise RuntimeError(f"`{' '.join(args)}` failed (rc={result.returncode}): {result.stderr.strip()}")
+        return result.stdout
+
+    def _run_json(self, args: list[str]) -> dict:
+        return json.loads(self._run_cli(args) or "{}")
+
+    # ------------------------------------------------------------------
+    # Submission
+    # ------------------------------------------------------------------
+
+    def sbatch_options(self, run_data: dict) -> list[str]:
+        """``--flag=value`` sbatch options for a run (defaults, then per-run)."""
+        options = {**self.defaults, **{k: v for k, v in (run_data.get("slurm") or {}).items() if v is not None}}
+        flags = []
+        for key, flag in (
+            ("partition", "--partition"),
+            ("account", "--account"),
+            ("qos", "--qos"),
+            ("time_limit", "--time"),
+            ("cpus_per_task", "--cpus-per-task"),
+            ("mem", "--mem"),
+        ):
+            if options.get(key):
+                flags.append(f"{flag}={_check_directive(str(options[key]))}")
+
+        gpuwrap_config = _normalize_gpuwrap_config(run_data.get("gpuwrap_config")) or {}
+        if gpuwrap_config.get("enabled"):
+            # Slurm hands out whole devices; min_free_memory_mb has no sbatch equivalent.
+            flags.append(f"--gres=gpu:{int(gpuwrap_config.get('gpu_count') or 1)}")
+
+        for extra in options.get("extra_args") or []:
+            flags.append(_check_directive(str(extra)))
+        return flags
+
+    def render_batch_script(
+        self,
+        job_name: str,
+        run_dir: str,
+        workdir: str,
+        body: str,
+        options: list[str],
+        output: Optional[str] = None,
+    ) -> str:
+        lines = [
+            "#!/bin/bash",
+            f"#SBATCH --job-name={_check_directive(job_name)}",
+            f"#SBATCH --output={_check_directive(output or os.path.join(run_dir, 'run.log'))}",
+            "#SBATCH --open-mode=append",
+            f"#SBATCH --chdir={_check_directive(workdir)}",
+        ]
+        lines.extend(f"#SBATCH {option}" for option in options)
+        lines.extend(["", "export PYTHONUNBUFFERED=1", body])
+        return "\n".join(lines) + "\n"
+
+    def _run_body(self, run_id: str, run_dir: str, command_file: str) -> str:
+        completion_file = os.path.join(run_dir, "job.done")
+        wandb_dir = os.path.join(run_dir, "wandb_data")
+        return "\n".join([
+            f"export WANDB_DIR={shlex.quote(wandb_dir)}",
+            f"export WANDB_RUN_ID={shlex.quote(run_id)}",
+            'mkdir -p "$WANDB_DIR"',
+            f"bash {shlex.quote(command_file)}",
+            "rc=$?",
+            f"echo $rc > {shlex.quote(completion_file)}",
+            "exit $rc",
+        ])
+
+    def submit_script(self, script_path: str, extra_args: Optional[list[str]] = None) -> str:
+        """Submit a batch script and return the Slurm job id."""
+        output = self._run_cli([self._bin("sbatch"), "--parsable", *(extra_args or []), script_path])
+        job_id = output.strip().splitlines()[-1].split(";")[0].strip() if output.strip() else ""
+        if not job_id:
+            raise RuntimeError("sbatch did not return a job id")
+        return job_id
+
+    def prepare(self, run_id: str, run_data: dict) -> None:
+        # The workdir only has to exist on the compute nodes.
+        prepare_run_dir(run_id, run_data)
+
+    def launch(self, run_id: str, run_data: dict) -> Optional[str]:
+        run_dir, command_file, _ = prepare_run_dir(run_id, run_data)
+        completion_file = os.path.join(run_dir, "job.done")
+        if os.path.exists(completion_file):
+            os.remove(completion_file)
+
+        script = self.render_batch_script(
+            job_name=f"ra-{run_id[:8]}",
+            run_dir=run_dir,
+            workdir=run_data.get("workdir") or config.WORKDIR,
+            body=self._run_body(run_id, run_dir, command_file),
+            options=self.sbatch_options(run_data),
+        )
+        script_path = os.path.join(run_dir, "job.sbatch")
+        with open(script_path, "w") as f:
+            f.write(script)
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if loop is None:
+            job_id = self.submit_script(script_path)
+            self._mark_launching(run_id, run_data, run_dir, job_id)
+            return job_id
+
+        self._mark_launching(run_id, run_data, run_dir, None)
+        self._submits[run_id] = loop.create_task(self._submit(run_id, run_data, script_path))
+        return None
+
+    def _mark_launching(self, run_id: str, run_data: dict, run_dir: str, job_id: Optional[str]) -> None:
+        run_data["status"] = "launching"
+        run_data["monitor"] = "server"
+        run_data["tmux_window"] = None
+        run_data["run_dir"] = run_dir
+        run_data["slurm_job_id"] = job_id
+        run_data["slurm_state"] = "PENDING" if job_id else "SUBMITTING"
+        run_data["launched_at"] = time.time()
+        if job_id:
+            logger.info(f"Submitted run {run_id} as Slurm job {job_id}")
+            self.ensure_polling()
+
+    async def _submit(self, run_id: str, run_data: dict, script_path: str) -> None:
+        job_id: Optional[str] = None
+        error: Optional[Exception] = None
+        try:
+            job_id = await asyncio.to_thread(self.submit_script, script_path)
+        except Exception as e:
+            error = e
+        current = self._submits.get(run_id) is asyncio.current_task()
+        if current:
+            self._submits.pop(run_id, None)
+        if job_id is None:
+            if current and run_data.get("status") in RUN_STATUS_ACTIVE:
+                logger.error("sbatch failed for run %s: %s", run_id, error)
+                self._report(run_id, "failed", error=f"Slurm submission failed: {error}")
+            return
+        if not current or run_data.get("status") not in RUN_STATUS_ACTIVE:
+            # Stopped (or relaunched) while sbatch was still running.
+            await asyncio.to_thread(self._cancel, run_id, job_id)
+            return
+        run_data["slurm_job_id"] = job_id
+        run_data["slurm_state"] = "PENDING"
+        logger.info(f"Submitted run {run_id} as Slurm job {job_id}")
+        self.ensure_polling()
+
+    def _cancel(self, run_id: str, job_id: str) -> None:
+        try:
+            self._run_cli([self._bin("scancel"), str(job_id)])
+            logger.info(f"Cancelled Slurm job {job_id} for run {run_id}")
+        except Exception as e:
+            logger.warning("scancel failed for run %s (job %s): %s", run_id, job_id, e)
+
+    def stop(self, run_id: str, run_data: dict) -> None:
+        # An sbatch still in flight cancels its own job once it returns.
+        self._submits.pop(run_id, None)
+        job_id = run_data.get("slurm_job_id")
+        if job_id:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                loop = None
+            if loop is None:
+                self._cancel(run_id, str(job_id))
+            else:
+                task = loop.create_task(asyncio.to_thread(self._cancel, run_id, str(job_id)))
+                self._cancels.add(task)
+                task.add_done_callback(self._cancels.discard)
+        run_dir = run_data.get("run_dir")
+        if run_dir:
+            completion_file = os.path.join(run_dir, "job.done")
+            if os.path.exists(completion_file):
+                os.remove(completion_file)
+
+    def recover_orphans(self) -> int:
+        """Fail runs whose sbatch was in flight when the server last stopped.
+
+        Whether the job was queued is unknown, and without its id it can
+        neither be polled nor cancelled.  Returns the number of runs failed.
+        """
+        failed = 0
+        for run_id, run_data in list(self._runs.items()):
+            if (
+                run_data.get("executor") == self.name and run_data.get("status") in RUN_STATUS_ACTIVE
+                and not run_data.get("slurm_job_id") and run_id not in self._submits
+            ):
+                failed += 1
+                self._report(run_id, "failed", error="Server restarted while the Slurm job was being submitted")
+        return failed
+
+    # ------------------------------------------------------------------
+    # Job arrays
+    # ------------------------------------------------------------------
+
+    def submit_array(
+        self,
+        sweep_id: str,
+        sweep: dict,
+        run_ids: list[str],
+        parallel: Optional[int] = None,
+    ) -> str:
+        """Submit sweep runs as one ``sbatch --array=0-N%P`` job.
+
+        The parameter table (task id, run id, run dir, workdir, params) is
+        written once to the sweep directory; each task looks up its own row
+        and runs that run's ``command.txt``.  Runs become ``<array>_<task>``
+        jobs for polling and scancel.
+        """
+        if not run_ids:
+            raise ValueError("No runs to submit")
+        sweep_dir = os.path.join(config.DATA_DIR, "sweeps", sweep_id)
+        os.makedirs(sweep_dir, exist_ok=True)
+        submission = len(sweep.get("slurm_arrays") or [])
+        table_path = os.path.join(sweep_dir, f"array_{submission}.tsv")
+        script_path = os.path.join(sweep_dir, f"array_{submission}.sbatch")
+
+        rows = ["# task_id\trun_id\trun_dir\tworkdir\tparams"]
+        for task_id, run_id in enumerate(run_ids):
+            run_data = self._runs[run_id]
+            run_dir, _, _ = prepare_run_dir(run_id, run_data)
+            completion_file = os.path.join(run_dir, "job.done")
+            if os.path.exists(completion_file):
+                os.remove(completion_file)
+            workdir = run_data.get("workdir") or sweep.get("workdir") or config.WORKDIR
+            params = json.dumps(run_data.get("sweep_params") or {}, separators=(",", ":"))
+            for value in (run_dir, workdir, params):
+                if "\t" in value or "\n" in value:
+                    raise ValueError(f"Cannot store {value!r} in the array parameter table")
+            rows.append(f"{task_id}\t{run_id}\t{run_dir}\t{workdir}\t{params}")
+        with open(table_path, "w") as f:
+            f.write("\n".join(rows) + "\n")
+
+        array_spec = f"0-{len(run_ids) - 1}"
+        if parallel:
+            array_spec += f"%{int(parallel)}"
+        body = "\n".join([
+            f"TABLE={shlex.quote(table_path)}",
+            'IFS=$\'\\t\' read -r task_id run_id run_dir workdir params < <(awk -F\'\\t\' -v t="$SLURM_ARRAY_TASK_ID" \'$1 == t\' "$TABLE")',
+            'if [ -z "$run_dir" ]; then echo "No row for array task $SLURM_ARRAY_TASK_ID in $TABLE" >&2; exit 1; fi',
+            'cd "$workdir" || exit 1',
+            'export WANDB_DIR="$run_dir/wandb_data"',
+            'export WANDB_RUN_ID="$run_id"',
+            'mkdir -p "$WANDB_DIR"',
+            'bash "$run_dir/command.txt" >> "$run_dir/run.log" 2>&1',
+            "rc=$?",
+            'echo $rc > "$run_dir/job.done"',
+            "exit $rc",
+        ])
+        script = self.render_batch_script(
+            job_name=f"ra-sweep-{sweep_id[:8]}",
+            run_dir=sweep_dir,
+            workdir=sweep.get("workdir") or config.WORKDIR,
+            body=body,
+            options=[f"--array={array_spec}", *self.sbatch_options(self._runs[run_ids[0]])],
+            output=os.path.join(sweep_dir, "slurm-%A_%a.out"),
+        )
+        with open(script_path, "w") as f:
+            f.write(script)
+
+        array_job_id = self.submit_script(script_path)
+        logger.info(f"Submitted sweep {sweep_id} as Slurm array {array_job_id} ({len(run_ids)} tasks)")
+        now = time.time()
+        for task_id, run_id in enumerate(run_ids):
+            run_data = self._runs[run_id]
+            run_data["executor"] = self.name
+            run_data["status"] = "launching"
+            run_data["monitor"] = "server"
+            run_data["tmux_window"] = None
+            run_data["run_dir"] = os.path.join(config.DATA_DIR, "runs", run_id)
+            run_data["slurm_job_id"] = f"{array_job_id}_{task_id}"
+            run_data["slurm_array_job_id"] = array_job_id
+            run_data["slurm_array_task_id"] = task_id
+            run_data["slurm_state"] = "PENDING"
+            run_data["launched_at"] = now
+        sweep.setdefault("slurm_arrays", []).append({
+            "job_id": array_job_id,
+            "table": table_path,
+            "run_ids": list(run_ids),
+            "parallel": parallel,
+            "submitted_at": now,
+        })
+        self.ensure_polling()
+        return array_job_id
+
+    # ------------------------------------------------------------------
+    # Batched status polling
+    # ------------------------------------------------------------------
+
+    def tracked_jobs(self) -> dict[str, str]:
+        """Slurm job id -> run id for every active Slurm run."""
+        tracked = {}
+        for run_id, run in self._runs.items():
+            if run.get("executor") == self.name and run.get("status") in RUN_STATUS_ACTIVE and run.get("slurm_job_id"):
+                tracked[str(run["slurm_job_id"])] = run_id
+        return tracked
+
+    def _sacct_args(self, job_ids: list[str], since: Optional[float]) -> list[str]:
+        args = [self._bin("sacct"), "--json", f"--jobs={','.join(job_ids)}"]
+        if since:
+            args.append(f"--starttime={datetime.fromtimestamp(since).strftime('%Y-%m-%dT%H:%M:%S')}")
+        return args
+
+    def query_states(self, job_ids: list[str], since: Optional[float] = None) -> dict[str, dict]:
+        """Current state of each job id, using as few Slurm calls as possible.
+
+        Plain jobs: one squeue call for all of them, then one sacct call for
+        the ones that have left the queue.  Array tasks (``<array>_<task>``):
+        one sacct call over their parent arrays, which lists every task.
+
+        A job whose lookup failed maps to ``{"state": None}`` so a controller
+        outage is not mistaken for a vanished job.
+        """
+        states: dict[str, dict] = {}
+        plain = [job_id for job_id in job_ids if "_" not in job_id]
+        tasks = [job_id for job_id in job_ids if "_" in job_id]
+
+        if plain:
+            try:
+                data = self._run_json([self._bin("squeue"), "--json", f"--jobs={','.join(plain)}"])
+                for job in data.get("jobs", []):
+                    states[slurm_job_key(job)] = {
+                        "state": slurm_job_state(job),
+                        "exit_code": slurm_exit_code(job),
+                    }
+            except Exception as e:
+                # squeue rejects the whole call if any id has aged out; sacct covers it.
+                logger.debug("squeue poll failed, falling back to sacct: %s", e)
+
+            unresolved = [
+                job_id for job_id in plain
+                if job_id not in states or SLURM_STATE_TO_RUN_STATUS.get(states[job_id]["state"]) not in RUN_STATUS_ACTIVE
+            ]
+            if unresolved:
+                try:
+                    data = self._run_json(self._sacct_args(unresolved, since))
+                    for job in data.get("jobs", []):
+                        key = slurm_job_key(job)
+                        if key in unresolved:
+                            states[key] = {"state": slurm_job_state(job), "exit_code": slurm_exit_code(job)}
+                except Exception as e:
+                    logger.warning("sacct poll failed: %s", e)
+                    for job_id in unresolved:
+                        states.setdefault(job_id, {"state": None, "exit_code": None})
+
+        if tasks:
+            arrays = sorted({job_id.split("_", 1)[0] for job_id in tasks})
+            try:
+                data = self._run_json(self._sacct_args(arrays, since))
+            except Exception as e:
+                logger.warning("sacct poll for job arrays failed: %s", e)
+                data = None
+            if data is None:
+                for job_id in tasks:
+                    states[job_id] = {"state": None, "exit_code": None}
+            else:
+                for job in data.get("jobs", []):
+                    states[slurm_job_key(job)] = {"state": slurm_job_state(job), "exit_code": slurm_exit_code(job)}
+                for job_id in tasks:
+                    # Tasks that have not been scheduled yet are folded into one
+                    # record keyed by the bare array id.
+                    parent = states.get(job_id.split("_", 1)[0])
+                    if job_id not in states and parent is not None:
+                        states[job_id] = parent
+        return states
+
+    def _report(self, run_id: str, status: str, **fields: Any) -> None:
+        if self._report_status is None:
+            return
+        try:
+            self._report_status(run_id, status, **fields)
+        except Exception as e:
+            logger.error("Failed to record %s status for run %s: %s", status, run_id, e)
+
+    def apply_states(self, tracked: dict[str, str], states: dict[str, dict]) -> dict[str, str]:
+        """Report run status changes; returns run_id -> new status for changed runs."""
+        changed: dict[str, str] = {}
+        for job_id, run_id in tracked.items():
+            run = self._runs.get(run_id)
+            if run is None or run.get("status") not in RUN_STATUS_ACTIVE:
+                continue
+            info = states.get(job_id)
+            if info is not None and info["state"] is None:
+                continue
+            if info is None:
+                self._missing[job_id] = self._missing.get(job_id, 0) + 1
+                if self._missing[job_id] >= MISSING_JOB_POLLS:
+                    self._missing.pop(job_id, None)
+                    self._report(run_id, "failed", error=f"Slurm job {job_id} is no longer known to squeue/sacct")
+                    changed[run_id] = "failed"
+                continue
+            self._missing.pop(job_id, None)
+
+            slurm_state = info["state"]
+            run["slurm_state"] = slurm_state
+            next_status = SLURM_STATE_TO_RUN_STATUS.get(slurm_state, "failed")
+            if next_status == run.get("status"):
+                continue
+            if next_status == "running":
+                self._report(run_id, "running")
+            elif next_status == "finished":
+                self._report(run_id, "finished", exit_code=0)
+            elif next_status == "stopped":
+                self._report(run_id, "stopped", error="Cancelled in Slurm")
+            elif next_status == "failed":
+                exit_code = info.get("exit_code")
+                self._report(
+                    run_id,
+                    "failed",
+                    exit_code=exit_code if exit_code not in (None, 0) else None,
+                    error=SLURM_FAILURE_REASONS.get(slurm_state, f"Slurm job ended in state {slurm_state}"),
+                )
+            else:
+                continue
+            changed[run_id] = next_status
+        return changed
+
+    def _oldest_launch(self, tracked: dict[str, str]) -> Optional[float]:
+        launched = [
+            self._runs[run_id].get("launched_at") for run_id in tracked.values()
+            if isinstance(self._runs.get(run_id, {}).get("launched_at"), (int, float))
+        ]
+        return min(launched) if launched else None
+
+    def poll(self) -> dict[str, str]:
+        """Synchronous poll of every active Slurm run."""
+        tracked = self.tracked_jobs()
+        if not tracked:
+            return {}
+        states = self.query_states(list(tracked), since=self._oldest_launch(tracked))
+        return self.apply_states(tracked, states)
+
+    async def poll_async(self) -> dict[str, str]:
+        tracked = self.tracked_jobs()
+        if not tracked:
+            return {}
+        states = await asyncio.to_thread(self.query_states, list(tracked), self._oldest_launch(tracked))
+        return self.apply_states(tracked, states)
+
+    def ensure_polling(self) -> None:
+        """Start the poll loop if there are Slurm runs to watch and a loop to run on."""
+        if self._poll_task is not None and not self._poll_task.done():
+            return
+        if not self.tracked_jobs():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._poll_task = loop.create_task(self._poll_loop())
+
+    async def _poll_loop(self) -> None:
+        while self.tracked_jobs():
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self.poll_async()
+            except Exception as e:
+                logger.warning("Slurm poll failed: %s", e)
@@ -0,0 +1,482 @@
+"""
+Research Agent Server — Run Directory Disk Accounting and GC
+
+Every run keeps its logs, W&B data, metrics and artifacts under
+``DATA_DIR/runs/<id>/`` forever, and archiving a run frees nothing.
+``StorageManager`` does two things from a background task, with the
+filesystem work in a worker thread and run records only touched on the
+event loop:
+
+- Accounting: each run's directory is measured (allocated bytes, each inode
+  counted once, symlinks not followed) and the result is kept on the run as
+  ``disk_usage`` — with a per-component breakdown — and summed per sweep.
+  Active runs are re-measured at most every ``active_interval_seconds``;
+  ended runs every ``interval_seconds`` during their first hour (while logs
+  get compressed and artifacts deduplicated), then only after a change.
+- GC: opt-in policies turn into a plan of paths to delete.  ``plan()`` is
+  a dry run; ``apply()`` deletes file by file through a token bucket so a
+  large cleanup cannot saturate the disk.
+
+Policies (all off by default):
+
+- ``keep_last_per_sweep``: only the newest N ended runs of each sweep keep
+  their outputs; older ones are reduced to their metrics and command.
+- ``prune_wandb``: ``*.wandb`` binaries of ended runs whose W&B history was
+  fully ingested into ``agent_metrics.jsonl`` (checked against the W&B
+  run's last step, or its history row count).
+- ``prune_archived_failed``: the ``artifacts/`` of archived failed runs
+  (symlinked checkpoints are unlinked, never followed).
+"""
+
+import asyncio
+import json
+import logging
+import os
+import stat
+import time
+from typing import Any, Callable, Optional
+
+from core import config
+from runs.artifact_manifest import ARTIFACTS_DIR
+from runs.rate_limit import TokenBucket
+
+logger = logging.getLogger("research-agent-server")
+
+_TERMINAL = ("finished", "failed", "stopped")
+METRICS_FILE = "agent_metrics.jsonl"
+TERMINAL_SETTLE_SECONDS = 3600.0
+# What a run pruned by keep_last_per_sweep keeps: enough to chart and rerun it.
+KEEP_FILES = (METRICS_FILE, "command.txt")
+_COMPONENTS = {
+    "run.log": "logs", "run.log.zf": "logs", "run.log.lidx": "logs",
+    "sidecar.log": "logs", "sidecar.log.zf": "logs", "sidecar.log.lidx": "logs",
+    "run.raw.log.gz": "logs", "wandb_data": "wandb", ARTIFACTS_DIR: "artifacts",
+    METRICS_FILE: "metrics",
+}
+
+
+def measure(path: str, seen: Optional[set] = None) -> dict:
+    """Allocated bytes and file count under ``path``; hardlinks count once per ``seen``."""
+    seen = set() if seen is None else seen
+    total, files = 0, 0
+    stack = [path]
+    while stack:
+        current = stack.pop()
+        try:
+            st = os.lstat(current)
+        except OSError:
+            continue
+        if stat.S_ISDIR(st.st_mode):
+            try:
+                stack.extend(os.path.join(current, name) for name in os.listdir(current))
+            except OSError:
+                pass
+            continue
+        if st.st_nlink > 1:
+            if (st.st_dev, st.st_ino) in seen:
+                continue
+            seen.add((st.st_dev, st.st_ino))
+        total += st.st_blocks * 512
+        files += 1
+    return {"bytes": total, "files": files}
+
+
+def measure_run(run_dir: str) -> dict:
+    """``measure`` of a run directory plus a logs/wandb/artifacts/metrics/other breakdown."""
+    seen: set = set()
+    breakdown = {"logs": 0, "wandb": 0, "artifacts": 0, "metrics": 0, "other": 0}
+    total, files = 0, 0
+    try:
+        names = os.listdir(run_dir)
+    except OSError:
+        names = []
+    for name in names:
+        usage = measure(os.path.join(run_dir, name), seen)
+        breakdown[_COMPONENTS.get(name, "other")] += usage["bytes"]
+        total += usage["bytes"]
+        files += usage["files"]
+    return {"bytes": total, "files": files, "breakdown": breakdown}
+
+
+class StorageManager:
+    """Keeps ``disk_usage`` on runs and sweeps current and applies GC policies."""
+
+    def __init__(
+        self,
+        runs: dict,
+        sweeps: dict,
+        runs_root: Optional[str] = None,
+        accounting_enabled: bool = True,
+        gc_enabled: bool = False,
+        keep_last_per_sweep: int = 0,
+        prune_wandb: bool = False,
+        prune_archived_failed: bool = False,
+        min_age_seconds: float = 3600.0,
+        files_per_second: float = 200.0,
+        active_interval_seconds: float = 60.0,
+        interval_seconds: float = 600.0,
+        save_fn: Optional[Callable[[], Any]] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Any] = time.sleep,
+    ) -> None:
+        self._runs = runs
+        self._sweeps = sweeps
+        self._runs_root = runs_root
+        self.accounting_enabled = accounting_enabled
+        self.gc_enabled = gc_enabled
+        self.keep_last_per_sweep = keep_last_per_sweep
+        self.prune_wandb = prune_wandb
+        self.prune_archived_failed = prune_archived_failed
+        self.min_age_seconds = min_age_seconds
+        self.files_per_second = files_per_second
+        self.active_interval_seconds = active_interval_seconds
+        self.interval_seconds = interval_seconds
+        self._save_fn = save_fn
+        self._clock = clock
+        self._sleep = sleep
+        self.stats = {"measured": 0, "deleted_files": 0, "freed_bytes": 0, "errors": 0}
+        self.last_report: Optional[dict] = None
+        self._last_gc = float("-inf")
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def runs_root(self) -> str:
+        return self._runs_root or os.path.join(config.DATA_DIR, "runs")
+
+    def _owned(self, run_dir: Optional[str]) -> bool:
+        """Only directories the server created under ``runs_root`` are ever pruned."""
+        if not run_dir:
+            return False
+        root = os.path.realpath(self.runs_root) + os.sep
+        return os.path.realpath(run_dir).startswith(root)
+
+    # -- accounting ---------------------------------------------------------
+
+    def update_usage(self, now: Optional[float] = None) -> int:
+        """Measure runs whose usage is missing or stale, then re-sum sweeps; returns runs measured."""
+        now = time.time() if now is None else now
+        return self._record_usage(self._measure(self._stale(now)), now)
+
+    async def update_usage_async(self, now: Optional[float] = None) -> int:
+        """``update_usage`` with only the measuring done in a worker thread."""
+        now = time.time() if now is None else now
+        usages = await asyncio.to_thread(self._measure, self._stale(now))
+        return self._record_usage(usages, now)
+
+    def _stale(self, now: float) -> list[tuple[str, str]]:
+        """``(run_id, run_dir)`` for runs whose usage is missing or out of date."""
+        stale = []
+        for run_id, run in list(self._runs.items()):
+            run_dir = run.get("run_dir")
+            if not run_dir:
+                continue
+            usage = run.get("disk_usage") or {}
+            measured_at = usage.get("measured_at") or 0
+            if run.get("status") in _TERMINAL:
+                # Compaction and dedup still shrink a run for a while after it ends.
+                changed_at = max(
+                    run.get("ended_at") or 0,
+                    (run.get("storage_gc") or {}).get("at", 0),
+                    run.get("artifacts_deduped_at") or 0,
+                )
+                if measured_at >= changed_at and (
+                    measured_at - changed_at >= TERMINAL_SETTLE_SECONDS or now - measured_at < self.interval_seconds
+                ):
+                    continue
+            elif run.get("status") != "running" or now - measured_at < self.active_interval_seconds:
+                continue
+            stale.append((run_id, run_dir))
+        return stale
+
+    @staticmethod
+    def _measure(stale: list[tuple[str, str]]) -> dict[str, dict]:
+        """Filesystem half of accounting; touches no run records."""
+        return {run_id: measure_run(run_dir) for run_id, run_dir in stale}
+
+    def _record_usage(self, usages: dict[str, dict], now: float) -> int:
+        for run_id, usage in usages.items():
+            run = self._runs.get(run_id)
+            if run is not None:
+                run["disk_usage"] = {**usage, "measured_at": now}
+        self.stats["measured"] += len(usages)
+        self._sum_sweeps()
+        return len(usages)
+
+    def _sum_sweeps(self) -> None:
+        for sweep in self._sweeps.values():
+            total, counted = 0, 0
+            for run_id in sweep.get("run_ids") or []:
+                usage = (self._runs.get(run_id) or {}).get("disk_usage")
+                if usage:
+                    total += usage["bytes"]
+                    counted += 1
+            sweep["disk_usage"] = {"bytes": total, "runs": counted}
+
+    # -- GC -----------------------------------------------------------------
+
+    def _settled(self, run: dict, now: float) -> bool:
+        ended_at = run.get("ended_at")
+        return (
+            run.get("status") in _TERMINAL and bool(ended_at)
+            and now - ended_at >= self.min_age_seconds and self._owned(run.get("run_dir"))
+        )
+
+    def _superseded(self, now: float) -> set[str]:
+        """Run ids beyond the newest ``keep_last_per_sweep`` ended runs of their sweep."""
+        if self.keep_last_per_sweep <= 0:
+            return set()
+        by_sweep: dict[str, list[tuple[float, str]]] = {}
+        for run_id, run in self._runs.items():
+            if run.get("sweep_id") and run.get("status") in _TERMINAL:
+                by_sweep.setdefault(run["sweep_id"], []).append((run.get("created_at") or 0, run_id))
+        superseded = set()
+        for members in by_sweep.values():
+            members.sort(reverse=True)
+            superseded.update(run_id for _, run_id in members[self.keep_last_per_sweep:])
+        return {run_id for run_id in superseded if self._settled(self._runs[run_id], now)}
+
+    def plan(self, now: Optional[float] = None) -> list[dict]:
+        """Paths each enabled policy would delete, with their size; nothing is touched."""
+        now = time.time() if now is None else now
+        superseded = self._superseded(now)
+        actions = []
+        for run_id, run in list(self._runs.items()):
+            if not self._settled(run, now):
+                continue
+            run_dir = run["run_dir"]
+            if run_id in superseded:
+                paths = [os.path.join(run_dir, name) for name in _listdir(run_dir) if name not in KEEP_FILES]
+                actions.append({"run_id": run_id, "policy": "keep_last_per_sweep", "paths": paths})
+                continue
+            if self.prune_wandb:
+                paths = _ingested_wandb_binaries(run_dir)
+                actions.append({"run_id": run_id, "policy": "prune_wandb", "paths": paths})
+            if self.prune_archived_failed and run.get("is_archived") and run.get("status") == "failed":
+                artifacts = os.path.join(run_dir, ARTIFACTS_DIR)
+                paths = [os.path.join(artifacts, name) for name in _listdir(artifacts)]
+                actions.append({"run_id": run_id, "policy": "prune_archived_failed", "paths": paths})
+        actions = [action for action in actions if action["paths"]]
+        for action in actions:
+            seen: set = set()
+            action["bytes"] = sum(measure(path, seen)["bytes"] for path in action["paths"])
+        return actions
+
+    def _remove(self, path: str, bucket: TokenBucket) -> int:
+        """Delete ``path`` (a file, link or tree, links never followed) one file per token."""
+        try:
+            st = os.lstat(path)
+        except FileNotFoundError:
+            return 0
+        deleted = 0
+        if stat.S_ISDIR(st.st_mode):
+            for name in _listdir(path):
+                deleted += self._remove(os.path.join(path, name), bucket)
+            os.rmdir(path)
+            return deleted
+        while not bucket.take(1):
+            self._sleep(1.0 / bucket.rate)
+        os.unlink(path)
+        return 1
+
+    def apply(self, actions: list[dict], now: Optional[float] = None) -> dict:
+        """Carry out ``plan()`` output; returns the files deleted and bytes freed."""
+        now = time.time() if now is None else now
+        return self._record_gc(self._delete(self._targets(actions, now)), now)
+
+    def _targets(self, actions: list[dict], now: float) -> list[tuple[dict, str]]:
+        """Actions whose run is still settled, with its run directory."""
+        targets = []
+        for action in actions:
+            run = self._runs.get(action["run_id"])
+            if run is None or not self._settled(run, now):
+                continue  # relaunched or removed since the plan was made
+            targets.append((action, run["run_dir"]))
+        return targets
+
+    def _delete(self, targets: list[tuple[dict, str]]) -> list[dict]:
+        """Filesystem half of ``apply``; touches no run records."""
+        bucket = TokenBucket(self.files_per_second, 1.0, self._clock)
+        results = []
+        for action, run_dir in targets:
+            before = measure_run(run_dir)["bytes"]
+            deleted = 0
+            for path in action["paths"]:
+                try:
+                    deleted += self._remove(path, bucket)
+                except OSError as e:
+                    self.stats["errors"] += 1
+                    logger.warning("Storage GC could not remove %s: %s", path, e)
+            results.append({
+                "run_id": action["run_id"],
+                "policy": action["policy"],
+                "deleted_files": deleted,
+                "freed_bytes": max(0, before - measure_run(run_dir)["bytes"]),
+            })
+        return results
+
+    def _record_gc(self, results: list[dict], now: float) -> dict:
+        deleted, freed = 0, 0
+        for result in results:
+            deleted += result["deleted_files"]
+            freed += result["freed_bytes"]
+            run = self._runs.get(result["run_id"])
+            if run is None:
+                continue
+            record = run.get("storage_gc") or {}
+            run["storage_gc"] = {
+                "at": now,
+                "policies": sorted(set(record.get("policies", [])) | {result["policy"]}),
+                "freed_bytes": record.get("freed_bytes", 0) + result["freed_bytes"],
+            }
+        self.stats["deleted_files"] += deleted
+        self.stats["freed_bytes"] += freed
+        return {"deleted_files": deleted, "freed_bytes": freed}
+
+    @staticmethod
+    def _report(actions: list[dict], dry_run: bool, now: float) -> dict:
+        return {
+            "dry_run": dry_run,
+            "at": now,
+            "actions": actions,
+            "planned_bytes": sum(action["bytes"] for action in actions),
+        }
+
+    def collect(self, dry_run: bool = True, now: Optional[float] = None) -> dict:
+        """Plan, optionally apply, and remember the report for ``summary()``."""
+        now = time.time() if now is None else now
+        actions = self.plan(now)
+        report = self._report(actions, dry_run, now)
+        if not dry_run:
+            report.update(self.apply(actions, now))
+            self.update_usage(now)
+            if actions and self._save_fn:
+                self._save_fn()
+        self.last_report = report
+        return report
+
+    async def collect_async(self, dry_run: bool = True) -> dict:
+        """``collect`` for the event loop: planning and deleting run in a worker
+        thread, while run records are updated and saved on the loop."""
+        now = time.time()
+        actions = await asyncio.to_thread(self.plan, now)
+        report = self._report(actions, dry_run, now)
+        if not dry_run:
+            results = await asyncio.to_thread(self._delete, self._targets(actions, now))
+            report.update(self._record_gc(results, now))
+            await self.update_usage_async(now)
+            if actions and self._save_fn:
+                self._save_fn()
+        self.last_report = report
+        return report
+
+    def summary(self) -> dict:
+        runs = [run.get("disk_usage") for run in self._runs.values()]
+        return {
+            "runs_root": self.runs_root,
+            "total_bytes": sum(usage["bytes"] for usage in runs if usage),
+            "measured_runs": sum(1 for usage in runs if usage),
+            "policies": {
+                "keep_last_per_sweep": self.keep_last_per_sweep,
+                "prune_wandb": self.prune_wandb,
+                "prune_archived_failed": self.prune_archived_failed,
+                "min_age_seconds": self.min_age_seconds,
+            },
+            "gc_enabled": self.gc_enabled,
+            **self.stats,
+            "last_report": self.last_report,
+        }
+
+    async def run_pass(self) -> None:
+        if self.accounting_enabled:
+            measured = await self.update_usage_async()
+            if measured and self._save_fn:
+                self._save_fn()
+        if self.gc_enabled and self._clock() - self._last_gc >= self.interval_seconds:
+            self._last_gc = self._clock()
+            await self.collect_async(dry_run=False)
+
+    def ensure_running(self) -> None:
+        if not (self.accounting_enabled or self.gc_enabled) or (self._task is not None and not self._task.done()):
+            return
+        try:
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+        except RuntimeError:
+            pass
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self.run_pass()
+            except Exception as e:
+                logger.error("Storage pass failed: %s", e)
+            await asyncio.sleep(min(self.active_interval_seconds, self.interval_seconds))
+
+
+def _listdir(path: str) -> list[str]:
+    try:
+        return sorted(os.listdir(path))
+    except OSError:
+        return []
+
+
+def _ingested_wandb_binaries(run_dir: str) -> list[str]:
+    """``*.wandb`` binaries whose W&B run is fully in ``agent_metrics.jsonl``.
+
+    A W&B run counts as ingested when the ingested rows reach the ``_step``
+    in its ``wandb-summary.json`` or, without one, when there are at least as
+    many rows as its history JSONL has.  Runs that cannot be checked are kept.
+    """
+    binaries = _wandb_binaries(os.path.join(run_dir, "wandb_data"))
+    if not binaries:
+        return []
+    rows, last_step = _ingested_metrics(run_dir)
+    if not rows:
+        return []
+    return [path for path in binaries if _wandb_run_ingested(os.path.dirname(path), rows, last_step)]
+
+
+def _ingested_metrics(run_dir: str) -> tuple[int, Optional[float]]:
+    """Row count and highest step in the run's ``agent_metrics.jsonl``."""
+    rows, last_step = 0, None
+    try:
+        with open(os.path.join(run_dir, METRICS_FILE)) as f:
+            for line in f:
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    continue
+                if not isinstance(row, dict):
+                    continue
+                rows += 1
+                step = row.get("_step", row.get("step"))
+                if isinstance(step, (int, float)) and (last_step is None or step > last_step):
+                    last_step = step
+    except OSError:
+        pass
+    return rows, last_step
+
+
+def _wandb_run_ingested(wandb_run_dir: str, rows: int, last_step: Optional[float]) -> bool:
+    for name in ("files/wandb-summary.json", "wandb-summary.json"):
+        try:
+            with open(os.path.join(wandb_run_dir, name)) as f:
+                summary_step = json.load(f).get("_step")
+        except (OSError, ValueError, AttributeError):
+            continue
+        if isinstance(summary_step, (int, float)):
+            return last_step is not None and last_step >= summary_step
+    for name in ("metrics.jsonl", "files/metrics.jsonl", "wandb-history.jsonl", "files/wandb-history.jsonl"):
+        try:
+            with open(os.path.join(wandb_run_dir, name)) as f:
+                history_rows = sum(1 for line in f if line.strip())
+        except OSError:
+            continue
+        return rows >= history_rows
+    return False
+
+
+def _wandb_binaries(wandb_data: str) -> list[str]:
+    found = []
+    for directory, _, files in os.walk(wandb_data):
+        found.extend(os.path.join(directory, name) for name in files if name.endswith(".wandb"))
+    return sorted(found)
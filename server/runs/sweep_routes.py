@@ -16,6 +16,13 @@ from pydantic import BaseModel
 
 from core import config
 from core.models import SweepCreate, SweepUpdate, RunCreate
+from runs.helpers import (
+    _validated_anomaly_detectors,
+    _validated_dependencies,
+    _validated_dependency_condition,
+    _validated_executor,
+    _validated_priority_class,
+)
 
 logger = logging.getLogger("research-agent-server")
 router = APIRouter()
@@ -32,8 +39,9 @@ _normalize_sweep_status = None
 _ensure_sweep_creation_context = None
 _derive_sweep_creation_context = None
 _normalize_gpuwrap_config = None
-_launch_run_in_tmux = None
 _RUN_STATUS_ACTIVE = None
+_launch_queue = None
+_run_executors = None
 
 
 def init(
@@ -46,15 +54,16 @@ def init(
     ensure_sweep_creation_context_fn,
     derive_sweep_creation_context_fn,
     normalize_gpuwrap_config_fn,
-    launch_run_in_tmux_fn,
     run_status_active_set,
+    launch_queue=None,
+    run_executors=None,
 ):
     """Wire in all shared state and helper functions from server.py."""
     global _sweeps, _runs, _save_runs_state
     global _recompute_sweep_state, _recompute_all_sweep_states
     global _normalize_sweep_status, _ensure_sweep_creation_context
     global _derive_sweep_creation_context, _normalize_gpuwrap_config
-    global _launch_run_in_tmux, _RUN_STATUS_ACTIVE
+    global _RUN_STATUS_ACTIVE, _launch_queue, _run_executors
     _sweeps = sweeps_dict
     _runs = runs_dict
     _save_runs_state = save_runs_state_fn
@@ -64,8 +73,9 @@ def init(
     _ensure_sweep_creation_context = ensure_sweep_creation_context_fn
     _derive_sweep_creation_context = derive_sweep_creation_context_fn
     _normalize_gpuwrap_config = normalize_gpuwrap_config_fn
-    _launch_run_in_tmux = launch_run_in_tmux_fn
     _RUN_STATUS_ACTIVE = run_status_active_set
+    _launch_queue = launch_queue
+    _run_executors = run_executors
 
 
 # ---------------------------------------------------------------------------
@@ -86,6 +96,45 @@ def build_command_with_params(base_command: str, params: dict) -> str:
     return f"{base_command} {param_str}".strip()
 
 
+def _submit_slurm_array(sweep_id: str, parallel: Optional[int]) -> Optional[dict]:
+    """Submit a sweep's queued Slurm runs as one job array.
+
+    Only members whose own executor (else the sweep's, else the server
+    default) is ``slurm`` go into the array; the rest are left queued for the
+    launch queue, which the caller dispatches afterwards.  Returns None when
+    no queued member runs on Slurm.
+    """
+    sweep = _sweeps[sweep_id]
+    if _run_executors is None:
+        return None
+    slurm = _run_executors.get("slurm")
+    if slurm is None:
+        return None
+
+    default_executor = sweep.get("executor") or config.RUN_EXECUTOR
+    run_ids = [
+        run_id for run_id in sweep.get("run_ids", [])
+        if (_runs.get(run_id) or {}).get("status") == "queued" and not _runs[run_id].get("is_archived")
+        and (_runs[run_id].get("executor") or default_executor) == "slurm"
+    ]
+    if not run_ids:
+        return None
+    try:
+        job_id = slurm.submit_array(sweep_id, sweep, run_ids, parallel)
+    except Exception as e:
+        logger.error(f"Failed to submit sweep {sweep_id} as a Slurm array: {e}")
+        for run_id in run_ids:
+            _runs[run_id]["status"] = "ready"
+            _runs[run_id]["queued_at"] = None
+        _recompute_sweep_state(sweep_id)
+        _save_runs_state()
+        raise HTTPException(status_code=500, detail=f"Failed to submit Slurm job array: {e}")
+
+    _recompute_sweep_state(sweep_id)
+    _save_runs_state()
+    return {"job_id": job_id, "run_ids": run_ids}
+
+
 # ---------------------------------------------------------------------------
 # Request models
 # ---------------------------------------------------------------------------
@@ -177,6 +226,10 @@ async def create_sweep(req: SweepCreate):
 
     if requested_status not in {"draft", "pending", "running"}:
         raise HTTPException(status_code=400, detail=f"Unsupported sweep status: {requested_status}")
+    priority_class = _validated_priority_class(req.priority_class)
+    executor = _validated_executor(req.executor, _run_executors)
+    slurm_options = req.slurm.model_dump(exclude_none=True) if req.slurm else None
+    anomaly_detectors = _validated_anomaly_detectors(req.anomaly_detectors)
 
     created_at = time.time()
     creation_context = _derive_sweep_creation_context(
@@ -204,6 +257,11 @@ async def create_sweep(req: SweepCreate):
             "ui_config": req.ui_config,
             "chat_session_id": req.chat_session_id,
             "creation_context": creation_context,
+            "priority_class": priority_class,
+            "share_weight": req.share_weight,
+            "executor": executor,
+            "slurm": slurm_options,
+            "anomaly_detectors": anomaly_detectors,
             "progress": {
                 "total": 0,
                 "completed": 0,
@@ -235,10 +293,13 @@ async def create_sweep(req: SweepCreate):
             "workdir": req.workdir or config.WORKDIR,
             "status": "queued" if requested_status == "running" else "ready",
             "created_at": time.time(),
+            "queued_at": created_at if requested_status == "running" else None,
             "is_archived": False,
             "sweep_id": sweep_id,
             "sweep_params": params,
             "chat_session_id": req.chat_session_id,
+            "executor": executor,
+            "slurm": slurm_options,
             "tmux_window": None,
             "run_dir": None,
             "exit_code": None,
@@ -263,6 +324,11 @@ async def create_sweep(req: SweepCreate):
         "ui_config": req.ui_config,
         "chat_session_id": req.chat_session_id,
         "creation_context": creation_context,
+        "priority_class": priority_class,
+        "share_weight": req.share_weight,
+        "executor": executor,
+        "slurm": slurm_options,
+        "anomaly_detectors": anomaly_detectors,
         "progress": {
             "total": len(run_ids),
             "completed": 0,
@@ -280,6 +346,9 @@ async def create_sweep(req: SweepCreate):
     _save_runs_state()
 
     logger.info(f"Created sweep {sweep_id}: {req.name} with {len(run_ids)} runs (status={requested_status})")
+    if requested_status == "running":
+        _submit_slurm_array(sweep_id, sweep_data.get("parallel"))
+        _launch_queue.dispatch()
     return {"id": sweep_id, **sweep_data}
 
 
@@ -363,8 +432,17 @@ async def update_sweep(sweep_id: str, req: SweepUpdate):
     if req.max_runs is not None and req.max_runs > 0:
         sweep["max_runs"] = req.max_runs
 
+    if req.priority_class is not None:
+        sweep["priority_class"] = _validated_priority_class(req.priority_class)
+    if req.share_weight is not None:
+        sweep["share_weight"] = req.share_weight
+    if req.anomaly_detectors is not None:
+        sweep["anomaly_detectors"] = _validated_anomaly_detectors(req.anomaly_detectors)
+
     _recompute_sweep_state(sweep_id)
     _save_runs_state()
+    if req.priority_class is not None or req.share_weight is not None:
+        _launch_queue.dispatch()
     return {"id": sweep_id, **sweep}
 
 
@@ -381,36 +459,50 @@ async def get_sweep(sweep_id: str):
 
 
 @router.post("/sweeps/{sweep_id}/start")
-async def start_sweep(sweep_id: str, parallel: int = Query(1, description="Max parallel runs")):
-    """Start all ready/queued runs in a sweep."""
+async def start_sweep(sweep_id: str, parallel: int = Query(1, ge=1, description="Max parallel runs")):
+    """Queue all ready runs in a sweep; the launch queue keeps at most ``parallel`` active."""
     if sweep_id not in _sweeps:
         raise HTTPException(status_code=404, detail="Sweep not found")
 
     sweep = _sweeps[sweep_id]
     if _normalize_sweep_status(sweep.get("status")) == "draft":
         raise HTTPException(status_code=400, detail="Draft sweep has no runnable jobs yet")
-    started = 0
-    attempted = 0
+    sweep["parallel"] = parallel
+    queued = 0
+    now = time.time()
 
     for run_id in sweep.get("run_ids", []):
-        if run_id in _runs:
-            run = _runs[run_id]
-            if run["status"] in ["ready", "queued"] and started < parallel:
-                attempted += 1
-                try:
-                    if run["status"] == "ready":
-                        run["status"] = "queued"
-                        run["queued_at"] = time.time()
-
-                    _launch_run_in_tmux(run_id, run)
-                    started += 1
-                except Exception as e:
-                    logger.error(f"Failed to start run {run_id}: {e}")
+        run = _runs.get(run_id)
+        if not run:
+            continue
+        if run["status"] == "ready":
+            run["status"] = "queued"
+            run["queued_at"] = now
+        if run["status"] == "queued":
+            queued += 1
 
     _recompute_sweep_state(sweep_id)
     _save_runs_state()
-
-    return {"message": f"Started {started}/{attempted} runs", "sweep_id": sweep_id}
+    array = _submit_slurm_array(sweep_id, parallel)
+    submitted = len(array["run_ids"]) if array else 0
+
+    result = _launch_queue.dispatch()
+    started = sum(1 for run_id in result["launched"] if _runs.get(run_id, {}).get("sweep_id") == sweep_id)
+    for run_id, error in result["failed"].items():
+        if _runs.get(run_id, {}).get("sweep_id") == sweep_id:
+            logger.error(f"Failed to start run {run_id}: {error}")
+
+    if array is not None:
+        message = f"Submitted {submitted} runs as Slurm array {array['job_id']}"
+        if queued > submitted:
+            message += f"; started {started}/{queued - submitted} other runs"
+        return {
+            "message": message,
+            "sweep_id": sweep_id,
+            "queued": queued - submitted - started,
+            "slurm_job_id": array["job_id"],
+        }
+    return {"message": f"Started {started}/{queued} runs", "sweep_id": sweep_id, "queued": queued - started}
 
 
 @router.post("/sweeps/{sweep_id}/runs")
@@ -424,19 +516,28 @@ async def add_run_to_sweep_directly(sweep_id: str, req: RunCreate):
     run_id = uuid.uuid4().hex[:12]
     initial_status = "queued" if req.auto_start else "ready"
     gpuwrap_config = _normalize_gpuwrap_config(req.gpuwrap_config)
+    depends_on = _validated_dependencies(_runs, run_id, req.depends_on)
+    now = time.time()
 
     run_data = {
         "name": req.name,
         "command": req.command,
         "workdir": req.workdir or config.WORKDIR,
         "status": initial_status,
-        "created_at": time.time(),
+        "created_at": now,
+        "queued_at": now if initial_status == "queued" else None,
         "is_archived": False,
         "sweep_id": sweep_id,
         "parent_run_id": req.parent_run_id,
         "origin_alert_id": req.origin_alert_id,
         "gpuwrap_config": gpuwrap_config,
+        "priority_class": _validated_priority_class(req.priority_class),
+        "executor": _validated_executor(req.executor, _run_executors) or _sweeps[sweep_id].get("executor"),
+        "slurm": req.slurm.model_dump(exclude_none=True) if req.slurm else _sweeps[sweep_id].get("slurm"),
         "chat_session_id": req.chat_session_id or _sweeps[sweep_id].get("chat_session_id"),
+        "anomaly_detectors": _validated_anomaly_detectors(req.anomaly_detectors),
+        "depends_on": depends_on,
+        "dependency_condition": _validated_dependency_condition(req.dependency_condition) if depends_on else None,
         "tmux_window": None,
         "run_dir": None,
         "exit_code": None,
@@ -450,6 +551,8 @@ async def add_run_to_sweep_directly(sweep_id: str, req: RunCreate):
     _save_runs_state()
 
     logger.info(f"Created run {run_id} and attached to sweep {sweep_id}: {req.name} (status: {initial_status})")
+    if initial_status == "queued":
+        _launch_queue.dispatch()
     return {"id": run_id, **run_data}
 
 
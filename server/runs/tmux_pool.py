@@ -0,0 +1,257 @@
+"""
+Research Agent Server — Pooled tmux Access
+
+Every libtmux query forks a ``tmux`` client, and the launch path used to
+build a new ``libtmux.Server()``, look the session up, create the window,
+fetch its pane and send the keys one call at a time — five or more forks
+per run.  ``TmuxPool`` keeps one ``Server`` and the agent session (re-checked
+with a single ``has-session`` every ``revalidate_seconds``) and talks to tmux
+in command sequences: ``new-window ; send-keys -l ... ; send-keys Enter``
+is one ``tmux`` invocation.
+
+Inside ``with pool.batch():`` window creation and kills are queued instead
+and flushed on exit, up to ``MAX_BATCH_RUNS`` runs per invocation, so a
+dispatch that launches 100 runs costs a handful of tmux round trips.  tmux
+stops a sequence at the first failing command; the pool then finds out what
+was left undone and retries it run by run, reporting failures through each
+launch's ``on_error`` callback.
+"""
+
+import contextlib
+import logging
+import threading
+import time
+from typing import Callable, Iterator, Optional
+
+import libtmux
+
+from core.config import TMUX_SESSION_NAME
+
+logger = logging.getLogger("research-agent-server")
+
+MAX_BATCH_RUNS = 50
+REVALIDATE_SECONDS = 30.0
+
+
+class TmuxError(RuntimeError):
+    """A tmux command sequence failed."""
+
+
+class _Batch:
+    def __init__(self) -> None:
+        self.launches: list[tuple[str, str, Optional[Callable[[str], None]]]] = []
+        self.kills: list[str] = []
+
+
+class TmuxPool:
+    """Cached tmux server/session plus batched window creation and kills."""
+
+    def __init__(
+        self,
+        session_name: Optional[str] = None,
+        revalidate_seconds: float = REVALIDATE_SECONDS,
+        server_factory: Callable[[], libtmux.Server] = libtmux.Server,
+    ) -> None:
+        self.session_name = session_name or TMUX_SESSION_NAME
+        self.revalidate_seconds = revalidate_seconds
+        self._server_factory = server_factory
+        self._server: Optional[libtmux.Server] = None
+        self._session = None
+        self._checked_at = 0.0
+        self._lock = threading.RLock()
+        self._local = threading.local()
+        self.stats = {"tmux_calls": 0, "batched_launches": 0, "batched_kills": 0, "sessions_created": 0}
+
+    # -- connection ---------------------------------------------------------
+
+    def server(self) -> Optional[libtmux.Server]:
+        with self._lock:
+            if self._server is None:
+                try:
+                    self._server = self._server_factory()
+                except Exception as e:
+                    logger.error(f"Failed to connect to tmux server: {e}")
+                    return None
+            return self._server
+
+    def session(self):
+        """The agent session, created if missing; None when tmux is unavailable."""
+        with self._lock:
+            server = self.server()
+            if server is None:
+                return None
+            now = time.monotonic()
+            if self._session is not None and now - self._checked_at < self.revalidate_seconds:
+                return self._session
+            try:
+                if self._session is not None and not self._cmd("has-session", "-t", self._session.session_id).stderr:
+                    self._checked_at = now
+                    return self._session
+                self.stats["tmux_calls"] += 1
+                session = server.sessions.get(session_name=self.session_name, default=None)
+                if not session:
+                    logger.info(f"Creating new tmux session: {self.session_name}")
+                    session = server.new_session(session_name=self.session_name)
+                    self.stats["sessions_created"] += 1
+            except Exception as e:
+                logger.error(f"Error getting/creating tmux session: {e}")
+                self.invalidate()
+                return None
+            self._session, self._checked_at = session, now
+            return session
+
+    def invalidate(self) -> None:
+        """Forget the cached session (and server) after tmux misbehaved."""
+        with self._lock:
+            self._server = None
+            self._session = None
+            self._checked_at = 0.0
+
+    def _cmd(self, *args: str):
+        self.stats["tmux_calls"] += 1
+        return self._server.cmd(*args)
+
+    def _run(self, sequences: list[list[str]]) -> None:
+        """Run command lists as one ``a ; b ; c`` invocation; raises TmuxError on failure."""
+        args: list[str] = []
+        for sequence in sequences:
+            if args:
+                args.append(";")
+            args.extend(sequence)
+        with self._lock:
+            if self._server is None:
+                raise TmuxError("tmux server not available")
+            result = self._cmd(*args)
+        if result.stderr:
+            raise TmuxError("; ".join(result.stderr))
+
+    @staticmethod
+    def _target(session, window_name: str) -> str:
+        return f"{session.session_id}:={window_name}"
+
+    def _launch_commands(self, session, window_name: str, keys: str) -> list[list[str]]:
+        target = self._target(session, window_name)
+        return [
+            ["new-window", "-d", "-t", f"{session.session_id}:", "-n", window_name],
+            ["send-keys", "-t", target, "-l", keys],
+            ["send-keys", "-t", target, "Enter"],
+        ]
+
+    def window_names(self) -> Optional[set[str]]:
+        session = self.session()
+        if session is None:
+            return None
+        try:
+            with self._lock:
+                result = self._cmd("list-windows", "-t", session.session_id, "-F", "#{window_name}")
+        except Exception as e:
+            logger.debug("Could not list tmux windows: %s", e)
+            self.invalidate()
+            return None
+        if result.stderr:
+            self.invalidate()
+            return None
+        return set(result.stdout)
+
+    # -- windows ------------------------------------------------------------
+
+    def launch(self, window_name: str, keys: str, on_error: Optional[Callable[[str], None]] = None) -> None:
+        """Open ``window_name`` and type ``keys`` + Enter into it.
+
+        Runs immediately (raising on failure) unless a batch is open, in which
+        case failures are reported to ``on_error`` when the batch is flushed.
+        """
+        batch = getattr(self._local, "batch", None)
+        if batch is not None:
+            batch.launches.append((window_name, keys, on_error))
+            return
+        with self._lock:
+            session = self.session()
+            if session is None:
+                raise TmuxError("Tmux session not available. Start tmux first.")
+            try:
+                self._run(self._launch_commands(session, window_name, keys))
+            except Exception:
+                self.invalidate()
+                raise
+
+    def kill(self, window_name: str) -> None:
+        """Kill ``window_name`` if it exists (deferred inside a batch)."""
+        batch = getattr(self._local, "batch", None)
+        if batch is not None:
+            batch.kills.append(window_name)
+            return
+        self._kill_windows([window_name])
+
+    @contextlib.contextmanager
+    def batch(self) -> Iterator[None]:
+        """Queue launches and kills on this thread and flush them on exit; nests."""
+        if getattr(self._local, "batch", None) is not None:
+            yield
+            return
+        batch = self._local.batch = _Batch()
+        try:
+            yield
+        finally:
+            self._local.batch = None
+            self._flush(batch)
+
+    def _flush(self, batch: _Batch) -> None:
+        if batch.kills:
+            self.stats["batched_kills"] += len(batch.kills)
+            self._kill_windows(batch.kills)
+        if not batch.launches:
+            return
+        self.stats["batched_launches"] += len(batch.launches)
+        session = self.session()
+        if session is None:
+            for _, _, on_error in batch.launches:
+                if on_error:
+                    on_error("Tmux session not available. Start tmux first.")
+            return
+        for start in range(0, len(batch.launches), MAX_BATCH_RUNS):
+            chunk = batch.launches[start:start + MAX_BATCH_RUNS]
+            try:
+                self._run([c for name, keys, _ in chunk for c in self._launch_commands(session, name, keys)])
+                continue
+            except Exception as e:
+                logger.warning("Batched tmux launch failed (%s); retrying run by run", e)
+            # The sequence stopped at its first failure: windows that exist were done.
+            done = self.window_names() or set()
+            for name, keys, on_error in chunk:
+                if name in done:
+                    continue
+                try:
+                    self.launch(name, keys)
+                except Exception as e:
+                    logger.warning("Failed to open tmux window %s: %s", name, e)
+                    if on_error:
+                        on_error(str(e))
+
+    def _kill_windows(self, window_names: list[str]) -> None:
+        session = self.session()
+        if session is None:
+            return
+        names = list(dict.fromkeys(window_names))
+        for start in range(0, len(names), MAX_BATCH_RUNS):
+            chunk = names[start:start + MAX_BATCH_RUNS]
+            try:
+                self._run([["kill-window", "-t", self._target(session, name)] for name in chunk])
+                logger.info("Killed tmux windows %s", ", ".join(chunk))
+                continue
+            except Exception:
+                pass  # usually a window that is already gone; the rest were not killed
+            existing = self.window_names() or set()
+            remaining = [name for name in chunk if name in existing]
+            try:
+                if remaining:
+                    self._run([["kill-window", "-t", self._target(session, name)] for name in remaining])
+                    logger.info("Killed tmux windows %s", ", ".join(remaining))
+            except Exception as e:
+                logger.warning("Failed to kill tmux windows %s: %s", ", ".join(remaining), e)
+
+    def summary(self) -> dict:
+        return {"session": self.session_name, "connected": self._session is not None, **self.stats}
+
+
+tmux_pool = TmuxPool()
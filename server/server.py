@@ -18,12 +18,12 @@ import math
 import os
 import re
 import shlex
+import shutil
 import sys
 import time
 import uuid
 import logging
 import asyncio
-import shutil
 import socket
 import subprocess
 from typing import Any, Callable, Dict, Optional, AsyncIterator, List
@@ -32,6 +32,7 @@ from typing import Any, Callable, Dict, Optional, AsyncIterator, List
 from agent.wild_loop_v2 import WildV2Engine
 from memory.store import MemoryStore
 from integrations.slack_handler import slack_notifier
+from integrations.notification_dispatcher import NotificationDispatcher
 
 import httpx
 import uvicorn
@@ -226,11 +227,13 @@ def _get_run_log_content(run_id: str) -> str:
     if not run_dir:
         return "No run directory"
     log_file = os.path.join(run_dir, "run.log")
-    if not os.path.exists(log_file):
+    st = stat_log(log_file)
+    if st is None:
         return "No log file"
     try:
-        with open(log_file, "r") as f:
-            content = f.read()
+        # Read only the tail (up to 4 bytes per character) instead of the whole log.
+        start = max(0, st[1] - 5000 * 4)
+        content = read_range(log_file, start, st[1] - start).decode("utf-8", errors="replace")
         return content[-5000:] if len(content) > 5000 else content
     except Exception as e:
         return f"Error reading log: {e}"
@@ -363,6 +366,7 @@ def load_runs_state():
                     if _ensure_sweep_creation_context(sweep):
                         sweeps_backfilled = True
                 recompute_all_sweep_states()
+                gpu_scheduler.rebuild_from_runs(runs, RUN_STATUS_ACTIVE)
                 if sweeps_backfilled:
                     save_runs_state()
         except Exception as e:
@@ -502,6 +506,8 @@ def _run_response_payload(run_id: str, run: dict) -> dict:
     2. WandB files discovered via wandb_dir or run_dir
     """
     payload = {"id": run_id, **run}
+    if run.get("status") == "queued":
+        payload.update(launch_queue.queue_info(run_id) or {})
 
     # Source 1: stored metrics from sidecar POSTs
     parsed = _load_run_metrics(run.get("run_dir"))
@@ -580,9 +586,160 @@ from runs.helpers import (  # noqa: E402
     _infer_cluster_from_environment,
     _current_run_summary,
     get_tmux_server,
-    get_or_create_session,
     _normalize_gpuwrap_config,
-    launch_run_in_tmux,
+    run_gpus_fit,
+)
+from runs.gpu_scheduler import gpu_scheduler  # noqa: E402
+from runs.launch_queue import LaunchQueue  # noqa: E402
+from runs.executors import ExecutorRegistry, SubprocessExecutor, TmuxExecutor  # noqa: E402
+from runs.slurm_executor import SlurmExecutor  # noqa: E402
+from runs.monitor import RunMonitor  # noqa: E402
+from runs.anomaly import AnomalyEngine  # noqa: E402
+from runs.alert_judge import AlertJudgeService  # noqa: E402
+from runs.alert_groups import AlertAggregator  # noqa: E402
+from runs.log_store import LogCompactor, read_range, stat_log  # noqa: E402
+from runs.blob_store import ArtifactDeduper, BlobStore  # noqa: E402
+from runs.storage import StorageManager  # noqa: E402
+
+
+def _report_run_status(run_id: str, status: str, **fields) -> None:
+    """Status callback for executors that run inside the server process."""
+    run_routes.apply_run_status_update(run_id, RunStatusUpdate(status=status, **fields))
+
+
+run_executors = ExecutorRegistry()
+run_executors.register(TmuxExecutor())
+subprocess_executor = run_executors.register(SubprocessExecutor(report_status=_report_run_status))
+slurm_executor = run_executors.register(SlurmExecutor(runs, report_status=_report_run_status))
+
+anomaly_engine = AnomalyEngine(sweeps, enabled=config.ANOMALY_DETECTION_ENABLED)
+alert_aggregator = AlertAggregator(
+    runs,
+    window_seconds=config.ALERT_GROUP_WINDOW_SECONDS,
+    on_digest=lambda group: run_routes.send_alert_group_digest(group),
+)
+alert_judge_service = AlertJudgeService(
+    runs,
+    on_decision=lambda run_id, decision: run_routes.record_run_alert(
+        run_id, decision["message"], decision["choices"], decision["severity"], source="alert_judge"
+    ),
+    enabled=config.ALERT_JUDGE_ENABLED and shutil.which("opencode") is not None,
+    batch_size=config.ALERT_JUDGE_BATCH_SIZE,
+    max_calls_per_minute=config.ALERT_JUDGE_CALLS_PER_MINUTE,
+    tokens_per_hour=config.ALERT_JUDGE_TOKENS_PER_HOUR,
+)
+
+log_compactor = LogCompactor(
+    runs,
+    enabled=config.LOG_COMPRESSION_ENABLED,
+    min_age_seconds=config.LOG_COMPRESS_AFTER_SECONDS,
+    min_bytes=config.LOG_COMPRESS_MIN_BYTES,
+)
+artifact_deduper = ArtifactDeduper(
+    runs,
+    BlobStore(),
+    enabled=config.ARTIFACT_DEDUP_ENABLED,
+    min_bytes=config.ARTIFACT_DEDUP_MIN_BYTES,
+    save_fn=save_runs_state,
+)
+storage_manager = StorageManager(
+    runs,
+    sweeps,
+    accounting_enabled=config.STORAGE_ACCOUNTING_ENABLED,
+    gc_enabled=config.STORAGE_GC_ENABLED,
+    keep_last_per_sweep=config.STORAGE_KEEP_LAST_PER_SWEEP,
+    prune_wandb=config.STORAGE_PRUNE_WANDB,
+    prune_archived_failed=config.STORAGE_PRUNE_ARCHIVED_FAILED,
+    min_age_seconds=config.STORAGE_GC_MIN_AGE_SECONDS,
+    files_per_second=config.STORAGE_GC_FILES_PER_SECOND,
+    save_fn=save_runs_state,
+)
+
+run_monitor = RunMonitor(
+    runs,
+    report_status=_report_run_status,
+    append_metrics=lambda run_id, rows: run_routes.append_run_metrics(run_id, rows),
+    create_alert=lambda run_id, message, choices, severity: run_routes.record_run_alert(
+        run_id, message, choices, severity
+    ),
+    get_alert=lambda alert_id: active_alerts.get(alert_id),
+    stop_run=run_executors.stop,
+    judge_enabled=shutil.which("opencode") is not None and not config.ALERT_JUDGE_ENABLED,
+    rule_alerts=not config.ANOMALY_DETECTION_ENABLED,
+)
+
+
+def _on_queued_run_launched(run_id: str, run: dict) -> None:
+    run_monitor.ensure_running()
+    _record_journey_event(
+        kind="run_launched",
+        actor="system",
+        session_id=run.get("chat_session_id"),
+        run_id=run_id,
+        note=run.get("name") or run_id,
+        metadata={"tmux_window": run.get("tmux_window")},
+    )
+    if run.get("sweep_id"):
+        recompute_sweep_state(run["sweep_id"])
+
+
+def _on_queued_run_preempted(run_id: str, run: dict, preempted_by: str) -> None:
+    _record_journey_event(
+        kind="run_preempted",
+        actor="system",
+        session_id=run.get("chat_session_id"),
+        run_id=run_id,
+        note=run.get("name") or run_id,
+        metadata={"preempted_by": preempted_by},
+    )
+    if run.get("sweep_id"):
+        recompute_sweep_state(run["sweep_id"])
+
+
+def _on_queued_run_ended(run_id: str, run: dict) -> None:
+    _record_journey_event(
+        kind=f"run_{run['status']}",
+        actor="system",
+        session_id=run.get("chat_session_id"),
+        run_id=run_id,
+        note=run.get("name") or run_id,
+        metadata={"error": run.get("error")},
+    )
+    if run.get("sweep_id"):
+        recompute_sweep_state(run["sweep_id"])
+
+
+def _background_run_tick() -> bool:
+    # Subprocess runs started (and sbatch calls made) before a restart have no
+    # supervisor in this process.
+    changed = subprocess_executor.recover_orphans(runs) > 0
+    changed = slurm_executor.recover_orphans() > 0 or changed
+    changed = _reconcile_all_run_terminal_states() or changed
+    # Picks Slurm polling and server-monitored runs back up after a restart.
+    slurm_executor.ensure_polling()
+    run_monitor.ensure_running()
+    # Groups restored at startup are flushed once the loop is up.
+    alert_aggregator.ensure_running()
+    log_compactor.ensure_running()
+    artifact_deduper.ensure_running()
+    storage_manager.ensure_running()
+    return changed
+
+
+launch_queue = LaunchQueue(
+    runs,
+    sweeps,
+    launch_fn=run_executors.launch,
+    stop_fn=run_executors.stop,
+    save_fn=save_runs_state,
+    on_launched=_on_queued_run_launched,
+    on_preempted=_on_queued_run_preempted,
+    on_cancelled=_on_queued_run_ended,
+    on_failed=_on_queued_run_ended,
+    fits_fn=run_gpus_fit,
+    prepare_fn=run_executors.prepare,
+    slot_fn=run_executors.takes_slot,
+    batch_fn=run_executors.batch,
 )
 
 
@@ -690,7 +847,6 @@ run_routes.init(
     save_runs_state_fn=save_runs_state,
     save_alerts_state_fn=save_alerts_state,
     save_settings_state_fn=save_settings_state,
-    launch_run_in_tmux_fn=launch_run_in_tmux,
     recompute_sweep_state_fn=recompute_sweep_state,
     reconcile_all_run_terminal_states_fn=_reconcile_all_run_terminal_states,
     run_response_payload_fn=_run_response_payload,
@@ -699,12 +855,16 @@ run_routes.init(
     normalize_gpuwrap_config_fn=_normalize_gpuwrap_config,
     coerce_exit_code_fn=_coerce_exit_code,
     slack_notifier=slack_notifier,
-    get_or_create_session_fn=get_or_create_session,
+    run_executors=run_executors,
     run_status_terminal_set=RUN_STATUS_TERMINAL,
     load_run_metrics_fn=_load_run_metrics,
     find_wandb_dir_from_run_dir_fn=_find_wandb_dir_from_run_dir,
     get_wandb_curve_data_fn=_get_wandb_curve_data,
     wandb_metrics_cache_dict=_wandb_metrics_cache,
+    launch_queue=launch_queue,
+    anomaly_engine=anomaly_engine,
+    alert_judge=alert_judge_service,
+    alert_aggregator=alert_aggregator,
 )
 app.include_router(run_routes.router)
 
@@ -719,7 +879,7 @@ app.include_router(run_routes.router)
 # =============================================================================
 
 import agent.wild_routes as wild_routes  # noqa: E402
-wild_routes.init(wild_v2_engine, active_alerts, runs, WildV2Engine)
+wild_routes.init(wild_v2_engine, active_alerts, runs, WildV2Engine, launch_queue)
 app.include_router(wild_routes.router)
 
 
@@ -741,7 +901,9 @@ app.include_router(memory_routes.router)
 # =============================================================================
 
 import integrations.cluster_routes as cluster_routes  # noqa: E402
-cluster_routes.init(cluster_state, save_settings_state, _current_run_summary, _infer_cluster_from_environment)
+cluster_routes.init(
+    cluster_state, save_settings_state, _current_run_summary, _infer_cluster_from_environment, gpu_scheduler,
+)
 app.include_router(cluster_routes.router)
 
 
@@ -752,7 +914,14 @@ app.include_router(cluster_routes.router)
 # =============================================================================
 
 import integrations.slack_routes as slack_routes  # noqa: E402
-slack_routes.init(slack_notifier, save_settings_state)
+# Run status and alert handlers only enqueue; the dispatcher's worker posts.
+notification_dispatcher = NotificationDispatcher(
+    slack_notifier,
+    max_queue=config.SLACK_QUEUE_SIZE,
+    min_interval=config.SLACK_MIN_INTERVAL_SECONDS,
+)
+slack_notifier.attach_dispatcher(notification_dispatcher)
+slack_routes.init(slack_notifier, save_settings_state, notification_dispatcher)
 app.include_router(slack_routes.router)
 
 
@@ -783,8 +952,9 @@ sweep_routes.init(
     ensure_sweep_creation_context_fn=_ensure_sweep_creation_context,
     derive_sweep_creation_context_fn=_derive_sweep_creation_context,
     normalize_gpuwrap_config_fn=_normalize_gpuwrap_config,
-    launch_run_in_tmux_fn=launch_run_in_tmux,
     run_status_active_set=RUN_STATUS_ACTIVE,
+    launch_queue=launch_queue,
+    run_executors=run_executors,
 )
 app.include_router(sweep_routes.router)
 
@@ -796,7 +966,7 @@ app.include_router(sweep_routes.router)
 # =============================================================================
 
 import runs.log_routes as log_routes  # noqa: E402
-log_routes.init(runs)
+log_routes.init(runs, artifact_deduper=artifact_deduper, storage_manager=storage_manager)
 app.include_router(log_routes.router)
 
 
@@ -852,6 +1022,13 @@ def main():
         job_sidecar.main(sidecar_argv)
         return
 
+    if "--run-log-filter" in sys.argv:
+        filter_argv = sys.argv[sys.argv.index("--run-log-filter") + 1 :]
+        import tools.log_filter as log_filter
+
+        log_filter.main(filter_argv)
+        return
+
     parser = argparse.ArgumentParser(description="Research Agent Server")
     parser.add_argument("--workdir", default=os.getcwd(), help="Working directory for runs and data")
     parser.add_argument("--port", type=int, default=10000, help="Server port")
@@ -885,6 +1062,7 @@ def main():
     load_chat_state()
     load_runs_state()
     load_alerts_state()
+    alert_aggregator.restore(active_alerts.values())
     load_plans_state()
     load_journey_state()
     load_settings_state()
@@ -893,6 +1071,7 @@ def main():
         cluster_state.update(_normalize_cluster_state(inferred))
         save_settings_state()
     maybe_mount_frontend_static()
+    launch_queue.enable_background_dispatch(5.0, tick=_background_run_tick)
 
     # Initialize telemetry
     _telemetry_endpoint = os.environ.get("TELEMETRY_ENDPOINT_URL", "")
@@ -175,6 +175,16 @@ class TestSlackNotifierSend(unittest.TestCase):
         notifier.send_alert(alert, run)
         mock_client.chat_postMessage.assert_called_once()
 
+    def test_send_alert_digest(self):
+        notifier, mock_client = self._make_enabled_notifier()
+        group = {"id": "grp-1", "severity": "warning", "message": "loss spiked", "choices": ["Ignore", "Stop Job"]}
+        runs = [{"id": f"r{i}", "name": f"sweep-run-{i}"} for i in range(12)]
+        notifier.send_alert_digest(group, runs, sweep={"id": "s1", "name": "lr-sweep"})
+        mock_client.chat_postMessage.assert_called_once()
+        text = mock_client.chat_postMessage.call_args[1]["text"]
+        self.assertIn("12 runs alerting", text)
+        self.assertIn("+2 more", text)
+
     def test_send_disabled_notify_on_complete(self):
         """When notify_on_complete is False, send_run_completed should not call Slack."""
         notifier, mock_client = self._make_enabled_notifier()
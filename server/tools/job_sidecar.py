@@ -9,13 +9,17 @@ This script is spawned by the server in a tmux window to:
 """
 
 import argparse
+import ctypes
 import glob
 import json
 import logging
 import os
 import re
+import select
 import shlex
+import struct
 import sys
+import threading
 import time
 import math
 import hashlib
@@ -23,6 +27,11 @@ import subprocess
 import requests
 import libtmux
 
+try:
+    from tools.log_filter import RAW_LOG_NAME, filter_command
+except ImportError:  # run as a script from tools/
+    from log_filter import RAW_LOG_NAME, filter_command
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -38,6 +47,7 @@ AGENT_JUDGE_INTERVAL = 30
 AGENT_JUDGE_MAX_LINES = 5
 AGENT_JUDGE_MAX_BYTES = 8000
 ALERT_SIGNATURE_TTL_SECONDS = 180
+REPORT_DRAIN_SECONDS = float(os.environ.get("RESEARCH_AGENT_REPORT_DRAIN_SECONDS", "300"))
 GPU_CONFLICT_PATTERNS = (
     re.compile(r"all CUDA-capable devices are busy or unavailable", re.IGNORECASE),
     re.compile(r"CUDA error:.*busy", re.IGNORECASE),
@@ -87,6 +97,7 @@ def trigger_alert(
     choices: list[str],
     severity: str = "warning",
     auth_token: str | None = None,
+    session: requests.Session | None = None,
 ) -> str | None:
     """Create alert via server and return alert_id."""
     payload = {
@@ -96,7 +107,7 @@ def trigger_alert(
     }
     try:
         logger.info("Triggering alert: %s", message)
-        res = requests.post(
+        res = (session or requests).post(
             f"{server_url}/runs/{job_id}/alerts",
             json=payload,
             headers=_auth_headers(auth_token),
@@ -111,23 +122,270 @@ def trigger_alert(
     return None
 
 
-def wait_for_response(run_dir: str, alert_id: str, timeout_seconds: int = 600) -> str | None:
-    """Wait for alert response file from server."""
-    response_file = os.path.join(run_dir, "alerts", f"{alert_id}.response")
-    deadline = time.time() + timeout_seconds
-    logger.info("Waiting for response file: %s", response_file)
+class SidecarReporter:
+    """Durable, batched status/metrics reporting to the server.
+
+    Every event gets a sequence number and is appended to
+    ``<run_dir>/report_spool.jsonl`` before anything is sent, so callers can
+    treat it as delivered.  ``flush()`` POSTs pending events in order to
+    ``/runs/{id}/events`` over one keep-alive session; the server applies
+    each seq at most once and returns the highest seq it has, which is
+    persisted to ``report_spool.ack``.  Failures back off exponentially
+    without blocking the monitor loop; the spool replays once the server is
+    back, including after a sidecar restart.
+    """
+
+    SPOOL_FILE = "report_spool.jsonl"
+    ACK_FILE = "report_spool.ack"
+    MAX_BATCH_EVENTS = 200
+    BACKOFF_BASE_SECONDS = 1.0
+    BACKOFF_MAX_SECONDS = 60.0
+
+    def __init__(
+        self,
+        server_url: str,
+        job_id: str,
+        run_dir: str,
+        auth_token: str | None = None,
+        session: requests.Session | None = None,
+        timeout: float = 10.0,
+    ):
+        self.server_url = server_url
+        self.job_id = job_id
+        self.timeout = timeout
+        self.headers = _auth_headers(auth_token)
+        self.session = session or requests.Session()
+        self.spool_path = os.path.join(run_dir, self.SPOOL_FILE)
+        self.ack_path = os.path.join(run_dir, self.ACK_FILE)
+        self.failures = 0
+        self.next_attempt_at = 0.0
+        # Monitor-loop wakeups so far; sent with each metrics event.
+        self.wakeups: int | None = None
+        self.acked_seq = self._read_ack()
+        self.pending: list[dict] = [e for e in self._read_spool() if e["seq"] > self.acked_seq]
+        last_spooled = self.pending[-1]["seq"] if self.pending else 0
+        self.next_seq = max(self.acked_seq, last_spooled) + 1
+        if self.pending:
+            logger.info("Replaying %d spooled report events (from seq %d)", len(self.pending), self.pending[0]["seq"])
+
+    def _read_ack(self) -> int:
+        try:
+            with open(self.ack_path, "r") as f:
+                return int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            return 0
 
-    while time.time() < deadline:
-        if os.path.exists(response_file):
+    def _read_spool(self) -> list[dict]:
+        events: list[dict] = []
+        try:
+            with open(self.spool_path, "r") as f:
+                for line in f:
+                    try:
+                        event = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # torn final line from a crash
+                    if isinstance(event, dict) and isinstance(event.get("seq"), int):
+                        events.append(event)
+        except OSError:
+            pass
+        return events
+
+    def _enqueue(self, event_type: str, data: dict) -> dict:
+        event = {"seq": self.next_seq, "type": event_type, "data": data, "ts": time.time()}
+        self.next_seq += 1
+        with open(self.spool_path, "a") as f:
+            f.write(json.dumps(event, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.pending.append(event)
+        return event
+
+    def status(self, status: str, extra_data: dict | None = None) -> None:
+        """Record a status change and try to deliver it right away."""
+        data = {"status": status}
+        if extra_data:
+            data.update(extra_data)
+        logger.info(f"Reporting status: {status} with data: {extra_data}")
+        self._enqueue("status", data)
+        self.flush()
+
+    def metrics(self, rows: list[dict]) -> None:
+        """Spool metric rows; they go out with the next flush."""
+        if rows:
+            data: dict = {"rows": rows}
+            if self.wakeups is not None:
+                data["sidecar_wakeups"] = self.wakeups
+            self._enqueue("metrics", data)
+
+    def _acknowledge(self, acked_seq: int) -> None:
+        self.acked_seq = max(self.acked_seq, acked_seq)
+        self.pending = [e for e in self.pending if e["seq"] > self.acked_seq]
+        with open(self.ack_path, "w") as f:
+            f.write(str(self.acked_seq))
+        if not self.pending:
+            # Everything is on the server; the ack file keeps the seq counter.
+            open(self.spool_path, "w").close()
+
+    def flush(self, force: bool = False) -> bool:
+        """Send pending events in order; True once nothing is pending."""
+        while self.pending:
+            if not force and time.time() < self.next_attempt_at:
+                return False
+            batch = self.pending[: self.MAX_BATCH_EVENTS]
             try:
-                with open(response_file, "r") as f:
-                    return f.read().strip()
-            except Exception:
-                pass
-        time.sleep(2)
+                res = self.session.post(
+                    f"{self.server_url}/runs/{self.job_id}/events",
+                    json={"events": [{"seq": e["seq"], "type": e["type"], "data": e["data"]} for e in batch]},
+                    headers=self.headers,
+                    timeout=self.timeout,
+                )
+                if res.status_code != 200:
+                    raise RuntimeError(f"HTTP {res.status_code}: {res.text[:200]}")
+                # A 200 means the whole batch is applied (or was already).
+                acked = max(int(res.json().get("acked_seq") or 0), batch[-1]["seq"])
+            except Exception as e:
+                self.failures += 1
+                delay = min(self.BACKOFF_MAX_SECONDS, self.BACKOFF_BASE_SECONDS * (2 ** (self.failures - 1)))
+                self.next_attempt_at = time.time() + delay
+                logger.warning(
+                    "Failed to deliver %d report events (attempt %d, retry in %.0fs): %s",
+                    len(batch), self.failures, delay, e,
+                )
+                return False
+            self.failures = 0
+            self.next_attempt_at = 0.0
+            self._acknowledge(acked)
+        return True
 
-    logger.info("Timed out waiting for alert response (%s)", alert_id)
-    return None
+    def drain(self, timeout_seconds: float) -> bool:
+        """Block until everything is delivered or ``timeout_seconds`` pass."""
+        deadline = time.time() + timeout_seconds
+        while not self.flush():
+            if time.time() >= deadline:
+                logger.warning("Leaving %d undelivered report events in %s", len(self.pending), self.spool_path)
+                return False
+            time.sleep(max(0.0, min(self.next_attempt_at, deadline) - time.time()))
+        return True
+
+
+class AlertResponseListener:
+    """Deliver alert responses to the monitor loop without blocking it.
+
+    Alerts raised by the sidecar are ``track()``-ed here; a daemon thread
+    long-polls ``/runs/{id}/alerts/responses`` for them and queues each
+    answer for ``take_responses()``, calling ``on_response`` so the loop
+    wakes up and applies it right away.  If the server cannot be reached the
+    thread falls back to the ``alerts/<id>.response`` files the server also
+    writes.  Alerts that go unanswered for ``RESPONSE_TIMEOUT_SECONDS`` are
+    dropped, as the old blocking wait did.
+    """
+
+    LONG_POLL_SECONDS = 25
+    RESPONSE_TIMEOUT_SECONDS = 600
+
+    def __init__(
+        self,
+        server_url: str,
+        job_id: str,
+        run_dir: str,
+        auth_token: str | None = None,
+        on_response=None,
+        session: requests.Session | None = None,
+    ):
+        self.server_url = server_url
+        self.job_id = job_id
+        self.alerts_dir = os.path.join(run_dir, "alerts")
+        self.headers = _auth_headers(auth_token)
+        self.on_response = on_response
+        # Separate from the reporter's session: requests sessions are not thread-safe.
+        self.session = session or requests.Session()
+        self._lock = threading.Lock()
+        self._pending: dict[str, dict] = {}
+        self._ready: list[tuple[str, str, str | None]] = []
+        self._changed = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._failures = 0
+
+    def track(self, alert_id: str, source: str) -> None:
+        with self._lock:
+            self._pending[alert_id] = {"source": source, "created_at": time.time()}
+        self._changed.set()
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="alert-responses", daemon=True)
+            self._thread.start()
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def take_responses(self) -> list[tuple[str, str, str | None]]:
+        """Return ``(alert_id, source, choice)`` for alerts answered since last call."""
+        now = time.time()
+        with self._lock:
+            ready, self._ready = self._ready, []
+            for alert_id, info in list(self._pending.items()):
+                if now - info["created_at"] > self.RESPONSE_TIMEOUT_SECONDS:
+                    logger.info("Timed out waiting for alert response (%s)", alert_id)
+                    del self._pending[alert_id]
+        return ready
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._changed.set()
+
+    def _resolve(self, responses: dict) -> None:
+        resolved = False
+        with self._lock:
+            for alert_id, choice in responses.items():
+                info = self._pending.pop(alert_id, None)
+                if info is not None:
+                    self._ready.append((alert_id, info["source"], choice))
+                    resolved = True
+        if resolved and self.on_response is not None:
+            self.on_response()
+
+    def _read_response_files(self, alert_ids: list[str]) -> dict:
+        responses = {}
+        for alert_id in alert_ids:
+            try:
+                with open(os.path.join(self.alerts_dir, f"{alert_id}.response"), "r") as f:
+                    responses[alert_id] = f.read().strip()
+            except OSError:
+                continue
+        return responses
+
+    def poll_once(self) -> None:
+        with self._lock:
+            alert_ids = list(self._pending)
+        if not alert_ids:
+            self._changed.wait(1.0)
+            self._changed.clear()
+            return
+        try:
+            res = self.session.get(
+                f"{self.server_url}/runs/{self.job_id}/alerts/responses",
+                params={"alert_ids": ",".join(alert_ids), "wait": self.LONG_POLL_SECONDS},
+                headers=self.headers,
+                timeout=self.LONG_POLL_SECONDS + 10,
+            )
+            if res.status_code != 200:
+                raise RuntimeError(f"HTTP {res.status_code}: {res.text[:200]}")
+            body = res.json()
+            responses = dict(body.get("responses") or {})
+            # Alerts the server no longer knows about will never be answered.
+            responses.update({alert_id: None for alert_id in body.get("unknown") or []})
+            self._failures = 0
+            self._resolve(responses)
+        except Exception as e:
+            self._failures += 1
+            logger.warning("Alert response long-poll failed (%d): %s", self._failures, e)
+            self._resolve(self._read_response_files(alert_ids))
+            self._stopped.wait(min(30.0, 2.0 ** self._failures))
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            self.poll_once()
 
 
 def should_stop_from_choice(choice: str | None) -> bool:
@@ -281,7 +539,13 @@ def parse_alert_judge_decision(output: str) -> dict | None:
         data = json.loads(match.group(0))
     except json.JSONDecodeError:
         return None
+    return normalize_alert_judge_decision(data)
 
+
+def normalize_alert_judge_decision(data: object) -> dict | None:
+    """Validate one judge verdict object; None if it is malformed."""
+    if not isinstance(data, dict):
+        return None
     action = data.get("action")
     if action not in {"alert", "ignore"}:
         return None
@@ -299,22 +563,15 @@ def parse_alert_judge_decision(output: str) -> dict | None:
         "choices": choices,
     }
 
-def run_alert_judge(context: str, workdir: str | None = None) -> dict | None:
-    prompt = (
-        "[SYSTEM] You are an ML training alert judge. "
-        "Decide if this update warrants interrupting a human. "
-        "Return ONLY JSON with keys: action ('alert'|'ignore'), "
-        "message (string), severity (info|warning|critical), choices (list of strings). "
-        "If action is ignore, keep message empty.\n"
-        f"Context:\n{context}"
-    )
+def run_opencode_prompt(prompt: str, workdir: str | None = None, timeout: float = 30) -> str | None:
+    """Run one prompt through the opencode CLI; returns stdout or None."""
     cmd = ["opencode", "run", "--model", "opencode/minimax-m2.5-free", prompt]
     try:
         res = subprocess.run(
             cmd,
             capture_output=True,
             text=True,
-            timeout=30,
+            timeout=timeout,
             cwd=workdir or None,
         )
     except FileNotFoundError:
@@ -323,8 +580,21 @@ def run_alert_judge(context: str, workdir: str | None = None) -> dict | None:
     except Exception as e:
         logger.warning("alert_judge execution failed: %s", e)
         return None
+    return (res.stdout or "").strip()
 
-    output = (res.stdout or "").strip()
+
+def run_alert_judge(context: str, workdir: str | None = None) -> dict | None:
+    prompt = (
+        "[SYSTEM] You are an ML training alert judge. "
+        "Decide if this update warrants interrupting a human. "
+        "Return ONLY JSON with keys: action ('alert'|'ignore'), "
+        "message (string), severity (info|warning|critical), choices (list of strings). "
+        "If action is ignore, keep message empty.\n"
+        f"Context:\n{context}"
+    )
+    output = run_opencode_prompt(prompt, workdir)
+    if output is None:
+        return None
     logger.info("alert_judge output: %s", output)
     return parse_alert_judge_decision(output)
 
@@ -374,64 +644,55 @@ def maybe_trigger_manual_alert(
     server_url: str,
     job_id: str,
     workdir: str,
-    run_dir: str,
     auth_token: str | None = None,
-) -> bool:
-    """Manual trigger path for testing alert flow."""
+    session: requests.Session | None = None,
+) -> str | None:
+    """Manual trigger path for testing alert flow; returns the alert id."""
     trigger_file = os.path.join(workdir, "tests", "story", "trigger_alert")
     # Only treat a regular file as a manual trigger sentinel.
     if not os.path.isfile(trigger_file):
-        return False
+        return None
 
     try:
         os.remove(trigger_file)
     except Exception:
-        return False
+        return None
 
-    alert_id = trigger_alert(
+    return trigger_alert(
         server_url=server_url,
         job_id=job_id,
         message="Manual Trigger Detected",
         choices=["Ignore", "Stop Job"],
         severity="warning",
         auth_token=auth_token,
+        session=session,
     )
-    if not alert_id:
-        return False
-
-    response = wait_for_response(run_dir, alert_id)
-    logger.info("Manual alert response: %s", response)
-    return should_stop_from_choice(response)
 
 
 def apply_alert_decision(
     server_url: str,
     job_id: str,
-    run_dir: str,
     decision: dict | None,
     auth_token: str | None = None,
-) -> bool:
+    session: requests.Session | None = None,
+) -> str | None:
+    """Raise the alert a rule/judge decision asks for; returns the alert id."""
     if not decision or decision.get("action") != "alert":
-        return False
+        return None
 
     message = decision.get("message") or "Metric anomaly detected."
     source = decision.get("source") or "alerts"
     logger.warning("%s produced alert: %s", source, message)
 
-    alert_id = trigger_alert(
+    return trigger_alert(
         server_url=server_url,
         job_id=job_id,
         message=message,
         choices=decision.get("choices") or ["Ignore", "Stop Job"],
         severity=decision.get("severity") or "warning",
         auth_token=auth_token,
+        session=session,
     )
-    if not alert_id:
-        return False
-
-    response = wait_for_response(run_dir, alert_id)
-    logger.info("Alert response (%s): %s", source, response)
-    return should_stop_from_choice(response)
 
 
 def get_current_pane():
@@ -589,11 +850,13 @@ def post_metrics_delta(
     wandb_dir: str,
     lines_posted: int,
     auth_token: str | None = None,
+    reporter: "SidecarReporter | None" = None,
 ) -> int:
     """Read new metrics rows from wandb files and POST them to the server.
 
     ``lines_posted`` tracks progress: for JSONL files it is the line count;
-    for binary .wandb files it is the record count.
+    for binary .wandb files it is the record count.  With a ``reporter`` the
+    rows are spooled instead of POSTed, so progress always advances.
 
     Returns the updated lines_posted count.
     """
@@ -645,6 +908,11 @@ def post_metrics_delta(
         sample_keys = list(rows[0].keys())[:8]
         logger.info(f"[metrics] Sample row keys: {sample_keys}")
 
+    if reporter is not None:
+        reporter.metrics(rows)
+        logger.info(f"[metrics] Spooled {len(rows)} rows, lines_posted now={new_total}")
+        return new_total
+
     url = f"{server_url}/runs/{job_id}/metrics"
     headers = {"Content-Type": "application/json"}
     if auth_token:
@@ -823,6 +1091,119 @@ def emit_gpu_retry_alert(
     )
 
 
+class AdaptiveCadence:
+    """Delay between monitor-loop checks.
+
+    Starts at ``min_seconds`` (right after launch, or whenever ``reset()`` is
+    called because something changed) and doubles on every idle check up to
+    ``max_seconds``.  ``wakeups`` counts checks so the savings over a fixed
+    interval can be measured.
+    """
+
+    def __init__(self, min_seconds: float = 0.5, max_seconds: float = 30.0, factor: float = 2.0):
+        self.min_seconds = max(0.05, min_seconds)
+        self.max_seconds = max(self.min_seconds, max_seconds)
+        self.factor = max(1.0, factor)
+        self.delay = self.min_seconds
+        self.wakeups = 0
+
+    def reset(self) -> None:
+        self.delay = self.min_seconds
+
+    def next_delay(self) -> float:
+        """Return the delay until the next check and back off for the one after."""
+        delay = self.delay
+        self.delay = min(self.max_seconds, self.delay * self.factor)
+        return delay
+
+
+class CompletionWatcher:
+    """Wait for ``job.done`` to appear, waking as soon as it is written.
+
+    Uses inotify (through ctypes, Linux only) on the run directory and
+    filters events by file name, so the sidecar's own spool/log writes do
+    not wake it.  Elsewhere, or if inotify is unavailable, ``wait`` simply
+    sleeps for the timeout.
+    """
+
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    _EVENT_HEADER = struct.Struct("iIII")
+
+    def __init__(self, completion_file: str):
+        self.path = completion_file
+        self.name = os.path.basename(completion_file).encode()
+        self.fd: int | None = None
+        # Self-pipe so other threads can cut a wait short (see wake()).
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_r, False)
+        os.set_blocking(self._wake_w, False)
+        if not sys.platform.startswith("linux"):
+            return
+        try:
+            libc = ctypes.CDLL(None, use_errno=True)
+            fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+            if fd < 0:
+                raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+            mask = self.IN_CLOSE_WRITE | self.IN_MOVED_TO
+            if libc.inotify_add_watch(fd, os.path.dirname(completion_file).encode(), mask) < 0:
+                os.close(fd)
+                raise OSError(ctypes.get_errno(), "inotify_add_watch failed")
+            self.fd = fd
+        except (OSError, AttributeError) as e:
+            logger.info("inotify unavailable, falling back to timed polling: %s", e)
+
+    def _saw_completion(self) -> bool:
+        try:
+            buf = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return False
+        offset = 0
+        while offset + self._EVENT_HEADER.size <= len(buf):
+            _, _, _, name_len = self._EVENT_HEADER.unpack_from(buf, offset)
+            offset += self._EVENT_HEADER.size
+            if buf[offset:offset + name_len].rstrip(b"\0") == self.name:
+                return True
+            offset += name_len
+        return False
+
+    def wake(self) -> None:
+        """End the current (or next) ``wait`` early; safe from any thread."""
+        try:
+            os.write(self._wake_w, b"x")
+        except (BlockingIOError, OSError):
+            pass
+
+    def wait(self, timeout: float) -> bool:
+        """Sleep up to ``timeout`` seconds, returning early on completion or
+        ``wake()``; True if the completion file exists."""
+        fds = [self._wake_r] if self.fd is None else [self._wake_r, self.fd]
+        deadline = time.time() + timeout
+        while True:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            readable, _, _ = select.select(fds, [], [], remaining)
+            if self._wake_r in readable:
+                try:
+                    os.read(self._wake_r, 4096)
+                except BlockingIOError:
+                    pass
+                break
+            if self.fd in readable and self._saw_completion():
+                break
+        return os.path.exists(self.path)
+
+    def close(self) -> None:
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+        if self._wake_r is not None:
+            os.close(self._wake_r)
+            os.close(self._wake_w)
+            self._wake_r = self._wake_w = None
+
+
 def monitor_job(
     server_url: str,
     job_id: str,
@@ -831,8 +1212,20 @@ def monitor_job(
     run_dir: str,
     auth_token: str | None = None,
     gpuwrap_config: dict | None = None,
+    assigned_cuda_visible_devices: str | None = None,
+    rule_alerts: bool = True,
+    judge_alerts: bool = True,
+    filter_log: bool = True,
+    keep_raw_log: bool = False,
 ):
-    """Main job monitoring loop."""
+    """Main job monitoring loop.
+
+    ``rule_alerts=False`` skips the local loss rules because the server runs
+    its own anomaly detectors on the metrics this sidecar reports;
+    ``judge_alerts=False`` likewise leaves the LLM judge to the server.
+    ``filter_log`` pipes the pane through tools/log_filter.py instead of
+    appending it to run.log verbatim.
+    """
     # Persist sidecar logs to a file so they can be streamed to the frontend.
     sidecar_log_file = os.path.join(run_dir, "sidecar.log")
     file_handler = logging.FileHandler(sidecar_log_file, mode="a")
@@ -845,12 +1238,17 @@ def monitor_job(
     logger.info(f"Command: {command}")
     logger.info(f"Workdir: {workdir}")
     logger.info(f"Run dir: {run_dir}")
-    
+
+    # Status and metrics go through a disk spool so a server outage or
+    # restart does not lose them; see SidecarReporter.
+    reporter = SidecarReporter(server_url, job_id, run_dir, auth_token=auth_token)
+
     # Find our current pane
     current_pane = get_current_pane()
     if not current_pane:
         logger.error("Could not identify current tmux pane")
-        report_status(server_url, job_id, "failed", {"error": "No tmux pane found"}, auth_token=auth_token)
+        reporter.status("failed", {"error": "No tmux pane found"})
+        reporter.drain(REPORT_DRAIN_SECONDS)
         return
     
     window = current_pane.window
@@ -876,7 +1274,11 @@ def monitor_job(
     # Setup log capture via pipe-pane
     try:
         logger.info(f"Piping pane output to {log_file}")
-        job_pane.cmd("pipe-pane", f"cat >> {log_file}")
+        if filter_log:
+            raw_log = os.path.join(run_dir, RAW_LOG_NAME) if keep_raw_log else None
+            job_pane.cmd("pipe-pane", filter_command(log_file, raw_log))
+        else:
+            job_pane.cmd("pipe-pane", f"cat >> {shlex.quote(log_file)}")
     except Exception as e:
         logger.error(f"Failed to setup pipe-pane: {e}")
     
@@ -893,12 +1295,28 @@ def monitor_job(
     logger.info("GPU settings: %s", settings)
 
     # Report running status
-    report_status(server_url, job_id, "running", {"tmux_pane": job_pane.pane_id}, auth_token=auth_token)
+    reporter.status("running", {"tmux_pane": job_pane.pane_id})
     
     # Monitoring/retry state
     found_wandb_dir = None
-    check_interval = 2
+    cadence = AdaptiveCadence(
+        min_seconds=_env_float("RESEARCH_AGENT_SIDECAR_MIN_POLL_SECONDS", 0.5),
+        max_seconds=_env_float("RESEARCH_AGENT_SIDECAR_MAX_POLL_SECONDS", 30.0),
+    )
+    completion_watcher = CompletionWatcher(completion_file)
+    alert_listener = AlertResponseListener(
+        server_url, job_id, run_dir, auth_token=auth_token, on_response=completion_watcher.wake
+    )
     alert_state: dict = {}
+
+    def stop_for_alert(source: str) -> None:
+        logger.info("Stopping job due to %s alert response", source)
+        job_pane.cmd("kill-pane")
+        alert_listener.stop()
+        completion_watcher.close()
+        reporter.status("stopped", {"error": "Stopped via alert response", "sidecar_wakeups": cadence.wakeups})
+        reporter.drain(REPORT_DRAIN_SECONDS)
+
     metrics_lines_posted = 0
     retries = settings["retries"]  # None = unlimited, 0 = no retry, N = N retries
     total_attempts: int | None = None if retries is None else retries + 1
@@ -920,7 +1338,11 @@ def monitor_job(
 
         cuda_visible_devices = ""
         detector_payload = None
-        if settings["enabled"]:
+        if settings["enabled"] and assigned_cuda_visible_devices:
+            # The server-side scheduler already reserved these devices for us.
+            cuda_visible_devices = assigned_cuda_visible_devices
+            logger.info("Using server-assigned CUDA_VISIBLE_DEVICES=%s", cuda_visible_devices)
+        elif settings["enabled"]:
             cuda_visible_devices, detector_payload = detect_available_cuda_devices(settings)
             logger.info("GPU detector payload: %s", detector_payload)
             if detector_payload is None:
@@ -963,8 +1385,11 @@ def monitor_job(
         wrapped_command = f"({launch_command}); echo $? > {shlex.quote(completion_file)}"
         logger.info(f"Executing: {wrapped_command}")
         job_pane.send_keys(wrapped_command)
+        cadence.reset()
 
         while not os.path.exists(completion_file):
+            cadence.wakeups += 1
+            reporter.wakeups = cadence.wakeups
             logger.debug("[metrics-loop] Monitoring job...")
             try:
                 # Check if pane still exists
@@ -973,7 +1398,10 @@ def monitor_job(
                 
                 if not pane_exists:
                     logger.error("Job pane disappeared")
-                    report_status(server_url, job_id, "failed", {"error": "Pane disappeared"}, auth_token=auth_token)
+                    alert_listener.stop()
+                    completion_watcher.close()
+                    reporter.status("failed", {"error": "Pane disappeared", "sidecar_wakeups": cadence.wakeups})
+                    reporter.drain(REPORT_DRAIN_SECONDS)
                     return
                 
                 # Detect WandB — filesystem scan first, tmux fallback
@@ -984,48 +1412,59 @@ def monitor_job(
                         found_wandb_dir = check_wandb_in_pane(job_pane.pane_id, workdir)
                     if found_wandb_dir:
                         logger.info(f"[metrics-loop] ✅ Detected WandB dir: {found_wandb_dir}")
-                        report_status(server_url, job_id, "running", {"wandb_dir": found_wandb_dir}, auth_token=auth_token)
+                        cadence.reset()
+                        reporter.status("running", {"wandb_dir": found_wandb_dir, "sidecar_wakeups": cadence.wakeups})
                     else:
                         logger.debug(f"[metrics-loop] WandB dir not found yet")
 
-                # Manual alert trigger path (for testing and operations)
-                if maybe_trigger_manual_alert(server_url, job_id, workdir, run_dir, auth_token=auth_token):
-                    logger.info("Stopping job due to manual alert response")
-                    job_pane.cmd("kill-pane")
-                    report_status(server_url, job_id, "stopped", {"error": "Stopped via alert response"}, auth_token=auth_token)
-                    return
-
-                # Rule-based alerts first, then LLM alert judge.
-                if found_wandb_dir:
-                    rule_decision = rulebased_alerts(job_id, found_wandb_dir, alert_state)
-                    if apply_alert_decision(server_url, job_id, run_dir, rule_decision, auth_token=auth_token):
-                        logger.info("Stopping job due to rulebased alert response")
-                        job_pane.cmd("kill-pane")
-                        report_status(server_url, job_id, "stopped", {"error": "Stopped via alert response"}, auth_token=auth_token)
-                        return
-
-                    judge_decision = alert_judge(job_id, found_wandb_dir, workdir, alert_state)
-                    if apply_alert_decision(server_url, job_id, run_dir, judge_decision, auth_token=auth_token):
-                        logger.info("Stopping job due to alert_judge response")
-                        job_pane.cmd("kill-pane")
-                        report_status(server_url, job_id, "stopped", {"error": "Stopped via alert response"}, auth_token=auth_token)
+                # Answers to earlier alerts; the loop kept running meanwhile.
+                for alert_id, source, response in alert_listener.take_responses():
+                    logger.info("Alert response (%s, %s): %s", source, alert_id, response)
+                    if should_stop_from_choice(response):
+                        stop_for_alert(source)
                         return
 
-                    # POST new metric rows to server
+                # Manual alert trigger path (for testing and operations)
+                alert_id = maybe_trigger_manual_alert(
+                    server_url, job_id, workdir, auth_token=auth_token, session=reporter.session
+                )
+                if alert_id:
+                    alert_listener.track(alert_id, "manual")
+
+                # Rule-based alerts first, then LLM alert judge.  Skipped while an
+                # earlier alert is unanswered so it isn't raised again every TTL.
+                if found_wandb_dir:
+                    evaluate_alerts = alert_listener.pending_count() == 0
+                    for decision in (
+                        rulebased_alerts(job_id, found_wandb_dir, alert_state)
+                        if rule_alerts and evaluate_alerts else None,
+                        alert_judge(job_id, found_wandb_dir, workdir, alert_state)
+                        if judge_alerts and evaluate_alerts else None,
+                    ):
+                        alert_id = apply_alert_decision(
+                            server_url, job_id, decision, auth_token=auth_token, session=reporter.session
+                        )
+                        if alert_id:
+                            alert_listener.track(alert_id, decision.get("source") or "alerts")
+
+                    # Spool new metric rows; flushed below with any pending status
                     logger.info(f"[metrics-loop] Calling post_metrics_delta (found_wandb_dir={found_wandb_dir}, lines_posted={metrics_lines_posted})")
                     prev_lines = metrics_lines_posted
                     metrics_lines_posted = post_metrics_delta(
-                        server_url, job_id, found_wandb_dir, metrics_lines_posted, auth_token=auth_token
+                        server_url, job_id, found_wandb_dir, metrics_lines_posted, reporter=reporter
                     )
                     if metrics_lines_posted != prev_lines:
                         logger.info(f"[metrics-loop] lines_posted advanced: {prev_lines} → {metrics_lines_posted}")
+                        cadence.reset()
                 else:
                     logger.debug(f"[metrics-loop] Skipping metrics POST — no wandb_dir found yet")
 
+                reporter.flush()
             except Exception as e:
                 logger.error(f"Error in monitoring loop: {e}")
-            
-            time.sleep(check_interval)
+
+            # Returns early when job.done is written.
+            completion_watcher.wait(cadence.next_delay())
 
         # Attempt completed
         attempt_exit_code = "unknown"
@@ -1055,25 +1494,32 @@ def monitor_job(
             continue
         break
     
+    alert_listener.stop()
+    completion_watcher.close()
+    logger.info("Monitor loop woke %d times", cadence.wakeups)
+
     # Final status
     if final_exit_code == "0":
         logger.info("Job completed successfully")
-        report_status(server_url, job_id, "finished", {"exit_code": 0}, auth_token=auth_token)
+        reporter.status("finished", {"exit_code": 0, "sidecar_wakeups": cadence.wakeups})
     else:
         logger.error(f"Job failed with exit code: {final_exit_code}")
-        extra: dict = {"exit_code": final_exit_code}
+        extra: dict = {"exit_code": final_exit_code, "sidecar_wakeups": cadence.wakeups}
         if final_error:
             extra["error"] = final_error
-        report_status(server_url, job_id, "failed", extra, auth_token=auth_token)
+        reporter.status("failed", extra)
 
     # Final metrics flush
     if found_wandb_dir:
         logger.info(f"[metrics-final] Final metrics flush: wandb_dir={found_wandb_dir}, lines_posted={metrics_lines_posted}")
-        final_posted = post_metrics_delta(server_url, job_id, found_wandb_dir, metrics_lines_posted, auth_token=auth_token)
+        final_posted = post_metrics_delta(server_url, job_id, found_wandb_dir, metrics_lines_posted, reporter=reporter)
         logger.info(f"[metrics-final] Final flush done: lines_posted {metrics_lines_posted} → {final_posted}")
     else:
         logger.info(f"[metrics-final] No wandb_dir found during entire run — skipping final flush")
-    
+
+    if not reporter.drain(REPORT_DRAIN_SECONDS):
+        logger.warning("Server unreachable; undelivered reports stay spooled in %s", reporter.spool_path)
+
     logger.info("Sidecar exiting")
 
 
@@ -1085,6 +1531,31 @@ def main(argv: list[str] | None = None):
     parser.add_argument("--workdir", default=None, help="Working directory")
     parser.add_argument("--agent_run_dir", default=None, help="Run directory for logs")
     parser.add_argument("--gpuwrap_config_file", default=None, help="Optional per-run gpuwrap config JSON path")
+    parser.add_argument(
+        "--cuda_visible_devices",
+        default=None,
+        help="GPUs reserved for this run by the server scheduler (skips local detection)",
+    )
+    parser.add_argument(
+        "--no_rule_alerts",
+        action="store_true",
+        help="Skip local loss rules (the server runs anomaly detection on reported metrics)",
+    )
+    parser.add_argument(
+        "--no_alert_judge",
+        action="store_true",
+        help="Skip the local LLM alert judge (the server judges reported metrics in batches)",
+    )
+    parser.add_argument(
+        "--raw_log_capture",
+        action="store_true",
+        help="Append pane output to run.log verbatim (no CR/ANSI normalization)",
+    )
+    parser.add_argument(
+        "--keep_raw_log",
+        action="store_true",
+        help=f"Also keep the unfiltered pane output in {RAW_LOG_NAME}",
+    )
     parser.add_argument(
         "--auth_token",
         default=os.environ.get("RESEARCH_AGENT_USER_AUTH_TOKEN", ""),
@@ -1128,6 +1599,11 @@ def main(argv: list[str] | None = None):
         run_dir=args.agent_run_dir or "/tmp",
         auth_token=args.auth_token or None,
         gpuwrap_config=gpuwrap_config,
+        assigned_cuda_visible_devices=args.cuda_visible_devices or None,
+        rule_alerts=not args.no_rule_alerts,
+        judge_alerts=not args.no_alert_judge,
+        filter_log=not args.raw_log_capture,
+        keep_raw_log=args.keep_raw_log,
     )
 
 
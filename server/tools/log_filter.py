@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Log Filter - Normalizes job output before it lands in run.log
+
+Job output is captured raw (tmux ``pipe-pane``, ``tee``, a subprocess pipe),
+so every tqdm redraw and ANSI colour code ends up in ``run.log``.  This
+filter sits in that pipe: it reads the job's output on stdin and appends a
+normalized copy to ``--out``:
+
+1. Carriage-return redraws collapse to what the terminal finally shows.
+2. ANSI/VT control sequences (colours, cursor moves, OSC titles) and stray
+   control characters are removed; backspaces are applied.
+3. Runs of identical lines are cut after ``--max_repeats`` copies and
+   summarized as ``[previous line repeated N more times]``.
+4. A line that stays unfinished for ``PARTIAL_LINE_SECONDS`` (a progress bar
+   that only ever redraws with ``\r``) is written out as it currently looks,
+   at most once per interval, so a whole epoch's bar is not withheld.  The
+   finished line is not repeated if it did not change since.
+
+``--raw`` additionally appends the untouched stream to a gzip file, and
+``--echo`` passes it through to stdout (so a tmux pane still shows the job).
+
+Usage:
+    some_job 2>&1 | python log_filter.py --out run.log [--raw run.raw.log.gz]
+"""
+
+import argparse
+import gzip
+import os
+import re
+import select
+import shlex
+import sys
+import time
+from typing import Optional
+
+READ_SIZE = 64 * 1024
+MAX_PENDING_BYTES = 1024 * 1024  # a "line" longer than this is emitted as is
+RAW_FLUSH_SECONDS = 5.0
+PARTIAL_LINE_SECONDS = 10.0
+RAW_LOG_NAME = "run.raw.log.gz"
+
+# CSI (ESC [ ... final), OSC (ESC ] ... BEL/ST), and two-byte ESC sequences.
+_ANSI_RE = re.compile(rb"\x1b\[[0-?]*[ -/]*[@-~]|\x1b\][^\x07\x1b]*(?:\x07|\x1b\\)|\x1b[@-Z\\-_]")
+# C0 controls other than \t, \n, \r and \b (handled separately).
+_CONTROL_RE = re.compile(rb"[\x00-\x07\x0b\x0c\x0e-\x1f\x7f]")
+
+
+def normalize_line(line: bytes) -> bytes:
+    """Terminal-visible form of one line (without its newline)."""
+    line = _ANSI_RE.sub(b"", line)
+    if b"\b" in line:
+        out = bytearray()
+        for byte in line:
+            if byte == 8:
+                if out:
+                    out.pop()
+            else:
+                out.append(byte)
+        line = bytes(out)
+    line = _CONTROL_RE.sub(b"", line)
+    if b"\r" in line:
+        # Each \r returns to column 0 and the next segment overwrites in place.
+        visible = b""
+        for segment in line.split(b"\r"):
+            visible = segment + visible[len(segment):]
+        line = visible
+    return line.rstrip(b" ")
+
+
+class LogFilter:
+    """Incremental normalizer: feed raw chunks, get filtered bytes back."""
+
+    def __init__(self, max_repeats: int = 3) -> None:
+        self.max_repeats = max_repeats
+        self._pending = b""
+        self._last: Optional[bytes] = None
+        self._repeats = 0
+        self._partial_shown: Optional[bytes] = None  # unfinished line already written by flush_partial
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    @property
+    def has_partial(self) -> bool:
+        return bool(self._pending)
+
+    def _complete(self, line: bytes, out: list) -> None:
+        shown, self._partial_shown = self._partial_shown, None
+        if line != shown:
+            self._emit(line, out)
+
+    def _emit(self, line: bytes, out: list) -> None:
+        if line == self._last:
+            self._repeats += 1
+            if self._repeats < self.max_repeats:
+                out.append(line + b"\n")
+            return
+        self._flush_repeats(out)
+        self._last, self._repeats = line, 0
+        out.append(line + b"\n")
+
+    def _flush_repeats(self, out: list) -> None:
+        hidden = self._repeats - (self.max_repeats - 1)
+        if self._last is not None and hidden > 0:
+            out.append(f"[previous line repeated {hidden} more times]\n".encode())
+        self._repeats = 0
+
+    def feed(self, chunk: bytes) -> bytes:
+        self.bytes_in += len(chunk)
+        data = self._pending + chunk
+        lines = data.split(b"\n")
+        pending = lines.pop()
+        out: list[bytes] = []
+        for line in lines:
+            self._complete(normalize_line(line.rstrip(b"\r")), out)
+        # A progress bar redraws without ever ending its line: fold the earlier
+        # redraws into what they display so the carry stays one line wide (the
+        # last segment is kept raw; a trailing \r may still become a \r\n).
+        cut = pending.rfind(b"\r", 0, len(pending) - 1)
+        if cut > 0:
+            pending = b"\r" + normalize_line(pending[:cut]) + pending[cut:]
+        if len(pending) > MAX_PENDING_BYTES:
+            self._complete(normalize_line(pending), out)
+            pending = b""
+        self._pending = pending
+        result = b"".join(out)
+        self.bytes_out += len(result)
+        return result
+
+    def flush_partial(self) -> bytes:
+        """Write out the unfinished line as it currently looks (e.g. a progress bar)."""
+        line = normalize_line(self._pending.rstrip(b"\r")) if self._pending else b""
+        if not line or line == self._partial_shown:
+            return b""
+        out: list[bytes] = []
+        self._emit(line, out)
+        self._partial_shown = line
+        result = b"".join(out)
+        self.bytes_out += len(result)
+        return result
+
+    def close(self) -> bytes:
+        out: list[bytes] = []
+        if self._pending:
+            line = normalize_line(self._pending.rstrip(b"\r"))
+            if line:
+                self._complete(line, out)
+            self._pending = b""
+        self._flush_repeats(out)
+        result = b"".join(out)
+        self.bytes_out += len(result)
+        return result
+
+
+def filter_argv(out_path: str, raw_path: Optional[str] = None, echo: bool = False) -> list[str]:
+    """argv that runs this filter with the current interpreter (or frozen binary)."""
+    if getattr(sys, "frozen", False):
+        argv = [sys.executable, "--run-log-filter"]
+    else:
+        argv = [sys.executable, os.path.abspath(__file__)]
+    argv += ["--out", out_path]
+    if raw_path:
+        argv += ["--raw", raw_path]
+    if echo:
+        argv.append("--echo")
+    return argv
+
+
+def filter_command(out_path: str, raw_path: Optional[str] = None, echo: bool = False) -> str:
+    """Shell form of ``filter_argv`` for pipelines and ``pipe-pane``."""
+    return " ".join(shlex.quote(arg) for arg in filter_argv(out_path, raw_path, echo))
+
+
+def run(
+    stdin_fd: int,
+    out_path: str,
+    raw_path: Optional[str] = None,
+    max_repeats: int = 3,
+    echo_fd: Optional[int] = None,
+) -> None:
+    log_filter = LogFilter(max_repeats=max_repeats)
+    raw = gzip.open(raw_path, "ab") if raw_path else None
+    last_raw_flush = time.monotonic()
+    partial_since: Optional[float] = None  # when the current unfinished line was last written
+    with open(out_path, "ab") as out:
+        try:
+            while True:
+                if partial_since is not None:
+                    wait = max(0.0, partial_since + PARTIAL_LINE_SECONDS - time.monotonic())
+                    if not select.select([stdin_fd], [], [], wait)[0]:
+                        filtered = log_filter.flush_partial()
+                        if filtered:
+                            out.write(filtered)
+                            out.flush()
+                        partial_since = time.monotonic()
+                        continue
+                try:
+                    chunk = os.read(stdin_fd, READ_SIZE)
+                except InterruptedError:
+                    continue
+                if not chunk:
+                    break
+                if echo_fd is not None:
+                    try:
+                        os.write(echo_fd, chunk)
+                    except OSError:
+                        echo_fd = None  # nobody is watching any more; keep logging
+                filtered = log_filter.feed(chunk)
+                if not log_filter.has_partial:
+                    partial_since = None
+                elif partial_since is None:
+                    partial_since = time.monotonic()
+                elif time.monotonic() - partial_since >= PARTIAL_LINE_SECONDS:
+                    # Still redrawing without a newline: show how far it got.
+                    filtered += log_filter.flush_partial()
+                    partial_since = time.monotonic()
+                if filtered:
+                    out.write(filtered)
+                    out.flush()
+                if raw is not None:
+                    raw.write(chunk)
+                    if time.monotonic() - last_raw_flush > RAW_FLUSH_SECONDS:
+                        raw.flush()
+                        last_raw_flush = time.monotonic()
+        finally:
+            out.write(log_filter.close())
+            out.flush()
+            if raw is not None:
+                raw.close()
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Normalize job output (CR redraws, ANSI, repeats) into a log file")
+    parser.add_argument("--out", required=True, help="Log file to append normalized output to")
+    parser.add_argument("--raw", default=None, help="Optional gzip file to append the raw stream to")
+    parser.add_argument("--echo", action="store_true", help="Also pass the raw stream through to stdout")
+    parser.add_argument("--max_repeats", type=int, default=3, help="Identical consecutive lines kept before summarizing")
+    args = parser.parse_args(argv)
+    echo_fd = sys.stdout.fileno() if args.echo else None
+    run(sys.stdin.fileno(), args.out, args.raw, max_repeats=max(1, args.max_repeats), echo_fd=echo_fd)
+
+
+if __name__ == "__main__":
+    main()
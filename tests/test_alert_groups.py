@@ -0,0 +1,157 @@
+"""Tests for runs/alert_groups.py — sweep-aware alert aggregation."""
+
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "server"))
+
+from core.models import RespondAlertRequest
+from runs import routes as run_routes
+from runs.alert_groups import AlertAggregator, alert_signature, group_alerts
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _alert(i, run_id, message, severity="warning", choices=("Ignore", "Stop Job")):
+    return {
+        "id": f"a{i}", "run_id": run_id, "message": message, "severity": severity,
+        "choices": list(choices), "status": "pending", "timestamp": 1000.0 + i, "source": "anomaly",
+    }
+
+
+def _setup(window=60.0):
+    runs = {f"r{i}": {"id": f"r{i}", "name": f"lr-sweep-{i}", "sweep_id": "s1"} for i in range(64)}
+    runs["solo"] = {"id": "solo", "name": "solo"}
+    digests = []
+    clock = FakeClock()
+    aggregator = AlertAggregator(runs, window_seconds=window, on_digest=digests.append, clock=clock)
+    return runs, aggregator, digests, clock
+
+
+def test_signature_ignores_run_names_and_numbers():
+    a = {"message": "lr-sweep-3: loss spiked to 12.5 at step 400", "source": "anomaly", "severity": "warning"}
+    b = {"message": "lr-sweep-41: loss spiked to 9.1e3 at step 415", "source": "anomaly", "severity": "warning"}
+    assert alert_signature(a, {"name": "lr-sweep-3"}) == alert_signature(b, {"name": "lr-sweep-41"})
+    c = dict(b, message="lr-sweep-41: grad norm exploded at step 415")
+    assert alert_signature(a, {"name": "lr-sweep-3"}) != alert_signature(c, {"name": "lr-sweep-41"})
+
+
+def test_sweep_incident_becomes_one_group_and_one_digest():
+    runs, aggregator, digests, clock = _setup()
+    alerts = []
+    for i in range(64):
+        alert = _alert(i, f"r{i}", f"lr-sweep-{i}: loss spiked to {10 + i}")
+        aggregator.assign(alert)
+        alerts.append(alert)
+        clock.now += 0.5
+    assert len({a["group_id"] for a in alerts}) == 1
+    assert aggregator.flush_due() == []
+
+    clock.now += 60
+    flushed = aggregator.flush_due()
+    assert len(flushed) == 1 and len(digests) == 1
+    assert len(digests[0]["alert_ids"]) == 64
+
+    group = group_alerts(alerts)[alerts[0]["group_id"]]
+    assert group["sweep_id"] == "s1"
+    assert len(group["run_ids"]) == 64
+    assert group["status"] == "pending"
+    assert group["choices"] == ["Ignore", "Stop Job"]
+
+
+def test_window_and_signature_split_groups():
+    runs, aggregator, digests, clock = _setup(window=30)
+    first = _alert(0, "r0", "loss spiked")
+    other = _alert(1, "r1", "grad norm exploded")
+    aggregator.assign(first)
+    aggregator.assign(other)
+    assert first["group_id"] != other["group_id"]
+
+    clock.now += 31
+    late = _alert(2, "r2", "loss spiked")
+    aggregator.assign(late)
+    assert late["group_id"] != first["group_id"]
+    assert len(digests) == 1  # the expired loss group was flushed on the way
+
+
+def test_runs_outside_sweeps_and_disabled_window_are_not_grouped():
+    runs, aggregator, digests, clock = _setup()
+    solo = _alert(0, "solo", "loss spiked")
+    assert aggregator.assign(solo) is None
+    assert "group_id" not in solo
+
+    disabled = AlertAggregator(runs, window_seconds=0)
+    assert disabled.assign(_alert(1, "r1", "loss spiked")) is None
+
+
+def test_closed_group_sends_no_digest_and_group_summary_tracks_responses():
+    runs, aggregator, digests, clock = _setup()
+    alerts = [_alert(i, f"r{i}", "loss spiked", severity="critical" if i == 2 else "warning") for i in range(3)]
+    alerts[1]["choices"] = ["Stop Job", "Ignore", "Lower LR"]
+    for alert in alerts:
+        aggregator.assign(alert)
+    group_id = alerts[0]["group_id"]
+    aggregator.close(group_id)
+    clock.now += 120
+    assert aggregator.flush_due() == [] and digests == []
+
+    group = group_alerts(alerts)[group_id]
+    assert group["severity"] == "critical"
+    assert group["choices"] == ["Ignore", "Stop Job"]
+    for alert in alerts:
+        alert["status"] = "resolved"
+    assert group_alerts(alerts)[group_id]["status"] == "resolved"
+
+
+def test_restore_reopens_groups_that_were_never_digested():
+    runs, aggregator, digests, clock = _setup()
+    alerts = [_alert(i, f"r{i}", "loss spiked") for i in range(3)]
+    for alert in alerts:
+        aggregator.assign(alert)
+    notified = _alert(3, "r3", "grad norm exploded")
+    aggregator.assign(notified)
+    notified["digest_sent_at"] = 1000.0
+    alerts[2]["status"] = "resolved"
+
+    # A restart: a fresh aggregator over the persisted alert records.
+    restarted = AlertAggregator(runs, window_seconds=60, on_digest=digests.append, clock=clock)
+    assert restarted.restore(alerts + [notified]) == 1
+    late = _alert(4, "r4", "loss spiked")
+    restarted.assign(late)
+    assert late["group_id"] == alerts[0]["group_id"]
+
+    clock.now += 60
+    flushed = restarted.flush_due()
+    assert [g["alert_ids"] for g in flushed] == [["a0", "a1", "a4"]]
+    assert digests == flushed
+
+
+def test_group_response_leaves_unwritable_members_pending(tmp_path, monkeypatch):
+    blocked = tmp_path / "blocked"
+    blocked.write_text("")  # a file, so alerts/ cannot be created under it
+    runs = {
+        "r0": {"id": "r0", "sweep_id": "s1", "run_dir": str(tmp_path / "r0")},
+        "r1": {"id": "r1", "sweep_id": "s1", "run_dir": str(blocked)},
+    }
+    alerts = {a["id"]: dict(a, group_id="g1") for a in (_alert(0, "r0", "x"), _alert(1, "r1", "x"))}
+    saves = []
+    monkeypatch.setattr(run_routes, "_runs", runs)
+    monkeypatch.setattr(run_routes, "_active_alerts", alerts)
+    monkeypatch.setattr(run_routes, "_save_alerts_state", lambda: saves.append(1))
+    monkeypatch.setattr(run_routes, "_alert_aggregator", None)
+    monkeypatch.setattr(run_routes, "_run_executors", None)
+
+    result = asyncio.run(run_routes.respond_to_alert_group("g1", RespondAlertRequest(choice="Ignore")))
+    assert result["resolved"] == ["a0"] and result["failed"] == ["a1"]
+    assert alerts["a0"]["status"] == "resolved"
+    assert (tmp_path / "r0" / "alerts" / "a0.response").read_text() == "Ignore"
+    assert alerts["a1"]["status"] == "pending"
+    assert "response" not in alerts["a1"]
+    assert saves
@@ -0,0 +1,116 @@
+"""Tests for runs/alert_judge.py — the shared, batched LLM alert judge."""
+
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "server"))
+
+from runs.alert_judge import AlertJudgeService, context_key, parse_batch_verdicts
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeModel:
+    """Alerts on any run whose latest loss is above 10."""
+
+    def __init__(self):
+        self.prompts = []
+
+    def __call__(self, prompt):
+        self.prompts.append(prompt)
+        contexts = json.loads(prompt.split("Runs:\n", 1)[1])
+        verdicts = {}
+        for run_id, context in contexts.items():
+            if context["recent_metrics"][-1].get("loss", 0) > 10:
+                verdicts[run_id] = {"action": "alert", "message": f"{run_id} loss blew up", "severity": "critical"}
+        return "Sure:\n" + json.dumps(verdicts)
+
+
+def _service(n_runs=3, **kwargs):
+    runs = {f"r{i}": {"status": "running"} for i in range(n_runs)}
+    raised = []
+    model = FakeModel()
+    clock = FakeClock()
+    service = AlertJudgeService(
+        runs,
+        on_decision=lambda run_id, decision: raised.append((run_id, decision)),
+        run_model=model,
+        run_interval=60,
+        clock=clock,
+        **kwargs,
+    )
+    return service, runs, raised, model, clock
+
+
+def test_many_runs_share_one_model_call():
+    service, _, raised, model, _ = _service(n_runs=5)
+    for i in range(5):
+        service.observe(f"r{i}", [{"step": 1, "loss": 50.0 if i == 2 else 1.0}])
+    assert service.judge_due() == 1
+    assert len(model.prompts) == 1
+    assert [run_id for run_id, _ in raised] == ["r2"]
+    assert raised[0][1]["source"] == "alert_judge"
+    assert raised[0][1]["choices"] == ["Ignore", "Stop Job"]
+    assert service.stats["runs_judged"] == 5
+
+
+def test_identical_context_hits_the_cache():
+    service, _, _, model, clock = _service(n_runs=2)
+    service.observe("r0", [{"step": 1, "loss": 1.0}])
+    service.judge_due()
+    clock.now += 120
+    # Same metrics at a later step: the context hash ignores step counters.
+    service.observe("r1", [{"step": 7, "loss": 1.0}])
+    service.judge_due()
+    assert len(model.prompts) == 1
+    assert service.stats["cache_hits"] == 1
+    assert context_key([{"step": 1, "loss": 1.00001}]) == context_key([{"step": 9, "loss": 1.0}])
+
+
+def test_run_interval_limits_judging_per_run():
+    service, _, _, model, clock = _service(n_runs=1)
+    service.observe("r0", [{"step": 1, "loss": 1.0}])
+    service.judge_due()
+    service.observe("r0", [{"step": 2, "loss": 2.0}])
+    service.judge_due()
+    assert len(model.prompts) == 1
+    clock.now += 61
+    service.judge_due()
+    assert len(model.prompts) == 2
+
+
+def test_budgets_defer_runs_instead_of_dropping_them():
+    service, _, _, model, clock = _service(n_runs=4, max_calls_per_minute=1)
+    service.observe("r0", [{"step": 1, "loss": 1.0}])
+    service.judge_due()
+    service.observe("r1", [{"step": 1, "loss": 2.0}])
+    service.judge_due()  # call budget exhausted
+    assert len(model.prompts) == 1
+    assert service.summary()["due_runs"] == 1
+    clock.now += 60
+    service.judge_due()
+    assert len(model.prompts) == 2
+
+    small, _, _, small_model, _ = _service(n_runs=4, tokens_per_hour=400)
+    for i in range(4):
+        small.observe(f"r{i}", [{"step": 1, "loss": float(i), "lr": 0.001 * i}])
+    small.judge_due()
+    assert len(small_model.prompts) == 1
+    assert 0 < small.stats["deferred"] < 4
+    assert small.stats["tokens_spent"] <= 400
+
+
+def test_parse_batch_verdicts_defaults_to_ignore():
+    output = 'noise {"a": {"action": "alert", "message": "x"}, "b": "garbage"} trailing'
+    verdicts = parse_batch_verdicts(output, ["a", "b", "c"])
+    assert verdicts["a"]["action"] == "alert"
+    assert verdicts["b"] == {"action": "ignore"}
+    assert verdicts["c"] == {"action": "ignore"}
+    assert parse_batch_verdicts("not json", ["a"]) == {"a": {"action": "ignore"}}
@@ -0,0 +1,116 @@
+"""Tests for runs/anomaly.py — streaming anomaly detectors on ingested metrics."""
+
+import math
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "server"))
+
+from runs.anomaly import (
+    AnomalyEngine,
+    DivergenceDetector,
+    NonFiniteDetector,
+    PlateauDetector,
+    build_detectors,
+    decay_scan,
+    validate_detector_specs,
+)
+
+
+def _feed(engine_or_detector, rows, batch=37, run_id="r1", run=None):
+    found = []
+    for start in range(0, len(rows), batch):
+        chunk = rows[start:start + batch]
+        if isinstance(engine_or_detector, AnomalyEngine):
+            found += engine_or_detector.process(run_id, run or {}, chunk)
+        else:
+            found += engine_or_detector.update(chunk, [row.get("step") for row in chunk])
+    return found
+
+
+def _training_rows(n=1000, seed=0):
+    rng = np.random.default_rng(seed)
+    return [
+        {"step": i, "loss": 2.0 * math.exp(-i / 500) + 0.02 * rng.standard_normal(), "grad_norm": 1 + 0.1 * rng.random()}
+        for i in range(n)
+    ]
+
+
+def test_decay_scan_matches_loop():
+    x = np.random.default_rng(1).random(300)
+    expected, y = [], 0.3
+    for value in x:
+        y = 0.95 * y + value
+        expected.append(y)
+    assert np.allclose(decay_scan(x, 0.3, 0.95), expected)
+
+
+def test_healthy_run_raises_nothing():
+    assert _feed(AnomalyEngine({}), _training_rows()) == []
+
+
+def test_default_detectors_flag_spike_explosion_and_nan():
+    rows = _training_rows()
+    rows[700]["loss"] = 5.0
+    rows[800]["grad_norm"] = 50.0
+    rows[900]["loss"] = float("nan")
+    found = _feed(AnomalyEngine({}), rows)
+    assert [(a.detector, a.step) for a in found] == [
+        ("ewma_zscore", 700), ("grad_explosion", 800), ("nonfinite", 900),
+    ]
+    assert found[2].severity == "critical"
+
+
+def test_batch_size_does_not_change_results():
+    rows = _training_rows()
+    rows[650]["loss"] = 4.0
+    by_batch = {
+        size: [(a.detector, a.step) for a in _feed(AnomalyEngine({}), rows, batch=size)]
+        for size in (1, 10, 500)
+    }
+    assert by_batch[1] == by_batch[10] == by_batch[500] == [("ewma_zscore", 650)]
+
+
+def test_plateau_fires_once_per_stall():
+    detector = PlateauDetector(params={"patience": 100})
+    rows = [{"step": i, "loss": 1.0 if i < 50 else 0.5} for i in range(400)]
+    rows += [{"step": 400 + i, "loss": 0.1} for i in range(150)]
+    found = _feed(detector, rows, batch=30)
+    assert [a.step for a in found] == [150, 500]
+
+
+def test_nonfinite_rearms_once_the_value_is_finite_again():
+    losses = [1.0, math.nan, math.inf, math.nan, 0.9, 0.8, math.inf, 0.7]
+    rows = [{"step": i, "loss": loss} for i, loss in enumerate(losses)]
+    for batch in (1, 3, 8):
+        assert [a.step for a in _feed(NonFiniteDetector(), rows, batch=batch)] == [1, 6]
+
+
+def test_divergence_needs_val_rising_while_train_falls():
+    rows = []
+    for i in range(100):
+        row = {"step": i, "loss": 1 - i / 200}
+        if i % 10 == 0:
+            row["val_loss"] = 1 - i / 100 if i < 50 else 0.5 + (i - 50) / 50
+        rows.append(row)
+    found = _feed(DivergenceDetector(), rows, batch=7)
+    assert len(found) == 1 and found[0].step == 80
+
+
+def test_config_resolution_and_validation():
+    sweeps = {"s1": {"anomaly_detectors": [{"type": "plateau", "metric": "val_loss", "params": {"patience": 5}}]}}
+    engine = AnomalyEngine(sweeps)
+    assert engine.specs_for({"sweep_id": "s1"})[0]["type"] == "plateau"
+    assert engine.specs_for({"sweep_id": "s1", "anomaly_detectors": []}) == []
+    assert engine.specs_for({}) == engine.default_specs
+
+    rows = [{"step": i, "loss": float("inf")} for i in range(3)]
+    assert engine.process("r1", {"sweep_id": "s1"}, rows) == []  # the sweep set has no nonfinite detector
+
+    with pytest.raises(ValueError):
+        validate_detector_specs([{"type": "ewma_zscore", "params": {"treshold": 3}}])
+    with pytest.raises(ValueError):
+        build_detectors([{"type": "bogus"}])
@@ -0,0 +1,69 @@
+"""Tests for runs/artifact_manifest.py — cached, incrementally refreshed artifact listings."""
+
+import hashlib
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "server"))
+
+from runs import artifact_manifest
+from runs.artifact_manifest import ArtifactManifest, detect_type
+
+
+def test_detect_type():
+    assert detect_type("model.safetensors") == "checkpoint"
+    assert detect_type("checkpoint-500/optimizer.state") == "checkpoint"
+    assert detect_type("plots/loss.PNG") == "image"
+    assert detect_type("eval/results.parquet") == "table"
+    assert detect_type("notes.md") == "text"
+    assert detect_type("wandb/run-1/files/output.log") == "wandb"
+    assert detect_type("blob") == "other"
+
+
+def test_walks_links_and_keeps_unchanged_entries(tmp_path, monkeypatch):
+    run_dir = tmp_path / "run"
+    (run_dir / "artifacts" / "plots").mkdir(parents=True)
+    (run_dir / "artifacts" / "plots" / "loss.png").write_bytes(b"png")
+    ckpt_dir = tmp_path / "workdir" / "checkpoint-10"
+    ckpt_dir.mkdir(parents=True)
+    (ckpt_dir / "model.pt").write_bytes(b"x" * 100)
+    os.symlink(ckpt_dir, run_dir / "artifacts" / "ckpt")
+    os.symlink(run_dir / "artifacts", run_dir / "artifacts" / "loop")  # must not recurse forever
+
+    manifest = ArtifactManifest(str(run_dir))
+    assert manifest.refresh(max_age=0)
+    listing = {entry["name"]: entry for entry in manifest.listing()}
+    assert set(listing) == {"plots/loss.png", "ckpt/model.pt"}
+    assert listing["ckpt/model.pt"]["path"] == str(ckpt_dir / "model.pt")
+    assert listing["ckpt/model.pt"]["type"] == "checkpoint" and listing["ckpt/model.pt"]["size"] == 100
+    assert manifest.compute_hashes() == 2
+
+    # A fresh instance loads the saved manifest; only the modified file loses its hash.
+    (run_dir / "artifacts" / "plots" / "loss.png").write_bytes(b"png v2")
+    reopened = ArtifactManifest(str(run_dir))
+    stats = []
+    real_sha = artifact_manifest._sha256
+    monkeypatch.setattr(artifact_manifest, "_sha256", lambda path: stats.append(path) or real_sha(path))
+    assert reopened.refresh(max_age=0)
+    entries = {entry["name"]: entry for entry in reopened.listing()}
+    assert entries["ckpt/model.pt"]["sha256"] == hashlib.sha256(b"x" * 100).hexdigest()
+    assert entries["plots/loss.png"]["sha256"] is None and entries["plots/loss.png"]["size"] == 6
+    assert reopened.compute_hashes() == 1 and len(stats) == 1
+
+    saved = json.loads((run_dir / "artifact_manifest.json").read_text())
+    assert saved["entries"]["plots/loss.png"]["sha256"] == hashlib.sha256(b"png v2").hexdigest()
+    assert not reopened.refresh()  # within the refresh interval
+
+
+def test_hash_budget_and_removed_files(tmp_path):
+    artifacts = tmp_path / "artifacts"
+    artifacts.mkdir()
+    (artifacts / "small.txt").write_bytes(b"a" * 10)
+    (artifacts / "big.bin").write_bytes(b"b" * 1000)
+    manifest = ArtifactManifest(str(tmp_path))
+    manifest.refresh(max_age=0)
+    assert manifest.compute_hashes(max_bytes=100) == 1
+    (artifacts / "small.txt").unlink()
+    assert manifest.refresh(max_age=0)
+    assert [(e["name"], e["sha256"]) for e in manifest.listing()] == [("big.bin", None)]
@@ -0,0 +1,70 @@
+"""Tests for runs/blob_store.py — content-addressed artifact dedup across runs."""
+
+import os
+import shutil
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "server"))
+
+from runs.artifact_manifest import get_manifest
+from runs.blob_store import ArtifactDeduper, BlobStore, unshare_artifacts
+
+BASE = b"base checkpoint " * 200  # 3200 bytes
+
+
+def _run(tmp_path, run_id, files, ended_at=1000.0):
+    run_dir = tmp_path / "runs" / run_id
+    (run_dir / "artifacts").mkdir(parents=True)
+    for name, data in files.items():
+        (run_dir / "artifacts" / name).write_bytes(data)
+    return {"status": "finished", "run_dir": str(run_dir), "ended_at": ended_at}
+
+
+@pytest.fixture
+def deduper(tmp_path):
+    runs = {
+        "a": _run(tmp_path, "a", {"base.pt": BASE, "tiny.txt": b"t", "own.pt": b"a" * 2000}),
+        "b": _run(tmp_path, "b", {"base.pt": BASE, "tiny.txt": b"t"}),
+        "live": _run(tmp_path, "live", {"base.pt": BASE}),
+    }
+    runs["live"]["status"] = "running"
+    return ArtifactDeduper(runs, BlobStore(str(tmp_path / "blobs")), enabled=True, min_bytes=1000, settle_seconds=0)
+
+
+def test_identical_artifacts_share_one_blob(deduper, tmp_path):
+    assert deduper.run_due(now=2000.0) == 2
+    a_base = tmp_path / "runs" / "a" / "artifacts" / "base.pt"
+    b_base = tmp_path / "runs" / "b" / "artifacts" / "base.pt"
+    assert os.stat(a_base).st_ino == os.stat(b_base).st_ino and a_base.read_bytes() == BASE
+    assert os.stat(a_base).st_nlink == 3  # store + two runs
+    assert os.stat(tmp_path / "runs" / "live" / "artifacts" / "base.pt").st_nlink == 1
+    assert os.stat(tmp_path / "runs" / "a" / "artifacts" / "tiny.txt").st_nlink == 1  # below min_bytes
+
+    summary = deduper.store.summary()
+    assert summary["blobs"] == 2 and summary["saved_bytes"] == len(BASE)
+    assert deduper.stats["freed_bytes"] == len(BASE)
+    # Hashes survive the relink, and runs are not revisited until they end again.
+    entry = {e["name"]: e for e in get_manifest(str(tmp_path / "runs" / "b")).listing()}["base.pt"]
+    assert entry["sha256"] and entry["mtime_ns"] == os.stat(b_base).st_mtime_ns
+    assert deduper.run_due(now=3000.0) == 0
+
+
+def test_gc_drops_blobs_without_runs(deduper, tmp_path):
+    deduper.run_due(now=2000.0)
+    shutil.rmtree(tmp_path / "runs" / "a")
+    assert deduper.store.gc() == {"removed": 1, "freed_bytes": 2000}  # own.pt
+    shutil.rmtree(tmp_path / "runs" / "b")
+    assert deduper.store.gc()["removed"] == 1
+    assert deduper.store.summary()["blobs"] == 0
+
+
+def test_unshare_gives_private_writable_copies(deduper, tmp_path):
+    deduper.run_due(now=2000.0)
+    run_dir = tmp_path / "runs" / "b"
+    assert unshare_artifacts(str(run_dir)) == 1
+    path = run_dir / "artifacts" / "base.pt"
+    assert os.stat(path).st_nlink == 1 and path.read_bytes() == BASE
+    path.write_bytes(b"retrained")
+    assert (tmp_path / "runs" / "a" / "artifacts" / "base.pt").read_bytes() == BASE
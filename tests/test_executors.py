@@ -0,0 +1,161 @@
+"""Tests for runs/executors.py — executor routing and the direct-subprocess backend."""
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "server"))
+
+from core import config
+from runs.executors import ExecutorRegistry, RunExecutor, SubprocessExecutor
+
+
+class RecordingExecutor(RunExecutor):
+    def __init__(self, name):
+        self.name = name
+        self.calls = []
+
+    def launch(self, run_id, run_data):
+        self.calls.append(("launch", run_id))
+        run_data["status"] = "launching"
+
+    def stop(self, run_id, run_data):
+        self.calls.append(("stop", run_id))
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(config, "WORKDIR", str(tmp_path))
+    return tmp_path
+
+
+def _subprocess_harness():
+    statuses = []
+    runs = {}
+
+    def report(run_id, status, **fields):
+        statuses.append((status, fields))
+        runs[run_id]["status"] = status
+        runs[run_id].update(fields)
+
+    return SubprocessExecutor(report_status=report, stop_grace_seconds=0.5), runs, statuses
+
+
+async def _wait_for(predicate, timeout=10.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError("timed out waiting for condition")
+        await asyncio.sleep(0.02)
+
+
+class TestRegistry:
+    def test_routes_by_run_field_and_default(self):
+        registry = ExecutorRegistry(default_name="a")
+        a = registry.register(RecordingExecutor("a"))
+        b = registry.register(RecordingExecutor("b"))
+        run = {}
+        registry.launch("r1", run)
+        assert run["executor"] == "a"
+        registry.launch("r2", {"executor": "b"})
+        registry.stop("r1", run)
+        assert a.calls == [("launch", "r1"), ("stop", "r1")]
+        assert b.calls == [("launch", "r2")]
+
+    def test_legacy_tmux_runs_resolve_to_tmux(self):
+        registry = ExecutorRegistry(default_name="subprocess")
+        tmux = registry.register(RecordingExecutor("tmux"))
+        registry.register(RecordingExecutor("subprocess"))
+        assert registry.resolve({"tmux_window": "ra-1234"}) is tmux
+
+    def test_unknown_executor(self):
+        registry = ExecutorRegistry(default_name="tmux")
+        with pytest.raises(ValueError):
+            registry.resolve({"executor": "nope"})
+
+
+class TestSubprocessExecutor:
+    @pytest.mark.asyncio
+    async def test_captures_output_and_exit_code(self, data_dir):
+        executor, runs, statuses = _subprocess_harness()
+        runs["r1"] = {"command": "echo hello; echo oops >&2; exit 3", "workdir": str(data_dir)}
+        executor.launch("r1", runs["r1"])
+        await _wait_for(lambda: runs["r1"]["status"] == "failed")
+
+        assert [s for s, _ in statuses] == ["running", "failed"]
+        assert runs["r1"]["exit_code"] == 3
+        run_dir = runs["r1"]["run_dir"]
+        with open(os.path.join(run_dir, "run.log")) as f:
+            assert f.read().split() == ["hello", "oops"]
+        with open(os.path.join(run_dir, "job.done")) as f:
+            assert f.read() == "3"
+
+    @pytest.mark.asyncio
+    async def test_success_sets_wandb_env(self, data_dir):
+        executor, runs, _ = _subprocess_harness()
+        runs["r1"] = {"command": 'echo "$WANDB_RUN_ID"', "workdir": str(data_dir)}
+        executor.launch("r1", runs["r1"])
+        await _wait_for(lambda: runs["r1"]["status"] == "finished")
+        with open(os.path.join(runs["r1"]["run_dir"], "run.log")) as f:
+            assert f.read().strip() == "r1"
+
+    @pytest.mark.asyncio
+    async def test_output_is_normalized_on_capture(self, data_dir):
+        executor, runs, _ = _subprocess_harness()
+        runs["r1"] = {"command": r"printf '\033[32m0%%\r50%%\r100%%\033[0m\n'", "workdir": str(data_dir)}
+        executor.launch("r1", runs["r1"])
+        await _wait_for(lambda: runs["r1"]["status"] == "finished")
+        with open(os.path.join(runs["r1"]["run_dir"], "run.log")) as f:
+            assert f.read() == "100%\n"
+
+    @pytest.mark.asyncio
+    async def test_stop_kills_process_group_without_reporting(self, data_dir):
+        executor, runs, statuses = _subprocess_harness()
+        runs["r1"] = {"command": "sleep 30 & sleep 30; wait", "workdir": str(data_dir)}
+        executor.launch("r1", runs["r1"])
+        await _wait_for(lambda: runs["r1"]["status"] == "running")
+        pid = runs["r1"]["pid"]
+
+        executor.stop("r1", runs["r1"])
+        runs["r1"]["status"] = "stopped"
+        await _wait_for(lambda: _group_gone(pid))
+        await asyncio.sleep(0.05)
+        assert [s for s, _ in statuses] == ["running"]
+        assert not os.path.exists(os.path.join(runs["r1"]["run_dir"], "job.done"))
+
+    @pytest.mark.asyncio
+    async def test_recovers_runs_left_by_a_previous_server(self, data_dir):
+        executor, runs, statuses = _subprocess_harness()
+        runs["r1"] = {"command": "sleep 0.3; exit 4", "workdir": str(data_dir), "executor": "subprocess"}
+        executor.launch("r1", runs["r1"])
+        await _wait_for(lambda: runs["r1"]["status"] == "running")
+        executor._tasks.pop("r1").cancel()  # the supervising server went away
+        assert executor.recover_orphans(runs) == 0  # still alive
+
+        exit_file = os.path.join(runs["r1"]["run_dir"], "job.exit")
+        await _wait_for(lambda: os.path.exists(exit_file) and not executor._pid_alive(runs["r1"]["pid"]))
+        assert executor.recover_orphans(runs) == 1
+        assert statuses[-1] == ("failed", {"exit_code": 4})
+        with open(os.path.join(runs["r1"]["run_dir"], "job.done")) as f:
+            assert f.read() == "4"
+
+        runs["r2"] = {"status": "running", "executor": "subprocess", "pid": 2 ** 22 + 12345,
+                      "run_dir": str(data_dir / "gone")}
+        assert executor.recover_orphans(runs) == 1
+        assert runs["r2"]["status"] == "failed" and "not supervising" in runs["r2"]["error"]
+
+    def test_requires_event_loop(self, data_dir):
+        executor, _, _ = _subprocess_harness()
+        with pytest.raises(RuntimeError):
+            executor.launch("r1", {"command": "true"})
+
+
+def _group_gone(pgid):
+    try:
+        os.killpg(pgid, 0)
+    except ProcessLookupError:
+        return True
+    return False
@@ -0,0 +1,140 @@
+"""Tests for runs/gpu_scheduler.py — bin-packing placement and the reservation ledger."""
+
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "server"))
+
+from runs.gpu_scheduler import GpuPlacementError, GpuScheduler
+
+
+class FakeNvmlProvider:
+    """Stands in for NVML: returns whatever device rows the test sets."""
+
+    def __init__(self, devices):
+        self.devices = devices
+
+    def list_devices(self):
+        return [dict(d) for d in self.devices]
+
+
+def _gpu(index, total=80000, used=0, processes=0):
+    return {
+        "index": index,
+        "uuid": f"GPU-{index}",
+        "name": "Fake A100",
+        "memory_total_mb": total,
+        "memory_used_mb": used,
+        "utilization_gpu": 0,
+        "process_count": processes,
+    }
+
+
+class TestExclusivePlacement:
+    def test_skips_busy_devices(self):
+        sched = GpuScheduler(FakeNvmlProvider([_gpu(0, processes=1), _gpu(1), _gpu(2)]))
+        placement = sched.reserve("run-a", gpu_count=1)
+        assert placement["devices"] == [1]
+        assert placement["cuda_visible_devices"] == "1"
+
+    def test_concurrent_launches_never_share(self):
+        sched = GpuScheduler(FakeNvmlProvider([_gpu(0), _gpu(1)]))
+        assert sched.reserve("run-a")["devices"] == [0]
+        assert sched.reserve("run-b")["devices"] == [1]
+        with pytest.raises(GpuPlacementError):
+            sched.reserve("run-c")
+
+    def test_multi_gpu_request(self):
+        sched = GpuScheduler(FakeNvmlProvider([_gpu(i) for i in range(4)]))
+        placement = sched.reserve("run-a", gpu_count=3)
+        assert placement["cuda_visible_devices"] == "0,1,2"
+        with pytest.raises(GpuPlacementError):
+            sched.reserve("run-b", gpu_count=2)
+
+    def test_fits_counts_devices_freed_by_preemption(self):
+        provider = FakeNvmlProvider([_gpu(0), _gpu(1)])
+        sched = GpuScheduler(provider)
+        sched.reserve("victim", gpu_count=2)
+        provider.devices = [_gpu(0, used=70000, processes=1), _gpu(1, used=70000, processes=1)]
+        assert not sched.fits(gpu_count=1)
+        assert sched.fits(gpu_count=2, freed_run_ids=("victim",))
+        assert not sched.fits(gpu_count=3, freed_run_ids=("victim",))
+        assert sched.fits(min_free_memory_mb=40000, freed_run_ids=("victim",))
+
+    def test_release_frees_devices(self):
+        sched = GpuScheduler(FakeNvmlProvider([_gpu(0)]))
+        sched.reserve("run-a")
+        assert sched.release("run-a") is True
+        assert sched.reserve("run-b")["devices"] == [0]
+        assert sched.release("missing") is False
+
+    def test_reserve_is_idempotent_per_run(self):
+        sched = GpuScheduler(FakeNvmlProvider([_gpu(0), _gpu(1)]))
+        first = sched.reserve("run-a")
+        assert sched.reserve("run-a")["devices"] == first["devices"]
+        assert sched.reserve("run-b")["devices"] == [1]
+
+    def test_no_gpus_means_no_pinning(self):
+        sched = GpuScheduler(FakeNvmlProvider([]))
+        assert sched.reserve("run-a") is None
+
+    def test_threads_race_for_one_device(self):
+        sched = GpuScheduler(FakeNvmlProvider([_gpu(0)]))
+        results = []
+
+        def worker(run_id):
+            try:
+                results.append(sched.reserve(run_id)["devices"])
+            except GpuPlacementError:
+                results.append(None)
+
+        threads = [threading.Thread(target=worker, args=(f"run-{i}",)) for i in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert results.count([0]) == 1
+
+
+class TestSharedPlacement:
+    def test_best_fit_packs_tightest_device(self):
+        devices = [_gpu(0, total=80000, used=10000), _gpu(1, total=24000, used=4000, processes=1)]
+        sched = GpuScheduler(FakeNvmlProvider(devices))
+        placement = sched.reserve("small", min_free_memory_mb=16000)
+        assert placement["devices"] == [1]
+
+    def test_ledger_counts_unallocated_reservations(self):
+        sched = GpuScheduler(FakeNvmlProvider([_gpu(0, total=40000)]))
+        sched.reserve("a", min_free_memory_mb=30000)
+        # NVML still reports 0 MB used, but the ledger holds 30 GB.
+        with pytest.raises(GpuPlacementError):
+            sched.reserve("b", min_free_memory_mb=20000)
+        assert sched.reserve("c", min_free_memory_mb=10000)["devices"] == [0]
+
+    def test_shared_and_exclusive_do_not_mix(self):
+        sched = GpuScheduler(FakeNvmlProvider([_gpu(0)]))
+        sched.reserve("shared", min_free_memory_mb=1000)
+        with pytest.raises(GpuPlacementError):
+            sched.reserve("exclusive")
+
+
+class TestRestoreAndSnapshot:
+    def test_rebuild_from_active_runs(self):
+        sched = GpuScheduler(FakeNvmlProvider([_gpu(0), _gpu(1)]))
+        runs = {
+            "live": {"status": "running", "gpu_reservation": {"devices": [0], "exclusive": True}},
+            "done": {"status": "finished", "gpu_reservation": {"devices": [1], "exclusive": True}},
+        }
+        sched.rebuild_from_runs(runs, {"launching", "running"})
+        assert sched.reserve("new")["devices"] == [1]
+
+    def test_snapshot_lists_reservations(self):
+        sched = GpuScheduler(FakeNvmlProvider([_gpu(0)]))
+        sched.reserve("run-a", min_free_memory_mb=5000)
+        snap = sched.snapshot()
+        assert snap["devices"][0]["reserved_memory_mb"] == 5000
+        assert snap["devices"][0]["reservations"][0]["run_id"] == "run-a"
+        assert "run-a" in snap["assignments"]
@@ -0,0 +1,245 @@
+"""Tests for runs/launch_queue.py — priority classes, fair share, preemption and ETAs."""
+
+import contextlib
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "server"))
+
+from runs.gpu_scheduler import GpuPlacementError
+from runs.launch_queue import LaunchQueue, priority_class_for
+
+
+def _queued(created_at, **fields):
+    return {"status": "queued", "created_at": created_at, "queued_at": created_at, **fields}
+
+
+def _launch(run_id, run):
+    run["status"] = "launching"
+    run["launched_at"] = time.time()
+
+
+def _make_queue(runs, sweeps=None, **kwargs):
+    launched = []
+
+    def launch(run_id, run):
+        _launch(run_id, run)
+        launched.append(run_id)
+
+    queue = LaunchQueue(runs, sweeps or {}, launch_fn=launch, **kwargs)
+    return queue, launched
+
+
+class TestPriorityClass:
+    def test_inference(self):
+        assert priority_class_for({}) == "interactive"
+        assert priority_class_for({"chat_session_id": "c1"}) == "agent"
+        assert priority_class_for({"sweep_id": "s1", "chat_session_id": "c1"}) == "sweep"
+        assert priority_class_for({"sweep_id": "s1"}, {"s1": {"priority_class": "background"}}) == "background"
+        assert priority_class_for({"priority_class": "interactive", "sweep_id": "s1"}) == "interactive"
+
+
+class TestDispatch:
+    def test_respects_max_concurrent(self):
+        runs = {f"r{i}": _queued(i) for i in range(4)}
+        queue, launched = _make_queue(runs, max_concurrent=2)
+        assert queue.dispatch()["launched"] == ["r0", "r1"]
+        assert queue.dispatch()["launched"] == []
+        runs["r0"]["status"] = "finished"
+        assert queue.dispatch()["launched"] == ["r2"]
+
+    def test_unlimited_by_default_and_cluster_runs_take_no_slot(self):
+        runs = {f"r{i}": _queued(i) for i in range(8)}
+        queue, launched = _make_queue(runs, max_concurrent=0)
+        assert len(queue.dispatch()["launched"]) == 8
+
+        runs = {"local": _queued(0), "slurm-a": _queued(1, executor="slurm"), "slurm-b": _queued(2, executor="slurm"),
+                "local2": _queued(3)}
+        runs["busy-slurm"] = {"status": "running", "executor": "slurm", "launched_at": 1}
+        queue, launched = _make_queue(runs, max_concurrent=1, slot_fn=lambda run: run.get("executor") != "slurm")
+        assert sorted(queue.dispatch()["launched"]) == ["local", "slurm-a", "slurm-b"]
+        assert queue.summary()["active"] == 4 and queue.estimate()["local2"]["queue_position"] == 1
+
+    def test_interactive_beats_big_sweep(self):
+        runs = {f"sweep-{i}": _queued(i, sweep_id="s1") for i in range(200)}
+        runs["debug"] = _queued(500)
+        queue, launched = _make_queue(runs, {"s1": {}}, max_concurrent=1)
+        queue.dispatch()
+        assert launched == ["debug"]
+
+    def test_fair_share_between_sweeps(self):
+        runs = {f"a{i}": _queued(i, sweep_id="A") for i in range(10)}
+        runs.update({f"b{i}": _queued(100 + i, sweep_id="B") for i in range(2)})
+        queue, launched = _make_queue(runs, {"A": {}, "B": {}}, max_concurrent=4)
+        queue.dispatch()
+        assert sorted(launched) == ["a0", "a1", "b0", "b1"]
+
+    def test_share_weight(self):
+        runs = {f"a{i}": _queued(i, sweep_id="A") for i in range(10)}
+        runs.update({f"b{i}": _queued(i + 0.5, sweep_id="B") for i in range(10)})
+        queue, launched = _make_queue(runs, {"A": {"share_weight": 3}, "B": {}}, max_concurrent=4)
+        queue.dispatch()
+        assert sum(1 for r in launched if r.startswith("a")) == 3
+
+    def test_sweep_parallel_cap(self):
+        runs = {f"a{i}": _queued(i, sweep_id="A") for i in range(5)}
+        queue, launched = _make_queue(runs, {"A": {"parallel": 2}}, max_concurrent=5)
+        queue.dispatch()
+        assert launched == ["a0", "a1"]
+
+    def test_gpu_blocked_run_stays_queued_and_others_backfill(self):
+        runs = {"big": _queued(0), "small": _queued(1)}
+
+        def launch(run_id, run):
+            if run_id == "big":
+                raise GpuPlacementError("Need 8 GPU(s)")
+            _launch(run_id, run)
+
+        queue = LaunchQueue(runs, {}, launch_fn=launch, max_concurrent=4)
+        result = queue.dispatch()
+        assert result["launched"] == ["small"]
+        assert "big" in result["blocked"]
+        assert runs["big"]["status"] == "queued"
+        assert runs["big"]["queue_blocked_reason"] == "Need 8 GPU(s)"
+
+    def test_non_gpu_launch_failure_fails_the_run(self):
+        runs = {"bad": _queued(0), "good": _queued(1)}
+        attempts, failed = [], []
+
+        def launch(run_id, run):
+            attempts.append(run_id)
+            if run_id == "bad":
+                raise FileNotFoundError("No such workdir: /nope")
+            _launch(run_id, run)
+
+        queue = LaunchQueue(runs, {}, launch_fn=launch, max_concurrent=4,
+                            on_failed=lambda run_id, run: failed.append(run_id))
+        result = queue.dispatch()
+        assert result["launched"] == ["good"] and result["failed"] == {"bad": "No such workdir: /nope"}
+        assert runs["bad"]["status"] == "failed" and runs["bad"]["error"] == "No such workdir: /nope"
+        assert "queue_blocked_reason" not in runs["bad"] and failed == ["bad"]
+        queue.dispatch()
+        assert attempts == ["bad", "good"]  # not retried
+
+
+class TestPreemption:
+    def test_preempts_lower_class(self):
+        runs = {
+            "sweep-old": {"status": "running", "sweep_id": "s1", "launched_at": 1},
+            "sweep-new": {"status": "running", "sweep_id": "s1", "launched_at": 2},
+            "debug": _queued(3),
+        }
+        stopped = []
+        queue, launched = _make_queue(
+            runs, {"s1": {}}, max_concurrent=2, preemption_enabled=True,
+            stop_fn=lambda run_id, run: stopped.append(run_id),
+        )
+        result = queue.dispatch()
+        assert stopped == ["sweep-new"]
+        assert result["preempted"] == ["sweep-new"]
+        assert launched == ["debug"]
+        assert runs["sweep-new"]["status"] == "queued"
+        assert runs["sweep-new"]["preempt_count"] == 1
+
+    def test_no_preemption_when_disabled_or_same_class(self):
+        runs = {"a": {"status": "running", "launched_at": 1}, "b": _queued(2)}
+        stopped = []
+        queue, launched = _make_queue(
+            runs, max_concurrent=1, preemption_enabled=True,
+            stop_fn=lambda run_id, run: stopped.append(run_id),
+        )
+        queue.dispatch()
+        assert stopped == [] and launched == []
+
+    def test_only_preempts_a_victim_whose_gpus_make_room(self):
+        runs = {
+            "cpu-sweep": {"status": "running", "sweep_id": "s1", "launched_at": 2},
+            "gpu-sweep": {"status": "running", "sweep_id": "s1", "launched_at": 1},
+            "debug": _queued(3),
+        }
+        stopped = []
+        queue, launched = _make_queue(
+            runs, {"s1": {}}, max_concurrent=2, preemption_enabled=True,
+            stop_fn=lambda run_id, run: stopped.append(run_id),
+            fits_fn=lambda run_id, run, freed: freed == ("gpu-sweep",),
+        )
+        assert queue.dispatch()["preempted"] == ["gpu-sweep"]  # not the younger CPU-only run
+        assert stopped == ["gpu-sweep"] and launched == ["debug"]
+
+        runs["debug2"] = _queued(4)  # only cpu-sweep is left to preempt, and it frees no GPUs
+        assert queue.dispatch()["preempted"] == []
+        assert stopped == ["gpu-sweep"] and "debug2" not in launched
+
+    def test_victim_is_untouched_when_the_preemptor_cannot_launch(self):
+        runs = {"sweep": {"status": "running", "sweep_id": "s1", "launched_at": 1},
+                "debug": _queued(2), "broken": _queued(3, executor="nope")}
+        stopped, batching, preempted = [], [], []
+
+        @contextlib.contextmanager
+        def batch():
+            batching.append(True)
+            yield
+            batching.pop()
+
+        def launch(run_id, run):
+            assert not batching  # preemptor launches are never deferred
+            raise GpuPlacementError("Need 8 GPU(s)")
+
+        def prepare(run_id, run):
+            if run.get("executor") == "nope":
+                raise ValueError("Unknown executor 'nope'")
+
+        queue = LaunchQueue(runs, {"s1": {}}, launch_fn=launch, stop_fn=lambda run_id, run: stopped.append(run_id),
+                            prepare_fn=prepare, batch_fn=batch, max_concurrent=1, preemption_enabled=True,
+                            on_preempted=lambda *args: preempted.append(args))
+        result = queue.dispatch()
+        assert "debug" in result["blocked"] and result["failed"] == {"broken": "Unknown executor 'nope'"}
+        assert result["preempted"] == [] and stopped == [] and preempted == []
+        assert runs["sweep"]["status"] == "running" and runs["broken"]["status"] == "failed"
+
+    def test_victim_is_relaunched_when_the_preemptor_fails_after_the_stop(self):
+        runs = {"sweep": {"status": "running", "sweep_id": "s1", "launched_at": 1}, "debug": _queued(2)}
+        stopped, relaunched, preempted = [], [], []
+
+        def launch(run_id, run):
+            if run_id == "debug":
+                raise GpuPlacementError("GPUs taken meanwhile")
+            _launch(run_id, run)
+            relaunched.append(run_id)
+
+        queue = LaunchQueue(runs, {"s1": {}}, launch_fn=launch, stop_fn=lambda run_id, run: stopped.append(run_id),
+                            fits_fn=lambda run_id, run, freed: freed == ("sweep",),
+                            max_concurrent=1, preemption_enabled=True,
+                            on_preempted=lambda *args: preempted.append(args))
+        result = queue.dispatch()
+        assert stopped == ["sweep"] and relaunched == ["sweep"]
+        assert result["preempted"] == [] and result["launched"] == ["sweep"] and "debug" in result["blocked"]
+        assert runs["sweep"]["status"] == "launching" and "preempt_count" not in runs["sweep"]
+        assert preempted == []
+
+
+class TestEstimates:
+    def test_positions_and_eta(self):
+        now = time.time()
+        runs = {
+            "done": {"status": "finished", "started_at": now - 200, "ended_at": now - 100},
+            "live": {"status": "running", "started_at": now - 40},
+            "q1": _queued(1),
+            "q2": _queued(2),
+        }
+        queue, _ = _make_queue(runs, max_concurrent=1)
+        estimates = queue.estimate()
+        assert estimates["q1"]["queue_position"] == 1
+        assert estimates["q2"]["queue_position"] == 2
+        assert abs(estimates["q1"]["estimated_start_at"] - (now + 60)) < 2
+        assert abs(estimates["q2"]["estimated_start_at"] - (now + 160)) < 2
+
+    def test_snapshot_lists_queue_in_order(self):
+        runs = {"q1": _queued(1, sweep_id="s1"), "q2": _queued(2)}
+        queue, _ = _make_queue(runs, {"s1": {}}, max_concurrent=1)
+        runs["busy"] = {"status": "running", "started_at": time.time()}
+        snap = queue.snapshot()
+        assert [row["id"] for row in snap["queue"]] == ["q2", "q1"]
+        assert snap["by_class"]["interactive"]["queued"] == 1
+        assert snap["max_concurrent"] == 1
@@ -0,0 +1,86 @@
+"""Tests for tools/log_filter.py — CR/ANSI normalization of captured job output."""
+
+import gzip
+import os
+import subprocess
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "server"))
+
+from tools import log_filter as log_filter_module
+from tools.log_filter import LogFilter, filter_argv, normalize_line
+
+
+def _filter(*chunks, max_repeats=3):
+    log_filter = LogFilter(max_repeats=max_repeats)
+    out = b"".join(log_filter.feed(chunk) for chunk in chunks) + log_filter.close()
+    return out.decode()
+
+
+def test_normalize_line_collapses_redraws_and_strips_escapes():
+    assert normalize_line(b" 10%|#   | 1/10\r 50%|#####| 5/10\r100%|##########| 10/10") == "100%|##########| 10/10".encode()
+    assert normalize_line(b"\x1b[1;32mOK\x1b[0m \x1b]0;title\x07done") == b"OK done"
+    assert normalize_line(b"loss 12345\rloss 9") == b"loss 92345"  # shorter redraw overwrites in place
+    assert normalize_line(b"abc\b\bX\x00\x07y\tz") == b"aXy\tz"
+
+
+def test_progress_bar_split_across_chunks_keeps_only_final_state():
+    frames = [f"\r{i:3d}%|{'#' * (i // 10):<10}|".encode() for i in range(0, 101, 5)]
+    chunks = [b"epoch 1\n"] + frames + [b"\r\n", b"epoch 2\r\n"]
+    assert _filter(*chunks) == "epoch 1\n100%|##########|\nepoch 2\n"
+
+
+def test_unterminated_redraws_keep_the_carry_bounded():
+    log_filter = LogFilter()
+    for i in range(10000):
+        assert log_filter.feed(f"\rstep {i:05d}".encode()) == b""
+    assert len(log_filter._pending) < 64
+    assert log_filter.close() == b"step 09999\n"
+
+
+def test_flush_partial_shows_an_unfinished_bar_once():
+    log_filter = LogFilter()
+    assert log_filter.feed(b"epoch 1\n\r 10%|#") == b"epoch 1\n"
+    assert log_filter.flush_partial() == b" 10%|#\n"
+    assert log_filter.flush_partial() == b""  # unchanged since
+    assert log_filter.feed(b"\r 50%|#####") == b""
+    assert log_filter.flush_partial() == b" 50%|#####\n"
+    assert log_filter.feed(b"\n") == b""  # the finished line was already written
+    assert log_filter.feed(b"\r100%\nnext\n") == b"100%\nnext\n"
+
+
+def test_run_writes_pending_bar_after_an_idle_interval(tmp_path, monkeypatch):
+    monkeypatch.setattr(log_filter_module, "PARTIAL_LINE_SECONDS", 0.2)
+    log = tmp_path / "run.log"
+    read_fd, write_fd = os.pipe()
+    thread = threading.Thread(target=log_filter_module.run, args=(read_fd, str(log)))
+    thread.start()
+    try:
+        os.write(write_fd, b"\r 30%|###")
+        deadline = time.time() + 5
+        while (not log.exists() or not log.read_bytes()) and time.time() < deadline:
+            time.sleep(0.02)
+        assert log.read_text() == " 30%|###\n"
+    finally:
+        os.write(write_fd, b"\r100%|##########\n")
+        os.close(write_fd)
+        thread.join(5)
+        os.close(read_fd)
+    assert log.read_text() == " 30%|###\n100%|##########\n"
+
+
+def test_repeated_lines_are_summarized():
+    out = _filter(b"start\n" + b"same\n" * 10 + b"end\n" + b"x\n" * 2, max_repeats=2)
+    assert out == "start\nsame\nsame\n[previous line repeated 8 more times]\nend\nx\nx\n"
+
+
+def test_filter_process_appends_and_keeps_raw(tmp_path):
+    log, raw = tmp_path / "run.log", tmp_path / "run.raw.log.gz"
+    log.write_text("earlier\n")
+    data = b"\x1b[31mred\x1b[0m\n 0%\r100%\n"
+    subprocess.run(filter_argv(str(log), str(raw)), input=data, check=True, timeout=30)
+    assert log.read_text() == "earlier\nred\n100%\n"
+    with gzip.open(raw) as f:
+        assert f.read() == data
@@ -0,0 +1,60 @@
+"""Tests for runs/log_index.py — the .lidx line index behind line-based log pagination."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "server"))
+
+from runs.log_index import LineIndex
+
+
+def _lines(index, log, start, count):
+    bounds = index.boundaries(start, count)
+    data = log.read_bytes()
+    return [data[int(a):int(b)].decode() for a, b in zip(bounds[:-1], bounds[1:])]
+
+
+def test_index_matches_splitlines_and_grows_incrementally(tmp_path, monkeypatch):
+    monkeypatch.setattr("runs.log_index.SCAN_CHUNK_BYTES", 64)  # force chunk boundaries
+    log = tmp_path / "run.log"
+    text = "".join(f"step {i} loss → {1 / (i + 1):.4f}\n" for i in range(500))
+    log.write_text(text)
+    index = LineIndex(str(log))
+    index.refresh()
+    assert index.total_lines() == 500
+    assert _lines(index, log, 250, 3) == text.splitlines(keepends=True)[250:253]
+
+    with open(log, "a") as f:
+        f.write("step 500 loss 0.1\npartial")
+    index.refresh()
+    assert index.total_lines() == 502
+    assert _lines(index, log, 500, 10) == ["step 500 loss 0.1\n", "partial"]
+    assert os.path.getsize(str(log) + ".lidx") == 16 + 8 * 501
+
+
+def test_index_is_reused_across_instances_and_rebuilt_when_log_shrinks(tmp_path):
+    log = tmp_path / "run.log"
+    log.write_text("a\nb\nc\n")
+    LineIndex(str(log)).refresh()
+
+    reopened = LineIndex(str(log))
+    reopened.refresh()
+    assert reopened.lines == 3 and _lines(reopened, log, 1, 1) == ["b\n"]
+
+    log.write_text("x\n")
+    reopened.refresh()
+    assert reopened.total_lines() == 1 and _lines(reopened, log, 0, 5) == ["x\n"]
+
+
+def test_boundaries_clamp_to_the_log(tmp_path):
+    log = tmp_path / "run.log"
+    log.write_text("a\nb\n")
+    index = LineIndex(str(log))
+    index.refresh()
+    assert _lines(index, log, 0, 100) == ["a\n", "b\n"]
+    assert _lines(index, log, 5, 10) == []
+    assert list(index.boundaries(0, 0)) == [0]
+
+    empty = LineIndex(str(tmp_path / "missing.log"))
+    empty.refresh()
+    assert empty.total_lines() == 0 and list(empty.boundaries(0, 10)) == [0]
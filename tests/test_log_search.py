@@ -0,0 +1,53 @@
+"""Tests for runs/log_search.py — mmap log scanning with line numbers from the line index."""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "server"))
+
+from runs.log_search import build_matcher, scan_log
+
+
+@pytest.fixture
+def log(tmp_path):
+    path = tmp_path / "run.log"
+    lines = [f"step {i} loss 0.{i:03d}" for i in range(1000)]
+    lines[10] = "RuntimeError: CUDA error: out of memory"
+    lines[500] = "warning: cuda error recovered, CUDA error again"
+    lines[999] = "final CUDA error"  # no trailing newline
+    path.write_text("\n".join(lines))
+    return path
+
+
+def test_literal_search_reports_line_and_offsets(log):
+    matches = scan_log(str(log), build_matcher("CUDA error"), 10)
+    assert [m["line"] for m in matches] == [10, 500, 999]  # one result per line
+    data = log.read_bytes()
+    for m in matches:
+        assert data[m["offset"]:].split(b"\n", 1)[0].decode() == m["text"]
+        assert data[m["match_offset"]:].startswith(b"CUDA error")
+
+
+def test_regex_ignore_case_and_anchors(log):
+    assert [m["line"] for m in scan_log(str(log), build_matcher("cuda error", ignore_case=True), 10)] == [10, 500, 999]
+    anchored = scan_log(str(log), build_matcher(r"^step 99\d ", regex=True), 100)
+    assert [m["line"] for m in anchored] == list(range(990, 999))
+    with pytest.raises(ValueError):
+        build_matcher("([", regex=True)
+
+
+def test_limit_and_resume_after_offset(log):
+    first = scan_log(str(log), build_matcher("CUDA error"), 2)
+    assert [m["line"] for m in first] == [10, 500]
+    rest = scan_log(str(log), build_matcher("CUDA error"), 2, after_offset=first[-1]["offset"])
+    assert [m["line"] for m in rest] == [999]
+
+
+def test_search_sees_appended_lines(log):
+    matcher = build_matcher("NaN")
+    assert scan_log(str(log), matcher, 10) == []
+    with open(log, "a") as f:
+        f.write("\nloss is NaN\n")
+    assert [m["line"] for m in scan_log(str(log), matcher, 10)] == [1000]
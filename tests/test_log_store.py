@@ -0,0 +1,94 @@
+"""Tests for runs/log_store.py — seekable compressed logs of finished runs."""
+
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "server"))
+
+from runs import log_store
+from runs.log_index import LineIndex
+from runs.log_search import build_matcher, scan_log
+from runs.log_store import LogCompactor, compress_log, iter_chunks, read_range, restore_log, stat_log
+
+
+@pytest.fixture
+def log(tmp_path):
+    path = tmp_path / "run.log"
+    lines = [f"step {i} loss {1 / (i + 1):.6f} → ok" for i in range(5000)]
+    lines[1234] = "RuntimeError: CUDA error: out of memory"
+    path.write_text("\n".join(lines) + "\npartial")
+    return path
+
+
+def test_range_reads_match_the_original_across_frames(log):
+    original = log.read_bytes()
+    inode = os.stat(log).st_ino
+    result = compress_log(str(log), frame_bytes=4096)
+    assert not log.exists() and result["compressed_size"] < len(original) / 3
+
+    assert stat_log(str(log)) == (inode, len(original))
+    for offset, length in [(0, 100), (4090, 20), (1000, 50000), (len(original) - 10, 100), (len(original) + 5, 10)]:
+        assert read_range(str(log), offset, length) == original[offset:offset + length]
+    chunks = list(iter_chunks(str(log), 5000))
+    assert b"".join(data for _, data in chunks) == original[5000:]
+    # Frames end on line boundaries, so every chunk after the first starts a line.
+    assert all(original[pos - 1:pos] == b"\n" for pos, _ in chunks[1:])
+
+
+def test_line_index_and_search_survive_compression(log):
+    index = LineIndex(str(log))
+    index.refresh()
+    before = scan_log(str(log), build_matcher("CUDA error"), 10)
+    resumed = scan_log(str(log), build_matcher("step 12"), 5, after_offset=before[0]["offset"])
+    assert [m["line"] for m in resumed] == [1235, 1236, 1237, 1238, 1239]
+    lines_before = index.total_lines()
+    index_size = os.path.getsize(str(log) + ".lidx")
+
+    compress_log(str(log), frame_bytes=4096)
+    reopened = LineIndex(str(log))
+    reopened.refresh()
+    assert reopened.total_lines() == lines_before
+    assert os.path.getsize(str(log) + ".lidx") == index_size  # reused, not rebuilt
+    assert scan_log(str(log), build_matcher("CUDA error"), 10) == before
+    assert [m["line"] for m in scan_log(str(log), build_matcher(r"^step 49\d\d ", regex=True), 3)] == [4900, 4901, 4902]
+    assert scan_log(str(log), build_matcher("step 12"), 5, after_offset=before[0]["offset"]) == resumed
+
+
+def test_compactor_only_compresses_old_finished_logs(tmp_path):
+    now = time.time()
+    runs = {}
+    for rid, status, age in [("old", "finished", 3600), ("recent", "failed", 10), ("live", "running", 3600)]:
+        run_dir = tmp_path / rid
+        run_dir.mkdir()
+        (run_dir / "run.log").write_text("x" * 5000 + "\n")
+        os.utime(run_dir / "run.log", (now - age, now - age))
+        runs[rid] = {"status": status, "run_dir": str(run_dir), "ended_at": now - age}
+    compactor = LogCompactor(runs, min_age_seconds=600, min_bytes=1000)
+    assert compactor.compact_due(now) == 1
+    assert (tmp_path / "old" / "run.log.zf").exists() and not (tmp_path / "old" / "run.log").exists()
+    assert (tmp_path / "recent" / "run.log").exists() and (tmp_path / "live" / "run.log").exists()
+    assert compactor.stats["bytes_after"] < compactor.stats["bytes_before"]
+
+    assert restore_log(str(tmp_path / "old" / "run.log"))
+    assert (tmp_path / "old" / "run.log").read_text() == "x" * 5000 + "\n"
+    assert not (tmp_path / "old" / "run.log.zf").exists()
+
+
+def test_log_that_changes_during_compression_is_kept(log, monkeypatch):
+    real_stat = os.stat
+    calls = []
+
+    def growing_stat(path, *args, **kwargs):
+        if str(path) == str(log):
+            calls.append(path)
+            if len(calls) == 2:
+                with open(log, "a") as f:
+                    f.write("late line\n")
+        return real_stat(path, *args, **kwargs)
+
+    monkeypatch.setattr(log_store.os, "stat", growing_stat)
+    assert compress_log(str(log)) is None
+    assert log.exists() and not os.path.exists(str(log) + ".zf")
@@ -0,0 +1,122 @@
+"""Tests for runs/log_tailer.py — shared log tailers for SSE streaming."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "server"))
+
+from runs.log_tailer import LogTailerHub
+
+
+def _drain(subscriber):
+    events = []
+    while not subscriber.queue.empty():
+        events.append(subscriber.queue.get_nowait())
+    return events
+
+
+def test_initial_is_a_bounded_tail_on_a_line_boundary(tmp_path):
+    log = tmp_path / "run.log"
+    log.write_text("".join(f"line {i:04d}\n" for i in range(1000)))
+    hub = LogTailerHub(tail_bytes=100)
+    _, _, initial = hub.subscribe(str(log))
+
+    size = log.stat().st_size
+    assert initial["total_size"] == size
+    assert size - 100 <= initial["offset"] < size
+    assert initial["content"] == log.read_bytes()[initial["offset"]:].decode()
+    assert initial["content"].startswith("line ")
+    assert initial["content"].endswith("line 0999\n")
+
+
+def test_one_tailer_fans_out_deltas_to_every_subscriber(tmp_path):
+    log = tmp_path / "run.log"
+    log.write_text("start\n")
+    hub = LogTailerHub()
+    subs = [hub.subscribe(str(log)) for _ in range(10)]
+    assert len({id(tailer) for tailer, _, _ in subs}) == 1
+    assert hub.summary() == {"tailers": 1, "subscribers": 10, "polls": 0}
+
+    with open(log, "a") as f:
+        f.write("step 1 loss 0.5\n")
+    hub.poll_all()
+    for _, subscriber, _ in subs:
+        assert [e["content"] for e in _drain(subscriber)] == ["step 1 loss 0.5\n"]
+
+    for tailer, subscriber, _ in subs:
+        hub.unsubscribe(tailer, subscriber)
+    assert hub.summary()["tailers"] == 0
+
+
+def test_late_subscriber_gets_snapshot_and_no_duplicate_delta(tmp_path):
+    log = tmp_path / "run.log"
+    log.write_text("a\n")
+    hub = LogTailerHub()
+    _, early, _ = hub.subscribe(str(log))
+    with open(log, "a") as f:
+        f.write("b\n")
+    _, late, initial = hub.subscribe(str(log))
+    assert initial["content"] == "a\nb\n"
+    assert [e["content"] for e in _drain(early)] == ["b\n"]
+    assert _drain(late) == []
+
+
+def test_split_utf8_and_missing_file(tmp_path):
+    log = tmp_path / "run.log"
+    hub = LogTailerHub()
+    tailer, subscriber, initial = hub.subscribe(str(log))
+    assert initial["content"] == "" and initial["offset"] == 0
+
+    encoded = "loss → 0.1\n".encode()
+    cut = encoded.index("→".encode()) + 1
+    with open(log, "wb") as f:
+        f.write(encoded[:cut])
+    hub.poll_all()
+    with open(log, "ab") as f:
+        f.write(encoded[cut:])
+    hub.poll_all()
+    assert "".join(e["content"] for e in _drain(subscriber)) == "loss → 0.1\n"
+
+
+def test_overflowing_subscriber_is_marked_lagged(tmp_path):
+    log = tmp_path / "run.log"
+    log.write_text("")
+    hub = LogTailerHub()
+    tailer, subscriber, _ = hub.subscribe(str(log))
+    for i in range(subscriber.queue.maxsize + 1):
+        with open(log, "a") as f:
+            f.write(f"{i}\n")
+        hub.poll_all()
+    assert subscriber.lagged
+    assert subscriber not in tailer.subscribers
+
+
+def test_truncation_resyncs_subscribers_from_the_start(tmp_path):
+    log = tmp_path / "run.log"
+    log.write_text("".join(f"old {i}\n" for i in range(100)))
+    hub = LogTailerHub()
+    _, subscriber, _ = hub.subscribe(str(log))
+    log.write_text("new 0\n")  # truncated and rewritten before the next poll
+    hub.poll_all()
+    assert _drain(subscriber) == [{"type": "initial", "content": "new 0\n", "offset": 0, "total_size": 6}]
+    with open(log, "a") as f:
+        f.write("new 1\n")
+    hub.poll_all()
+    assert [(e["type"], e["content"]) for e in _drain(subscriber)] == [("delta", "new 1\n")]
+
+
+def test_rotation_to_a_larger_file_resyncs_by_inode(tmp_path):
+    log = tmp_path / "run.log"
+    log.write_text("old 0\n")
+    hub = LogTailerHub()
+    _, subscriber, _ = hub.subscribe(str(log))
+    os.rename(log, tmp_path / "run.log.1")
+    log.write_text("".join(f"new {i}\n" for i in range(3)))  # already past the old offset
+    hub.poll_all()
+    assert _drain(subscriber) == [
+        {"type": "initial", "content": "new 0\nnew 1\nnew 2\n", "offset": 0, "total_size": 18}
+    ]
+    with open(log, "a") as f:
+        f.write("new 3\n")
+    hub.poll_all()
+    assert [(e["type"], e["content"]) for e in _drain(subscriber)] == [("delta", "new 3\n")]
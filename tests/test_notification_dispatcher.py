@@ -0,0 +1,132 @@
+"""Tests for integrations/notification_dispatcher.py — queued Slack delivery."""
+
+import asyncio
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "server"))
+
+from integrations.notification_dispatcher import NotificationDispatcher
+from integrations.slack_handler import SlackNotifier
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeSlack:
+    """Scripted responses per call; defaults to ok."""
+
+    def __init__(self, script=None):
+        self.script = list(script or [])
+        self.posted = []
+
+    async def __call__(self, payload):
+        self.posted.append(payload)
+        result = self.script.pop(0) if self.script else (200, None, {"ok": True})
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+class EnabledNotifier:
+    is_enabled = True
+    bot_token = "xoxb-test"
+
+
+def _dispatcher(script=None, **kwargs):
+    slack = FakeSlack(script)
+    clock = FakeClock()
+    dispatcher = NotificationDispatcher(EnabledNotifier(), post=slack, clock=clock, **kwargs)
+    return dispatcher, slack, clock
+
+
+def _msg(channel="#runs", text="hi"):
+    return {"channel": channel, "text": text}
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_blocks_only_that_channel_for_retry_after():
+    dispatcher, slack, clock = _dispatcher(script=[(429, 30.0, {})])
+    dispatcher.enqueue(_msg("#runs", "a"))
+    dispatcher.enqueue(_msg("#alerts", "b"))
+
+    await dispatcher.deliver_one("#runs")
+    assert dispatcher.stats["rate_limited"] == 1
+    channel, _ = dispatcher._next_ready()
+    assert channel == "#alerts"
+    await dispatcher.deliver_one("#alerts")
+
+    assert dispatcher._next_ready() == (None, pytest.approx(30.0))
+    clock.now += 30
+    await dispatcher.deliver_one(dispatcher._next_ready()[0])
+    assert [p["text"] for p in slack.posted] == ["a", "b", "a"]
+    assert dispatcher.stats["sent"] == 2
+    assert dispatcher.summary()["queue_depth"] == 0
+
+
+@pytest.mark.asyncio
+async def test_transient_errors_back_off_and_permanent_errors_drop():
+    dispatcher, slack, clock = _dispatcher(
+        script=[ConnectionError("reset"), (503, None, {}), (200, None, {"ok": True})], base_backoff=2.0
+    )
+    dispatcher.enqueue(_msg())
+    await dispatcher.deliver_one("#runs")
+    assert dispatcher._next_ready()[1] == pytest.approx(2.0)
+    clock.now += 2
+    await dispatcher.deliver_one("#runs")
+    assert dispatcher._next_ready()[1] == pytest.approx(4.0)
+    clock.now += 4
+    await dispatcher.deliver_one("#runs")
+    assert dispatcher.stats["retried"] == 2 and dispatcher.stats["sent"] == 1
+
+    dispatcher.enqueue(_msg())
+    slack.script = [(200, None, {"ok": False, "error": "channel_not_found"})]
+    clock.now += 5
+    await dispatcher.deliver_one("#runs")
+    assert dispatcher.stats["failed"] == 1
+    assert dispatcher.last_error == "channel_not_found"
+    assert dispatcher.summary()["queue_depth"] == 0
+
+
+def test_queue_is_bounded():
+    dispatcher, _, _ = _dispatcher(max_queue=2)
+    assert dispatcher.enqueue(_msg()) and dispatcher.enqueue(_msg())
+    assert dispatcher.enqueue(_msg()) is False
+    assert dispatcher.stats["dropped"] == 1
+
+
+@pytest.mark.asyncio
+async def test_notifier_enqueues_without_blocking_when_dispatcher_runs():
+    slow_client_calls = []
+
+    class SlowClient:
+        def chat_postMessage(self, **kwargs):
+            time.sleep(0.5)
+            slow_client_calls.append(kwargs)
+
+    notifier = SlackNotifier()
+    notifier._client, notifier._enabled, notifier._channel = SlowClient(), True, "#runs"
+    slack = FakeSlack()
+    dispatcher = NotificationDispatcher(notifier, post=slack, min_interval=0.0)
+    notifier.attach_dispatcher(dispatcher)
+
+    start = time.monotonic()
+    for i in range(20):
+        assert notifier.send_run_failed({"id": f"r{i}", "name": f"run-{i}", "error": "OOM"})
+    assert time.monotonic() - start < 0.2
+
+    for _ in range(100):
+        if len(slack.posted) == 20:
+            break
+        await asyncio.sleep(0.01)
+    assert len(slack.posted) == 20 and slow_client_calls == []
+    assert slack.posted[0]["channel"] == "#runs"
+    dispatcher._task.cancel()
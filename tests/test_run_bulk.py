@@ -0,0 +1,146 @@
+"""Tests for POST /runs/bulk in runs/routes.py and core.state.deferred_saves."""
+
+import contextlib
+import os
+import sys
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "server"))
+
+from core import state
+from runs import routes as run_routes
+from runs.executors import ExecutorRegistry, RunExecutor
+from runs.launch_queue import LaunchQueue
+
+
+class FakeExecutor(RunExecutor):
+    name = "fake"
+
+    def __init__(self):
+        self.stopped = []
+        self.batches = 0
+
+    def launch(self, run_id, run_data):
+        run_data["status"] = "running"
+
+    def stop(self, run_id, run_data):
+        self.stopped.append(run_id)
+
+    @contextlib.contextmanager
+    def batch(self):
+        self.batches += 1
+        yield
+
+
+@pytest.fixture
+def env():
+    runs, sweeps = {}, {"s1": {"run_ids": []}}
+    calls = {"save": 0, "recompute": [], "journey": []}
+    executor = FakeExecutor()
+    registry = ExecutorRegistry(default_name="fake")
+    registry.register(executor)
+    queue = LaunchQueue(runs, sweeps, launch_fn=registry.launch, batch_fn=registry.batch, max_concurrent=2)
+
+    def save():
+        calls["save"] += 1
+
+    def sync_membership(run_id, sweep_id, recompute=True):
+        if sweep_id:
+            sweeps[sweep_id]["run_ids"].append(run_id)
+            if recompute:
+                calls["recompute"].append(sweep_id)
+
+    run_routes.init(
+        runs, sweeps, {},
+        save, save, save,
+        lambda sweep_id: calls["recompute"].append(sweep_id),
+        lambda: False, lambda run_id, run: {"id": run_id, **run},
+        sync_membership, lambda **event: calls["journey"].append(event["kind"]),
+        lambda config: None, lambda code: code,
+        None, registry,
+        {"finished", "failed", "stopped"},
+        lambda run_dir: {}, lambda run_dir: None, lambda wandb_dir: None, {},
+        launch_queue=queue,
+    )
+    app = FastAPI()
+    app.include_router(run_routes.router)
+    return TestClient(app), runs, calls, executor
+
+
+def test_bulk_create_start_and_stop(env):
+    client, runs, calls, executor = env
+    created = client.post("/runs/bulk", json={
+        "action": "create",
+        "runs": [{"name": f"r{i}", "command": "true", "sweep_id": "s1"} for i in range(5)]
+        + [{"name": "bad", "command": "true", "sweep_id": "missing"}],
+    }).json()
+    assert created["succeeded"] == 5 and created["failed"] == 1
+    assert created["results"][5] == {"id": None, "index": 5, "ok": False, "status_code": 404,
+                                     "error": "Sweep not found: missing"}
+    assert calls["save"] == 1 and calls["recompute"] == ["s1"]
+    assert calls["journey"].count("run_created") == 5
+
+    calls["save"] = 0
+    ids = [result["id"] for result in created["results"][:5]]
+    started = client.post("/runs/bulk", json={"action": "start", "filter": {"sweep_id": "s1"}}).json()
+    assert started["succeeded"] == 5 and len(started["launched"]) == 2  # max_concurrent
+    assert sorted(r["status"] for r in started["results"]) == ["queued"] * 3 + ["running"] * 2
+    assert calls["save"] == 1
+
+    running = [run_id for run_id in ids if runs[run_id]["status"] == "running"]
+    stopped = client.post("/runs/bulk", json={"action": "stop", "run_ids": running + ["nope"]}).json()
+    assert [r["ok"] for r in stopped["results"]] == [True, True, False]
+    assert sorted(executor.stopped) == sorted(running) and executor.batches >= 2
+    assert len(stopped["launched"]) == 2  # freed slots are refilled in the same request
+
+    archived = client.post("/runs/bulk", json={
+        "action": "archive", "filter": {"statuses": ["stopped"]},
+    }).json()
+    assert archived["succeeded"] == 2 and all(runs[run_id]["is_archived"] for run_id in running)
+    rerun = client.post("/runs/bulk", json={"action": "rerun", "run_ids": running[:1]}).json()
+    assert runs[rerun["results"][0]["new_id"]]["parent_run_id"] == running[0]
+    assert client.post("/runs/bulk", json={"action": "delete", "run_ids": ids}).status_code == 400
+
+
+def test_sweep_members_and_reruns_keep_dependencies_and_detectors(env):
+    from runs import sweep_routes
+
+    client, runs, calls, _ = env
+    sweeps = run_routes._sweeps
+    sweep_routes.init(sweeps, runs, lambda: None, lambda sweep_id: None, lambda: None, lambda status: status,
+                      None, None, lambda config: None, {"launching", "running"},
+                      launch_queue=run_routes._launch_queue, run_executors=run_routes._run_executors)
+    client.app.include_router(sweep_routes.router)
+
+    upstream = client.post("/runs", json={"name": "prep", "command": "true"}).json()["id"]
+    detectors = [{"type": "ewma_zscore", "metric": "loss"}]
+    member = client.post("/sweeps/s1/runs", json={
+        "name": "train", "command": "true", "auto_start": True, "depends_on": [upstream],
+        "dependency_condition": "on_any", "anomaly_detectors": detectors,
+    }).json()
+    run = runs[member["id"]]
+    assert run["depends_on"] == [upstream] and run["dependency_condition"] == "on_any"
+    assert run["status"] == "queued"  # waits for prep instead of launching
+    assert run["anomaly_detectors"][0]["type"] == "ewma_zscore"
+    assert client.post("/sweeps/s1/runs", json={"name": "x", "command": "true",
+                                                "depends_on": ["missing"]}).status_code == 400
+
+    rerun = client.post(f"/runs/{member['id']}/rerun", json={}).json()
+    assert runs[rerun["id"]]["anomaly_detectors"] == run["anomaly_detectors"]
+
+
+def test_deferred_saves_write_once(monkeypatch, tmp_path):
+    writes = []
+    monkeypatch.setattr(state.config, "JOBS_DATA_FILE", str(tmp_path / "jobs.json"))
+    monkeypatch.setattr(state.json, "dump", lambda *args, **kwargs: writes.append(args[0]))
+    with state.deferred_saves():
+        with state.deferred_saves():
+            for _ in range(3):
+                state.save_runs_state()
+        assert writes == []
+    assert len(writes) == 1
+    state.save_runs_state()
+    assert len(writes) == 2
@@ -0,0 +1,103 @@
+"""Tests for runs/dependencies.py and dependency-gated dispatch in runs/launch_queue.py."""
+
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "server"))
+
+from runs.dependencies import DependencyError, dependency_state, validate_dependencies
+from runs.launch_queue import LaunchQueue
+
+
+def _queued(created_at, **fields):
+    return {"status": "queued", "created_at": created_at, "queued_at": created_at, **fields}
+
+
+def _make_queue(runs, **kwargs):
+    launched, cancelled = [], []
+
+    def launch(run_id, run):
+        run["status"] = "launching"
+        run["launched_at"] = time.time()
+        launched.append(run_id)
+
+    queue = LaunchQueue(runs, {}, launch_fn=launch, on_cancelled=lambda run_id, run: cancelled.append(run_id),
+                        max_concurrent=10, **kwargs)
+    return queue, launched, cancelled
+
+
+def test_validation_rejects_unknown_self_and_cycles():
+    runs = {"a": {}, "b": {"depends_on": ["a"]}, "c": {"depends_on": ["b"]}}
+    assert validate_dependencies(runs, "d", ["a", " c ", "a"]) == ["a", "c"]
+    with pytest.raises(DependencyError, match="not found"):
+        validate_dependencies(runs, "d", ["zzz"])
+    with pytest.raises(DependencyError, match="itself"):
+        validate_dependencies(runs, "a", ["a"])
+    with pytest.raises(DependencyError, match="a -> c -> b -> a"):
+        validate_dependencies(runs, "a", ["c"])
+
+
+def test_conditions():
+    runs = {"up1": {"status": "finished"}, "up2": {"status": "running"}}
+    run = {"depends_on": ["up1", "up2"]}
+    assert dependency_state(runs, run) == ("waiting", "Waiting for 1 dependency: up2")
+    runs["up2"]["status"] = "failed"
+    assert dependency_state(runs, run) == ("failed", "Dependency up2 failed")
+    assert dependency_state(runs, {**run, "dependency_condition": "on_any"}) == ("ready", None)
+    runs["up2"]["status"] = "stopped"
+    assert dependency_state(runs, run)[0] == "stopped"
+    del runs["up1"]
+    assert dependency_state(runs, run) == ("failed", "Dependency up1 no longer exists")
+
+
+def test_fan_out_then_fan_in_launches_on_completion():
+    runs = {
+        "prep": _queued(0),
+        "train-a": _queued(1, depends_on=["prep"]),
+        "train-b": _queued(2, depends_on=["prep"]),
+        "eval": _queued(3, depends_on=["train-a", "train-b"]),
+        "cleanup": _queued(4, depends_on=["eval"], dependency_condition="on_any"),
+    }
+    queue, launched, cancelled = _make_queue(runs)
+    assert queue.dispatch()["launched"] == ["prep"]
+    assert runs["eval"]["queue_blocked_reason"] == "Waiting for 2 dependencies: train-a, train-b"
+    snapshot = queue.snapshot()
+    assert [r["id"] for r in snapshot["queue"]] == []
+    assert [r["id"] for r in snapshot["waiting"]] == ["train-a", "train-b", "eval", "cleanup"]
+
+    runs["prep"]["status"] = "finished"
+    assert sorted(queue.dispatch()["launched"]) == ["train-a", "train-b"]
+    runs["train-a"]["status"] = "finished"
+    assert queue.dispatch()["launched"] == []
+    runs["train-b"]["status"] = "finished"
+    assert queue.dispatch()["launched"] == ["eval"]
+    assert "queue_blocked_reason" not in runs["eval"]
+    runs["eval"]["status"] = "failed"
+    assert queue.dispatch()["launched"] == ["cleanup"]  # on_any runs after a failure
+    assert cancelled == []
+
+
+def test_failure_and_cancellation_propagate_downstream():
+    runs = {
+        "a": _queued(0),
+        "b": _queued(1, depends_on=["a"]),
+        "c": _queued(2, depends_on=["b"]),
+        "d": {"status": "ready", "created_at": 3, "depends_on": ["c"]},
+        "report": _queued(4, depends_on=["c"], dependency_condition="on_any"),
+        "s": _queued(5),
+        "t": _queued(6, depends_on=["s"]),
+    }
+    queue, launched, cancelled = _make_queue(runs)
+    queue.dispatch()
+    assert sorted(launched) == ["a", "s"]
+
+    runs["a"]["status"] = "failed"
+    runs["s"]["status"] = "stopped"
+    result = queue.dispatch()
+    assert sorted(result["cancelled"]) == ["b", "c", "d", "t"] == sorted(cancelled)
+    assert runs["c"]["status"] == "failed" and runs["c"]["error"] == "Dependency b failed"
+    assert runs["t"]["status"] == "stopped" and runs["t"]["ended_at"]
+    assert result["launched"] == ["report"]  # its dependency ended, just not well
@@ -0,0 +1,80 @@
+"""Tests for the run file / raw log download routes in runs/log_routes.py."""
+
+import os
+import sys
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "server"))
+
+from runs import log_routes
+from runs.log_store import compress_log
+
+TEXT = "".join(f"line {i}\n" for i in range(50000)).encode()
+
+
+@pytest.fixture
+def client(tmp_path):
+    run_dir = tmp_path / "r1"
+    (run_dir / "artifacts").mkdir(parents=True)
+    (run_dir / "run.log").write_bytes(TEXT)
+    (run_dir / "sidecar.log").write_bytes(TEXT)
+    compress_log(str(run_dir / "sidecar.log"), frame_bytes=8192)
+    (tmp_path / "ckpt.bin").write_bytes(b"w" * 4096)
+    os.symlink(tmp_path / "ckpt.bin", run_dir / "artifacts" / "ckpt.bin")
+    os.symlink(tmp_path / "ckpt.bin", run_dir / "escape.bin")
+    log_routes.init({"r1": {"run_dir": str(run_dir), "status": "finished"}})
+    app = FastAPI()
+    app.include_router(log_routes.router)
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("log", ["run", "sidecar"])  # plain and compressed
+def test_raw_log_download_supports_ranges_and_etags(client, log):
+    url = f"/runs/r1/logs/raw?log={log}"
+    full = client.get(url)
+    assert full.status_code == 200 and full.content == TEXT
+    etag = full.headers["etag"]
+
+    part = client.get(url, headers={"Range": "bytes=10000-10099"})
+    assert part.status_code == 206 and part.content == TEXT[10000:10100]
+    assert part.headers["content-range"] == f"bytes 10000-10099/{len(TEXT)}"
+    assert client.get(url, headers={"Range": "bytes=-5"}).content == TEXT[-5:]
+    assert client.get(url, headers={"Range": f"bytes={len(TEXT)}-"}).status_code == 416
+
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+    stale = client.get(url, headers={"Range": "bytes=0-9", "If-Range": '"other"'})
+    assert stale.status_code == 200 and stale.content == TEXT
+
+
+def test_run_files_are_sandboxed(client):
+    assert client.get("/runs/r1/files/artifacts/ckpt.bin").content == b"w" * 4096
+    assert client.get("/runs/r1/files/escape.bin").status_code == 403
+    assert client.get("/runs/r1/files/..%2F..%2Fetc%2Fpasswd").status_code == 403
+    assert client.get("/runs/r1/files/missing.txt").status_code == 404
+    assert client.get("/runs/r1/files/artifacts").status_code == 404
+    assert client.get("/runs/nope/files/run.log").status_code == 404
+
+
+def test_artifact_listing_urls_download(client, tmp_path):
+    ckpt_dir = tmp_path / "workdir" / "checkpoint-1"
+    ckpt_dir.mkdir(parents=True)
+    (ckpt_dir / "model.pt").write_bytes(b"m" * 10)
+    os.symlink(ckpt_dir, tmp_path / "r1" / "artifacts" / "ckpt")
+    listing = {a["name"]: a for a in client.get("/runs/r1/artifacts?hashes=true").json()}
+    assert listing["ckpt/model.pt"]["type"] == "checkpoint" and listing["ckpt/model.pt"]["sha256"]
+    assert client.get(listing["ckpt/model.pt"]["url"]).content == b"m" * 10
+    assert client.get("/runs/r1/files/artifacts/ckpt/../../escape.bin").status_code == 403
+
+
+def test_artifact_hashing_is_budgeted(client, tmp_path, monkeypatch):
+    from core import config
+
+    (tmp_path / "r1" / "artifacts" / "small.txt").write_bytes(b"s" * 10)
+    (tmp_path / "r1" / "artifacts" / "big.bin").write_bytes(b"b" * 1000)
+    monkeypatch.setattr(config, "ARTIFACT_HASH_MAX_BYTES", 100)
+    listing = {a["name"]: a for a in client.get("/runs/r1/artifacts?hashes=true").json()}
+    assert listing["small.txt"]["sha256"] and "hash_pending" not in listing["small.txt"]
+    assert listing["big.bin"]["sha256"] is None and listing["big.bin"]["hash_pending"] is True
@@ -0,0 +1,140 @@
+"""Tests for runs/monitor.py — the timer wheel and the in-server run monitor."""
+
+import json
+import os
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "server"))
+
+from core import config
+from runs.helpers import prepare_run_dir, write_direct_job_script
+from runs.monitor import RunMonitor, TimerWheel
+
+
+class TestTimerWheel:
+    def test_due_after_delay(self):
+        wheel = TimerWheel(tick_seconds=1.0, slots=4)
+        wheel.schedule("a", 1)
+        wheel.schedule("b", 3)
+        assert wheel.advance() == ["a"]
+        assert wheel.advance() == []
+        assert wheel.advance() == ["b"]
+        assert len(wheel) == 0
+
+    def test_delays_longer_than_one_revolution(self):
+        wheel = TimerWheel(tick_seconds=1.0, slots=4)
+        wheel.schedule("late", 9)
+        fired = [i for i in range(1, 12) if wheel.advance() == ["late"]]
+        assert fired == [9]
+
+    def test_reschedule_replaces(self):
+        wheel = TimerWheel(tick_seconds=1.0, slots=8)
+        wheel.schedule("a", 1)
+        wheel.schedule("a", 3)
+        assert [wheel.advance() for _ in range(3)] == [[], [], ["a"]]
+
+
+def _harness(tmp_path, windows=None):
+    runs = {}
+    reports, metrics, alerts, stopped = [], [], {}, []
+
+    def report(run_id, status, **fields):
+        reports.append((run_id, status, fields))
+        runs[run_id]["status"] = status
+
+    def create_alert(run_id, message, choices, severity):
+        alert_id = f"alert-{len(alerts)}"
+        alerts[alert_id] = {"run_id": run_id, "message": message, "status": "pending"}
+        return alert_id
+
+    monitor = RunMonitor(
+        runs,
+        report_status=report,
+        append_metrics=lambda run_id, rows: metrics.extend((run_id, row) for row in rows),
+        create_alert=create_alert,
+        get_alert=alerts.get,
+        stop_run=lambda run_id, run: stopped.append(run_id),
+        list_tmux_windows=lambda: windows,
+        check_interval=0.5,
+        tick_seconds=0.5,
+    )
+    return monitor, runs, reports, metrics, alerts, stopped
+
+
+def _run(tmp_path, run_id, **fields):
+    run_dir = tmp_path / run_id
+    run_dir.mkdir()
+    return {"status": "running", "monitor": "server", "run_dir": str(run_dir), "workdir": str(tmp_path), **fields}
+
+
+def _metrics_file(run):
+    wandb_dir = os.path.join(run["run_dir"], "wandb_data", "wandb", "run-20260101-r1")
+    os.makedirs(wandb_dir, exist_ok=True)
+    return os.path.join(wandb_dir, "metrics.jsonl")
+
+
+def test_tails_metrics_incrementally(tmp_path):
+    monitor, runs, reports, metrics, _, _ = _harness(tmp_path)
+    runs["r1"] = _run(tmp_path, "r1", executor="subprocess")
+    runs["legacy"] = _run(tmp_path, "legacy", monitor=None)
+    path = _metrics_file(runs["r1"])
+    with open(path, "w") as f:
+        f.write(json.dumps({"step": 1, "loss": 1.0}) + "\n" + '{"step": 2, "lo')
+
+    monitor.step()
+    assert metrics == [("r1", {"step": 1, "loss": 1.0})]
+    assert reports[0][2]["wandb_dir"].endswith("run-20260101-r1")
+
+    with open(path, "a") as f:
+        f.write('ss": 0.9}\n')
+    monitor.step()
+    monitor.step()
+    assert [row["step"] for _, row in metrics] == [1, 2]
+    assert all(run_id == "r1" for run_id, _ in metrics)
+
+
+def test_tmux_completion_and_window_loss(tmp_path):
+    monitor, runs, reports, _, _, _ = _harness(tmp_path, windows={"ra-a", "ra-b"})
+    runs["a"] = _run(tmp_path, "a", executor="tmux", tmux_window="ra-a", status="launching")
+    runs["b"] = _run(tmp_path, "b", executor="tmux", tmux_window="ra-b")
+    runs["c"] = _run(tmp_path, "c", executor="tmux", tmux_window="ra-c")
+
+    monitor.step()
+    assert ("a", "running", {}) in reports
+    assert ("c", "failed", {"error": "Tmux window disappeared"}) in reports
+
+    with open(os.path.join(runs["b"]["run_dir"], "job.done"), "w") as f:
+        f.write("3")
+    monitor.step()
+    assert ("b", "failed", {"exit_code": 3}) in reports
+    assert monitor.summary()["watched_runs"] == 1
+
+
+def test_rule_alert_then_stop_response(tmp_path):
+    monitor, runs, reports, _, alerts, stopped = _harness(tmp_path)
+    runs["r1"] = _run(tmp_path, "r1", executor="subprocess")
+    with open(_metrics_file(runs["r1"]), "w") as f:
+        for step, loss in enumerate([1.0, 1.0, 1.0, 9.5]):
+            f.write(json.dumps({"step": step, "loss": loss}) + "\n")
+
+    monitor.step()
+    assert len(alerts) == 1
+    alert_id = next(iter(alerts))
+    assert "High loss" in alerts[alert_id]["message"]
+
+    monitor.step()
+    assert stopped == []
+    alerts[alert_id].update(status="resolved", response="Stop Job")
+    monitor.step()
+    assert stopped == ["r1"]
+    assert reports[-1] == ("r1", "stopped", {"error": "Stopped via alert response"})
+
+
+def test_direct_job_script_records_exit_code(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "DATA_DIR", str(tmp_path))
+    run = {"command": 'echo "hello $WANDB_RUN_ID"; exit 4', "workdir": str(tmp_path)}
+    run_dir, command_file, _ = prepare_run_dir("r1", run)
+    subprocess.run(["bash", write_direct_job_script("r1", run, run_dir, command_file)], capture_output=True)
+    assert open(os.path.join(run_dir, "run.log")).read() == "hello r1\n"
+    assert open(os.path.join(run_dir, "job.done")).read().strip() == "4"
@@ -0,0 +1,92 @@
+"""Tests for tools/job_sidecar.py AlertResponseListener — non-blocking alert waits."""
+
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "server"))
+
+from tools.job_sidecar import AlertResponseListener, CompletionWatcher
+
+
+class _Response:
+    def __init__(self, status_code, payload):
+        self.status_code = status_code
+        self._payload = payload
+        self.text = str(payload)
+
+    def json(self):
+        return self._payload
+
+
+class FakeServer:
+    def __init__(self):
+        self.up = True
+        self.resolved = {}
+        self.requests = []
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        self.requests.append((url, params))
+        if not self.up:
+            raise ConnectionError("server down")
+        ids = params["alert_ids"].split(",")
+        return _Response(200, {
+            "responses": {a: self.resolved[a] for a in ids if a in self.resolved},
+            "unknown": [a for a in ids if a == "gone"],
+        })
+
+
+def test_responses_are_queued_without_blocking(tmp_path):
+    server = FakeServer()
+    woken = []
+    listener = AlertResponseListener(
+        "http://server", "r1", str(tmp_path), on_response=lambda: woken.append(1), session=server
+    )
+    listener._pending = {"a1": {"source": "rulebased", "created_at": time.time()},
+                         "a2": {"source": "manual", "created_at": time.time()}}
+
+    listener.poll_once()
+    assert listener.take_responses() == []
+    assert server.requests[0] == (
+        "http://server/runs/r1/alerts/responses", {"alert_ids": "a1,a2", "wait": listener.LONG_POLL_SECONDS},
+    )
+
+    server.resolved["a2"] = "Stop Job"
+    listener.poll_once()
+    assert listener.take_responses() == [("a2", "manual", "Stop Job")]
+    assert woken == [1]
+    assert listener.pending_count() == 1
+
+
+def test_unknown_and_expired_alerts_are_dropped(tmp_path):
+    server = FakeServer()
+    listener = AlertResponseListener("http://server", "r1", str(tmp_path), session=server)
+    listener._pending = {"gone": {"source": "judge", "created_at": time.time()},
+                         "old": {"source": "judge", "created_at": time.time() - 10_000}}
+    listener.poll_once()
+    assert listener.take_responses() == [("gone", "judge", None)]
+    assert listener.pending_count() == 0
+
+
+def test_falls_back_to_response_files(tmp_path):
+    server = FakeServer()
+    server.up = False
+    listener = AlertResponseListener("http://server", "r1", str(tmp_path), session=server)
+    listener._stopped.set()  # skip the retry backoff sleep
+    listener._pending = {"a1": {"source": "manual", "created_at": time.time()}}
+    (tmp_path / "alerts").mkdir()
+    (tmp_path / "alerts" / "a1.response").write_text("Ignore\n")
+    listener.poll_once()
+    assert listener.take_responses() == [("a1", "manual", "Ignore")]
+
+
+def test_wake_interrupts_watcher_wait(tmp_path):
+    watcher = CompletionWatcher(str(tmp_path / "job.done"))
+    try:
+        threading.Timer(0.1, watcher.wake).start()
+        start = time.monotonic()
+        assert watcher.wait(5.0) is False
+        assert time.monotonic() - start < 2.0
+    finally:
+        watcher.close()
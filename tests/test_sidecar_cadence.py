@@ -0,0 +1,62 @@
+"""Tests for the sidecar monitor loop's adaptive cadence and completion wake-up."""
+
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "server"))
+
+from tools.job_sidecar import AdaptiveCadence, CompletionWatcher
+
+
+def test_cadence_backs_off_and_resets():
+    cadence = AdaptiveCadence(min_seconds=0.5, max_seconds=4.0)
+    assert [cadence.next_delay() for _ in range(6)] == [0.5, 1.0, 2.0, 4.0, 4.0, 4.0]
+    cadence.reset()
+    assert cadence.next_delay() == 0.5
+
+
+def test_idle_hour_needs_far_fewer_wakeups_than_fixed_interval():
+    cadence = AdaptiveCadence(min_seconds=0.5, max_seconds=30.0)
+    elapsed = 0.0
+    while elapsed < 3600:
+        cadence.wakeups += 1
+        elapsed += cadence.next_delay()
+    assert cadence.wakeups < 3600 / 2 / 10
+
+
+def _write_later(path, delay, content="0"):
+    def write():
+        time.sleep(delay)
+        with open(path, "w") as f:
+            f.write(content)
+    thread = threading.Thread(target=write)
+    thread.start()
+    return thread
+
+
+def test_watcher_wakes_on_completion_file(tmp_path):
+    completion_file = str(tmp_path / "job.done")
+    watcher = CompletionWatcher(completion_file)
+    try:
+        noise = _write_later(str(tmp_path / "report_spool.jsonl"), 0.05, "{}\n")
+        done = _write_later(completion_file, 0.2)
+        start = time.monotonic()
+        assert watcher.wait(5.0) is True
+        elapsed = time.monotonic() - start
+        noise.join()
+        done.join()
+        if watcher.fd is not None:
+            assert elapsed < 2.0
+    finally:
+        watcher.close()
+
+
+def test_watcher_times_out_without_completion(tmp_path):
+    watcher = CompletionWatcher(str(tmp_path / "job.done"))
+    try:
+        (tmp_path / "run.log").write_text("still running\n")
+        assert watcher.wait(0.1) is False
+    finally:
+        watcher.close()
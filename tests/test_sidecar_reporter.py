@@ -0,0 +1,124 @@
+"""Tests for tools/job_sidecar.py SidecarReporter — spooled, batched reporting."""
+
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "server"))
+
+from tools.job_sidecar import SidecarReporter
+
+
+class _Response:
+    def __init__(self, status_code, payload=None):
+        self.status_code = status_code
+        self._payload = payload or {}
+        self.text = json.dumps(self._payload)
+
+    def json(self):
+        return self._payload
+
+
+class FakeServer:
+    """Stands in for requests.Session; applies events like /runs/{id}/events."""
+
+    def __init__(self):
+        self.up = True
+        self.posts = []
+        self.applied = []
+        self.report_seq = 0
+
+    def post(self, url, json=None, headers=None, timeout=None):
+        self.posts.append(url)
+        if not self.up:
+            raise ConnectionError("server down")
+        for event in json["events"]:
+            if event["seq"] > self.report_seq:
+                self.applied.append(event)
+                self.report_seq = event["seq"]
+        return _Response(200, {"acked_seq": self.report_seq})
+
+
+def _reporter(tmp_path, server):
+    return SidecarReporter("http://server", "r1", str(tmp_path), session=server)
+
+
+def test_events_batched_in_order(tmp_path):
+    server = FakeServer()
+    reporter = _reporter(tmp_path, server)
+    reporter.metrics([{"step": 1}])
+    reporter.metrics([{"step": 2}])
+    assert server.posts == []
+
+    reporter.status("running", {"wandb_dir": "/w"})
+    assert server.posts == ["http://server/runs/r1/events"]
+    assert [(e["seq"], e["type"]) for e in server.applied] == [(1, "metrics"), (2, "metrics"), (3, "status")]
+    assert server.applied[2]["data"] == {"status": "running", "wandb_dir": "/w"}
+    assert reporter.pending == []
+    assert (tmp_path / SidecarReporter.SPOOL_FILE).read_text() == ""
+    assert (tmp_path / SidecarReporter.ACK_FILE).read_text() == "3"
+
+
+def test_metrics_carry_wakeups_once_known(tmp_path):
+    server = FakeServer()
+    reporter = _reporter(tmp_path, server)
+    reporter.metrics([{"step": 1}])
+    reporter.wakeups = 7
+    reporter.metrics([{"step": 2}])
+    reporter.flush()
+    assert [e["data"] for e in server.applied] == [
+        {"rows": [{"step": 1}]},
+        {"rows": [{"step": 2}], "sidecar_wakeups": 7},
+    ]
+
+
+def test_outage_backs_off_then_replays(tmp_path, monkeypatch):
+    server = FakeServer()
+    server.up = False
+    reporter = _reporter(tmp_path, server)
+    reporter.status("running")
+    reporter.metrics([{"step": 1}])
+    assert len(server.posts) == 1
+    assert reporter.flush() is False
+    assert len(server.posts) == 1  # still backing off
+    assert reporter.next_attempt_at > 0
+
+    server.up = True
+    assert reporter.flush(force=True) is True
+    assert [e["seq"] for e in server.applied] == [1, 2]
+    assert reporter.failures == 0
+
+
+def test_restart_resumes_from_spool(tmp_path):
+    server = FakeServer()
+    server.up = False
+    first = _reporter(tmp_path, server)
+    first.status("running")
+    first.metrics([{"step": 1}])
+    first.status("finished", {"exit_code": 0})
+
+    # A new sidecar process picks up where the old one stopped.
+    server.up = True
+    second = _reporter(tmp_path, server)
+    assert [e["seq"] for e in second.pending] == [1, 2, 3]
+    assert second.next_seq == 4
+    assert second.drain(1) is True
+    assert [e["data"].get("status") for e in server.applied] == ["running", None, "finished"]
+
+    third = _reporter(tmp_path, server)
+    assert third.pending == [] and third.next_seq == 4
+
+
+def test_replayed_events_are_not_applied_twice(tmp_path):
+    server = FakeServer()
+    reporter = _reporter(tmp_path, server)
+    reporter.status("running")
+    # Simulate losing the ack file after the server applied the event.
+    os.remove(tmp_path / SidecarReporter.ACK_FILE)
+    (tmp_path / SidecarReporter.SPOOL_FILE).write_text(
+        json.dumps({"seq": 1, "type": "status", "data": {"status": "running"}}) + "\n"
+    )
+    again = _reporter(tmp_path, server)
+    assert again.drain(1) is True
+    assert len(server.applied) == 1
+    assert again.next_seq == 2
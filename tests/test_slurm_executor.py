@@ -0,0 +1,290 @@
+"""Tests for runs/slurm_executor.py — sbatch submission and batched status polling."""
+
+import asyncio
+import json
+import os
+import stat
+import subprocess
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "server"))
+
+from core import config
+from runs.slurm_executor import SlurmExecutor, slurm_exit_code, slurm_job_key
+
+
+def _fake_cli(bin_dir, name, body):
+    path = bin_dir / name
+    path.write_text(
+        "#!/bin/bash\n"
+        f'echo "{name} $*" >> "{bin_dir}/calls.log"\n'
+        f"{body}\n"
+    )
+    path.chmod(path.stat().st_mode | stat.S_IEXEC)
+
+
+@pytest.fixture
+def slurm(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "DATA_DIR", str(tmp_path / "data"))
+    monkeypatch.setattr(config, "WORKDIR", str(tmp_path))
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    (bin_dir / "next_id").write_text("1000")
+    _fake_cli(
+        bin_dir, "sbatch",
+        f'id=$(cat "{bin_dir}/next_id"); echo $((id + 1)) > "{bin_dir}/next_id"; echo "$id;cluster"',
+    )
+    _fake_cli(bin_dir, "scancel", "true")
+    _fake_cli(bin_dir, "squeue", f'cat "{bin_dir}/squeue.json"')
+    _fake_cli(bin_dir, "sacct", f'cat "{bin_dir}/sacct.json"')
+    (bin_dir / "squeue.json").write_text('{"jobs": []}')
+    (bin_dir / "sacct.json").write_text('{"jobs": []}')
+
+    runs = {}
+    statuses = []
+
+    def report(run_id, status, **fields):
+        statuses.append((run_id, status, fields))
+        runs[run_id]["status"] = status
+        runs[run_id].update(fields)
+
+    executor = SlurmExecutor(runs, report_status=report, bin_dir=str(bin_dir), poll_interval=0.01, defaults={})
+    return executor, runs, statuses, bin_dir
+
+
+def _calls(bin_dir, name):
+    log = bin_dir / "calls.log"
+    if not log.exists():
+        return []
+    return [line for line in log.read_text().splitlines() if line.startswith(name + " ")]
+
+
+def _squeue_job(job_id, state):
+    return {"job_id": job_id, "job_state": [state], "array_job_id": {"set": True, "number": 0},
+            "array_task_id": {"set": False, "number": 0}}
+
+
+def _sacct_job(job_id, state, rc=0, sig=0):
+    return {"job_id": job_id, "state": {"current": [state]},
+            "exit_code": {"return_code": {"set": True, "number": rc}, "signal": {"id": {"set": True, "number": sig}}}}
+
+
+def test_launch_renders_script_and_records_job_id(slurm):
+    executor, runs, _, bin_dir = slurm
+    runs["r1"] = {
+        "command": "python train.py",
+        "gpuwrap_config": {"enabled": True, "gpu_count": 2},
+        "slurm": {"partition": "gpu", "time_limit": "02:00:00", "extra_args": ["--exclusive"]},
+    }
+    assert executor.launch("r1", runs["r1"]) == "1000"
+    assert runs["r1"]["slurm_job_id"] == "1000"
+    assert runs["r1"]["status"] == "launching"
+
+    script = open(os.path.join(runs["r1"]["run_dir"], "job.sbatch")).read()
+    assert "#SBATCH --partition=gpu" in script
+    assert "#SBATCH --time=02:00:00" in script
+    assert "#SBATCH --gres=gpu:2" in script
+    assert "#SBATCH --exclusive" in script
+    assert "WANDB_RUN_ID=r1" in script
+    assert "job.done" in script
+
+    with pytest.raises(ValueError):
+        executor.launch("r2", {"command": "true", "slurm": {"partition": "gpu\n#SBATCH --mem=1T"}})
+
+
+def test_one_squeue_call_covers_every_active_run(slurm):
+    executor, runs, statuses, bin_dir = slurm
+    for i in range(3):
+        runs[f"r{i}"] = {"command": "true"}
+        executor.launch(f"r{i}", runs[f"r{i}"])
+        runs[f"r{i}"]["executor"] = "slurm"
+    (bin_dir / "squeue.json").write_text(json.dumps({"jobs": [
+        _squeue_job(1000, "RUNNING"), _squeue_job(1001, "PENDING"), _squeue_job(1002, "RUNNING"),
+    ]}))
+
+    changed = executor.poll()
+    assert changed == {"r0": "running", "r2": "running"}
+    squeue_calls = _calls(bin_dir, "squeue")
+    assert squeue_calls == ["squeue --json --jobs=1000,1001,1002"]
+    assert _calls(bin_dir, "sacct") == []
+
+    # Unchanged states are not re-reported.
+    executor.poll()
+    assert [s for _, s, _ in statuses] == ["running", "running"]
+
+
+def test_finished_jobs_resolved_through_sacct(slurm):
+    executor, runs, _, bin_dir = slurm
+    for i in range(3):
+        runs[f"r{i}"] = {"command": "true"}
+        executor.launch(f"r{i}", runs[f"r{i}"])
+        runs[f"r{i}"]["executor"] = "slurm"
+    (bin_dir / "squeue.json").write_text(json.dumps({"jobs": []}))
+    (bin_dir / "sacct.json").write_text(json.dumps({"jobs": [
+        _sacct_job(1000, "COMPLETED"),
+        _sacct_job(1001, "FAILED", rc=2),
+        _sacct_job(1002, "OUT_OF_MEMORY", rc=0, sig=9),
+    ]}))
+
+    executor.poll()
+    assert runs["r0"]["status"] == "finished"
+    assert runs["r1"]["status"] == "failed" and runs["r1"]["exit_code"] == 2
+    assert runs["r2"]["status"] == "failed" and runs["r2"]["exit_code"] == 137
+    assert "memory" in runs["r2"]["error"]
+    assert len(_calls(bin_dir, "sacct")) == 1
+
+
+def test_missing_job_fails_after_repeated_polls(slurm):
+    executor, runs, _, _ = slurm
+    runs["r1"] = {"command": "true"}
+    executor.launch("r1", runs["r1"])
+    runs["r1"]["executor"] = "slurm"
+    executor.poll()
+    executor.poll()
+    assert runs["r1"]["status"] == "launching"
+    executor.poll()
+    assert runs["r1"]["status"] == "failed"
+
+
+def test_stop_calls_scancel(slurm):
+    executor, runs, _, bin_dir = slurm
+    runs["r1"] = {"command": "true"}
+    executor.launch("r1", runs["r1"])
+    executor.stop("r1", runs["r1"])
+    assert _calls(bin_dir, "scancel") == ["scancel 1000"]
+
+
+@pytest.mark.asyncio
+async def test_submission_on_the_event_loop_does_not_block(slurm):
+    executor, runs, statuses, bin_dir = slurm
+    for run_id in ("ok", "stopped", "orphan"):
+        runs[run_id] = {"command": "true", "executor": "slurm"}
+    assert executor.launch("ok", runs["ok"]) is None
+    assert runs["ok"]["status"] == "launching" and runs["ok"]["slurm_state"] == "SUBMITTING"
+    await asyncio.gather(*executor._submits.values())
+    assert runs["ok"]["slurm_job_id"] == "1000" and runs["ok"]["slurm_state"] == "PENDING"
+
+    executor.launch("stopped", runs["stopped"])
+    executor.stop("stopped", runs["stopped"])
+    runs["stopped"]["status"] = "stopped"
+    runs["orphan"].update(status="launching", slurm_job_id=None)  # sbatch in flight before a restart
+    assert executor.recover_orphans() == 1
+    await asyncio.gather(*executor._submits.values(), return_exceptions=True)
+    for _ in range(100):
+        if len(_calls(bin_dir, "scancel")) == 1:
+            break
+        await asyncio.sleep(0.01)
+
+    assert _calls(bin_dir, "scancel") == ["scancel 1001"]  # the stopped run's job, once it existed
+    assert runs["orphan"]["status"] == "failed"
+
+    _fake_cli(bin_dir, "sbatch", 'echo "sbatch: error: invalid partition" >&2; exit 1')
+    runs["bad"] = {"command": "true", "executor": "slurm"}
+    executor.launch("bad", runs["bad"])
+    await asyncio.gather(*executor._submits.values())
+    assert runs["bad"]["status"] == "failed" and "invalid partition" in runs["bad"]["error"]
+
+
+def test_array_task_keys_and_exit_codes():
+    assert slurm_job_key({"job_id": 7, "array_job_id": {"set": True, "number": 5},
+                          "array_task_id": {"set": True, "number": 2}}) == "5_2"
+    assert slurm_job_key({"job_id": 7, "array": {"job_id": 5, "task_id": {"set": True, "number": 3}}}) == "5_3"
+    assert slurm_job_key({"job_id": 7, "array_job_id": {"set": True, "number": 0},
+                          "array_task_id": {"set": False, "number": 0}}) == "7"
+    assert slurm_exit_code({"exit_code": {"return_code": {"set": True, "number": 1}}}) == 1
+
+
+def _sweep_runs(executor, runs, n, tmp_path):
+    sweep = {"workdir": str(tmp_path)}
+    run_ids = []
+    for i in range(n):
+        run_id = f"s{i}"
+        runs[run_id] = {
+            "command": f'echo "task {i} $WANDB_RUN_ID"',
+            "workdir": str(tmp_path),
+            "status": "queued",
+            "sweep_params": {"lr": i},
+        }
+        run_ids.append(run_id)
+    return sweep, run_ids
+
+
+def test_submit_array_writes_table_and_maps_tasks(slurm, tmp_path):
+    executor, runs, _, bin_dir = slurm
+    sweep, run_ids = _sweep_runs(executor, runs, 4, tmp_path)
+
+    job_id = executor.submit_array("sweep1", sweep, run_ids, parallel=2)
+    assert job_id == "1000"
+    assert len(_calls(bin_dir, "sbatch")) == 1
+    assert [runs[r]["slurm_job_id"] for r in run_ids] == ["1000_0", "1000_1", "1000_2", "1000_3"]
+    assert all(runs[r]["status"] == "launching" and runs[r]["executor"] == "slurm" for r in run_ids)
+
+    array = sweep["slurm_arrays"][0]
+    script_path = array["table"].replace(".tsv", ".sbatch")
+    script = open(script_path).read()
+    assert "#SBATCH --array=0-3%2" in script
+    rows = open(array["table"]).read().splitlines()[1:]
+    assert [row.split("\t")[1] for row in rows] == run_ids
+    assert rows[2].split("\t")[4] == '{"lr":2}'
+
+    # Each array task finds its own row and runs that run's command.
+    subprocess.run(["bash", script_path], env={**os.environ, "SLURM_ARRAY_TASK_ID": "2"}, check=True)
+    run_dir = runs["s2"]["run_dir"]
+    assert open(os.path.join(run_dir, "run.log")).read().strip() == "task 2 s2"
+    assert open(os.path.join(run_dir, "job.done")).read().strip() == "0"
+
+
+def test_sweep_array_skips_members_that_override_the_executor(slurm, tmp_path):
+    from runs import sweep_routes
+    from runs.executors import ExecutorRegistry
+
+    executor, runs, _, bin_dir = slurm
+    sweep, run_ids = _sweep_runs(executor, runs, 3, tmp_path)
+    sweep.update(executor="slurm", run_ids=run_ids)
+    runs["s1"]["executor"] = "tmux"
+    registry = ExecutorRegistry(default_name="tmux")
+    registry.register(executor)
+    sweep_routes.init({"sweep1": sweep}, runs, lambda: None, lambda sweep_id: None, lambda: None,
+                      lambda status: status, None, None, None, {"launching", "running"}, run_executors=registry)
+
+    array = sweep_routes._submit_slurm_array("sweep1", 2)
+    assert array["run_ids"] == ["s0", "s2"]
+    assert runs["s1"]["status"] == "queued"  # left for the launch queue
+    runs["s0"]["status"] = runs["s2"]["status"] = "finished"
+    assert sweep_routes._submit_slurm_array("sweep1", 2) is None
+
+
+def test_array_tasks_polled_with_one_sacct_call(slurm, tmp_path):
+    executor, runs, _, bin_dir = slurm
+    sweep, run_ids = _sweep_runs(executor, runs, 4, tmp_path)
+    executor.submit_array("sweep1", sweep, run_ids, parallel=2)
+
+    def task(task_id, state, rc=0):
+        job = _sacct_job(1000 + task_id, state, rc=rc)
+        job["array"] = {"job_id": 1000, "task_id": {"set": True, "number": task_id}}
+        return job
+
+    pending = {"job_id": 1000, "state": {"current": ["PENDING"]},
+               "array": {"job_id": 1000, "task_id": {"set": False, "number": 0}, "task": "2-3%2"}}
+    (bin_dir / "sacct.json").write_text(json.dumps({"jobs": [
+        task(0, "COMPLETED"), task(1, "RUNNING"), pending,
+    ]}))
+
+    changed = executor.poll()
+    assert changed == {"s0": "finished", "s1": "running"}
+    assert runs["s2"]["status"] == "launching" and runs["s3"]["status"] == "launching"
+    assert _calls(bin_dir, "sacct")[0].startswith("sacct --json --jobs=1000 ")
+    assert len(_calls(bin_dir, "sacct")) == 1
+    assert _calls(bin_dir, "squeue") == []
+
+
+def test_unreachable_controller_does_not_fail_runs(slurm, tmp_path):
+    executor, runs, _, bin_dir = slurm
+    sweep, run_ids = _sweep_runs(executor, runs, 2, tmp_path)
+    executor.submit_array("sweep1", sweep, run_ids)
+    _fake_cli(bin_dir, "sacct", "exit 1")
+    for _ in range(5):
+        executor.poll()
+    assert all(runs[r]["status"] == "launching" for r in run_ids)
@@ -0,0 +1,158 @@
+"""Tests for runs/storage.py — run directory disk accounting and GC policies."""
+
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "server"))
+
+from runs.storage import StorageManager, measure, measure_run
+
+
+def _run(root, run_id, sweep_id=None, created_at=0.0, status="finished", **fields):
+    run_dir = root / run_id
+    (run_dir / "artifacts").mkdir(parents=True)
+    (run_dir / "wandb_data" / "wandb" / "run-1").mkdir(parents=True)
+    (run_dir / "run.log").write_bytes(b"l" * 10000)
+    (run_dir / "command.txt").write_text("python train.py")
+    (run_dir / "agent_metrics.jsonl").write_text('{"step": 1, "loss": 0.5}\n')
+    (run_dir / "artifacts" / "model.pt").write_bytes(b"m" * 20000)
+    (run_dir / "wandb_data" / "wandb" / "run-1" / "run-1.wandb").write_bytes(b"w" * 30000)
+    (run_dir / "wandb_data" / "wandb" / "run-1" / "wandb-history.jsonl").write_text("{}\n")
+    return {"run_dir": str(run_dir), "status": status, "sweep_id": sweep_id,
+            "created_at": created_at, "ended_at": 1000.0, **fields}
+
+
+def _manager(tmp_path, runs, sweeps=None, **kwargs):
+    return StorageManager(runs, sweeps or {}, runs_root=str(tmp_path / "runs"), min_age_seconds=100,
+                          sleep=lambda seconds: None, **kwargs)
+
+
+def test_usage_is_incremental_and_summed_per_sweep(tmp_path):
+    root = tmp_path / "runs"
+    runs = {"a": _run(root, "a", "s"), "b": _run(root, "b", "s", status="running")}
+    os.link(root / "a" / "artifacts" / "model.pt", root / "a" / "artifacts" / "copy.pt")
+    sweeps = {"s": {"run_ids": ["a", "b", "missing"]}}
+    manager = _manager(tmp_path, runs, sweeps)
+
+    assert manager.update_usage(now=2000.0) == 2
+    usage = runs["a"]["disk_usage"]
+    assert usage == {**measure_run(str(root / "a")), "measured_at": 2000.0}
+    assert usage["files"] == 6  # the hardlinked copy counts once
+    assert usage["breakdown"]["artifacts"] == measure(str(root / "a" / "artifacts"))["bytes"] > 0
+    assert usage["breakdown"]["wandb"] > usage["breakdown"]["logs"] > 0
+    assert sweeps["s"]["disk_usage"] == {"bytes": usage["bytes"] + runs["b"]["disk_usage"]["bytes"], "runs": 2}
+
+    # Nothing is re-walked until an active run is due or an ended run changes.
+    assert manager.update_usage(now=2010.0) == 0
+    assert manager.update_usage(now=2070.0) == 1
+    del runs["b"]
+    runs["a"]["ended_at"] = 9000.0  # rerun
+    assert manager.update_usage(now=9001.0) == 1
+    assert manager.update_usage(now=9300.0) == 0
+    assert manager.update_usage(now=9000.0 + 7200) == 1  # last measured inside its first hour
+    assert manager.update_usage(now=9000.0 + 9000) == 0
+
+
+def test_dry_run_then_apply_policies(tmp_path):
+    root = tmp_path / "runs"
+    runs = {
+        "old": _run(root, "old", "s", created_at=1.0),
+        "new": _run(root, "new", "s", created_at=2.0),
+        "live": _run(root, "live", "s", created_at=3.0, status="running"),
+        "failed": _run(root, "failed", status="failed", is_archived=True),
+        "fresh": _run(root, "fresh", status="failed", is_archived=True, ended_at=1950.0),
+    }
+    (tmp_path / "ckpt.bin").write_bytes(b"c" * 100)
+    os.symlink(tmp_path / "ckpt.bin", root / "failed" / "artifacts" / "linked.bin")
+    outside = _run(tmp_path / "elsewhere", "x", status="failed", is_archived=True)
+    runs["outside"] = outside
+    manager = _manager(tmp_path, runs, keep_last_per_sweep=1, prune_wandb=True, prune_archived_failed=True)
+
+    report = manager.collect(dry_run=True, now=2000.0)
+    planned = {(a["run_id"], a["policy"]) for a in report["actions"]}
+    assert planned == {
+        ("old", "keep_last_per_sweep"),
+        ("new", "prune_wandb"),
+        ("failed", "prune_wandb"),
+        ("failed", "prune_archived_failed"),
+    }
+    assert report["planned_bytes"] > 0 and (root / "old" / "run.log").exists()
+
+    report = manager.collect(dry_run=False, now=2000.0)
+    assert report["freed_bytes"] > 0 and report["deleted_files"] > 0
+    assert sorted(os.listdir(root / "old")) == ["agent_metrics.jsonl", "command.txt"]
+    assert runs["old"]["storage_gc"]["policies"] == ["keep_last_per_sweep"]
+    assert not (root / "new" / "wandb_data" / "wandb" / "run-1" / "run-1.wandb").exists()
+    assert (root / "new" / "wandb_data" / "wandb" / "run-1" / "wandb-history.jsonl").exists()
+    assert (root / "new" / "artifacts" / "model.pt").exists()
+    assert os.listdir(root / "failed" / "artifacts") == []
+    assert (tmp_path / "ckpt.bin").read_bytes() == b"c" * 100  # links are not followed
+    assert (root / "fresh" / "artifacts" / "model.pt").exists()  # ended too recently
+    assert os.path.exists(os.path.join(outside["run_dir"], "artifacts", "model.pt"))
+    assert runs["old"]["disk_usage"]["bytes"] == measure_run(str(root / "old"))["bytes"]
+    assert manager.collect(dry_run=True, now=2000.0)["actions"] == []
+
+
+def test_prune_wandb_needs_the_whole_history_ingested(tmp_path):
+    root = tmp_path / "runs"
+    runs = {run_id: _run(root, run_id) for run_id in ("partial", "complete", "summary", "unknown")}
+    history = "".join(f'{{"_step": {i}}}\n' for i in range(3))
+    (root / "partial" / "wandb_data" / "wandb" / "run-1" / "wandb-history.jsonl").write_text(history)
+    (root / "complete" / "wandb_data" / "wandb" / "run-1" / "wandb-history.jsonl").write_text(history)
+    (root / "complete" / "agent_metrics.jsonl").write_text(history)
+    files = root / "summary" / "wandb_data" / "wandb" / "run-1" / "files"
+    files.mkdir()
+    (files / "wandb-summary.json").write_text('{"_step": 40, "loss": 0.1}')
+    (root / "summary" / "agent_metrics.jsonl").write_text('{"_step": 39}\n')
+    os.remove(root / "unknown" / "wandb_data" / "wandb" / "run-1" / "wandb-history.jsonl")
+    manager = _manager(tmp_path, runs, prune_wandb=True)
+
+    assert [a["run_id"] for a in manager.plan(now=2000.0)] == ["complete"]
+    (root / "summary" / "agent_metrics.jsonl").write_text('{"_step": 39}\n{"_step": 40}\n')
+    assert [a["run_id"] for a in manager.plan(now=2000.0)] == ["complete", "summary"]
+
+
+def test_deletes_are_throttled(tmp_path):
+    root = tmp_path / "runs"
+    run = _run(root, "r", status="failed", is_archived=True)
+    for i in range(9):
+        (root / "r" / "artifacts" / f"f{i}.txt").write_text("x")
+    clock = [0.0]
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        clock[0] += seconds
+
+    manager = StorageManager({"r": run}, {}, runs_root=str(root), prune_archived_failed=True, min_age_seconds=0,
+                             files_per_second=5, clock=lambda: clock[0], sleep=sleep)
+    assert manager.collect(dry_run=False, now=2000.0)["deleted_files"] == 10
+    assert 0.9 <= sum(sleeps) <= 1.1  # 10 files at 5/s with a burst of 5
+
+
+class _ThreadRecordingRun(dict):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.writers = set()
+
+    def __setitem__(self, key, value):
+        self.writers.add(threading.get_ident())
+        super().__setitem__(key, value)
+
+
+@pytest.mark.asyncio
+async def test_background_pass_updates_records_on_the_loop(tmp_path):
+    root = tmp_path / "runs"
+    run = _ThreadRecordingRun(_run(root, "r", status="failed", is_archived=True))
+    saves = []
+    manager = _manager(tmp_path, {"r": run}, prune_archived_failed=True, gc_enabled=True,
+                       save_fn=lambda: saves.append(threading.get_ident()))
+
+    await manager.run_pass()
+    assert os.listdir(root / "r" / "artifacts") == []
+    assert run["storage_gc"]["policies"] == ["prune_archived_failed"]
+    assert run["disk_usage"]["bytes"] == measure_run(str(root / "r"))["bytes"]
+    assert run.writers == {threading.get_ident()} and set(saves) == {threading.get_ident()}
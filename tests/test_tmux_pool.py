@@ -0,0 +1,78 @@
+"""Tests for runs/tmux_pool.py — cached tmux session and batched window commands."""
+
+import os
+import shutil
+import sys
+import uuid
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "server"))
+
+import libtmux
+
+from runs.tmux_pool import TmuxError, TmuxPool
+
+pytestmark = pytest.mark.skipif(shutil.which("tmux") is None, reason="tmux not installed")
+
+
+@pytest.fixture
+def pool():
+    socket_name = f"ra-test-{uuid.uuid4().hex[:8]}"
+    pool = TmuxPool("agent", revalidate_seconds=3600, server_factory=lambda: libtmux.Server(socket_name=socket_name))
+    yield pool
+    libtmux.Server(socket_name=socket_name).kill()
+
+
+def _typed(pool, window_name):
+    window = pool.session().windows.get(window_name=window_name)
+    return "\n".join(window.active_pane.capture_pane())
+
+
+def test_batched_launches_and_kills_use_few_tmux_calls(pool):
+    pool.session()
+    calls = pool.stats["tmux_calls"]
+    with pool.batch():
+        for i in range(60):
+            pool.launch(f"ra-{i:03d}", f"echo launch {i}")
+        with pool.batch():  # nested batches join the outer one
+            pool.launch("ra-extra", "echo extra")
+    assert pool.stats["tmux_calls"] - calls == 2  # 61 runs in chunks of 50
+    assert pool.window_names() >= {f"ra-{i:03d}" for i in range(60)} | {"ra-extra"}
+    assert "echo launch 7" in _typed(pool, "ra-007")
+
+    calls = pool.stats["tmux_calls"]
+    with pool.batch():
+        for i in range(10):
+            pool.kill(f"ra-{i:03d}")
+    assert pool.stats["tmux_calls"] - calls == 1
+    names = pool.window_names()
+    assert "ra-000" not in names and "ra-010" in names
+
+    pool.kill("ra-missing")  # missing windows are ignored
+    with pool.batch():
+        pool.kill("ra-gone")
+        pool.kill("ra-011")  # after a failure the rest are still killed
+    assert "ra-011" not in pool.window_names()
+
+
+def test_recovers_when_the_session_disappears(pool):
+    pool.launch("ra-first", "echo first")
+    pool.server().kill_session(pool.session_name)  # cached session is now stale
+    errors = []
+    with pool.batch():
+        pool.launch("ra-a", "echo a", on_error=errors.append)
+        pool.launch("ra-b", "echo b", on_error=errors.append)
+    assert errors == []
+    assert {"ra-a", "ra-b"} <= pool.window_names()
+    assert "echo b" in _typed(pool, "ra-b")
+
+
+def test_launch_failures(pool):
+    broken = TmuxPool("agent", server_factory=lambda: (_ for _ in ()).throw(OSError("no tmux")))
+    with pytest.raises(TmuxError):
+        broken.launch("ra-x", "echo x")
+    errors = []
+    with broken.batch():
+        broken.launch("ra-x", "echo x", on_error=errors.append)
+    assert errors == ["Tmux session not available. Start tmux first."]